@@ -10,6 +10,9 @@ from .table_metadata_routes import router as table_metadata_router
 from .column_metadata_routes import router as column_metadata_router
 from .lineage_routes import router as lineage_router
 from .config_routes import router as config_router
+from .import_job_routes import router as import_job_router
+from .chunked_upload_routes import router as chunked_upload_router
+from .export_routes import router as export_router
 
 # 注册各个路由
 router.include_router(upload_router)
@@ -18,6 +21,9 @@ router.include_router(table_metadata_router)
 router.include_router(column_metadata_router)
 router.include_router(lineage_router)
 router.include_router(config_router)
+router.include_router(import_job_router)
+router.include_router(chunked_upload_router)
+router.include_router(export_router)
 
 @router.get("/health")
 def health_check():
@@ -0,0 +1,215 @@
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Header, Body
+from fastapi.concurrency import run_in_threadpool
+from typing import Dict, Any, Optional
+from sqlalchemy.orm import Session
+import json
+import uuid
+import logging
+
+from services.chunked_upload_service import ChunkedUploadService
+from services.upload_import_service import UploadImportService, STREAMING_IMPORT_TYPES
+from services.import_job_service import ImportJobService
+from services.upload_validation_service import UploadValidationService
+from config.settings import settings
+from models import get_db
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/upload/chunked", tags=["file-upload"])
+
+# 实例化服务类
+chunked_upload_service = ChunkedUploadService()
+upload_import_service = UploadImportService()
+import_job_service = ImportJobService()
+upload_validation_service = UploadValidationService()
+
+@router.post("", response_model=Dict[str, Any])
+async def initiate_chunked_upload(request_data: Dict[str, Any] = Body(...)):
+    """
+    创建分块上传会话
+
+    请求体:
+    {
+        "file_name": "lineage.xlsx",
+        "total_size": 524288000,
+        "chunk_size": 8388608,      // 可选，默认8MB
+        "file_sha256": "..."         // 可选，合并时校验整个文件
+    }
+
+    返回upload_id和分块数，客户端随后按序号上传各分块
+    """
+    file_name = request_data.get("file_name")
+    total_size = request_data.get("total_size")
+    if not file_name or not isinstance(total_size, int):
+        raise HTTPException(status_code=400, detail="缺少必需字段: file_name, total_size")
+
+    try:
+        return chunked_upload_service.initiate(
+            file_name=file_name,
+            total_size=total_size,
+            chunk_size=request_data.get("chunk_size"),
+            file_sha256=request_data.get("file_sha256")
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.put("/{upload_id}/chunks/{index}", response_model=Dict[str, Any])
+async def upload_chunk(
+    upload_id: str,
+    index: int,
+    request: Request,
+    x_chunk_sha256: Optional[str] = Header(None, description="分块内容的SHA-256，用于校验传输完整性")
+):
+    """
+    上传一个分块，请求体为分块的原始字节
+
+    同一分块可重复上传，中断后通过GET查询缺失的分块继续上传即可
+    """
+    data = await request.body()
+    if len(data) > settings.upload_max_chunk_size:
+        raise HTTPException(status_code=413, detail=f"分块大小超过限制: {settings.upload_max_chunk_size}字节")
+
+    try:
+        status = chunked_upload_service.put_chunk(upload_id, index, data, checksum=x_chunk_sha256)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if status is None:
+        raise HTTPException(status_code=404, detail="上传会话不存在")
+    return status
+
+@router.get("/{upload_id}", response_model=Dict[str, Any])
+async def get_chunked_upload(upload_id: str):
+    """
+    获取上传会话状态，包括已接收和缺失的分块
+    """
+    status = chunked_upload_service.get_status(upload_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="上传会话不存在")
+    return status
+
+@router.post("/{upload_id}/complete", response_model=Dict[str, Any])
+async def complete_chunked_upload(
+    upload_id: str,
+    import_type: str = Query(..., description="导入类型，如excel、table_lineage_excel、column_lineage_json"),
+    background: bool = Query(False, description="是否作为后台任务执行，立即返回任务ID"),
+    dry_run: bool = Query(False, description="只校验文件内容并返回逐行问题报告，不写入数据库"),
+    db: Session = Depends(get_db)
+):
+    """
+    合并分块并按导入类型导入文件
+
+    合并时逐块校验SHA-256；导入成功后删除暂存文件，导入失败或dry_run校验时保留合并后的文件，可直接重试
+    """
+    importer = upload_import_service.get_importer(import_type)
+    if importer is None:
+        raise HTTPException(status_code=400, detail=f"不支持的导入类型: {import_type}")
+    import_func, extensions = importer
+
+    status = chunked_upload_service.get_status(upload_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="上传会话不存在")
+    if not status["file_name"].lower().endswith(extensions):
+        raise HTTPException(status_code=400, detail=f"导入类型{import_type}只支持以下文件格式: {', '.join(extensions)}")
+
+    try:
+        # 校验和合并数百MB的文件耗时较长，与校验、导入一样放到线程池中执行，避免阻塞事件循环
+        assembled_path = await run_in_threadpool(chunked_upload_service.complete, upload_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if assembled_path is None:
+        raise HTTPException(status_code=404, detail="上传会话不存在")
+
+    if dry_run:
+        try:
+            return await run_in_threadpool(_validate_assembled, db, import_type, assembled_path)
+        except json.JSONDecodeError:
+            raise HTTPException(status_code=400, detail="JSON文件格式错误，无法解析")
+
+    if background:
+        # 后台任务从合并后的文件读取，不在请求中读入内容
+        def import_and_discard(job_db: Session, job_path: str, progress=None) -> Dict[str, Any]:
+            result = _import_assembled(job_db, import_type, import_func, job_path, progress=progress)
+            chunked_upload_service.discard(upload_id)
+            return result
+
+        return import_job_service.submit(db, import_type, status["file_name"], import_and_discard, assembled_path)
+
+    try:
+        result = await run_in_threadpool(_import_assembled, db, import_type, import_func, assembled_path)
+    except json.JSONDecodeError as e:
+        logger.error(f"分块上传文件 {status['file_name']} JSON格式错误: {str(e)}")
+        raise HTTPException(status_code=400, detail="JSON文件格式错误，无法解析")
+    except Exception as e:
+        logger.error(f"导入分块上传文件 {status['file_name']} 时出错: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"导入文件时出错: {str(e)}")
+
+    chunked_upload_service.discard(upload_id)
+    return result
+
+def _import_assembled(db: Session, import_type: str, import_func, path: str, progress=None) -> Dict[str, Any]:
+    """从合并后的文件导入，JSON/NDJSON血缘文件直接流式解析，不读入内存"""
+    with open(path, "rb") as f:
+        return import_func(db, f if import_type in STREAMING_IMPORT_TYPES else f.read(), progress=progress)
+
+def _validate_assembled(db: Session, import_type: str, path: str) -> Dict[str, Any]:
+    """校验合并后的文件，JSON/NDJSON血缘文件以文件对象传入，不先读成字节串"""
+    with open(path, "rb") as f:
+        return upload_validation_service.validate(db, import_type, f if import_type in STREAMING_IMPORT_TYPES else f.read())
+
+@router.post("/{upload_id}/stream-import", response_model=Dict[str, Any])
+async def stream_import_chunked_upload(
+    upload_id: str,
+    import_type: str = Query(..., description="导入类型，只支持JSON/NDJSON血缘文件，如column_lineage_ndjson"),
+    db: Session = Depends(get_db)
+):
+    """
+    边上传边导入JSON/NDJSON血缘文件
+
+    创建后台导入任务，按序解析从第一个分块开始连续已到达的分块，后续分块到达后继续解析，不等待全部上传和合并；
+    读完整个文件且校验和一致后提交导入结果并删除暂存分块，不再调用complete。
+    导入失败时保留已上传的分块，可重新发起或改用complete导入。返回任务信息，可通过/api/jobs/{job_id}查询进度
+    """
+    if import_type not in STREAMING_IMPORT_TYPES:
+        raise HTTPException(status_code=400, detail=f"导入类型{import_type}不支持边上传边导入")
+    import_func, extensions = upload_import_service.get_importer(import_type)
+
+    status = chunked_upload_service.get_status(upload_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="上传会话不存在")
+    if not status["file_name"].lower().endswith(extensions):
+        raise HTTPException(status_code=400, detail=f"导入类型{import_type}只支持以下文件格式: {', '.join(extensions)}")
+
+    def import_while_uploading(job_db: Session, job_upload_id: str, progress=None) -> Dict[str, Any]:
+        try:
+            result = import_func(job_db, chunked_upload_service.iter_prefix(job_upload_id, follow=True), progress=progress)
+        except BaseException:
+            chunked_upload_service.detach_import(job_upload_id)
+            raise
+        if isinstance(result, dict) and result.get("status") == "error":
+            chunked_upload_service.detach_import(job_upload_id)
+        else:
+            chunked_upload_service.discard(job_upload_id)
+        return result
+
+    # 先关联任务再提交，任务结束时解除关联或删除会话
+    job_id = str(uuid.uuid4())
+    try:
+        chunked_upload_service.attach_import(upload_id, job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        return import_job_service.submit(db, import_type, status["file_name"], import_while_uploading, upload_id,
+                                         job_id=job_id)
+    except Exception:
+        chunked_upload_service.detach_import(upload_id)
+        raise
+
+@router.delete("/{upload_id}", response_model=Dict[str, Any])
+async def abort_chunked_upload(upload_id: str):
+    """
+    取消上传会话并删除暂存的分块
+    """
+    if not chunked_upload_service.discard(upload_id):
+        raise HTTPException(status_code=404, detail="上传会话不存在")
+    return {"status": "success", "message": "上传会话已删除"}
@@ -1,12 +1,16 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
-from typing import List, Optional
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session
 
 from models.schemas import (
     DataSourceBase, DataSourceCreate, DataSourceUpdate, DataSourceResponse
 )
 from services.data_source_service import DataSourceService
-from models import get_db
+from services.refresh_scheduler_service import RefreshSchedulerService
+from services.extraction_snapshot_service import ExtractionSnapshotService
+from services.schema_diff_service import SchemaDiffService
+from models import get_db, RefreshRunStatus
 
 router = APIRouter(prefix="/data-sources", tags=["data-sources"])
 
@@ -119,4 +123,115 @@ async def delete_data_source(
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"删除数据源异常: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"删除数据源失败：{str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"删除数据源失败：{str(e)}")
+
+@router.post("/{data_source_id}/extract", response_model=dict)
+async def extract_data_source_metadata(
+    data_source_id: int,
+    full_resync: bool = Query(False, description="是否忽略上次提取的水位线，全量提取并删除数据源中已不存在的表"),
+    db: Session = Depends(get_db)
+):
+    """
+    连接数据源提取表和字段元数据并导入
+    
+    Oracle数据源在上次成功提取后只提取新建或修改过结构的表，并删除已不存在的表，其他表保持不变；
+    full_resync=true时全量提取。返回新增、更新、删除、未变化的表数和字段数。
+    MongoDB和Elasticsearch使用异步驱动并发提取，Oracle在工作线程中提取，提取期间不阻塞其他请求。
+    """
+    # 提取依赖各数据源的驱动，在调用时才导入
+    from services.metadata_import_service import MetadataImportService
+    
+    if not data_source_service.get_by_id(db, data_source_id):
+        raise HTTPException(status_code=404, detail="数据源不存在")
+    try:
+        return await MetadataImportService.import_metadata_from_source_async(db, data_source_id, full_resync)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"提取元数据失败：{str(e)}")
+
+@router.get("/{data_source_id}/refresh-runs", response_model=Dict[str, Any])
+async def list_data_source_refresh_runs(
+    data_source_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    status: Optional[RefreshRunStatus] = Query(None, description="按运行状态过滤"),
+    db: Session = Depends(get_db)
+):
+    """
+    获取数据源的定时刷新记录（按开始时间倒序）和下一次计划刷新的时间
+    
+    每条记录包含状态、耗时、扫描和变化的表数、错误信息及导入结果统计；
+    触发时上一次刷新仍在进行的记录状态为skipped
+    """
+    if not data_source_service.get_by_id(db, data_source_id):
+        raise HTTPException(status_code=404, detail="数据源不存在")
+    return {
+        "data_source_id": data_source_id,
+        "next_run_at": RefreshSchedulerService.next_run(data_source_id),
+        "runs": RefreshSchedulerService.list_runs(db, data_source_id, skip=skip, limit=limit, status=status)
+    }
+
+@router.get("/{data_source_id}/snapshots", response_model=List[Dict[str, Any]])
+async def list_data_source_snapshots(
+    data_source_id: int,
+    db: Session = Depends(get_db)
+):
+    """
+    获取数据源的提取快照列表，按创建时间倒序
+    """
+    if not data_source_service.get_by_id(db, data_source_id):
+        raise HTTPException(status_code=404, detail="数据源不存在")
+    return ExtractionSnapshotService.list_snapshots(data_source_id)
+
+@router.post("/{data_source_id}/snapshots/{snapshot_id}/import", response_model=dict)
+async def import_data_source_snapshot(
+    data_source_id: int,
+    snapshot_id: str,
+    db: Session = Depends(get_db)
+):
+    """
+    从保存的提取快照重新导入元数据，不连接数据源
+    
+    snapshot_id为latest时使用最新的快照。导入规则和返回值同提取元数据接口，另有snapshot_id表示使用的快照
+    """
+    # 导入服务依赖各数据源的驱动，在调用时才导入
+    from services.metadata_import_service import MetadataImportService
+    
+    if not data_source_service.get_by_id(db, data_source_id):
+        raise HTTPException(status_code=404, detail="数据源不存在")
+    try:
+        return await run_in_threadpool(
+            MetadataImportService.import_metadata_from_snapshot,
+            db, data_source_id, None if snapshot_id == "latest" else snapshot_id
+        )
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"从快照导入元数据失败：{str(e)}")
+
+@router.get("/{data_source_id}/schema-diff", response_model=Dict[str, Any])
+async def get_data_source_schema_diff(
+    data_source_id: int,
+    against: str = Query("previous", pattern="^(previous|catalog)$", description="比较对象: previous(上一次提取的快照), catalog(当前元数据目录)"),
+    snapshot_id: Optional[str] = Query(None, description="作为最新一侧的快照ID，默认为最新的快照"),
+    db: Session = Depends(get_db)
+):
+    """
+    比较最近一次提取与上一次提取（或当前元数据目录）的表结构变化
+    
+    返回新增、删除和变化的表，变化的表中新增、删除和类型/长度/可空性变化的列；
+    删除的表和删除、变化的列标注下游影响的列数和表数
+    """
+    if not data_source_service.get_by_id(db, data_source_id):
+        raise HTTPException(status_code=404, detail="数据源不存在")
+    try:
+        return await run_in_threadpool(SchemaDiffService.diff, db, data_source_id, against, snapshot_id)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"比较表结构变化失败：{str(e)}")
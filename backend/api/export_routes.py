@@ -0,0 +1,65 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from starlette.background import BackgroundTask
+from sqlalchemy.orm import Session
+import os
+import logging
+
+from services.catalog_export_service import CatalogExportService, EXPORT_DATASETS, EXPORT_FORMATS
+from models import get_db
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+# 实例化服务类
+catalog_export_service = CatalogExportService()
+
+# 导出文件的媒体类型
+_MEDIA_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson"
+}
+
+@router.get("/{dataset}")
+async def export_dataset(
+    dataset: str,
+    file_format: str = Query("parquet", alias="format", description="导出格式: parquet、arrow、xlsx、csv或ndjson"),
+    db: Session = Depends(get_db)
+):
+    """
+    导出元数据目录
+
+    dataset可选data_sources、tables、columns、table_structure、table_lineage、column_lineage；
+    format为xlsx时还可以是catalog，将全部数据源、表、字段和血缘关系导出到一个工作簿。
+    数据按批次从数据库流式读取并写入临时文件，导出在线程池中执行，不会阻塞其他请求。
+    table_structure、table_lineage、column_lineage导出为Parquet/Arrow时，
+    与对应的/api/upload/{table-structure|table-lineage|column-lineage}/{format}导入格式一致
+    """
+    if dataset != "catalog" and dataset not in EXPORT_DATASETS:
+        raise HTTPException(status_code=404, detail=f"不支持导出的数据集: {dataset}")
+    if file_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"不支持的导出格式: {file_format}")
+    if dataset == "catalog" and file_format != "xlsx":
+        raise HTTPException(status_code=400, detail="全目录导出只支持xlsx格式")
+
+    try:
+        path = await run_in_threadpool(catalog_export_service.export_file, db, dataset, file_format)
+    except ImportError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    except Exception as e:
+        logger.error(f"导出{dataset}时出错: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"导出{dataset}时出错: {str(e)}")
+
+    return FileResponse(
+        path,
+        media_type=_MEDIA_TYPES[file_format],
+        filename=f"{dataset}{EXPORT_FORMATS[file_format]}",
+        # 响应发送完成后删除临时文件
+        background=BackgroundTask(os.remove, path)
+    )
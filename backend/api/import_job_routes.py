@@ -0,0 +1,88 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, Dict, Any
+from sqlalchemy.orm import Session
+import asyncio
+import json
+import logging
+
+from models import get_db, ImportJobStatus
+import models
+from services.import_job_service import ImportJobService, TERMINAL_JOB_STATUSES
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/jobs", tags=["import-jobs"])
+
+# 实例化服务类
+import_job_service = ImportJobService()
+
+@router.get("", response_model=List[Dict[str, Any]])
+async def list_import_jobs(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    status: Optional[ImportJobStatus] = Query(None, description="按任务状态过滤"),
+    db: Session = Depends(get_db)
+):
+    """
+    获取后台导入任务列表，按创建时间倒序
+    """
+    return import_job_service.list_jobs(db, skip=skip, limit=limit, status=status)
+
+@router.get("/{job_id}", response_model=Dict[str, Any])
+async def get_import_job(job_id: str, db: Session = Depends(get_db)):
+    """
+    获取后台导入任务详情，包括进度、处理速度和逐行错误
+    """
+    job = import_job_service.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="导入任务不存在")
+    return job
+
+@router.get("/{job_id}/events")
+async def stream_import_job_events(
+    job_id: str,
+    interval: float = Query(1.0, ge=0.1, le=60, description="推送间隔（秒）"),
+    db: Session = Depends(get_db)
+):
+    """
+    以Server-Sent Events方式推送任务进度，任务结束后关闭连接
+    """
+    if not import_job_service.get_job(db, job_id):
+        raise HTTPException(status_code=404, detail="导入任务不存在")
+
+    terminal_statuses = {status.value for status in TERMINAL_JOB_STATUSES}
+
+    async def event_stream():
+        # 使用独立会话，请求依赖注入的会话在响应开始后即被关闭
+        stream_db = models.session_local()
+        try:
+            while True:
+                job = import_job_service.get_job(stream_db, job_id)
+                # 结束本次读事务，避免等待期间持有SQLite共享锁阻塞导入任务提交
+                stream_db.rollback()
+                if job is None:
+                    break
+                yield f"event: progress\ndata: {json.dumps(job, ensure_ascii=False)}\n\n"
+                if job["status"] in terminal_statuses:
+                    break
+                await asyncio.sleep(interval)
+        finally:
+            stream_db.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+@router.post("/{job_id}/cancel", response_model=Dict[str, Any])
+async def cancel_import_job(job_id: str, db: Session = Depends(get_db)):
+    """
+    取消后台导入任务，运行中的任务会回滚尚未提交的写操作
+    """
+    job = import_job_service.cancel_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="导入任务不存在")
+    return job
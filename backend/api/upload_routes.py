@@ -1,33 +1,62 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from typing import List, Dict, Any
-import pandas as pd
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query
+from fastapi.concurrency import run_in_threadpool
+from typing import Dict, Any
+from enum import Enum
 import json
-import io
+import os
+import shutil
+import tempfile
 
-from models.schemas import (
-    DataSourceBase, DataSourceCreate, DataSourceUpdate, DataSourceResponse,
-    TableMetadataBase, TableMetadataCreate, TableMetadataUpdate, TableMetadataResponse,
-    ColumnMetadataBase, ColumnMetadataCreate, ColumnMetadataUpdate, ColumnMetadataResponse,
-    LineageRelationCreate, LineageRelationUpdate,
-    ColumnLineageRelationCreate, ColumnLineageRelationUpdate
-)
-from services.data_source_service import DataSourceService
-from services.table_metadata_service import TableMetadataService
-from services.column_metadata_service import ColumnMetadataService
-from services.lineage_service import LineageService
+from services.upload_import_service import UploadImportService
+from services.import_job_service import ImportJobService
+from services.upload_validation_service import UploadValidationService
+from config.settings import settings
 from models import get_db
 from sqlalchemy.orm import Session
 
 router = APIRouter(prefix="/upload", tags=["file-upload"])
 
 # 实例化服务类
-data_source_service = DataSourceService()
-table_metadata_service = TableMetadataService()
-column_metadata_service = ColumnMetadataService()
-lineage_service = LineageService()
+upload_import_service = UploadImportService()
+import_job_service = ImportJobService()
+upload_validation_service = UploadValidationService()
+
+async def _spool_upload(file: UploadFile) -> str:
+    """
+    将上传文件按块复制到独立的临时文件，返回路径，由调用方在使用后删除
+
+    请求结束后上传的临时文件即被关闭，后台任务从复制的文件流式读取，不将整个文件读入内存
+    """
+    fd, path = tempfile.mkstemp(prefix="upload_", suffix=os.path.splitext(file.filename)[1])
+    try:
+        with os.fdopen(fd, "wb") as out:
+            await file.seek(0)
+            await run_in_threadpool(shutil.copyfileobj, file.file, out, settings.json_stream_block_size)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+def _submit_streaming_import(db: Session, import_type: str, file_name: str, import_func, path: str) -> Dict[str, Any]:
+    """提交从暂存文件流式导入的后台任务，任务结束后删除暂存文件"""
+    def import_spooled(job_db: Session, job_path: str, progress=None) -> Dict[str, Any]:
+        with open(job_path, "rb") as f:
+            return import_func(job_db, f, progress=progress)
+
+    try:
+        return import_job_service.submit(db, import_type, file_name, import_spooled, path,
+                                         cleanup=lambda: os.remove(path))
+    except Exception:
+        os.remove(path)
+        raise
 
 @router.post("/excel", response_model=Dict[str, Any])
-async def upload_excel_file(file: UploadFile = File(...), db: Session = Depends(get_db)):
+async def upload_excel_file(
+    file: UploadFile = File(...),
+    background: bool = Query(False, description="是否作为后台任务执行，立即返回任务ID"),
+    dry_run: bool = Query(False, description="只校验文件内容并返回逐行问题报告，不写入数据库"),
+    db: Session = Depends(get_db)
+):
     """
     上传Excel文件，解析表结构和血缘关系数据
     
@@ -36,232 +65,33 @@ async def upload_excel_file(file: UploadFile = File(...), db: Session = Depends(
     - 第二个Sheet: 表元数据信息 (tables)
     - 第三个Sheet: 列元数据信息 (columns)
     - 第四个Sheet: 血缘关系信息 (lineages)
+    
+    background=true时作为后台导入任务执行，立即返回任务ID，可通过/api/jobs/{job_id}查询进度；
+    dry_run=true时只校验文件，返回缺失字段、未知的数据源/表/字段及重复行等问题，不写入任何数据
     """
     if not file.filename.endswith(('.xlsx', '.xls')):
         raise HTTPException(status_code=400, detail="只支持Excel文件格式(.xlsx, .xls)")
     
+    # 读取上传的Excel文件
+    contents = await file.read()
+    if background and not dry_run:
+        return import_job_service.submit(db, "excel", file.filename, upload_import_service.import_excel, contents)
+    
     try:
-        # 读取上传的Excel文件
-        contents = await file.read()
-        excel_data = pd.ExcelFile(io.BytesIO(contents))
-        
-        # 处理结果统计
-        result = {
-            "data_sources": {"created": 0, "updated": 0},
-            "tables": {"created": 0, "updated": 0},
-            "columns": {"created": 0, "updated": 0},
-            "lineages": {"created": 0, "updated": 0}
-        }
-        
-        # 处理数据源信息
-        if "data_sources" in excel_data.sheet_names:
-            data_sources_df = pd.read_excel(excel_data, "data_sources")
-            for _, row in data_sources_df.iterrows():
-                # 构建正确的数据源数据结构，将非模型字段放入connection_config
-                source_type = row.get("source_type")
-                # 确保数据源类型为小写，兼容枚举值
-                if source_type:
-                    source_type = source_type.lower()
-                
-                source_data = {
-                    "name": row.get("name"),
-                    "description": row.get("description", ""),
-                    "type": source_type,  # 映射source_type到type，确保小写
-                    "connection_config": {
-                        "connection_string": row.get("connection_string", ""),
-                        "schema_name": row.get("schema_name", ""),
-                        "is_active": row.get("is_active", True)
-                    }
-                }
-                
-                # 检查数据源是否已存在
-                existing_source = data_source_service.get_by_name(db, source_data["name"])
-                if existing_source:
-                    # 更新现有数据源 - 确保使用正确的Pydantic模型
-                    try:
-                        from models.schemas import DataSourceUpdate
-                        data_source_update = DataSourceUpdate(**source_data)
-                        data_source_service.update(db, existing_source.id, data_source_update)
-                        result["data_sources"]["updated"] += 1
-                    except Exception as e:
-                        raise HTTPException(status_code=400, detail=f"更新数据源时出错: {str(e)}")
-                else:
-                    # 创建新数据源
-                    try:
-                        # 确保传入的是正确的Pydantic模型对象
-                        data_source_create = DataSourceCreate(**source_data)
-                        data_source_service.create(db, data_source_create)
-                        result["data_sources"]["created"] += 1
-                    except Exception as e:
-                        raise HTTPException(status_code=400, detail=f"创建数据源时出错: {str(e)}")
-        
-        # 处理表元数据信息
-        if "tables" in excel_data.sheet_names:
-            tables_df = pd.read_excel(excel_data, "tables")
-            for _, row in tables_df.iterrows():
-                # 获取数据源
-                source = data_source_service.get_by_name(db, row.get("data_source_name"))
-                if not source:
-                    continue
-                
-                # 构建正确的表元数据结构，将非模型字段放入properties
-                table_data = {
-                    "data_source_id": source.id,
-                    "name": row.get("name"),
-                    "description": row.get("description", ""),
-                    "properties": {
-                        "table_type": row.get("table_type", "TABLE"),
-                        "row_count": row.get("row_count", 0)
-                    }
-                }
-                
-                # 检查表是否已存在
-                existing_table = table_metadata_service.get_by_name_and_source(
-                    db, table_data["name"], source.id
-                )
-                if existing_table:
-                    # 更新现有表 - 使用正确的Pydantic模型
-                    from models.schemas import TableMetadataUpdate
-                    table_update = TableMetadataUpdate(**table_data)
-                    table_metadata_service.update(db, existing_table.id, table_update)
-                    result["tables"]["updated"] += 1
-                else:
-                    # 创建新表
-                    table_metadata_service.create(db, TableMetadataCreate(**table_data))
-                    result["tables"]["created"] += 1
-        
-        # 处理列元数据信息
-        if "columns" in excel_data.sheet_names:
-            columns_df = pd.read_excel(excel_data, "columns")
-            for _, row in columns_df.iterrows():
-                # 获取数据源和表
-                source = data_source_service.get_by_name(db, row.get("data_source_name"))
-                if not source:
-                    continue
-                
-                table = table_metadata_service.get_by_name_and_source(
-                    db, row.get("table_name"), source.id
-                )
-                if not table:
-                    continue
-                
-                # 构建正确的列元数据结构，将非模型字段放入properties
-                column_data = {
-                    "table_id": table.id,
-                    "name": row.get("name"),
-                    "data_type": row.get("data_type"),
-                    "description": row.get("description", ""),
-                    "is_primary_key": row.get("is_primary_key", False),
-                    "properties": {
-                        "is_nullable": row.get("is_nullable", True),
-                        "column_order": row.get("column_order", 0),
-                        "length": row.get("length")
-                    }
-                }
-                
-                # 检查列是否已存在
-                existing_column = column_metadata_service.get_by_name_and_table(
-                    db, column_data["name"], table.id
-                )
-                if existing_column:
-                    # 更新现有列 - 使用正确的Pydantic模型
-                    from models.schemas import ColumnMetadataUpdate
-                    column_update = ColumnMetadataUpdate(**column_data)
-                    column_metadata_service.update(db, existing_column.id, column_update)
-                    result["columns"]["updated"] += 1
-                else:
-                    # 创建新列
-                    column_metadata_service.create(db, ColumnMetadataCreate(**column_data))
-                    result["columns"]["created"] += 1
-        
-        # 处理血缘关系信息
-        if "lineages" in excel_data.sheet_names:
-            lineages_df = pd.read_excel(excel_data, "lineages")
-            for _, row in lineages_df.iterrows():
-                # 获取源表和目标表
-                source_db = data_source_service.get_by_name(db, row.get("source_db_name"))
-                target_db = data_source_service.get_by_name(db, row.get("target_db_name"))
-                if not source_db or not target_db:
-                    continue
-                
-                source_table = table_metadata_service.get_by_name_and_source(
-                    db, row.get("source_table_name"), source_db.id
-                )
-                target_table = table_metadata_service.get_by_name_and_source(
-                    db, row.get("target_table_name"), target_db.id
-                )
-                if not source_table or not target_table:
-                    continue
-                
-                # 构建血缘关系数据
-                lineage_data = {
-                    "source_table_id": source_table.id,
-                    "target_table_id": target_table.id,
-                    "description": row.get("description", ""),
-                    "lineage_type": row.get("lineage_type", "TRANSFORMATION"),
-                    "transformation_logic": row.get("transformation_logic", "")
-                }
-                
-                # 如果有列级血缘关系，获取源列和目标列
-                if pd.notna(row.get("source_column_name")) and pd.notna(row.get("target_column_name")):
-                    source_column = column_metadata_service.get_by_name_and_table(
-                        db, row.get("source_column_name"), source_table.id
-                    )
-                    target_column = column_metadata_service.get_by_name_and_table(
-                        db, row.get("target_column_name"), target_table.id
-                    )
-                    
-                    if source_column and target_column:
-                        lineage_data["source_column_id"] = source_column.id
-                        lineage_data["target_column_id"] = target_column.id
-                
-                # 对于表级血缘关系，使用LineageRelationCreate
-                lineage_create = LineageRelationCreate(
-                    source_table_ids=[lineage_data["source_table_id"]],
-                    target_table_id=lineage_data["target_table_id"],
-                    relation_type=lineage_data.get("lineage_type", "TRANSFORMATION"),
-                    description=lineage_data.get("description", ""),
-                    relation_details={"transformation_logic": lineage_data.get("transformation_logic", "")}
-                )
-                
-                # 检查表级血缘关系是否已存在
-                existing_lineage = lineage_service.get_table_lineages_by_source(db, source_table.id)
-                existing_lineage = next((l for l in existing_lineage if l.target_table_id == target_table.id), None)
-                
-                if existing_lineage:
-                    # 更新现有表级血缘关系
-                    lineage_update = LineageRelationUpdate(
-                        relation_type=lineage_data.get("lineage_type", "TRANSFORMATION"),
-                        description=lineage_data.get("description", ""),
-                        relation_details={"transformation_logic": lineage_data.get("transformation_logic", "")}
-                    )
-                    lineage_service.update_table_lineage(db, existing_lineage.id, lineage_update)
-                    result["lineages"]["updated"] += 1
-                else:
-                    # 创建新表级血缘关系
-                    created_lineage = lineage_service.create_table_lineage(db, lineage_create)
-                    result["lineages"]["created"] += 1
-                    
-                    # 如果有列级血缘关系，创建列级血缘关系
-                    if lineage_data.get("source_column_id") and lineage_data.get("target_column_id"):
-                        column_lineage_create = ColumnLineageRelationCreate(
-                            lineage_relation_id=created_lineage.id,
-                            source_column_id=lineage_data["source_column_id"],
-                            target_column_id=lineage_data["target_column_id"]
-                        )
-                        lineage_service.create_column_lineage(db, column_lineage_create)
-        
-        return {
-            "status": "success",
-            "message": "Excel文件上传并解析成功",
-            "result": result
-        }
-        
+        # 多工作表解析和写入耗时较长，放到线程池中执行，避免阻塞事件循环
+        if dry_run:
+            return await run_in_threadpool(upload_validation_service.validate, db, "excel", contents)
+        return await run_in_threadpool(upload_import_service.import_excel, db, contents)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"处理Excel文件时出错: {str(e)}")
 
 @router.post("/table-structure/excel", response_model=Dict[str, Any])
-async def upload_table_structure_excel(file: UploadFile = File(...), db: Session = Depends(get_db)):
+async def upload_table_structure_excel(
+    file: UploadFile = File(...),
+    background: bool = Query(False, description="是否作为后台任务执行，立即返回任务ID"),
+    dry_run: bool = Query(False, description="只校验文件内容并返回逐行问题报告，不写入数据库"),
+    db: Session = Depends(get_db)
+):
     """
     上传Excel文件，解析表结构和字段信息
     
@@ -269,124 +99,33 @@ async def upload_table_structure_excel(file: UploadFile = File(...), db: Session
     - 第一个Sheet: 数据源信息 (data_sources)
     - 第二个Sheet: 表元数据信息 (tables)
     - 第三个Sheet: 列元数据信息 (columns)
+    
+    background=true时作为后台导入任务执行，立即返回任务ID，可通过/api/jobs/{job_id}查询进度；
+    dry_run=true时只校验文件，返回缺失字段、未知的数据源/表/字段及重复行等问题，不写入任何数据
     """
     if not file.filename.endswith(('.xlsx', '.xls')):
         raise HTTPException(status_code=400, detail="只支持Excel文件格式(.xlsx, .xls)")
     
+    # 读取上传的Excel文件
+    contents = await file.read()
+    if background and not dry_run:
+        return import_job_service.submit(db, "table_structure_excel", file.filename, upload_import_service.import_table_structure_excel, contents)
+    
     try:
-        # 读取上传的Excel文件
-        contents = await file.read()
-        excel_data = pd.ExcelFile(io.BytesIO(contents))
-        
-        # 处理结果统计
-        result = {
-            "data_sources": {"created": 0, "updated": 0},
-            "tables": {"created": 0, "updated": 0},
-            "columns": {"created": 0, "updated": 0}
-        }
-        
-        # 处理数据源信息
-        if "data_sources" in excel_data.sheet_names:
-            data_sources_df = pd.read_excel(excel_data, "data_sources")
-            for _, row in data_sources_df.iterrows():
-                source_data = {
-                    "name": row.get("name"),
-                    "description": row.get("description", ""),
-                    "type": row.get("type"),
-                    "connection_config": row.get("connection_config", {})
-                }
-                
-                # 检查数据源是否已存在
-                existing_source = data_source_service.get_by_name(db, source_data["name"])
-                if existing_source:
-                    # 更新现有数据源
-                    data_source_update = DataSourceUpdate(**source_data)
-                    data_source_service.update(db, existing_source.id, data_source_update)
-                    result["data_sources"]["updated"] += 1
-                else:
-                    # 创建新数据源
-                    data_source_create = DataSourceCreate(**source_data)
-                    data_source_service.create(db, data_source_create)
-                    result["data_sources"]["created"] += 1
-        
-        # 处理表元数据信息
-        if "tables" in excel_data.sheet_names:
-            tables_df = pd.read_excel(excel_data, "tables")
-            for _, row in tables_df.iterrows():
-                # 获取数据源
-                source = data_source_service.get_by_name(db, row.get("data_source_name"))
-                if not source:
-                    continue
-                
-                table_data = {
-                    "data_source_id": source.id,
-                    "name": row.get("name"),
-                    "schema_name": row.get("schema_name"),
-                    "description": row.get("description", ""),
-                    "properties": row.get("properties", {})
-                }
-                
-                # 检查表是否已存在
-                existing_table = table_metadata_service.get_by_name_and_source(
-                    db, table_data["name"], source.id
-                )
-                if existing_table:
-                    # 更新现有表
-                    table_metadata_service.update(db, existing_table.id, table_data)
-                    result["tables"]["updated"] += 1
-                else:
-                    # 创建新表
-                    table_metadata_service.create(db, TableMetadataCreate(**table_data))
-                    result["tables"]["created"] += 1
-        
-        # 处理列元数据信息
-        if "columns" in excel_data.sheet_names:
-            columns_df = pd.read_excel(excel_data, "columns")
-            for _, row in columns_df.iterrows():
-                # 获取数据源和表
-                source = data_source_service.get_by_name(db, row.get("data_source_name"))
-                if not source:
-                    continue
-                
-                table = table_metadata_service.get_by_name_and_source(
-                    db, row.get("table_name"), source.id
-                )
-                if not table:
-                    continue
-                
-                column_data = {
-                    "table_id": table.id,
-                    "name": row.get("name"),
-                    "data_type": row.get("data_type"),
-                    "description": row.get("description", ""),
-                    "is_primary_key": row.get("is_primary_key", False),
-                    "properties": row.get("properties", {})
-                }
-                
-                # 检查列是否已存在
-                existing_column = column_metadata_service.get_by_name_and_table(
-                    db, column_data["name"], table.id
-                )
-                if existing_column:
-                    # 更新现有列
-                    column_metadata_service.update(db, existing_column.id, column_data)
-                    result["columns"]["updated"] += 1
-                else:
-                    # 创建新列
-                    column_metadata_service.create(db, ColumnMetadataCreate(**column_data))
-                    result["columns"]["created"] += 1
-        
-        return {
-            "status": "success",
-            "message": "表结构Excel文件上传并解析成功",
-            "result": result
-        }
-        
+        # 多工作表解析和写入耗时较长，放到线程池中执行，避免阻塞事件循环
+        if dry_run:
+            return await run_in_threadpool(upload_validation_service.validate, db, "table_structure_excel", contents)
+        return await run_in_threadpool(upload_import_service.import_table_structure_excel, db, contents)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"处理表结构Excel文件时出错: {str(e)}")
 
 @router.post("/table-structure/json", response_model=Dict[str, Any])
-async def upload_table_structure_json(file: UploadFile = File(...), db: Session = Depends(get_db)):
+async def upload_table_structure_json(
+    file: UploadFile = File(...),
+    background: bool = Query(False, description="是否作为后台任务执行，立即返回任务ID"),
+    dry_run: bool = Query(False, description="只校验文件内容并返回逐行问题报告，不写入数据库"),
+    db: Session = Depends(get_db)
+):
     """
     上传JSON文件，解析表结构和字段信息
     
@@ -396,114 +135,43 @@ async def upload_table_structure_json(file: UploadFile = File(...), db: Session
         "tables": [...],
         "columns": [...]
     }
+    
+    background=true时作为后台导入任务执行，立即返回任务ID，可通过/api/jobs/{job_id}查询进度；
+    dry_run=true时只校验文件，返回缺失字段、未知的数据源/表/字段及重复行等问题，不写入任何数据
     """
     if not file.filename.endswith('.json'):
         raise HTTPException(status_code=400, detail="只支持JSON文件格式(.json)")
     
+    # 读取上传的JSON文件
+    contents = await file.read()
+    if background and not dry_run:
+        return import_job_service.submit(db, "table_structure_json", file.filename, upload_import_service.import_table_structure_json, contents)
+    
     try:
-        # 读取上传的JSON文件
-        contents = await file.read()
-        data = json.loads(contents)
-        
-        # 处理结果统计
-        result = {
-            "data_sources": {"created": 0, "updated": 0},
-            "tables": {"created": 0, "updated": 0},
-            "columns": {"created": 0, "updated": 0}
-        }
-        
-        # 处理数据源信息
-        if "data_sources" in data:
-            for source_data in data["data_sources"]:
-                # 检查数据源是否已存在
-                existing_source = data_source_service.get_by_name(db, source_data["name"])
-                if existing_source:
-                    # 更新现有数据源
-                    data_source_update = DataSourceUpdate(**source_data)
-                    data_source_service.update(db, existing_source.id, data_source_update)
-                    result["data_sources"]["updated"] += 1
-                else:
-                    # 创建新数据源
-                    data_source_create = DataSourceCreate(**source_data)
-                    data_source_service.create(db, data_source_create)
-                    result["data_sources"]["created"] += 1
-        
-        # 处理表元数据信息
-        if "tables" in data:
-            for table_data in data["tables"]:
-                # 检查数据源是否存在
-                source_id = table_data.get("data_source_id")
-                source_name = table_data.get("data_source_name")
-                
-                if not source_id and source_name:
-                    source = data_source_service.get_by_name(db, source_name)
-                    if source:
-                        table_data["data_source_id"] = source.id
-                    else:
-                        continue
-                
-                # 检查表是否已存在
-                existing_table = table_metadata_service.get_by_id(db, table_data.get("id"))
-                if existing_table:
-                    # 更新现有表
-                    table_update = TableMetadataUpdate(**table_data)
-                    table_metadata_service.update(db, existing_table.id, table_update)
-                    result["tables"]["updated"] += 1
-                else:
-                    # 创建新表
-                    table_metadata_service.create(db, TableMetadataCreate(**table_data))
-                    result["tables"]["created"] += 1
-        
-        # 处理列元数据信息
-        if "columns" in data:
-            for column_data in data["columns"]:
-                # 检查表是否存在
-                table_id = column_data.get("table_id")
-                table_name = column_data.get("table_name")
-                source_name = column_data.get("data_source_name")
-                
-                if not table_id and table_name and source_name:
-                    source = data_source_service.get_by_name(db, source_name)
-                    if source:
-                        table = table_metadata_service.get_by_name_and_source(db, table_name, source.id)
-                        if table:
-                            column_data["table_id"] = table.id
-                        else:
-                            continue
-                    else:
-                        continue
-                
-                # 检查列是否已存在
-                existing_column = column_metadata_service.get_by_id(db, column_data.get("id"))
-                if existing_column:
-                    # 更新现有列
-                    column_update = ColumnMetadataUpdate(**column_data)
-                    column_metadata_service.update(db, existing_column.id, column_update)
-                    result["columns"]["updated"] += 1
-                else:
-                    # 创建新列
-                    column_metadata_service.create(db, ColumnMetadataCreate(**column_data))
-                    result["columns"]["created"] += 1
-        
-        return {
-            "status": "success",
-            "message": "表结构JSON文件上传并解析成功",
-            "result": result
-        }
-        
+        if dry_run:
+            return await run_in_threadpool(upload_validation_service.validate, db, "table_structure_json", contents)
+        return upload_import_service.import_table_structure_json(db, contents)
     except json.JSONDecodeError:
         raise HTTPException(status_code=400, detail="JSON文件格式错误，无法解析")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"处理表结构JSON文件时出错: {str(e)}")
 
 @router.post("/table-lineage/excel", response_model=Dict[str, Any])
-async def upload_table_lineage_excel(file: UploadFile = File(...), db: Session = Depends(get_db)):
+async def upload_table_lineage_excel(
+    file: UploadFile = File(...),
+    background: bool = Query(False, description="是否作为后台任务执行，立即返回任务ID"),
+    dry_run: bool = Query(False, description="只校验文件内容并返回逐行问题报告，不写入数据库"),
+    db: Session = Depends(get_db)
+):
     """
     上传Excel文件，解析表血缘关系信息
     
     Excel文件格式要求：
     - Sheet名称: lineages
     - 必要字段: source_db_name, source_table_name, target_db_name, target_table_name
+    
+    background=true时作为后台导入任务执行，立即返回任务ID，可通过/api/jobs/{job_id}查询进度；
+    dry_run=true时只校验文件，返回缺失字段、未知的数据源/表/字段及重复行等问题，不写入任何数据
     """
     import logging
     logger = logging.getLogger(__name__)
@@ -512,157 +180,26 @@ async def upload_table_lineage_excel(file: UploadFile = File(...), db: Session =
         logger.error(f"文件格式错误，只支持Excel文件: {file.filename}")
         raise HTTPException(status_code=400, detail="只支持Excel文件格式(.xlsx, .xls)")
     
+    # 读取上传的Excel文件
+    contents = await file.read()
+    if background and not dry_run:
+        return import_job_service.submit(db, "table_lineage_excel", file.filename, upload_import_service.import_table_lineage_excel, contents)
+    
     try:
-        logger.info(f"开始处理表血缘关系Excel文件: {file.filename}")
-        # 读取上传的Excel文件
-        contents = await file.read()
-        excel_data = pd.ExcelFile(io.BytesIO(contents))
-        
-        # 处理结果统计
-        result = {
-            "lineages": {"created": 0, "updated": 0},
-            "validation_errors": []
-        }
-        
-        # 处理血缘关系信息
-        if "lineages" in excel_data.sheet_names:
-            logger.info(f"找到lineages工作表，开始处理")
-            lineages_df = pd.read_excel(excel_data, "lineages")
-            logger.info(f"共找到 {len(lineages_df)} 条血缘关系数据")
-            
-            for index, row in lineages_df.iterrows():
-                try:
-                    logger.info(f"处理第 {index+1} 条血缘关系数据: {row.get('source_db_name')}.{row.get('source_table_name')} -> {row.get('target_db_name')}.{row.get('target_table_name')}")
-                    
-                    # 获取源表和目标表
-                    source_db = data_source_service.get_by_name(db, row.get("source_db_name"))
-                    target_db = data_source_service.get_by_name(db, row.get("target_db_name"))
-                    
-                    if not source_db:
-                        error_msg = f"源数据库不存在: {row.get('source_db_name')}"
-                        logger.warning(error_msg)
-                        result["validation_errors"].append(error_msg)
-                        continue
-                    if not target_db:
-                        error_msg = f"目标数据库不存在: {row.get('target_db_name')}"
-                        logger.warning(error_msg)
-                        result["validation_errors"].append(error_msg)
-                        continue
-                    
-                    source_table = table_metadata_service.get_by_name_and_source(
-                        db, row.get("source_table_name"), source_db.id
-                    )
-                    target_table = table_metadata_service.get_by_name_and_source(
-                        db, row.get("target_table_name"), target_db.id
-                    )
-                    
-                    if not source_table:
-                        error_msg = f"源表不存在: {row.get('source_table_name')} 于数据库 {row.get('source_db_name')}"
-                        logger.warning(error_msg)
-                        result["validation_errors"].append(error_msg)
-                        continue
-                    if not target_table:
-                        error_msg = f"目标表不存在: {row.get('target_table_name')} 于数据库 {row.get('target_db_name')}"
-                        logger.warning(error_msg)
-                        result["validation_errors"].append(error_msg)
-                        continue
-                    
-                    # 构建血缘关系数据
-                    lineage_data = {
-                        "source_table_id": source_table.id,
-                        "target_table_id": target_table.id,
-                        "description": row.get("description", ""),
-                        "relation_type": row.get("relation_type", "TRANSFORMATION"),
-                        "relation_details": {"transformation_logic": row.get("transformation_logic", "")}
-                    }
-                    
-                    # 对于表级血缘关系，使用LineageRelationCreate
-                    lineage_create = LineageRelationCreate(
-                        source_table_ids=[lineage_data["source_table_id"]],
-                        target_table_id=lineage_data["target_table_id"],
-                        relation_type=lineage_data.get("relation_type", "TRANSFORMATION"),
-                        description=lineage_data.get("description", ""),
-                        relation_details=lineage_data.get("relation_details", {})
-                    )
-                    
-                    # 检查表级血缘关系是否已存在
-                    existing_lineage = lineage_service.get_table_lineages_by_source(db, source_table.id)
-                    existing_lineage = next((l for l in existing_lineage if l.target_table_id == target_table.id), None)
-                    
-                    if existing_lineage:
-                        # 更新现有表级血缘关系
-                        lineage_update = LineageRelationUpdate(
-                            relation_type=lineage_data.get("relation_type", "TRANSFORMATION"),
-                            description=lineage_data.get("description", ""),
-                            relation_details=lineage_data.get("relation_details", {})
-                        )
-                        lineage_service.update_table_lineage(db, existing_lineage.id, lineage_update)
-                        result["lineages"]["updated"] += 1
-                        logger.info(f"更新表级血缘关系成功: {source_table.name} -> {target_table.name}")
-                    else:
-                        # 创建新表级血缘关系
-                        lineage_service.create_table_lineage(db, lineage_create)
-                        result["lineages"]["created"] += 1
-                        logger.info(f"创建表级血缘关系成功: {source_table.name} -> {target_table.name}")
-                except Exception as e:
-                    error_msg = f"处理第 {index+1} 条血缘关系时出错: {str(e)}"
-                    logger.error(error_msg, exc_info=True)
-                    result["validation_errors"].append(error_msg)
-        else:
-            logger.warning(f"未找到lineages工作表")
-            result["validation_errors"].append("未找到lineages工作表")
-        
-        # 根据结果返回不同状态
-        logger.info(f"表血缘关系处理完成，创建: {result['lineages']['created']}，更新: {result['lineages']['updated']}，错误: {len(result['validation_errors'])}")
-        
-        if result["validation_errors"]:
-            # 统计错误数量
-            error_count = len(result["validation_errors"])
-            # 计算成功导入的数量
-            success_count = result["lineages"]["created"] + result["lineages"]["updated"]
-            
-            # 确定状态和消息
-            if success_count == 0:
-                # 完全失败
-                status = "error"
-                message = f"表血缘关系导入失败，共{error_count}个错误"
-                logger.error(message)
-            else:
-                # 部分成功
-                status = "partial_success"
-                message = f"表血缘关系导入完成，成功{success_count}个，失败{error_count}个"
-                logger.warning(message)
-            
-            return {
-                "status": status,
-                "message": message,
-                "result": {
-                    "lineages": result["lineages"],
-                    "validation_errors": result["validation_errors"],
-                    "error_count": error_count,
-                    "success_count": success_count
-                }
-            }
-        else:
-            # 完全成功
-            success_count = result["lineages"]["created"] + result["lineages"]["updated"]
-            message = f"表血缘关系导入成功，共{success_count}个"
-            logger.info(message)
-            return {
-                "status": "success",
-                "message": message,
-                "result": {
-                    "lineages": result["lineages"],
-                    "success_count": success_count
-                }
-            }
-        
+        if dry_run:
+            return await run_in_threadpool(upload_validation_service.validate, db, "table_lineage_excel", contents)
+        return upload_import_service.import_table_lineage_excel(db, contents)
     except Exception as e:
         logger.error(f"处理表血缘关系Excel文件时出错: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"处理表血缘关系Excel文件时出错: {str(e)}")
 
 @router.post("/table-lineage/json", response_model=Dict[str, Any])
-async def upload_table_lineage_json(file: UploadFile = File(...), db: Session = Depends(get_db)):
+async def upload_table_lineage_json(
+    file: UploadFile = File(...),
+    background: bool = Query(False, description="是否作为后台任务执行，立即返回任务ID"),
+    dry_run: bool = Query(False, description="只校验文件内容并返回逐行问题报告，不写入数据库"),
+    db: Session = Depends(get_db)
+):
     """
     上传JSON文件，解析表血缘关系信息
     
@@ -679,161 +216,30 @@ async def upload_table_lineage_json(file: UploadFile = File(...), db: Session =
             }
         ]
     }
+    
+    也支持NDJSON文件（.ndjson/.jsonl），每行一个与lineages条目相同的对象。
+    文件边读取边解析，按批处理，内存占用与文件大小无关。
+    
+    background=true时作为后台导入任务执行，立即返回任务ID，可通过/api/jobs/{job_id}查询进度；
+    dry_run=true时只校验文件，返回缺失字段、未知的数据源/表/字段及重复行等问题，不写入任何数据
     """
     import logging
     logger = logging.getLogger(__name__)
     
-    if not file.filename.endswith('.json'):
+    if not file.filename.endswith(('.json', '.ndjson', '.jsonl')):
         logger.error(f"文件格式错误，只支持JSON文件: {file.filename}")
-        raise HTTPException(status_code=400, detail="只支持JSON文件格式(.json)")
+        raise HTTPException(status_code=400, detail="只支持JSON文件格式(.json)或NDJSON文件格式(.ndjson, .jsonl)")
+    
+    import_type = "table_lineage_json" if file.filename.endswith('.json') else "table_lineage_ndjson"
+    import_func, _ = upload_import_service.get_importer(import_type)
     
     try:
-        logger.info(f"开始处理表血缘关系JSON文件: {file.filename}")
-        
-        # 读取上传的JSON文件
-        contents = await file.read()
-        data = json.loads(contents)
-        
-        logger.info(f"成功读取JSON文件，开始解析血缘关系数据")
-        
-        # 处理结果统计
-        result = {
-            "lineages": {"created": 0, "updated": 0},
-            "validation_errors": []
-        }
-        
-        # 处理血缘关系信息
-        if "lineages" in data:
-            logger.info(f"找到lineages字段，共包含 {len(data['lineages'])} 条血缘关系数据")
-            
-            for index, lineage_data in enumerate(data["lineages"]):
-                try:
-                    logger.info(f"处理第 {index+1} 条血缘关系数据: {lineage_data.get('source_db_name')}.{lineage_data.get('source_table_name')} -> {lineage_data.get('target_db_name')}.{lineage_data.get('target_table_name')}")
-                    
-                    # 检查必要字段
-                    if not lineage_data.get("source_db_name") or not lineage_data.get("source_table_name") or \
-                       not lineage_data.get("target_db_name") or not lineage_data.get("target_table_name"):
-                        error_msg = f"第 {index+1} 条血缘关系数据缺少必要字段"
-                        logger.warning(error_msg)
-                        result["validation_errors"].append(error_msg)
-                        continue
-                    
-                    # 获取源表和目标表
-                    source_db = data_source_service.get_by_name(db, lineage_data["source_db_name"])
-                    target_db = data_source_service.get_by_name(db, lineage_data["target_db_name"])
-                    
-                    if not source_db:
-                        error_msg = f"第 {index+1} 条血缘关系数据: 源数据库不存在: {lineage_data['source_db_name']}"
-                        logger.warning(error_msg)
-                        result["validation_errors"].append(error_msg)
-                        continue
-                    if not target_db:
-                        error_msg = f"第 {index+1} 条血缘关系数据: 目标数据库不存在: {lineage_data['target_db_name']}"
-                        logger.warning(error_msg)
-                        result["validation_errors"].append(error_msg)
-                        continue
-                    
-                    source_table = table_metadata_service.get_by_name_and_source(
-                        db, lineage_data["source_table_name"], source_db.id
-                    )
-                    target_table = table_metadata_service.get_by_name_and_source(
-                        db, lineage_data["target_table_name"], target_db.id
-                    )
-                    
-                    if not source_table:
-                        error_msg = f"第 {index+1} 条血缘关系数据: 源表不存在: {lineage_data['source_table_name']} 于数据库 {lineage_data['source_db_name']}"
-                        logger.warning(error_msg)
-                        result["validation_errors"].append(error_msg)
-                        continue
-                    if not target_table:
-                        error_msg = f"第 {index+1} 条血缘关系数据: 目标表不存在: {lineage_data['target_table_name']} 于数据库 {lineage_data['target_db_name']}"
-                        logger.warning(error_msg)
-                        result["validation_errors"].append(error_msg)
-                        continue
-                    
-                    # 对于表级血缘关系，使用LineageRelationCreate
-                    lineage_create = LineageRelationCreate(
-                        source_table_ids=[source_table.id],
-                        target_table_id=target_table.id,
-                        relation_type=lineage_data.get("relation_type", "TRANSFORMATION"),
-                        description=lineage_data.get("description", ""),
-                        relation_details=lineage_data.get("relation_details", {})
-                    )
-                    
-                    # 检查表级血缘关系是否已存在
-                    existing_lineage = lineage_service.get_table_lineages_by_source(db, source_table.id)
-                    existing_lineage = next((l for l in existing_lineage if l.target_table_id == target_table.id), None)
-                    
-                    if existing_lineage:
-                        # 更新现有表级血缘关系
-                        lineage_update = LineageRelationUpdate(
-                            relation_type=lineage_data.get("relation_type", "TRANSFORMATION"),
-                            description=lineage_data.get("description", ""),
-                            relation_details=lineage_data.get("relation_details", {})
-                        )
-                        lineage_service.update_table_lineage(db, existing_lineage.id, lineage_update)
-                        result["lineages"]["updated"] += 1
-                        logger.info(f"第 {index+1} 条血缘关系数据: 更新表级血缘关系成功: {source_table.name} -> {target_table.name}")
-                    else:
-                        # 创建新表级血缘关系
-                        lineage_service.create_table_lineage(db, lineage_create)
-                        result["lineages"]["created"] += 1
-                        logger.info(f"第 {index+1} 条血缘关系数据: 创建表级血缘关系成功: {source_table.name} -> {target_table.name}")
-                except Exception as e:
-                    error_msg = f"第 {index+1} 条血缘关系数据处理出错: {str(e)}"
-                    logger.error(error_msg, exc_info=True)
-                    result["validation_errors"].append(error_msg)
-        else:
-            # JSON文件中没有lineages字段
-            error_msg = "JSON文件缺少必要的lineages字段"
-            logger.warning(error_msg)
-            result["validation_errors"].append(error_msg)
-        
-        # 根据结果返回不同状态
-        logger.info(f"表血缘关系JSON文件处理完成，创建: {result['lineages']['created']}，更新: {result['lineages']['updated']}，错误: {len(result['validation_errors'])}")
-        
-        if result["validation_errors"]:
-            # 统计错误数量
-            error_count = len(result["validation_errors"])
-            # 计算成功导入的数量
-            success_count = result["lineages"]["created"] + result["lineages"]["updated"]
-            
-            # 确定状态和消息
-            if success_count == 0:
-                # 完全失败
-                status = "error"
-                message = f"表血缘关系导入失败，共{error_count}个错误"
-                logger.error(message)
-            else:
-                # 部分成功
-                status = "partial_success"
-                message = f"表血缘关系导入完成，成功{success_count}个，失败{error_count}个"
-                logger.warning(message)
-            
-            return {
-                "status": status,
-                "message": message,
-                "result": {
-                    "lineages": result["lineages"],
-                    "validation_errors": result["validation_errors"],
-                    "error_count": error_count,
-                    "success_count": success_count
-                }
-            }
-        else:
-            # 完全成功
-            success_count = result["lineages"]["created"] + result["lineages"]["updated"]
-            message = f"表血缘关系导入成功，共{success_count}个"
-            logger.info(message)
-            return {
-                "status": "success",
-                "message": message,
-                "result": {
-                    "lineages": result["lineages"],
-                    "success_count": success_count
-                }
-            }
-        
+        if background and not dry_run:
+            return _submit_streaming_import(db, import_type, file.filename, import_func, await _spool_upload(file))
+        if dry_run:
+            return await run_in_threadpool(upload_validation_service.validate, db, import_type, file.file)
+        # 直接从上传的临时文件流式解析，不将整个文件读入内存；导入耗时较长，放到线程池中执行
+        return await run_in_threadpool(import_func, db, file.file)
     except json.JSONDecodeError as e:
         error_msg = f"JSON文件格式错误，无法解析: {str(e)}"
         logger.error(error_msg)
@@ -844,120 +250,44 @@ async def upload_table_lineage_json(file: UploadFile = File(...), db: Session =
         raise HTTPException(status_code=500, detail=f"处理表血缘关系JSON文件时出错: {str(e)}")
 
 @router.post("/column-lineage/excel", response_model=Dict[str, Any])
-async def upload_column_lineage_excel(file: UploadFile = File(...), db: Session = Depends(get_db)):
+async def upload_column_lineage_excel(
+    file: UploadFile = File(...),
+    background: bool = Query(False, description="是否作为后台任务执行，立即返回任务ID"),
+    dry_run: bool = Query(False, description="只校验文件内容并返回逐行问题报告，不写入数据库"),
+    db: Session = Depends(get_db)
+):
     """
     上传Excel文件，解析字段血缘关系信息
     
     Excel文件格式要求：
     - Sheet名称: column_lineages
     - 必要字段: source_db_name, source_table_name, source_column_name, target_db_name, target_table_name, target_column_name
+    
+    background=true时作为后台导入任务执行，立即返回任务ID，可通过/api/jobs/{job_id}查询进度；
+    dry_run=true时只校验文件，返回缺失字段、未知的数据源/表/字段及重复行等问题，不写入任何数据
     """
     if not file.filename.endswith(('.xlsx', '.xls')):
         raise HTTPException(status_code=400, detail="只支持Excel文件格式(.xlsx, .xls)")
     
+    # 读取上传的Excel文件
+    contents = await file.read()
+    if background and not dry_run:
+        return import_job_service.submit(db, "column_lineage_excel", file.filename, upload_import_service.import_column_lineage_excel, contents)
+    
     try:
-        # 读取上传的Excel文件
-        contents = await file.read()
-        excel_data = pd.ExcelFile(io.BytesIO(contents))
-        
-        # 处理结果统计
-        result = {
-            "column_lineages": {"created": 0},
-            "validation_errors": []
-        }
-        
-        # 处理字段血缘关系信息
-        if "column_lineages" in excel_data.sheet_names:
-            lineages_df = pd.read_excel(excel_data, "column_lineages")
-            for _, row in lineages_df.iterrows():
-                try:
-                    # 获取源数据库和目标数据库
-                    source_db = data_source_service.get_by_name(db, row.get("source_db_name"))
-                    target_db = data_source_service.get_by_name(db, row.get("target_db_name"))
-                    
-                    if not source_db:
-                        result["validation_errors"].append(f"源数据库不存在: {row.get('source_db_name')}")
-                        continue
-                    if not target_db:
-                        result["validation_errors"].append(f"目标数据库不存在: {row.get('target_db_name')}")
-                        continue
-                    
-                    # 获取源表和目标表
-                    source_table = table_metadata_service.get_by_name_and_source(
-                        db, row.get("source_table_name"), source_db.id
-                    )
-                    target_table = table_metadata_service.get_by_name_and_source(
-                        db, row.get("target_table_name"), target_db.id
-                    )
-                    
-                    if not source_table:
-                        result["validation_errors"].append(
-                            f"源表不存在: {row.get('source_table_name')} 于数据库 {row.get('source_db_name')}"
-                        )
-                        continue
-                    if not target_table:
-                        result["validation_errors"].append(
-                            f"目标表不存在: {row.get('target_table_name')} 于数据库 {row.get('target_db_name')}"
-                        )
-                        continue
-                    
-                    # 获取源列和目标列
-                    source_column = column_metadata_service.get_by_name_and_table(
-                        db, row.get("source_column_name"), source_table.id
-                    )
-                    target_column = column_metadata_service.get_by_name_and_table(
-                        db, row.get("target_column_name"), target_table.id
-                    )
-                    
-                    if not source_column:
-                        result["validation_errors"].append(
-                            f"源字段不存在: {row.get('source_column_name')} 于表 {row.get('source_table_name')}"
-                        )
-                        continue
-                    if not target_column:
-                        result["validation_errors"].append(
-                            f"目标字段不存在: {row.get('target_column_name')} 于表 {row.get('target_table_name')}"
-                        )
-                        continue
-                    
-                    # 检查表级血缘关系是否已存在，如果不存在则创建
-                    existing_lineage = lineage_service.get_table_lineages_by_source(db, source_table.id)
-                    table_lineage = next((l for l in existing_lineage if l.target_table_id == target_table.id), None)
-                    
-                    if not table_lineage:
-                        # 创建表级血缘关系
-                        lineage_create = LineageRelationCreate(
-                            source_table_ids=[source_table.id],
-                            target_table_id=target_table.id,
-                            relation_type=row.get("relation_type", "TRANSFORMATION"),
-                            description=row.get("description", ""),
-                            relation_details={}
-                        )
-                        table_lineage = lineage_service.create_table_lineage(db, lineage_create)
-                    
-                    # 创建列级血缘关系
-                    column_lineage_create = ColumnLineageRelationCreate(
-                        lineage_relation_id=table_lineage.id,
-                        source_column_id=source_column.id,
-                        target_column_id=target_column.id,
-                        transformation_details={"logic": row.get("transformation_logic", "")}
-                    )
-                    lineage_service.create_column_lineage(db, column_lineage_create)
-                    result["column_lineages"]["created"] += 1
-                except Exception as e:
-                    result["validation_errors"].append(f"处理字段血缘关系时出错: {str(e)}")
-        
-        return {
-            "status": "success" if not result["validation_errors"] else "partial_success",
-            "message": "字段血缘关系Excel文件上传并解析" + ("成功" if not result["validation_errors"] else "，但有验证错误"),
-            "result": result
-        }
-        
+        if dry_run:
+            return await run_in_threadpool(upload_validation_service.validate, db, "column_lineage_excel", contents)
+        return upload_import_service.import_column_lineage_excel(db, contents)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"处理字段血缘关系Excel文件时出错: {str(e)}")
 
 @router.post("/column-lineage/json", response_model=Dict[str, Any])
-async def upload_column_lineage_json(file: UploadFile = File(...), db: Session = Depends(get_db)):
+async def upload_column_lineage_json(
+    file: UploadFile = File(...),
+    background: bool = Query(False, description="是否作为后台任务执行，立即返回任务ID"),
+    dry_run: bool = Query(False, description="只校验文件内容并返回逐行问题报告，不写入数据库"),
+    db: Session = Depends(get_db)
+):
     """
     上传JSON文件，解析字段血缘关系信息
     
@@ -975,173 +305,113 @@ async def upload_column_lineage_json(file: UploadFile = File(...), db: Session =
             }
         ]
     }
+    
+    也支持NDJSON文件（.ndjson/.jsonl），每行一个与column_lineages条目相同的对象。
+    文件边读取边解析，按批处理，内存占用与文件大小无关。
+    
+    background=true时作为后台导入任务执行，立即返回任务ID，可通过/api/jobs/{job_id}查询进度；
+    dry_run=true时只校验文件，返回缺失字段、未知的数据源/表/字段及重复行等问题，不写入任何数据
     """
-    if not file.filename.endswith('.json'):
-        raise HTTPException(status_code=400, detail="只支持JSON文件格式(.json)")
+    if not file.filename.endswith(('.json', '.ndjson', '.jsonl')):
+        raise HTTPException(status_code=400, detail="只支持JSON文件格式(.json)或NDJSON文件格式(.ndjson, .jsonl)")
+    
+    import_type = "column_lineage_json" if file.filename.endswith('.json') else "column_lineage_ndjson"
+    import_func, _ = upload_import_service.get_importer(import_type)
     
     try:
-        # 读取上传的JSON文件
-        contents = await file.read()
-        data = json.loads(contents)
-        
-        # 处理结果统计
-        result = {
-            "column_lineages": {"created": 0},
-            "validation_errors": []
-        }
-        
-        # 处理字段血缘关系信息
-        if "column_lineages" in data:
-            # 验证column_lineages是否为数组
-            if not isinstance(data["column_lineages"], list):
-                result["validation_errors"].append("column_lineages必须是数组格式")
-                return {
-                    "status": "error",
-                    "message": "字段血缘关系JSON文件格式错误",
-                    "result": result
-                }
-            
-            for index, lineage_data in enumerate(data["column_lineages"]):
-                try:
-                    # 验证单个血缘关系条目是否为对象
-                    if not isinstance(lineage_data, dict):
-                        result["validation_errors"].append(f"第{index+1}个血缘关系条目必须是对象格式")
-                        continue
-                    
-                    # 检查必要字段
-                    required_fields = ["source_db_name", "source_table_name", "source_column_name", 
-                                      "target_db_name", "target_table_name", "target_column_name"]
-                    
-                    # 检查必填字段是否存在
-                    missing_fields = [field for field in required_fields if field not in lineage_data]
-                    if missing_fields:
-                        result["validation_errors"].append(f"第{index+1}个血缘关系条目缺少必要字段: {', '.join(missing_fields)}")
-                        continue
-                    
-                    # 检查必填字段是否有值
-                    empty_fields = [field for field in required_fields if not lineage_data.get(field)]
-                    if empty_fields:
-                        result["validation_errors"].append(f"第{index+1}个血缘关系条目字段值不能为空: {', '.join(empty_fields)}")
-                        continue
-                    
-                    # 获取源数据库和目标数据库
-                    source_db = data_source_service.get_by_name(db, lineage_data["source_db_name"])
-                    target_db = data_source_service.get_by_name(db, lineage_data["target_db_name"])
-                    
-                    if not source_db:
-                        result["validation_errors"].append(f"第{index+1}个血缘关系条目: 源数据库不存在: {lineage_data['source_db_name']}")
-                        continue
-                    if not target_db:
-                        result["validation_errors"].append(f"第{index+1}个血缘关系条目: 目标数据库不存在: {lineage_data['target_db_name']}")
-                        continue
-                    
-                    # 获取源表和目标表
-                    source_table = table_metadata_service.get_by_name_and_source(
-                        db, lineage_data["source_table_name"], source_db.id
-                    )
-                    target_table = table_metadata_service.get_by_name_and_source(
-                        db, lineage_data["target_table_name"], target_db.id
-                    )
-                    
-                    if not source_table:
-                        result["validation_errors"].append(
-                            f"第{index+1}个血缘关系条目: 源表不存在: {lineage_data['source_table_name']} 于数据库 {lineage_data['source_db_name']}"
-                        )
-                        continue
-                    if not target_table:
-                        result["validation_errors"].append(
-                            f"第{index+1}个血缘关系条目: 目标表不存在: {lineage_data['target_table_name']} 于数据库 {lineage_data['target_db_name']}"
-                        )
-                        continue
-                    
-                    # 获取源列和目标列
-                    source_column = column_metadata_service.get_by_name_and_table(
-                        db, lineage_data["source_column_name"], source_table.id
-                    )
-                    target_column = column_metadata_service.get_by_name_and_table(
-                        db, lineage_data["target_column_name"], target_table.id
-                    )
-                    
-                    if not source_column:
-                        result["validation_errors"].append(
-                            f"第{index+1}个血缘关系条目: 源字段不存在: {lineage_data['source_column_name']} 于表 {lineage_data['source_table_name']}"
-                        )
-                        continue
-                    if not target_column:
-                        result["validation_errors"].append(
-                            f"第{index+1}个血缘关系条目: 目标字段不存在: {lineage_data['target_column_name']} 于表 {lineage_data['target_table_name']}"
-                        )
-                        continue
-                    
-                    # 检查表级血缘关系是否已存在，如果不存在则创建
-                    existing_lineage = lineage_service.get_table_lineages_by_source(db, source_table.id)
-                    table_lineage = next((l for l in existing_lineage if l.target_table_id == target_table.id), None)
-                    
-                    if not table_lineage:
-                        # 创建表级血缘关系
-                        lineage_create = LineageRelationCreate(
-                            source_table_ids=[source_table.id],
-                            target_table_id=target_table.id,
-                            relation_type=lineage_data.get("relation_type", "TRANSFORMATION"),
-                            description=lineage_data.get("description", ""),
-                            relation_details={}
-                        )
-                        table_lineage = lineage_service.create_table_lineage(db, lineage_create)
-                    
-                    # 创建列级血缘关系
-                    column_lineage_create = ColumnLineageRelationCreate(
-                        lineage_relation_id=table_lineage.id,
-                        source_column_id=source_column.id,
-                        target_column_id=target_column.id,
-                        transformation_details=lineage_data.get("transformation_details", {})
-                    )
-                    lineage_service.create_column_lineage(db, column_lineage_create)
-                    result["column_lineages"]["created"] += 1
-                except Exception as e:
-                    result["validation_errors"].append(f"第{index+1}个血缘关系条目处理出错: {str(e)}")
-        else:
-            result["validation_errors"].append("JSON文件缺少必要的column_lineages字段")
-        
-        # 根据结果返回不同状态
-        if result["validation_errors"]:
-            # 统计错误数量
-            error_count = len(result["validation_errors"])
-            # 计算成功导入的数量
-            success_count = result["column_lineages"]["created"]
-            
-            # 确定状态和消息
-            if success_count == 0:
-                # 完全失败
-                status = "error"
-                message = f"字段血缘关系导入失败，共{error_count}个错误"
-            else:
-                # 部分成功
-                status = "partial_success"
-                message = f"字段血缘关系导入完成，成功{success_count}个，失败{error_count}个"
-            
-            return {
-                "status": status,
-                "message": message,
-                "result": {
-                    "column_lineages": result["column_lineages"],
-                    "validation_errors": result["validation_errors"],
-                    "error_count": error_count,
-                    "success_count": success_count
-                }
-            }
-        else:
-            # 完全成功
-            success_count = result["column_lineages"]["created"]
-            return {
-                "status": "success",
-                "message": f"字段血缘关系导入成功，共{success_count}个",
-                "result": {
-                    "column_lineages": result["column_lineages"],
-                    "success_count": success_count
-                }
-            }
-        
+        if background and not dry_run:
+            return _submit_streaming_import(db, import_type, file.filename, import_func, await _spool_upload(file))
+        if dry_run:
+            return await run_in_threadpool(upload_validation_service.validate, db, import_type, file.file)
+        # 直接从上传的临时文件流式解析，不将整个文件读入内存；导入耗时较长，放到线程池中执行
+        return await run_in_threadpool(import_func, db, file.file)
     except json.JSONDecodeError:
         raise HTTPException(status_code=400, detail="JSON文件格式错误，无法解析")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"处理字段血缘关系JSON文件时出错: {str(e)}")
+
+class ColumnarFormat(str, Enum):
+    """列式文件格式"""
+    PARQUET = "parquet"
+    ARROW = "arrow"
+
+async def _upload_columnar(import_type: str, label: str, file: UploadFile, background: bool,
+                           dry_run: bool, db: Session) -> Dict[str, Any]:
+    """Parquet/Arrow上传的公共处理：校验扩展名，按background和dry_run分派"""
+    file_format = import_type.rsplit("_", 1)[1]
+    import_func, extensions = upload_import_service.get_importer(import_type)
+    if not file.filename.lower().endswith(extensions):
+        raise HTTPException(status_code=400, detail=f"{file_format}格式只支持以下文件扩展名: {', '.join(extensions)}")
+
+    contents = await file.read()
+    if background and not dry_run:
+        return import_job_service.submit(db, import_type, file.filename, import_func, contents)
+
+    try:
+        if dry_run:
+            return await run_in_threadpool(upload_validation_service.validate, db, import_type, contents)
+        return await run_in_threadpool(import_func, db, contents)
+    except ValueError as e:
+        # pyarrow的ArrowInvalid继承自ValueError，文件损坏或不是对应格式时返回400
+        raise HTTPException(status_code=400, detail=f"{file_format}文件格式错误，无法解析: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"处理{label}{file_format}文件时出错: {str(e)}")
+
+@router.post("/table-structure/{file_format}", response_model=Dict[str, Any])
+async def upload_table_structure_columnar(
+    file_format: ColumnarFormat,
+    file: UploadFile = File(...),
+    background: bool = Query(False, description="是否作为后台任务执行，立即返回任务ID"),
+    dry_run: bool = Query(False, description="只校验文件内容并返回逐行问题报告，不写入数据库"),
+    db: Session = Depends(get_db)
+):
+    """
+    上传Parquet或Arrow IPC文件，导入表结构和字段信息
+    
+    文件为扁平布局，每个字段一行，列为:
+    data_source_name, schema_name, table_name, table_description, table_properties,
+    column_name, data_type, column_description, is_primary_key, column_properties
+    
+    没有字段的表只需一行且column_name为空；properties列可以是JSON字符串或结构体；数据源需已存在。
+    文件按批次读取（只读取上述列），以批量插入/更新写入。与/api/export/table_structure导出的文件格式一致。
+    """
+    return await _upload_columnar(f"table_structure_{file_format.value}", "表结构", file, background, dry_run, db)
+
+@router.post("/table-lineage/{file_format}", response_model=Dict[str, Any])
+async def upload_table_lineage_columnar(
+    file_format: ColumnarFormat,
+    file: UploadFile = File(...),
+    background: bool = Query(False, description="是否作为后台任务执行，立即返回任务ID"),
+    dry_run: bool = Query(False, description="只校验文件内容并返回逐行问题报告，不写入数据库"),
+    db: Session = Depends(get_db)
+):
+    """
+    上传Parquet或Arrow IPC文件，导入表血缘关系
+    
+    每个(源表, 目标表)对一行，列为:
+    source_db_name, source_table_name, target_db_name, target_table_name,
+    relation_type, description, transformation_logic, relation_details
+    
+    已存在的血缘关系将被更新。与/api/export/table_lineage导出的文件格式一致。
+    """
+    return await _upload_columnar(f"table_lineage_{file_format.value}", "表血缘关系", file, background, dry_run, db)
+
+@router.post("/column-lineage/{file_format}", response_model=Dict[str, Any])
+async def upload_column_lineage_columnar(
+    file_format: ColumnarFormat,
+    file: UploadFile = File(...),
+    background: bool = Query(False, description="是否作为后台任务执行，立即返回任务ID"),
+    dry_run: bool = Query(False, description="只校验文件内容并返回逐行问题报告，不写入数据库"),
+    db: Session = Depends(get_db)
+):
+    """
+    上传Parquet或Arrow IPC文件，导入字段血缘关系
+    
+    每个(源字段, 目标字段)对一行，列为:
+    source_db_name, source_table_name, source_column_name, target_db_name, target_table_name,
+    target_column_name, relation_type, description, transformation_logic, transformation_details
+    
+    对应的表级血缘关系不存在时自动创建，已存在的字段血缘关系将更新转换细节。
+    与/api/export/column_lineage导出的文件格式一致。
+    """
+    return await _upload_columnar(f"column_lineage_{file_format.value}", "字段血缘关系", file, background, dry_run, db)
@@ -13,6 +13,8 @@ logging.basicConfig(
 from config.settings import settings
 from api import router as api_router
 from models import init_db
+from services.import_job_service import ImportJobService
+from services.refresh_scheduler_service import RefreshSchedulerService
 
 # 初始化数据库连接
 init_db(settings.metadata_db_url)
@@ -36,6 +38,23 @@ app.add_middleware(
 # 注册API路由
 app.include_router(api_router, prefix="/api")
 
+@app.on_event("startup")
+def recover_import_jobs():
+    """将服务重启前未结束的后台导入任务标记为失败"""
+    ImportJobService.recover_interrupted()
+
+@app.on_event("startup")
+def start_refresh_scheduler():
+    """启动元数据定时刷新调度"""
+    if settings.refresh_scheduler_enabled:
+        RefreshSchedulerService.start()
+
+@app.on_event("shutdown")
+def stop_refresh_scheduler():
+    """停止元数据定时刷新调度"""
+    if settings.refresh_scheduler_enabled:
+        RefreshSchedulerService.stop()
+
 @app.get("/")
 def read_root():
     """根路径，返回API基本信息"""
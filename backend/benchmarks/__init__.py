@@ -0,0 +1,6 @@
+"""性能基准测试工具：合成元数据目录生成器（catalog_generator）和基准测试套件（run_benchmarks）
+
+在backend目录下运行，例如:
+    python -m benchmarks.catalog_generator --tables 2000 --output-dir /tmp/catalog
+    python -m benchmarks.run_benchmarks --scales small medium --output results.json
+"""
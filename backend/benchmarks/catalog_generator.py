@@ -0,0 +1,345 @@
+"""
+合成元数据目录生成器
+
+按CatalogSpec确定性地生成数据源、表、字段以及分层的表级/字段级血缘DAG，
+可直接批量写入元数据库，也可以写成上传接口接受的JSON/Parquet文件。
+同样的参数（包括seed）总是生成完全相同的目录。
+"""
+import argparse
+import json
+import logging
+import os
+import random
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pydantic import BaseModel, Field
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from models import DataSource, DataSourceType, TableMetadata, ColumnMetadata, LineageRelation, ColumnLineageRelation
+from utils.columnar_utils import TABLE_STRUCTURE_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# 字段类型按(表序号, 字段序号)轮换，不消耗随机数
+_DATA_TYPES = ["NUMBER", "VARCHAR2", "DATE", "TIMESTAMP", "CHAR", "CLOB", "keyword", "long"]
+_DATA_SOURCE_TYPES = [t.value for t in DataSourceType]
+# 写入数据库时每条INSERT的行数
+_INSERT_CHUNK_SIZE = 5000
+
+
+class CatalogSpec(BaseModel):
+    """合成目录的规模和血缘图形状参数"""
+    seed: int = Field(42, description="随机种子")
+    data_sources: int = Field(3, ge=1, description="数据源数量")
+    tables: int = Field(1000, ge=1, description="表数量")
+    columns_per_table: int = Field(20, ge=1, description="每张表的字段数")
+    depth: int = Field(5, ge=0, description="血缘DAG的深度（层数减一），0表示不生成血缘")
+    fan_in: int = Field(3, ge=1, description="每张表最多的直接上游表数")
+    fan_out: int = Field(5, ge=1, description="每张表最多的直接下游表数（生成菱形和环时可能略微超出）")
+    diamond_ratio: float = Field(0.1, ge=0, le=1, description="额外增加一个与已选上游表同源的上游表（形成菱形）的表比例")
+    cycle_ratio: float = Field(0.0, ge=0, le=1, description="增加一条指向祖先表的回边（形成环）的表比例")
+    column_lineage_per_relation: int = Field(5, ge=0, description="每条表级血缘生成的字段级血缘数，不超过每表字段数")
+
+
+class SyntheticCatalog:
+    """
+    按CatalogSpec生成的合成目录
+
+    表按序号分为depth+1层，第L层(L≥1)的表从第L-1层选取上游表；字段定义由表序号和字段序号推导，
+    不在内存中展开，百万级字段的目录也只保存表和血缘边
+    """
+
+    def __init__(self, spec: CatalogSpec):
+        self.spec = spec
+        self.data_sources = [
+            {
+                "name": f"bench_ds_{index:02d}",
+                "type": _DATA_SOURCE_TYPES[index % len(_DATA_SOURCE_TYPES)],
+                "connection_config": {"host": f"bench-{index:02d}.local"},
+                "description": f"合成数据源{index}"
+            }
+            for index in range(spec.data_sources)
+        ]
+        self.layers = [index * (spec.depth + 1) // spec.tables for index in range(spec.tables)]
+        self.tables = [
+            {
+                "data_source_name": self.data_sources[index % spec.data_sources]["name"],
+                "name": f"T{layer:02d}_{index:06d}",
+                "schema_name": f"LAYER_{layer:02d}",
+                "description": f"合成表{index}",
+                "properties": {"layer": layer}
+            }
+            for index, layer in enumerate(self.layers)
+        ]
+        self.edges = self._generate_edges(random.Random(spec.seed))
+
+    def _generate_edges(self, rng: random.Random) -> List[Tuple[int, int]]:
+        """生成表级血缘边(源表序号, 目标表序号)，按目标表序号排列，同一对表最多一条边"""
+        spec = self.spec
+        layer_ranges: Dict[int, Tuple[int, int]] = {}
+        for index, layer in enumerate(self.layers):
+            start, _ = layer_ranges.get(layer, (index, index))
+            layer_ranges[layer] = (start, index + 1)
+
+        parents: List[List[int]] = [[] for _ in range(spec.tables)]
+        children: List[List[int]] = [[] for _ in range(spec.tables)]
+        edges: List[Tuple[int, int]] = []
+
+        def add_edge(source: int, target: int) -> None:
+            if source != target and source not in parents[target]:
+                parents[target].append(source)
+                children[source].append(target)
+                edges.append((source, target))
+
+        for target, layer in enumerate(self.layers):
+            if layer == 0:
+                continue
+            start, end = layer_ranges[layer - 1]
+            # 随机抽取未达到fan_out上限的上游表，抽取次数有限，上一层都已满时允许少于fan_in
+            wanted = rng.randint(1, spec.fan_in)
+            for _ in range(wanted * 4):
+                if len(parents[target]) >= wanted:
+                    break
+                source = rng.randrange(start, end)
+                if len(children[source]) < spec.fan_out:
+                    add_edge(source, target)
+            if not parents[target]:
+                add_edge(rng.randrange(start, end), target)
+
+            # 菱形：再加一个与某个上游表共享上游的兄弟表，形成 祖先 -> {上游, 兄弟} -> 目标
+            if layer >= 2 and rng.random() < spec.diamond_ratio:
+                grandparents = parents[rng.choice(parents[target])]
+                if grandparents:
+                    siblings = children[rng.choice(grandparents)]
+                    add_edge(rng.choice(siblings), target)
+
+            # 环：从目标表指回一个祖先表
+            if layer >= 2 and rng.random() < spec.cycle_ratio:
+                grandparents = parents[rng.choice(parents[target])]
+                if grandparents:
+                    add_edge(target, rng.choice(grandparents))
+
+        return edges
+
+    def columns(self, table_index: int) -> Iterator[Dict[str, Any]]:
+        """返回一张表的字段定义，第一个字段为主键"""
+        for column_index in range(self.spec.columns_per_table):
+            yield {
+                "name": f"COL_{column_index:03d}",
+                "data_type": _DATA_TYPES[(table_index * 31 + column_index) % len(_DATA_TYPES)],
+                "description": f"合成字段{column_index}",
+                "is_primary_key": column_index == 0,
+                "properties": {"nullable": column_index != 0}
+            }
+
+    def column_pairs(self) -> Iterator[Tuple[int, int, int]]:
+        """返回字段级血缘(表级血缘序号, 源字段序号, 目标字段序号)，源表和目标表的同序号字段一一对应"""
+        per_relation = min(self.spec.column_lineage_per_relation, self.spec.columns_per_table)
+        for edge_index in range(len(self.edges)):
+            for column_index in range(per_relation):
+                yield edge_index, column_index, column_index
+
+    def summary(self) -> Dict[str, int]:
+        """返回各类对象的数量"""
+        return {
+            "data_sources": len(self.data_sources),
+            "tables": len(self.tables),
+            "columns": len(self.tables) * self.spec.columns_per_table,
+            "table_lineages": len(self.edges),
+            "column_lineages": len(self.edges) * min(self.spec.column_lineage_per_relation, self.spec.columns_per_table)
+        }
+
+    def write_to_db(self, db: Session) -> Dict[str, int]:
+        """
+        将目录批量写入元数据库（不经过服务层），已有数据保留，新对象的ID接在现有最大ID之后
+
+        Args:
+            db: 数据库会话
+
+        Returns:
+            各类对象的数量
+        """
+        def next_id(model) -> int:
+            return (db.query(func.max(model.id)).scalar() or 0) + 1
+
+        def insert_chunks(model, rows: Iterator[Dict[str, Any]]) -> None:
+            chunk: List[Dict[str, Any]] = []
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) >= _INSERT_CHUNK_SIZE:
+                    db.execute(insert(model), chunk)
+                    chunk = []
+            if chunk:
+                db.execute(insert(model), chunk)
+
+        source_base, table_base, column_base = next_id(DataSource), next_id(TableMetadata), next_id(ColumnMetadata)
+        lineage_base = next_id(LineageRelation)
+        source_ids = {source["name"]: source_base + index for index, source in enumerate(self.data_sources)}
+        per_table = self.spec.columns_per_table
+
+        def column_id(table_index: int, column_index: int) -> int:
+            return column_base + table_index * per_table + column_index
+
+        insert_chunks(DataSource, (
+            {"id": source_ids[source["name"]], **source, "type": DataSourceType(source["type"])}
+            for source in self.data_sources
+        ))
+        insert_chunks(TableMetadata, (
+            {
+                "id": table_base + index, "data_source_id": source_ids[table["data_source_name"]],
+                "name": table["name"], "schema_name": table["schema_name"],
+                "description": table["description"], "properties": table["properties"]
+            }
+            for index, table in enumerate(self.tables)
+        ))
+        insert_chunks(ColumnMetadata, (
+            {
+                "id": column_id(index, column_index), "table_id": table_base + index,
+                **column, "is_primary_key": int(column["is_primary_key"])
+            }
+            for index in range(len(self.tables))
+            for column_index, column in enumerate(self.columns(index))
+        ))
+        insert_chunks(LineageRelation, (
+            {
+                "id": lineage_base + edge_index, "source_table_ids": [table_base + source],
+                "target_table_id": table_base + target, "relation_type": "ETL",
+                "description": None, "relation_details": {"transformation_logic": "synthetic"}
+            }
+            for edge_index, (source, target) in enumerate(self.edges)
+        ))
+        insert_chunks(ColumnLineageRelation, (
+            {
+                "lineage_relation_id": lineage_base + edge_index,
+                "source_column_id": column_id(self.edges[edge_index][0], source_column),
+                "target_column_id": column_id(self.edges[edge_index][1], target_column),
+                "transformation_details": {"expression": f"COL_{source_column:03d}"}
+            }
+            for edge_index, source_column, target_column in self.column_pairs()
+        ))
+        db.commit()
+        return self.summary()
+
+    def write_upload_files(self, output_dir: str, include_parquet: bool = True) -> Dict[str, str]:
+        """
+        将目录写成上传接口接受的文件
+
+        写出table_structure.json（/api/upload/table-structure/json）、table_lineage.json、
+        column_lineage.json，以及可选的扁平布局table_structure.parquet（/api/upload/table-structure/parquet）
+
+        Args:
+            output_dir: 输出目录，不存在时创建
+            include_parquet: 是否写出Parquet格式的表结构文件
+
+        Returns:
+            文件类型到文件路径的映射
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        paths = {
+            "table_structure_json": os.path.join(output_dir, "table_structure.json"),
+            "table_lineage_json": os.path.join(output_dir, "table_lineage.json"),
+            "column_lineage_json": os.path.join(output_dir, "column_lineage.json")
+        }
+
+        with open(paths["table_structure_json"], "w", encoding="utf-8") as f:
+            json.dump({
+                "data_sources": self.data_sources,
+                "tables": self.tables,
+                "columns": [
+                    {"data_source_name": table["data_source_name"], "table_name": table["name"], **column}
+                    for index, table in enumerate(self.tables)
+                    for column in self.columns(index)
+                ]
+            }, f, ensure_ascii=False)
+
+        with open(paths["table_lineage_json"], "w", encoding="utf-8") as f:
+            json.dump({"lineages": [
+                {**self._lineage_endpoints(source, target), "relation_type": "ETL", "description": None,
+                 "relation_details": {"transformation_logic": "synthetic"}}
+                for source, target in self.edges
+            ]}, f, ensure_ascii=False)
+
+        with open(paths["column_lineage_json"], "w", encoding="utf-8") as f:
+            json.dump({"column_lineages": [
+                {**self._lineage_endpoints(*self.edges[edge_index]),
+                 "source_column_name": f"COL_{source_column:03d}", "target_column_name": f"COL_{target_column:03d}",
+                 "relation_type": "ETL", "transformation_details": {"expression": f"COL_{source_column:03d}"}}
+                for edge_index, source_column, target_column in self.column_pairs()
+            ]}, f, ensure_ascii=False)
+
+        if include_parquet:
+            paths["table_structure_parquet"] = os.path.join(output_dir, "table_structure.parquet")
+            self._write_table_structure_parquet(paths["table_structure_parquet"])
+        return paths
+
+    def _lineage_endpoints(self, source: int, target: int) -> Dict[str, str]:
+        return {
+            "source_db_name": self.tables[source]["data_source_name"], "source_table_name": self.tables[source]["name"],
+            "target_db_name": self.tables[target]["data_source_name"], "target_table_name": self.tables[target]["name"]
+        }
+
+    def _write_table_structure_parquet(self, path: str) -> None:
+        """按TABLE_STRUCTURE_COLUMNS布局每个字段一行，逐表追加写入"""
+        schema = pa.schema([
+            (name, pa.bool_() if name == "is_primary_key" else pa.string()) for name in TABLE_STRUCTURE_COLUMNS
+        ])
+        with pq.ParquetWriter(path, schema) as writer:
+            for index, table in enumerate(self.tables):
+                rows = [
+                    {
+                        "data_source_name": table["data_source_name"], "schema_name": table["schema_name"],
+                        "table_name": table["name"], "table_description": table["description"],
+                        "table_properties": json.dumps(table["properties"]),
+                        "column_name": column["name"], "data_type": column["data_type"],
+                        "column_description": column["description"], "is_primary_key": column["is_primary_key"],
+                        "column_properties": json.dumps(column["properties"])
+                    }
+                    for column in self.columns(index)
+                ]
+                writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+
+
+def generate_catalog(spec: Optional[CatalogSpec] = None, **kwargs: Any) -> SyntheticCatalog:
+    """
+    生成合成目录
+
+    Args:
+        spec: 目录参数，未提供时由关键字参数构造CatalogSpec
+
+    Returns:
+        SyntheticCatalog
+    """
+    return SyntheticCatalog(spec or CatalogSpec(**kwargs))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="生成合成元数据目录")
+    for name, field in CatalogSpec.model_fields.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(field.default), default=field.default,
+                            help=field.description)
+    parser.add_argument("--output-dir", help="写出上传文件的目录")
+    parser.add_argument("--database-url", help="直接写入的元数据库URL，如sqlite:///bench.db")
+    args = parser.parse_args()
+
+    spec = CatalogSpec(**{name: getattr(args, name) for name in CatalogSpec.model_fields})
+    catalog = generate_catalog(spec)
+    print(json.dumps(catalog.summary(), ensure_ascii=False))
+    if args.output_dir:
+        for kind, path in catalog.write_upload_files(args.output_dir).items():
+            print(f"{kind}: {path}")
+    if args.database_url:
+        from sqlalchemy.orm import sessionmaker
+        from models import Base, create_metadata_engine, migrate_schema
+
+        db_engine = create_metadata_engine(args.database_url)
+        Base.metadata.create_all(bind=db_engine)
+        migrate_schema(db_engine)
+        session = sessionmaker(bind=db_engine)()
+        try:
+            catalog.write_to_db(session)
+        finally:
+            session.close()
+        print(f"已写入 {args.database_url}")
@@ -0,0 +1,264 @@
+"""
+导入和血缘查询热点路径的基准测试
+
+对每个规模预设生成合成目录，在独立的临时SQLite元数据库上通过TestClient计时：
+- 上传接口：表结构JSON/Parquet（含未变化文件的重复导入）、表级血缘JSON、字段级血缘JSON
+- 查询接口：GET /api/tables、GET /api/lineages/table、GET /api/lineages/column、表级/字段级血缘图
+- 服务层：LineageService.get_table_lineage_graph、get_column_lineage_graph
+
+结果写成JSON，可以用--compare与之前的结果比较各用例的中位耗时。
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.catalog_generator import CatalogSpec, SyntheticCatalog, generate_catalog
+from models import Base, DataSource, DataSourceType, TableMetadata, ColumnMetadata, create_metadata_engine, get_db
+
+logger = logging.getLogger(__name__)
+
+# 规模预设
+SCALES = {
+    "small": CatalogSpec(tables=200, columns_per_table=10, depth=4),
+    "medium": CatalogSpec(tables=2000, columns_per_table=20, depth=6),
+    "large": CatalogSpec(tables=10000, columns_per_table=20, depth=8, fan_in=4),
+}
+# 中位耗时超过基线的该倍数时在比较报告中标记为变慢
+REGRESSION_THRESHOLD = 1.2
+
+
+def _stats(samples: List[float]) -> Dict[str, Any]:
+    """将秒为单位的耗时样本汇总为毫秒统计"""
+    ordered = sorted(samples)
+    p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+    return {
+        "repeats": len(ordered),
+        "min_ms": round(ordered[0] * 1000, 3),
+        "median_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(ordered[p95_index] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3)
+    }
+
+
+def _timed(func: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class _Database:
+    """临时SQLite元数据库，在期间将应用的get_db依赖指向它"""
+
+    def __init__(self, app, directory: str, name: str):
+        self.app = app
+        self.engine = create_metadata_engine(
+            f"sqlite:///{os.path.join(directory, name)}", connect_args={"check_same_thread": False}
+        )
+        Base.metadata.create_all(bind=self.engine)
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+
+    def _get_db(self):
+        db = self.session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def __enter__(self):
+        self.app.dependency_overrides[get_db] = self._get_db
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.app.dependency_overrides.pop(get_db, None)
+        self.engine.dispose()
+
+
+def _upload(client, url: str, path: str) -> None:
+    with open(path, "rb") as f:
+        response = client.post(url, files={"file": (os.path.basename(path), f)})
+    if response.status_code != 200 or response.json().get("status") == "error":
+        raise RuntimeError(f"上传失败 {url}: {response.status_code} {response.text[:500]}")
+
+
+def bench_uploads(app, client, catalog: SyntheticCatalog, directory: str) -> Dict[str, Any]:
+    """
+    计时上传接口，每个用例只执行一次（导入会改变数据库状态）
+
+    JSON文件依次导入同一个空库；Parquet表结构导入另一个只有数据源的空库，随后再导入同一文件一次，
+    计时内容哈希跳过未变化表的路径
+    """
+    paths = catalog.write_upload_files(os.path.join(directory, "files"))
+    results = {}
+
+    with _Database(app, directory, "upload_json.db"):
+        for case, url, kind in [
+            ("upload_table_structure_json", "/api/upload/table-structure/json", "table_structure_json"),
+            ("upload_table_lineage_json", "/api/upload/table-lineage/json", "table_lineage_json"),
+            ("upload_column_lineage_json", "/api/upload/column-lineage/json", "column_lineage_json"),
+        ]:
+            results[case] = _stats([_timed(lambda: _upload(client, url, paths[kind]))])
+
+    with _Database(app, directory, "upload_parquet.db") as database:
+        with database.session_factory() as db:
+            db.execute(insert(DataSource), [
+                {**source, "type": DataSourceType(source["type"])} for source in catalog.data_sources
+            ])
+            db.commit()
+        url = "/api/upload/table-structure/parquet"
+        results["upload_table_structure_parquet"] = _stats([
+            _timed(lambda: _upload(client, url, paths["table_structure_parquet"]))
+        ])
+        results["reimport_table_structure_parquet_unchanged"] = _stats([
+            _timed(lambda: _upload(client, url, paths["table_structure_parquet"]))
+        ])
+    return results
+
+
+def bench_queries(app, client, catalog: SyntheticCatalog, directory: str, repeats: int) -> Dict[str, Any]:
+    """计时查询接口和血缘图服务，血缘图在中间层轮换选取若干张表和其主键字段"""
+    from services.lineage_service import LineageService
+
+    results = {}
+    with _Database(app, directory, "queries.db") as database:
+        with database.session_factory() as db:
+            catalog.write_to_db(db)
+            middle_layer = catalog.spec.depth // 2
+            table_ids = [
+                table_id for (table_id,) in db.query(TableMetadata.id)
+                .filter(TableMetadata.schema_name == f"LAYER_{middle_layer:02d}")
+                .order_by(TableMetadata.id).limit(5)
+            ]
+            column_ids = [
+                column_id for (column_id,) in db.query(ColumnMetadata.id)
+                .filter(ColumnMetadata.table_id.in_(table_ids), ColumnMetadata.name == "COL_000")
+                .order_by(ColumnMetadata.id)
+            ]
+
+        def get(url: str) -> None:
+            response = client.get(url)
+            if response.status_code != 200:
+                raise RuntimeError(f"请求失败 {url}: {response.status_code} {response.text[:500]}")
+
+        cases: Dict[str, Callable[[int], None]] = {
+            "get_tables": lambda i: get("/api/tables?limit=100"),
+            "get_tables_keyword": lambda i: get(f"/api/tables?keyword=T{middle_layer:02d}&limit=100"),
+            "get_table_lineages": lambda i: get("/api/lineages/table?limit=1000"),
+            "get_column_lineages": lambda i: get("/api/lineages/column?limit=1000"),
+            "get_table_lineage_graph_api": lambda i: get(f"/api/lineages/table/graph/{table_ids[i % len(table_ids)]}?depth=3"),
+            "get_column_lineage_graph_api": lambda i: get(f"/api/lineages/column/graph/{column_ids[i % len(column_ids)]}?depth=3"),
+        }
+        with database.session_factory() as db:
+            cases["service_table_lineage_graph"] = lambda i: LineageService.get_table_lineage_graph(
+                db, table_ids[i % len(table_ids)], depth=3
+            )
+            cases["service_column_lineage_graph"] = lambda i: LineageService.get_column_lineage_graph(
+                db, column_ids[i % len(column_ids)], depth=3
+            )
+            for case, func in cases.items():
+                # 第一次执行作为预热，不计入结果
+                func(0)
+                results[case] = _stats([_timed(lambda: func(i)) for i in range(repeats)])
+                db.expire_all()
+    return results
+
+
+def run(scales: List[str], repeats: int, include_uploads: bool = True) -> Dict[str, Any]:
+    """
+    运行基准测试
+
+    Args:
+        scales: 规模预设名称，见SCALES
+        repeats: 查询用例的重复次数
+        include_uploads: 是否计时上传接口
+
+    Returns:
+        测试结果，包含运行环境、各规模的目录参数、对象数量和各用例的耗时统计
+    """
+    from fastapi.testclient import TestClient
+    from app import app
+
+    # 导入过程中逐行记录的INFO日志会主导耗时
+    logging.getLogger().setLevel(logging.WARNING)
+
+    report = {
+        "generated_at": datetime.utcnow().isoformat(),
+        "git_commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "scales": {}
+    }
+    with TestClient(app) as client:
+        for scale in scales:
+            spec = SCALES[scale]
+            catalog = generate_catalog(spec)
+            results: Dict[str, Any] = {}
+            with tempfile.TemporaryDirectory(prefix=f"bench_{scale}_") as directory:
+                if include_uploads:
+                    results.update(bench_uploads(app, client, catalog, directory))
+                results.update(bench_queries(app, client, catalog, directory, repeats))
+            report["scales"][scale] = {"spec": spec.model_dump(), "counts": catalog.summary(), "results": results}
+            print(f"[{scale}] {json.dumps(catalog.summary(), ensure_ascii=False)}")
+            for case, stats in results.items():
+                print(f"  {case:45s} median {stats['median_ms']:>10.1f} ms  p95 {stats['p95_ms']:>10.1f} ms")
+    return report
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = REGRESSION_THRESHOLD) -> List[str]:
+    """
+    比较两次结果中相同规模、相同用例的中位耗时
+
+    Returns:
+        报告行，比值超过threshold的用例标记为REGRESSION
+    """
+    lines = [f"{'scale':8s} {'case':45s} {'baseline_ms':>12s} {'current_ms':>12s} {'ratio':>7s}"]
+    for scale, scale_result in current["scales"].items():
+        baseline_results = baseline.get("scales", {}).get(scale, {}).get("results", {})
+        for case, stats in scale_result["results"].items():
+            if case not in baseline_results:
+                continue
+            before, after = baseline_results[case]["median_ms"], stats["median_ms"]
+            ratio = after / before if before else float("inf")
+            flag = "  REGRESSION" if ratio > threshold else ""
+            lines.append(f"{scale:8s} {case:45s} {before:12.1f} {after:12.1f} {ratio:7.2f}{flag}")
+    return lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="导入和血缘查询基准测试")
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=["small", "medium"])
+    parser.add_argument("--repeats", type=int, default=10, help="查询用例的重复次数")
+    parser.add_argument("--skip-uploads", action="store_true", help="不计时上传接口")
+    parser.add_argument("--output", help="结果JSON文件路径")
+    parser.add_argument("--compare", help="与之前的结果JSON文件比较")
+    args = parser.parse_args()
+
+    report = run(args.scales, args.repeats, include_uploads=not args.skip_uploads)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print("\n".join(compare(json.load(f), report)))
@@ -16,9 +16,107 @@ class Settings(BaseSettings):
     # 数据库连接池配置
     db_pool_size: int = 10
     db_max_overflow: int = 20
-    
+
+    # 文件导入配置
+    # 每处理多少行执行一次flush，将暂存的写操作批量下发到数据库
+    import_flush_batch_size: int = 500
+    # 每处理多少行提交一次事务，0表示整个导入只在结束时提交一次（超大文件可分块提交）
+    import_commit_every: int = 0
+    # 后台导入任务的工作线程数（SQLite同一时刻只允许一个写事务，使用其他数据库时可适当调大）
+    import_job_workers: int = 1
+    # 每个导入任务最多保留的逐行错误条数
+    import_job_max_errors: int = 1000
+    # Excel多工作表并行解析的进程数，0表示自动（不超过4），1表示不使用进程池
+    excel_parse_workers: int = 0
+    # 文件小于该字节数时在当前进程解析，避免进程间传输文件内容的开销
+    excel_parallel_min_bytes: int = 1024 * 1024
+    # JSON/NDJSON血缘文件流式解析时每次读取的字节数，以及每批解析、处理的记录数
+    json_stream_block_size: int = 1024 * 1024
+    json_stream_chunk_size: int = 1000
+    # Parquet/Arrow文件每批读取和批量写入的行数
+    columnar_batch_size: int = 5000
+
+    # 分块上传配置
+    # 分块暂存目录，每个上传会话一个子目录，保存分块文件和清单
+    upload_staging_dir: str = "../upload_staging"
+    # 默认分块大小和允许的最大分块大小（字节）
+    upload_chunk_size: int = 8 * 1024 * 1024
+    upload_max_chunk_size: int = 64 * 1024 * 1024
+    # 未完成的上传会话保留时长（小时），超时后清理
+    upload_session_ttl_hours: int = 24
+    # 边上传边导入时检查新分块的间隔（秒），以及等待下一个分块的最长时间（秒），超时后导入失败
+    upload_stream_poll_seconds: float = 0.5
+    upload_stream_idle_seconds: int = 600
+
     # 数据源连接配置将通过配置文件或API动态管理
     
+    # 从数据源提取并导入元数据时每批处理的表数：导入按批预取已有的表和字段、批量写入后释放会话中的对象，
+    # Elasticsearch抽样时每批发出一次msearch
+    metadata_stream_batch_size: int = 200
+    # API中异步提取时MongoDB集合、Elasticsearch抽样批次的并发数（connection_config中的async_concurrency），
+    # 以及在工作线程中执行的同步提取（Oracle、未安装异步驱动时）最多占用的线程数
+    async_extract_concurrency: int = 16
+    async_extract_threads: int = 4
+    
+    # 提取快照配置：每次从数据源提取的结果保存为压缩的NDJSON快照，可不连接数据源重新导入
+    extraction_snapshot_enabled: bool = True
+    # 快照目录，每个数据源一个子目录
+    extraction_snapshot_dir: str = "../extraction_snapshots"
+    # 压缩方式，zstd（需要安装zstandard，未安装时使用gzip）或gzip
+    extraction_snapshot_codec: str = "zstd"
+    # 每个数据源保留的快照数，以及快照的最长保留天数（0表示不按时间清理，最新的快照始终保留）
+    extraction_snapshot_retention: int = 10
+    extraction_snapshot_max_age_days: int = 30
+    
+    # 元数据定时刷新配置（数据源的refresh_policy）
+    # 是否在服务启动时运行调度线程（多进程部署时只应在一个进程中启用）
+    refresh_scheduler_enabled: bool = True
+    # 调度线程重新读取刷新策略的间隔（秒）
+    refresh_poll_seconds: int = 30
+    # 同时执行的刷新数（SQLite同一时刻只允许一个写事务，使用其他数据库时可适当调大），
+    # 以及各数据源类型同时执行的刷新数上限，未列出的类型只受前者限制
+    refresh_max_workers: int = 1
+    refresh_type_limits: Dict[str, int] = {"oracle": 1}
+    # 刷新策略未指定jitter_seconds时，在触发时间后随机延迟的最大秒数，避免同一时刻触发的刷新同时连接数据源
+    refresh_jitter_seconds: int = 60
+    # 每个数据源保留的刷新记录条数
+    refresh_run_history_limit: int = 200
+    
+    # Oracle元数据提取配置，可在数据源的connection_config中用arraysize、prefetchrows单独覆盖
+    # 每次fetchmany取回的行数，以及执行查询时随响应预取的行数
+    oracle_arraysize: int = 1000
+    oracle_prefetchrows: int = 1000
+    # 按模式并行提取的线程数（connection_config中的extract_workers），以及会话池的初始、最大会话数和每次增长的会话数
+    # （connection_config中的pool_min、pool_max、pool_increment）
+    oracle_extract_workers: int = 4
+    # 并行提取时每个模式已提取、等待按顺序生成的表数上限（connection_config中的extract_buffer），
+    # 达到上限时该模式的线程暂停提取，内存中最多保留extract_workers*extract_buffer张表
+    oracle_extract_buffer: int = 100
+    oracle_pool_min: int = 1
+    oracle_pool_max: int = 4
+    oracle_pool_increment: int = 1
+    
+    # Elasticsearch元数据提取配置
+    # 时间序列索引名末尾时间部分（年月、年月日或年月日时）的正则表达式，名称只差该部分且映射相同的索引合并为一个逻辑表（如logs-*），
+    # 可在connection_config中用index_collapse_pattern覆盖，设为空字符串时不合并
+    es_time_series_suffix: str = r"(?<=[-_.])\d{4}(?:[-_.]?\d{2}){1,3}$"
+    # 每个逻辑表抽样统计字段分布的文档数（connection_config中的sample_size），0表示不抽样
+    es_sample_size: int = 0
+    
+    # MongoDB元数据提取配置，可在connection_config中用sample_size、schema_depth覆盖
+    # 推断集合结构时$sample抽样的文档数，以及展开嵌套文档的最大层数
+    mongo_sample_size: int = 1000
+    mongo_schema_depth: int = 5
+    # 按集合并行提取的线程数（connection_config中的extract_workers），MongoClient连接池的最大连接数（maxPoolSize），
+    # 以及单个集合提取的超时时间（毫秒，collection_timeout_ms）
+    mongo_extract_workers: int = 8
+    mongo_max_pool_size: int = 16
+    mongo_collection_timeout_ms: int = 60000
+    
+    # 文档型数据源（MongoDB、Elasticsearch）抽样推断结构时跟踪的字段路径上限，以及每个数组最多统计的元素数
+    schema_inference_max_paths: int = 2000
+    schema_inference_max_array_elements: int = 100
+    
     # API配置
     api_prefix: str = "/api"
     
@@ -0,0 +1,294 @@
+"""
+基于asyncio的元数据提取
+
+MongoDB和Elasticsearch使用异步驱动（motor、AsyncElasticsearch），各集合/各抽样批次在同一个事件循环中并发执行，
+并发数受信号量限制；Oracle没有异步驱动，提取放到工作线程中执行。未安装异步驱动时，MongoDB和Elasticsearch
+也退回到在工作线程中执行同步提取。提取期间事件循环不被阻塞，其他API请求可以正常处理。
+
+与MetadataExtractor.stream_metadata的返回值相同，只是tables为异步迭代器；iterate_in_thread可以在工作线程中
+同步消费它，供同步的导入服务边提取边导入。
+"""
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+import anyio
+import anyio.from_thread
+import anyio.to_thread
+
+from config.settings import settings
+from core.connection_factory import ConnectionFactory
+from core.metadata_extractor import MetadataExtractor, _MONGODB_SYSTEM_DATABASES
+from utils.json_stream_utils import chunked
+
+logger = logging.getLogger(__name__)
+
+# 在工作线程中执行的同步提取共用的线程数上限，首次使用时创建（需要在事件循环中创建）
+_thread_limiter: Optional[anyio.CapacityLimiter] = None
+# 已提示过未安装异步驱动的数据源类型
+_warned_missing_drivers = set()
+
+
+def _get_thread_limiter() -> anyio.CapacityLimiter:
+    global _thread_limiter
+    if _thread_limiter is None:
+        _thread_limiter = anyio.CapacityLimiter(settings.async_extract_threads)
+    return _thread_limiter
+
+
+def _import_async_driver(data_source_type: str) -> Optional[Any]:
+    """按需导入异步驱动，未安装时返回None"""
+    try:
+        if data_source_type == "MONGODB":
+            from motor.motor_asyncio import AsyncIOMotorClient
+            return AsyncIOMotorClient
+        if data_source_type == "ELASTICSEARCH":
+            # AsyncElasticsearch依赖aiohttp，未安装时在创建客户端时才报错
+            import aiohttp  # noqa: F401
+            from elasticsearch import AsyncElasticsearch
+            return AsyncElasticsearch
+    except ImportError:
+        if data_source_type not in _warned_missing_drivers:
+            _warned_missing_drivers.add(data_source_type)
+            logger.warning(f"未安装{data_source_type}的异步驱动（motor或aiohttp），在工作线程中执行同步提取")
+    return None
+
+
+async def _ordered_concurrent(func: Callable[[Any], Awaitable[Any]], items: Iterable[Any],
+                              concurrency: int) -> AsyncIterator[Tuple[Any, "asyncio.Task"]]:
+    """
+    并发对每个元素执行func，同时执行的不超过concurrency个，按items的顺序逐个生成(元素, 已完成的Task)
+
+    最多只有concurrency*2个任务已创建但未被取走；调用方提前停止迭代时取消未完成的任务
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(item):
+        async with semaphore:
+            return await func(item)
+
+    pending = deque()
+    try:
+        for item in items:
+            pending.append((item, asyncio.ensure_future(run(item))))
+            if len(pending) >= concurrency * 2:
+                item, task = pending.popleft()
+                await asyncio.wait([task])
+                yield item, task
+        while pending:
+            item, task = pending.popleft()
+            await asyncio.wait([task])
+            yield item, task
+    finally:
+        for _, task in pending:
+            task.cancel()
+
+
+def iterate_in_thread(tables: AsyncIterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    在anyio工作线程（如run_in_threadpool、anyio.to_thread.run_sync中）同步迭代事件循环上的异步迭代器
+
+    每次取下一项时回到事件循环执行，迭代结束或提前停止时关闭异步迭代器
+    """
+    async def next_table():
+        return await tables.__anext__()
+
+    try:
+        while True:
+            try:
+                table_info = anyio.from_thread.run(next_table)
+            except StopAsyncIteration:
+                return
+            yield table_info
+    finally:
+        if hasattr(tables, "aclose"):
+            anyio.from_thread.run(tables.aclose)
+
+
+class AsyncMetadataExtractor:
+    """基于asyncio的元数据提取器，tables以异步迭代器逐表生成"""
+
+    @staticmethod
+    async def stream_metadata(data_source_type: str, connection_params: Dict[str, Any],
+                              since: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        根据数据源类型提取元数据
+
+        参数和返回值同MetadataExtractor.stream_metadata，tables为异步迭代器，需要迭代完或调用aclose以释放连接
+
+        Args:
+            data_source_type: 数据源类型
+            connection_params: 连接参数，并发数由async_concurrency控制（默认settings.async_extract_concurrency）
+            since: 增量提取的水位线，目前只对Oracle生效
+
+        Returns:
+            包含元数据信息的字典
+        """
+        data_source_type = data_source_type.upper()
+        try:
+            if data_source_type == "MONGODB":
+                client_class = _import_async_driver(data_source_type)
+                if client_class is not None:
+                    return await AsyncMetadataExtractor._stream_mongodb_metadata(client_class, connection_params)
+            elif data_source_type == "ELASTICSEARCH":
+                client_class = _import_async_driver(data_source_type)
+                if client_class is not None:
+                    return await AsyncMetadataExtractor._stream_elasticsearch_metadata(client_class, connection_params)
+            elif data_source_type != "ORACLE":
+                raise ValueError(f"不支持的数据源类型: {data_source_type}")
+
+            # Oracle（或未安装异步驱动时）在工作线程中执行同步提取
+            return await AsyncMetadataExtractor._stream_in_thread(data_source_type, connection_params, since)
+        except Exception as e:
+            logger.error(f"提取元数据失败: {e}")
+            raise
+
+    @staticmethod
+    async def extract_metadata(data_source_type: str, connection_params: Dict[str, Any],
+                               since: Optional[datetime] = None) -> Dict[str, Any]:
+        """提取元数据，tables为所有表的列表"""
+        metadata = await AsyncMetadataExtractor.stream_metadata(data_source_type, connection_params, since)
+        return {**metadata, "tables": [table_info async for table_info in metadata["tables"]]}
+
+    @staticmethod
+    async def _stream_in_thread(data_source_type: str, connection_params: Dict[str, Any],
+                                since: Optional[datetime]) -> Dict[str, Any]:
+        """在工作线程中执行同步提取，每张表的读取也在工作线程中进行"""
+        limiter = _get_thread_limiter()
+        metadata = await anyio.to_thread.run_sync(
+            MetadataExtractor.stream_metadata, data_source_type, connection_params, since, limiter=limiter
+        )
+        tables = iter(metadata["tables"])
+        done = object()
+
+        async def iterate() -> AsyncIterator[Dict[str, Any]]:
+            try:
+                while True:
+                    table_info = await anyio.to_thread.run_sync(next, tables, done, limiter=limiter)
+                    if table_info is done:
+                        return
+                    yield table_info
+            finally:
+                # 提前停止时关闭同步生成器，归还Oracle会话等资源
+                if hasattr(tables, "close"):
+                    await anyio.to_thread.run_sync(tables.close, limiter=limiter)
+
+        metadata["tables"] = iterate()
+        return metadata
+
+    @staticmethod
+    async def _stream_mongodb_metadata(client_class: Any, connection_params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        用motor提取MongoDB的元数据
+
+        集合列表取完后各集合并发提取，每个集合受collection_timeout_ms限制（服务端maxTimeMS和客户端超时），
+        失败的集合记录在failed_tables和errors中，不影响其他集合
+        """
+        options = MetadataExtractor._mongodb_options(connection_params)
+        concurrency = int(connection_params.get("async_concurrency") or settings.async_extract_concurrency)
+        client = client_class(**ConnectionFactory.mongodb_client_kwargs(connection_params))
+        metadata = {
+            "tables": [],
+            "failed_tables": [],
+            "errors": []
+        }
+        try:
+            await client.admin.command("ping")
+            collections = []
+            for db_name in sorted(await client.list_database_names()):
+                # 跳过系统数据库
+                if db_name in _MONGODB_SYSTEM_DATABASES:
+                    continue
+                # 获取数据库中的所有集合，跳过系统集合
+                collections.extend(
+                    (db_name, collection_name)
+                    for collection_name in sorted(await client[db_name].list_collection_names())
+                    if not collection_name.startswith("system.")
+                )
+        except Exception:
+            client.close()
+            raise
+
+        async def extract(key: Tuple[str, str]) -> Dict[str, Any]:
+            collection = client[key[0]][key[1]]
+            max_time_ms = int(options["timeout"] * 1000)
+
+            async def run():
+                # 获取集合的文档数量
+                if options["exact_count"]:
+                    row_count = await collection.count_documents({}, maxTimeMS=max_time_ms)
+                else:
+                    row_count = await collection.estimated_document_count(maxTimeMS=max_time_ms)
+                # 在服务端抽样统计字段路径和类型
+                cursor = collection.aggregate(options["pipeline"], allowDiskUse=True, maxTimeMS=max_time_ms)
+                rows = await cursor.to_list(length=None)
+                return MetadataExtractor._mongodb_table_info(key[0], key[1], row_count, rows)
+
+            return await asyncio.wait_for(run(), options["timeout"])
+
+        async def iterate() -> AsyncIterator[Dict[str, Any]]:
+            try:
+                if collections:
+                    logger.info(f"并发提取MongoDB元数据: {len(collections)}个集合, 并发数{concurrency}")
+                async for (db_name, collection_name), task in _ordered_concurrent(extract, collections, concurrency):
+                    error = task.exception()
+                    if error is not None:
+                        # 单个集合失败不影响其他集合
+                        message = str(error) or type(error).__name__
+                        logger.error(f"提取MongoDB集合 {db_name}.{collection_name} 失败: {message}")
+                        metadata["failed_tables"].append((db_name, collection_name))
+                        metadata["errors"].append({"schema": db_name, "name": collection_name, "error": message})
+                        continue
+                    yield task.result()
+            finally:
+                client.close()
+
+        metadata["tables"] = iterate()
+        return metadata
+
+    @staticmethod
+    async def _stream_elasticsearch_metadata(client_class: Any, connection_params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        用AsyncElasticsearch提取Elasticsearch的元数据
+
+        映射和文档数的两个请求并发发出；需要抽样时每settings.metadata_stream_batch_size个逻辑表一次msearch，
+        各批次并发执行
+        """
+        sample_size = int(connection_params.get("sample_size", settings.es_sample_size) or 0)
+        concurrency = int(connection_params.get("async_concurrency") or settings.async_extract_concurrency)
+        client = client_class(**ConnectionFactory.elasticsearch_client_kwargs(connection_params))
+        try:
+            if not await client.ping():
+                raise Exception("无法连接到Elasticsearch服务器")
+            target = MetadataExtractor._elasticsearch_target(connection_params)
+            mappings, cat_rows = await asyncio.gather(
+                client.indices.get_mapping(**MetadataExtractor._elasticsearch_mapping_request(target)),
+                client.cat.indices(**MetadataExtractor._elasticsearch_cat_request(target))
+            )
+        except Exception:
+            await client.close()
+            raise
+        tables = MetadataExtractor._plan_elasticsearch_tables(mappings, cat_rows, connection_params)
+
+        async def sample(batch):
+            responses = await client.msearch(searches=MetadataExtractor._elasticsearch_sample_searches(batch, sample_size))
+            MetadataExtractor._apply_elasticsearch_samples(batch, responses["responses"])
+            return batch
+
+        async def iterate() -> AsyncIterator[Dict[str, Any]]:
+            try:
+                if sample_size <= 0:
+                    for table_info in tables:
+                        yield table_info
+                    return
+                batches = chunked(tables, settings.metadata_stream_batch_size)
+                async for _, task in _ordered_concurrent(sample, batches, concurrency):
+                    # 抽样请求整体失败时抛出
+                    for table_info in task.result():
+                        yield table_info
+            finally:
+                await client.close()
+
+        return {"tables": iterate()}
@@ -1,17 +1,32 @@
-from typing import Dict, Any, Optional
-import cx_Oracle
+from typing import Dict, Any, Optional, Tuple, TYPE_CHECKING
+import threading
 from elasticsearch import Elasticsearch
 from pymongo import MongoClient
 import logging
 from config.settings import settings
 
+if TYPE_CHECKING:
+    import cx_Oracle
+
 logger = logging.getLogger(__name__)
 
+
+def _import_cx_oracle() -> Any:
+    """按需导入cx_Oracle，未安装时只有连接Oracle数据源才报错，其他数据源不受影响"""
+    try:
+        import cx_Oracle
+    except ImportError as e:
+        raise ImportError("连接Oracle数据源需要安装cx_Oracle") from e
+    return cx_Oracle
+
 class ConnectionFactory:
     """数据源连接工厂类，负责创建和管理不同类型数据源的连接"""
     
     # 存储已创建的连接对象，避免重复创建
     _connections: Dict[str, Any] = {}
+    # 存储Oracle会话池，用于并行提取元数据，按连接目标、用户和会话池大小区分
+    _pools: Dict[Tuple[Any, ...], Any] = {}
+    _pool_lock = threading.Lock()
     
     @classmethod
     def get_connection(cls, data_source_type: str, connection_params: Dict[str, Any]) -> Any:
@@ -85,31 +100,100 @@ class ConnectionFactory:
             return False
     
     @staticmethod
-    def _create_oracle_connection(params: Dict[str, Any]) -> cx_Oracle.Connection:
+    def _create_oracle_connection(params: Dict[str, Any]) -> "cx_Oracle.Connection":
         """
         创建Oracle数据库连接
         
         参数需包含：host, port, service_name, user, password
         """
-        dsn = cx_Oracle.makedsn(
-            params.get("host", "localhost"),
-            params.get("port", 1521),
-            service_name=params.get("service_name", "ORCLPDB1")
-        )
-        
+        cx_Oracle = _import_cx_oracle()
         connection = cx_Oracle.connect(
             user=params.get("user"),
             password=params.get("password"),
-            dsn=dsn
+            dsn=ConnectionFactory._oracle_dsn(params)
         )
         
         # 设置会话参数
+        ConnectionFactory._init_oracle_session(connection)
+        
+        return connection
+    
+    @classmethod
+    def get_oracle_pool(cls, connection_params: Dict[str, Any]) -> "cx_Oracle.SessionPool":
+        """
+        获取Oracle会话池，连接目标、用户、密码和会话池大小相同时复用同一个会话池
+        
+        owners、arraysize等提取选项不影响会话池，修改这些选项不会创建新的会话池；
+        多个线程（如定时刷新）同时获取时只创建一个
+        
+        Args:
+            connection_params: 连接参数，同_create_oracle_connection，另可包含pool_min、pool_max、pool_increment
+            
+        Returns:
+            cx_Oracle会话池，由调用方acquire/release连接
+        """
+        pool_id = cls._oracle_pool_id(connection_params)
+        with cls._pool_lock:
+            if pool_id not in cls._pools:
+                cls._pools[pool_id] = cls._create_oracle_pool(connection_params)
+            return cls._pools[pool_id]
+    
+    @classmethod
+    def _oracle_pool_id(cls, params: Dict[str, Any]) -> Tuple[Any, ...]:
+        """会话池的缓存键：连接目标、用户、密码和会话池大小"""
+        return (
+            cls._oracle_dsn(params),
+            params.get("user"),
+            params.get("password"),
+            *cls._oracle_pool_sizes(params)
+        )
+    
+    @staticmethod
+    def _oracle_pool_sizes(params: Dict[str, Any]) -> Tuple[int, int, int]:
+        """会话池的(最小会话数, 最大会话数, 增长步长)"""
+        return (
+            int(params.get("pool_min") or settings.oracle_pool_min),
+            int(params.get("pool_max") or settings.oracle_pool_max),
+            int(params.get("pool_increment") or settings.oracle_pool_increment)
+        )
+    
+    @staticmethod
+    def _create_oracle_pool(params: Dict[str, Any]) -> "cx_Oracle.SessionPool":
+        """
+        创建Oracle会话池
+        
+        会话数从pool_min开始，按pool_increment增长，最多pool_max个；连接都已借出时acquire等待归还
+        """
+        cx_Oracle = _import_cx_oracle()
+        pool_min, pool_max, pool_increment = ConnectionFactory._oracle_pool_sizes(params)
+        return cx_Oracle.SessionPool(
+            user=params.get("user"),
+            password=params.get("password"),
+            dsn=ConnectionFactory._oracle_dsn(params),
+            min=pool_min,
+            max=pool_max,
+            increment=pool_increment,
+            threaded=True,
+            getmode=cx_Oracle.SPOOL_ATTRVAL_WAIT,
+            # 新建会话时设置会话参数，复用的会话不再重复设置
+            sessionCallback=ConnectionFactory._init_oracle_session
+        )
+    
+    @staticmethod
+    def _oracle_dsn(params: Dict[str, Any]) -> str:
+        return _import_cx_oracle().makedsn(
+            params.get("host", "localhost"),
+            params.get("port", 1521),
+            service_name=params.get("service_name", "ORCLPDB1")
+        )
+    
+    @staticmethod
+    def _init_oracle_session(connection: "cx_Oracle.Connection", requested_tag: Optional[str] = None) -> None:
+        """设置Oracle会话参数"""
         cursor = connection.cursor()
         cursor.execute("ALTER SESSION SET NLS_LANGUAGE='SIMPLIFIED CHINESE'")
         cursor.execute("ALTER SESSION SET NLS_TERRITORY='CHINA'")
         cursor.close()
-        
-        return connection
     
     @staticmethod
     def _create_elasticsearch_connection(params: Dict[str, Any]) -> Elasticsearch:
@@ -118,6 +202,18 @@ class ConnectionFactory:
         
         参数需包含：hosts, 可能包含用户名密码或证书等
         """
+        # 创建连接
+        es = Elasticsearch(**ConnectionFactory.elasticsearch_client_kwargs(params))
+        
+        # 验证连接
+        if not es.ping():
+            raise Exception("无法连接到Elasticsearch服务器")
+        
+        return es
+    
+    @staticmethod
+    def elasticsearch_client_kwargs(params: Dict[str, Any]) -> Dict[str, Any]:
+        """由连接参数构建Elasticsearch客户端的参数，同步和异步客户端共用"""
         # 构建Elasticsearch连接参数
         es_params = {
             'hosts': params.get('hosts', ['localhost:9200'])
@@ -137,14 +233,7 @@ class ConnectionFactory:
             if 'ca_certs' in params:
                 es_params['ca_certs'] = params['ca_certs']
         
-        # 创建连接
-        es = Elasticsearch(**es_params)
-        
-        # 验证连接
-        if not es.ping():
-            raise Exception("无法连接到Elasticsearch服务器")
-        
-        return es
+        return es_params
     
     @staticmethod
     def _create_mongodb_connection(params: Dict[str, Any]) -> MongoClient:
@@ -153,14 +242,28 @@ class ConnectionFactory:
         
         参数需包含：uri或host和port，可能包含用户名密码等
         """
+        client = MongoClient(**ConnectionFactory.mongodb_client_kwargs(params))
+        
+        # 验证连接
+        client.admin.command('ping')
+        
+        return client
+    
+    @staticmethod
+    def mongodb_client_kwargs(params: Dict[str, Any]) -> Dict[str, Any]:
+        """由连接参数构建MongoClient的参数，同步客户端和motor客户端共用"""
+        # 连接池由并行提取的各线程共用
+        pool_params = {'maxPoolSize': int(params.get('maxPoolSize') or settings.mongo_max_pool_size)}
+        
         # 优先使用uri
         if 'uri' in params:
-            client = MongoClient(params['uri'])
+            mongo_params = {'host': params['uri'], **pool_params}
         else:
             # 构建连接参数
             mongo_params = {
                 'host': params.get('host', 'localhost'),
-                'port': params.get('port', 27017)
+                'port': params.get('port', 27017),
+                **pool_params
             }
             
             # 添加认证信息
@@ -169,13 +272,8 @@ class ConnectionFactory:
                 mongo_params['password'] = params['password']
                 if 'authSource' in params:
                     mongo_params['authSource'] = params['authSource']
-            
-            client = MongoClient(**mongo_params)
         
-        # 验证连接
-        client.admin.command('ping')
-        
-        return client
+        return mongo_params
     
     @classmethod
     def close_connection(cls, data_source_type: str, connection_params: Dict[str, Any]) -> None:
@@ -188,6 +286,16 @@ class ConnectionFactory:
                 logger.error(f"关闭连接失败: {e}")
             finally:
                 del cls._connections[connection_id]
+        
+        if data_source_type.upper() != "ORACLE":
+            return
+        with cls._pool_lock:
+            pool = cls._pools.pop(cls._oracle_pool_id(connection_params), None)
+        if pool is not None:
+            try:
+                pool.close(force=True)
+            except Exception as e:
+                logger.error(f"关闭会话池失败: {e}")
     
     @classmethod
     def close_all_connections(cls) -> None:
@@ -199,4 +307,14 @@ class ConnectionFactory:
                 logger.error(f"关闭连接 {connection_id} 失败: {e}")
             finally:
                 if connection_id in cls._connections:
-                    del cls._connections[connection_id]
\ No newline at end of file
+                    del cls._connections[connection_id]
+        
+        with cls._pool_lock:
+            pools = list(cls._pools.items())
+            cls._pools.clear()
+        for (dsn, user, *_), pool in pools:
+            try:
+                pool.close(force=True)
+            except Exception as e:
+                # 缓存键中含有密码，只记录连接目标和用户
+                logger.error(f"关闭会话池 {user}@{dsn} 失败: {e}")
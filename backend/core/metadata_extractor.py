@@ -1,38 +1,223 @@
-from typing import List, Dict, Any, Optional
-import cx_Oracle
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple, Callable, TYPE_CHECKING
+from collections import deque
+from itertools import groupby
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime
+import queue
+import threading
 from elasticsearch import Elasticsearch
+import pymongo
 from pymongo import MongoClient
+from pymongo.collection import Collection
 import logging
 from core.connection_factory import ConnectionFactory
+from config.settings import settings
+from utils.es_mapping_utils import (
+    normalize_patterns, index_selected, flatten_mapping_properties, mapping_hash, collapse_time_series
+)
+from utils.mongo_schema_utils import build_schema_pipeline, columns_from_type_counts
+from utils.schema_inference_utils import SchemaInferrer, merge_column_statistics
+from utils.json_stream_utils import chunked
+
+# cx_Oracle只在连接Oracle时由ConnectionFactory按需导入，未安装时仍可提取其他数据源
+if TYPE_CHECKING:
+    import cx_Oracle
 
 logger = logging.getLogger(__name__)
 
+# 提取MongoDB元数据时跳过的系统数据库
+_MONGODB_SYSTEM_DATABASES = ('admin', 'config', 'local')
+
+# 提取Oracle元数据时排除的系统用户
+_ORACLE_SYSTEM_OWNERS = (
+    'SYS', 'SYSTEM', 'CTXSYS', 'DBSNMP', 'EXFSYS',
+    'MDSYS', 'MGMT_VIEW', 'OLAPSYS', 'OWBSYS',
+    'ORDPLUGINS', 'ORDSYS', 'OUTLN', 'SI_INFORMTN_SCHEMA',
+    'WMSYS', 'XDB', 'APEX_040200', 'APEX_PUBLIC_USER',
+    'DIP', 'FLOWS_FILES', 'ORACLE_OCM', 'XS$NULL'
+)
+# 表、字段和主键查询共用的排序，按二进制排序使结果顺序与Python字符串比较一致，不受会话NLS_SORT影响
+_ORACLE_TABLE_ORDER = "NLSSORT(t.owner, 'NLS_SORT=BINARY'), NLSSORT(t.table_name, 'NLS_SORT=BINARY')"
+
+
+def _oracle_owner_filter(column: str, owners: Optional[List[str]]) -> Tuple[str, Dict[str, str]]:
+    """
+    构建按所有者过滤的条件
+    
+    Returns:
+        (WHERE条件, 绑定变量)
+    """
+    if owners:
+        names = [f"owner_{index}" for index in range(len(owners))]
+        return f"{column} IN ({', '.join(':' + name for name in names)})", dict(zip(names, owners))
+    system_owners = ", ".join(f"'{owner}'" for owner in _ORACLE_SYSTEM_OWNERS)
+    return f"{column} NOT IN ({system_owners})", {}
+
+
+def _fetch_rows(cursor: Any, arraysize: int) -> Iterator[tuple]:
+    """以fetchmany逐批取回游标结果，每批arraysize行"""
+    while True:
+        rows = cursor.fetchmany(arraysize)
+        if not rows:
+            return
+        yield from rows
+
+
+class _TableRowGroups:
+    """
+    按(owner, table_name)顺序逐表取出已排序结果中的行
+    
+    行的前两列为owner和table_name，排序需与表清单一致；只保留当前一张表的行。
+    表清单中不存在的分组（如两次查询之间新建的表）被跳过
+    """
+    
+    def __init__(self, rows: Iterable[tuple]):
+        self._groups = groupby(rows, key=lambda row: (row[0], row[1]))
+        self._pending = next(self._groups, None)
+    
+    def take(self, key: Tuple[str, str]) -> List[tuple]:
+        """返回指定表的行，没有时返回空列表；调用的表需按排序顺序递增"""
+        while self._pending is not None and self._pending[0] < key:
+            self._pending = next(self._groups, None)
+        if self._pending is None or self._pending[0] != key:
+            return []
+        rows = list(self._pending[1])
+        self._pending = next(self._groups, None)
+        return rows
+
+
+def _ordered_results(func: Callable[[Any], Any], items: Iterable[Any], workers: int,
+                     thread_name_prefix: str) -> Iterator[Tuple[Any, Any]]:
+    """
+    在线程池中对每个元素执行func，按items的顺序逐个生成(元素, Future)
+    
+    最多只有workers*2个任务已提交但未被取走，调用方处理得慢时不会把所有结果堆积在内存中
+    """
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=thread_name_prefix) as executor:
+        pending = deque()
+        for item in items:
+            pending.append((item, executor.submit(func, item)))
+            if len(pending) >= workers * 2:
+                yield pending.popleft()
+        while pending:
+            yield pending.popleft()
+
+
+# _ordered_streams中生产线程放入队列的消息类型
+_STREAM_ITEM, _STREAM_END, _STREAM_ERROR = range(3)
+
+
+def _ordered_streams(func: Callable[[Any], Iterator[Any]], items: Iterable[Any], workers: int, buffer_size: int,
+                     thread_name_prefix: str) -> Iterator[Any]:
+    """
+    在线程池中对每个元素执行返回迭代器的func，按items的顺序依次生成各元素迭代出的结果
+    
+    每个元素的结果经容量为buffer_size的队列传给调用方，队列满时生产线程暂停，最多同时运行workers个元素，
+    内存中最多保留workers*buffer_size个结果；当前元素的结果一产生即可取走，不必等该元素全部完成。
+    任一元素抛出的异常在轮到该元素时抛出；调用方提前停止迭代时通知各线程停止、关闭其迭代器并等待线程结束
+    """
+    stop = threading.Event()
+    
+    def put(out: queue.Queue, message: Tuple[int, Any]) -> bool:
+        # 定期检查停止标志，调用方停止迭代后不会永远阻塞在已满的队列上
+        while not stop.is_set():
+            try:
+                out.put(message, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def produce(item: Any, out: queue.Queue) -> None:
+        try:
+            with closing(func(item)) as results:
+                for result in results:
+                    if not put(out, (_STREAM_ITEM, result)):
+                        return
+        except Exception as e:
+            put(out, (_STREAM_ERROR, e))
+            return
+        put(out, (_STREAM_END, None))
+    
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=thread_name_prefix) as executor:
+        pending = deque()
+        items = iter(items)
+        
+        def submit_next() -> None:
+            for item in items:
+                out = queue.Queue(maxsize=buffer_size)
+                pending.append((executor.submit(produce, item, out), out))
+                return
+        
+        try:
+            # 线程池按提交顺序执行，排在前面的元素总是先于后面的元素开始运行
+            for _ in range(workers):
+                submit_next()
+            while pending:
+                _, out = pending[0]
+                while True:
+                    kind, value = out.get()
+                    if kind == _STREAM_ITEM:
+                        yield value
+                    elif kind == _STREAM_ERROR:
+                        raise value
+                    else:
+                        break
+                pending.popleft()
+                submit_next()
+        finally:
+            stop.set()
+            for future, _ in pending:
+                future.cancel()
+
 class MetadataExtractor:
     """元数据提取器类，负责从不同类型的数据源提取元数据信息"""
     
     @staticmethod
-    def extract_metadata(data_source_type: str, connection_params: Dict[str, Any]) -> Dict[str, Any]:
+    def extract_metadata(data_source_type: str, connection_params: Dict[str, Any],
+                         since: Optional[datetime] = None) -> Dict[str, Any]:
         """
-        根据数据源类型提取元数据
+        根据数据源类型提取元数据，tables为所有表的列表
+        
+        参数和返回值同stream_metadata；数据源较大时应使用stream_metadata逐表处理
+        """
+        metadata = MetadataExtractor.stream_metadata(data_source_type, connection_params, since)
+        return {**metadata, "tables": list(metadata["tables"])}
+    
+    @staticmethod
+    def stream_metadata(data_source_type: str, connection_params: Dict[str, Any],
+                        since: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        根据数据源类型提取元数据，tables为逐表生成表信息的迭代器
+        
+        迭代过程中才逐表读取数据源，内存中只保留正在处理的少量表；failed_tables、errors（如有）
+        在迭代过程中填充，迭代结束后才完整
         
         Args:
             data_source_type: 数据源类型
             connection_params: 连接参数
+            since: 增量提取的水位线，只提取该时间之后创建或修改过结构的表；目前只对Oracle生效，
+                其他数据源总是全量提取
             
         Returns:
-            包含元数据信息的字典
+            包含元数据信息的字典；增量提取时incremental为True，并在table_names中列出数据源当前所有的表，
+            用于识别已删除的表；watermark为本次提取开始时数据源的服务器时间，可作为下次增量提取的水位线
         """
         try:
+            # Oracle通过会话池并行提取各模式
+            if data_source_type.upper() == "ORACLE":
+                pool = ConnectionFactory.get_oracle_pool(connection_params)
+                return MetadataExtractor._extract_oracle_metadata(pool, connection_params, since)
+            
             # 获取连接
             connection = ConnectionFactory.get_connection(data_source_type, connection_params)
             
             # 根据数据源类型调用不同的提取方法
-            if data_source_type.upper() == "ORACLE":
-                return MetadataExtractor._extract_oracle_metadata(connection)
-            elif data_source_type.upper() == "ELASTICSEARCH":
-                return MetadataExtractor._extract_elasticsearch_metadata(connection)
+            if data_source_type.upper() == "ELASTICSEARCH":
+                return MetadataExtractor._extract_elasticsearch_metadata(connection, connection_params)
             elif data_source_type.upper() == "MONGODB":
-                return MetadataExtractor._extract_mongodb_metadata(connection)
+                return MetadataExtractor._extract_mongodb_metadata(connection, connection_params)
             else:
                 raise ValueError(f"不支持的数据源类型: {data_source_type}")
         except Exception as e:
@@ -40,35 +225,195 @@ class MetadataExtractor:
             raise
     
     @staticmethod
-    def _extract_oracle_metadata(connection: cx_Oracle.Connection) -> Dict[str, Any]:
+    def _extract_oracle_metadata(pool: "cx_Oracle.SessionPool", connection_params: Optional[Dict[str, Any]] = None,
+                                 since: Optional[datetime] = None) -> Dict[str, Any]:
         """
         提取Oracle数据库的元数据
         
+        按所有者（模式）拆分，在最多extract_workers个线程中并行提取，每个线程从会话池借用一个连接；
+        结果按所有者排序逐个模式生成，与串行提取的顺序一致。
+        指定since时只提取all_objects.last_ddl_time不早于since的表（新建的表，以及修改过字段、注释、约束的表），
+        并列出当前所有的表名供调用方识别已删除的表
+        
+        Args:
+            pool: Oracle会话池
+            connection_params: 连接参数，其中的owners、arraysize、prefetchrows控制提取范围和取数批量，
+                extract_workers控制并行度（默认settings.oracle_extract_workers），extract_buffer控制每个模式缓冲的表数
+            since: 增量提取的水位线（数据库服务器时间）
+        
         Returns:
-            包含表和列信息的字典
+            包含表和列信息的字典，tables为逐表生成的迭代器
         """
+        connection_params = connection_params or {}
+        # 先取服务器时间作为新的水位线，提取期间发生的修改在下次增量提取时仍会被包含
         metadata = {
-            "tables": []
+            "tables": [],
+            "incremental": since is not None,
+            "watermark": MetadataExtractor._oracle_server_time(pool)
         }
+        if since is not None:
+            metadata["table_names"] = MetadataExtractor._list_oracle_tables(pool, connection_params)
+        
+        workers = int(connection_params.get("extract_workers") or settings.oracle_extract_workers)
+        owners = connection_params.get("owners")
+        if workers > 1 and not owners:
+            owners = MetadataExtractor._list_oracle_owners(pool)
+        
+        if workers <= 1 or len(owners) <= 1:
+            metadata["tables"] = MetadataExtractor._iter_oracle_pool_tables(pool, connection_params, since)
+        else:
+            metadata["tables"] = MetadataExtractor._iter_oracle_owner_tables(pool, connection_params, since, owners, workers)
+        return metadata
+    
+    @staticmethod
+    def _iter_oracle_owner_tables(pool: "cx_Oracle.SessionPool", connection_params: Dict[str, Any],
+                                  since: Optional[datetime], owners: List[str], workers: int) -> Iterator[Dict[str, Any]]:
+        """
+        在多个线程中按所有者并行提取，按所有者顺序逐表生成表信息，任一模式失败时抛出其异常
         
+        每个线程逐表提取一个模式，已提取、尚未轮到生成的表不超过extract_buffer张（默认settings.oracle_extract_buffer），
+        达到上限时暂停提取
+        """
+        # 按所有者排序，与单条查询按二进制排序的结果顺序一致
+        owners = sorted(set(owners))
+        workers = min(workers, len(owners))
+        buffer_size = int(connection_params.get("extract_buffer") or settings.oracle_extract_buffer)
+        logger.info(f"并行提取Oracle元数据: {len(owners)}个模式, {workers}个线程")
+        yield from _ordered_streams(
+            lambda owner: MetadataExtractor._iter_oracle_pool_tables(pool, {**connection_params, "owners": [owner]}, since),
+            owners, workers, buffer_size, "oracle-extract"
+        )
+    
+    @staticmethod
+    def _iter_oracle_pool_tables(pool: "cx_Oracle.SessionPool", connection_params: Dict[str, Any],
+                                 since: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+        """从会话池借用一个连接逐表生成元数据，迭代结束或提前停止时归还"""
+        connection = pool.acquire()
+        try:
+            yield from MetadataExtractor._iter_oracle_tables(connection, connection_params, since)
+        finally:
+            pool.release(connection)
+    
+    @staticmethod
+    def _oracle_server_time(pool: "cx_Oracle.SessionPool") -> datetime:
+        """返回数据库服务器的当前时间，与all_objects.last_ddl_time使用同一时钟"""
+        connection = pool.acquire()
         try:
             cursor = connection.cursor()
-            
+            try:
+                cursor.execute("SELECT SYSDATE FROM DUAL")
+                return cursor.fetchone()[0]
+            finally:
+                cursor.close()
+        finally:
+            pool.release(connection)
+    
+    @staticmethod
+    def _list_oracle_tables(pool: "cx_Oracle.SessionPool", connection_params: Dict[str, Any]) -> List[Tuple[str, str]]:
+        """返回当前所有的(owner, table_name)，只读取表名"""
+        owner_filter, binds = _oracle_owner_filter("t.owner", connection_params.get("owners"))
+        arraysize = int(connection_params.get("arraysize") or settings.oracle_arraysize)
+        connection = pool.acquire()
+        try:
+            cursor = connection.cursor()
+            cursor.arraysize = arraysize
+            try:
+                cursor.execute(f"SELECT t.owner, t.table_name FROM all_tables t WHERE {owner_filter}", binds)
+                return [(owner, table_name) for owner, table_name in _fetch_rows(cursor, arraysize)]
+            finally:
+                cursor.close()
+        finally:
+            pool.release(connection)
+    
+    @staticmethod
+    def _list_oracle_owners(pool: "cx_Oracle.SessionPool") -> List[str]:
+        """返回拥有表的非系统用户"""
+        owner_filter, binds = _oracle_owner_filter("t.owner", None)
+        connection = pool.acquire()
+        try:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(f"SELECT DISTINCT t.owner FROM all_tables t WHERE {owner_filter}", binds)
+                return [owner for (owner,) in cursor.fetchall()]
+            finally:
+                cursor.close()
+        finally:
+            pool.release(connection)
+    
+    @staticmethod
+    def _iter_oracle_tables(connection: "cx_Oracle.Connection", connection_params: Dict[str, Any],
+                            since: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+        """
+        逐表生成Oracle数据库的元数据
+        
+        表、字段（含注释）和主键各用一条覆盖所有所有者的查询读取，三条查询按相同顺序排列，
+        以fetchmany逐批取回并逐表归并，每张表的行到齐后立即生成该表，往返次数与表数量无关
+        
+        Args:
+            connection: Oracle连接
+            connection_params: 连接参数
+                owners: 只提取这些所有者（模式）的表，名称需与数据字典一致；未指定时提取除系统用户外的所有表
+                arraysize: 每次fetchmany取回的行数，默认settings.oracle_arraysize
+                prefetchrows: 执行查询时随响应预取的行数，默认settings.oracle_prefetchrows
+            since: 只提取last_ddl_time不早于该时间的表，None表示全部
+        
+        Returns:
+            表信息字典的迭代器
+        """
+        arraysize = int(connection_params.get("arraysize") or settings.oracle_arraysize)
+        prefetchrows = int(connection_params.get("prefetchrows") or settings.oracle_prefetchrows)
+        table_cursor = connection.cursor()
+        column_cursor = connection.cursor()
+        pk_cursor = connection.cursor()
+        for cursor in (table_cursor, column_cursor, pk_cursor):
+            # 需在execute之前设置
+            cursor.arraysize = arraysize
+            cursor.prefetchrows = prefetchrows
+        
+        try:
             # 获取用户可访问的表
-            query = """
-            SELECT owner, table_name, tablespace_name, num_rows, last_analyzed
-            FROM all_tables
-            WHERE owner NOT IN ('SYS', 'SYSTEM', 'CTXSYS', 'DBSNMP', 'EXFSYS', 
-                               'MDSYS', 'MGMT_VIEW', 'OLAPSYS', 'OWBSYS', 
-                               'ORDPLUGINS', 'ORDSYS', 'OUTLN', 'SI_INFORMTN_SCHEMA', 
-                               'WMSYS', 'XDB', 'APEX_040200', 'APEX_PUBLIC_USER', 
-                               'DIP', 'FLOWS_FILES', 'ORACLE_OCM', 'XS$NULL')
-            ORDER BY owner, table_name
-            """
-            cursor.execute(query)
-            tables = cursor.fetchall()
+            owner_filter, binds = _oracle_owner_filter("t.owner", connection_params.get("owners"))
+            if since is not None:
+                # 三条查询都以t为表（或约束）所属的owner/table_name，使用同一个过滤条件
+                owner_filter += """
+              AND (t.owner, t.table_name) IN (
+                  SELECT o.owner, o.object_name FROM all_objects o
+                  WHERE o.object_type = 'TABLE' AND o.last_ddl_time >= :since
+              )"""
+                binds = {**binds, "since": since}
+            table_cursor.execute(f"""
+            SELECT t.owner, t.table_name, t.tablespace_name, t.num_rows, t.last_analyzed
+            FROM all_tables t
+            WHERE {owner_filter}
+            ORDER BY {_ORACLE_TABLE_ORDER}
+            """, binds)
+            
+            # 获取所有表的列信息，只包含all_tables中的表（排除视图等对象）
+            column_cursor.execute(f"""
+            SELECT tc.owner, tc.table_name, tc.column_name, tc.data_type, tc.data_length,
+                   tc.data_precision, tc.data_scale, tc.nullable, tc.column_id, cc.comments
+            FROM all_tables t
+            JOIN all_tab_columns tc ON tc.owner = t.owner AND tc.table_name = t.table_name
+            LEFT JOIN all_col_comments cc ON cc.owner = tc.owner AND cc.table_name = tc.table_name AND cc.column_name = tc.column_name
+            WHERE {owner_filter}
+            ORDER BY {_ORACLE_TABLE_ORDER}, tc.column_id
+            """, binds)
+            
+            # 获取所有表的主键信息
+            pk_cursor.execute(f"""
+            SELECT t.owner, t.table_name, cols.column_name
+            FROM all_constraints t
+            JOIN all_cons_columns cols ON cols.owner = t.owner AND cols.constraint_name = t.constraint_name
+            WHERE {owner_filter}
+              AND t.constraint_type = 'P'
+            ORDER BY {_ORACLE_TABLE_ORDER}, cols.position
+            """, binds)
+            
+            # 按(owner, table_name)归并
+            columns_by_table = _TableRowGroups(_fetch_rows(column_cursor, arraysize))
+            pks_by_table = _TableRowGroups(_fetch_rows(pk_cursor, arraysize))
             
-            for owner, table_name, tablespace_name, num_rows, last_analyzed in tables:
+            for owner, table_name, tablespace_name, num_rows, last_analyzed in _fetch_rows(table_cursor, arraysize):
                 # 构建表信息
                 table_info = {
                     "schema": owner,
@@ -80,20 +425,8 @@ class MetadataExtractor:
                     "primary_keys": []
                 }
                 
-                # 获取表的列信息
-                column_query = """
-                SELECT column_name, data_type, data_length, data_precision, 
-                       data_scale, nullable, column_id, comments
-                FROM all_col_comments cc
-                JOIN all_tab_columns tc ON cc.owner = tc.owner AND cc.table_name = tc.table_name AND cc.column_name = tc.column_name
-                WHERE cc.owner = :owner AND cc.table_name = :table_name
-                ORDER BY tc.column_id
-                """
-                cursor.execute(column_query, owner=owner, table_name=table_name)
-                columns = cursor.fetchall()
-                
-                for col_name, data_type, data_length, data_precision, 
-                    data_scale, nullable, column_id, comments in columns:
+                for (_, _, col_name, data_type, data_length, data_precision,
+                     data_scale, nullable, column_id, comments) in columns_by_table.take((owner, table_name)):
                     # 构建列信息
                     column_info = {
                         "name": col_name,
@@ -107,105 +440,52 @@ class MetadataExtractor:
                     }
                     table_info["columns"].append(column_info)
                 
-                # 获取表的主键信息
-                pk_query = """
-                SELECT cols.column_name
-                FROM all_constraints cons,
-                     all_cons_columns cols
-                WHERE cons.owner = :owner
-                  AND cons.constraint_type = 'P'
-                  AND cons.constraint_name = cols.constraint_name
-                  AND cons.owner = cols.owner
-                  AND cons.table_name = :table_name
-                ORDER BY cols.position
-                """
-                cursor.execute(pk_query, owner=owner, table_name=table_name)
-                primary_keys = cursor.fetchall()
-                
-                for pk in primary_keys:
-                    table_info["primary_keys"].append(pk[0])
+                for pk in pks_by_table.take((owner, table_name)):
+                    table_info["primary_keys"].append(pk[2])
                 
-                # 添加表信息到结果
-                metadata["tables"].append(table_info)
-            
-            cursor.close()
-            return metadata
+                yield table_info
         except Exception as e:
             logger.error(f"提取Oracle元数据失败: {e}")
             raise
+        finally:
+            # 调用方提前停止迭代时也关闭游标
+            table_cursor.close()
+            column_cursor.close()
+            pk_cursor.close()
     
     @staticmethod
-    def _extract_elasticsearch_metadata(connection: Elasticsearch) -> Dict[str, Any]:
+    def _extract_elasticsearch_metadata(connection: Elasticsearch, connection_params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         提取Elasticsearch的元数据
         
+        每次提取只发出一次get_mapping和一次_cat/indices请求，分别取得所有匹配索引的映射和文档数，之后逐表生成表信息。
+        名称只差时间后缀且映射相同的索引（如按天滚动的logs-2024.01.01）合并为一个逻辑表，
+        properties中记录成员索引和合计文档数；每种映射只展开一次字段
+        
+        Args:
+            connection: Elasticsearch连接
+            connection_params: 连接参数
+                index_include: 包含的索引名通配符（列表或逗号分隔），默认所有不以.开头的索引
+                index_exclude: 排除的索引名通配符，优先于index_include
+                index_collapse_pattern: 时间后缀的正则表达式，默认settings.es_time_series_suffix，为空字符串时不合并
+                sample_size: 每个逻辑表随机抽样统计字段分布的文档数，默认settings.es_sample_size，0表示不抽样
+        
         Returns:
             包含索引和字段信息的字典
         """
+        connection_params = connection_params or {}
         metadata = {
             "tables": []
         }
         
         try:
-            # 获取所有索引
-            indices = connection.indices.get_alias("*")
+            target = MetadataExtractor._elasticsearch_target(connection_params)
+            mappings = connection.indices.get_mapping(**MetadataExtractor._elasticsearch_mapping_request(target))
+            cat_rows = connection.cat.indices(**MetadataExtractor._elasticsearch_cat_request(target))
             
-            for index_name in indices:
-                # 跳过系统索引
-                if index_name.startswith("."):
-                    continue
-                
-                # 获取索引的映射信息
-                mapping = connection.indices.get_mapping(index=index_name)
-                index_mapping = mapping[index_name]["mappings"]
-                
-                # 构建表信息
-                table_info = {
-                    "schema": "elasticsearch",
-                    "name": index_name,
-                    "columns": [],
-                    "primary_keys": ["_id"]  # Elasticsearch默认使用_id作为唯一标识符
-                }
-                
-                # 分析映射，提取字段信息
-                def parse_properties(properties: Dict[str, Any], prefix: str = ""):
-                    fields = []
-                    for field_name, field_props in properties.items():
-                        full_field_name = f"{prefix}.{field_name}" if prefix else field_name
-                        
-                        # 如果有properties字段，说明是对象类型，递归解析
-                        if "properties" in field_props:
-                            fields.extend(parse_properties(field_props["properties"], full_field_name))
-                        else:
-                            # 基本字段
-                            field_info = {
-                                "name": full_field_name,
-                                "type": field_props.get("type", "object"),
-                                "description": field_props.get("description", ""),
-                                "nullable": True  # Elasticsearch字段都可以为null
-                            }
-                            
-                            # 添加字段的其他属性
-                            if "format" in field_props:
-                                field_info["format"] = field_props["format"]
-                            if "analyzer" in field_props:
-                                field_info["analyzer"] = field_props["analyzer"]
-                            
-                            fields.append(field_info)
-                    return fields
-                
-                # 提取字段信息
-                if "properties" in index_mapping:
-                    table_info["columns"] = parse_properties(index_mapping["properties"])
-                
-                # 获取索引统计信息
-                stats = connection.indices.stats(index=index_name)
-                if "primaries" in stats[index_name]:
-                    doc_count = stats[index_name]["primaries"].get("docs", {}).get("count", 0)
-                    table_info["row_count"] = doc_count
-                
-                # 添加表信息到结果
-                metadata["tables"].append(table_info)
+            tables = MetadataExtractor._plan_elasticsearch_tables(mappings, cat_rows, connection_params)
+            sample_size = int(connection_params.get("sample_size", settings.es_sample_size) or 0)
+            metadata["tables"] = MetadataExtractor._iter_elasticsearch_tables(connection, tables, sample_size)
             
             return metadata
         except Exception as e:
@@ -213,105 +493,224 @@ class MetadataExtractor:
             raise
     
     @staticmethod
-    def _extract_mongodb_metadata(connection: MongoClient) -> Dict[str, Any]:
+    def _elasticsearch_target(connection_params: Dict[str, Any]) -> str:
+        """请求的索引：包含的通配符由服务端展开，排除的通配符在本地过滤"""
+        return ",".join(normalize_patterns(connection_params.get("index_include"))) or "*"
+    
+    @staticmethod
+    def _elasticsearch_mapping_request(target: str) -> Dict[str, Any]:
+        return {"index": target, "expand_wildcards": "open", "ignore_unavailable": True, "allow_no_indices": True}
+    
+    @staticmethod
+    def _elasticsearch_cat_request(target: str) -> Dict[str, Any]:
+        return {"index": target, "format": "json", "h": "index,docs.count", "expand_wildcards": "open"}
+    
+    @staticmethod
+    def _plan_elasticsearch_tables(mappings: Dict[str, Any], cat_rows: List[Dict[str, Any]],
+                                   connection_params: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        由get_mapping和_cat/indices的结果逐个生成逻辑表的表信息（不含抽样统计）
+        
+        同步和异步提取共用；映射按哈希去重，每种映射只展开一次字段
+        """
+        include = normalize_patterns(connection_params.get("index_include"))
+        exclude = normalize_patterns(connection_params.get("index_exclude"))
+        doc_counts = {row["index"]: int(row.get("docs.count") or 0) for row in cat_rows}
+        
+        # 按映射哈希去重，每种映射只保留一份定义
+        index_hashes = {}
+        distinct_mappings = {}
+        for index_name, index_data in mappings.items():
+            if not index_selected(index_name, include, exclude):
+                continue
+            index_mapping = index_data.get("mappings", {})
+            index_hashes[index_name] = mapping_hash(index_mapping)
+            distinct_mappings.setdefault(index_hashes[index_name], index_mapping)
+        
+        collapse_pattern = connection_params.get("index_collapse_pattern", settings.es_time_series_suffix)
+        columns_by_hash = {}
+        for group in collapse_time_series(index_hashes, collapse_pattern):
+            hash_value = group["mapping_hash"]
+            if hash_value not in columns_by_hash:
+                columns_by_hash[hash_value] = flatten_mapping_properties(
+                    distinct_mappings[hash_value].get("properties", {})
+                )
+            
+            # 构建表信息
+            table_info = {
+                "schema": "elasticsearch",
+                "name": group["name"],
+                "columns": columns_by_hash[hash_value],
+                "primary_keys": ["_id"],  # Elasticsearch默认使用_id作为唯一标识符
+                "row_count": sum(doc_counts.get(index_name, 0) for index_name in group["indices"]),
+                "mapping_hash": hash_value
+            }
+            if group["collapsed"]:
+                # 合并的逻辑表记录成员索引
+                table_info["member_indices"] = group["indices"]
+                table_info["member_count"] = len(group["indices"])
+            
+            yield table_info
+    
+    @staticmethod
+    def _iter_elasticsearch_tables(connection: Elasticsearch, tables: Iterable[Dict[str, Any]],
+                                   sample_size: int) -> Iterator[Dict[str, Any]]:
+        """逐表生成表信息，需要抽样时每settings.metadata_stream_batch_size个表发出一次msearch"""
+        if sample_size <= 0:
+            yield from tables
+            return
+        for batch in chunked(tables, settings.metadata_stream_batch_size):
+            responses = connection.msearch(searches=MetadataExtractor._elasticsearch_sample_searches(batch, sample_size))
+            MetadataExtractor._apply_elasticsearch_samples(batch, responses["responses"])
+            yield from batch
+    
+    @staticmethod
+    def _elasticsearch_sample_searches(tables: List[Dict[str, Any]], sample_size: int) -> List[Dict[str, Any]]:
+        """构建从每个逻辑表随机抽取sample_size个文档的msearch请求体"""
+        searches = []
+        for table_info in tables:
+            searches.append({"index": table_info.get("member_indices") or [table_info["name"]], "ignore_unavailable": True})
+            searches.append({
+                "size": sample_size,
+                "query": {"function_score": {"random_score": {}}},
+                "_source": True
+            })
+        return searches
+    
+    @staticmethod
+    def _apply_elasticsearch_samples(tables: List[Dict[str, Any]], responses: List[Dict[str, Any]]) -> None:
+        """
+        将msearch抽样结果中字段的出现比例、null比例和数组长度补充到映射得到的列上
+        
+        映射无法区分单值和数组，这些统计只能从文档中得到；抽样失败的表保留映射得到的列
+        """
+        for table_info, response in zip(tables, responses):
+            if "error" in response:
+                logger.warning(f"抽样Elasticsearch索引 {table_info['name']} 失败: {response['error']}")
+                continue
+            # 数组在映射中与单值字段同名，推断时数组对路径透明
+            inferrer = SchemaInferrer(array_marker="")
+            for hit in response["hits"]["hits"]:
+                inferrer.add(hit.get("_source") or {})
+            table_info["columns"] = merge_column_statistics(table_info["columns"], inferrer.columns())
+            table_info["sampled_documents"] = inferrer.documents
+    
+    @staticmethod
+    def _extract_mongodb_metadata(connection: MongoClient, connection_params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         提取MongoDB的元数据
         
+        文档数默认取集合元数据中的估计值，不扫描集合；字段结构通过$sample抽样的聚合管道在服务端推断，
+        只返回各字段路径的类型分布，不传输文档。
+        各集合在最多extract_workers个线程中并行提取，共用MongoClient的连接池；每个集合的操作受collection_timeout_ms限制，
+        超时或出错的集合记录在failed_tables中，不影响其他集合，表信息按(数据库, 集合)的顺序逐个生成
+        
+        Args:
+            connection: MongoDB连接
+            connection_params: 连接参数
+                exact_count: 为True时用count_documents精确计数（全集合扫描），默认False
+                sample_size: 推断结构时抽样的文档数，默认settings.mongo_sample_size
+                schema_depth: 展开嵌套文档的最大层数，默认settings.mongo_schema_depth
+                extract_workers: 并行提取的线程数，默认settings.mongo_extract_workers，不超过连接池的maxPoolSize
+                collection_timeout_ms: 单个集合的超时时间（毫秒），默认settings.mongo_collection_timeout_ms
+        
         Returns:
-            包含集合和字段信息的字典
+            包含集合和字段信息的字典；failed_tables为提取失败的(数据库, 集合)，errors为对应的错误信息
         """
+        options = MetadataExtractor._mongodb_options(connection_params or {})
         metadata = {
-            "tables": []
+            "tables": [],
+            "failed_tables": [],
+            "errors": []
         }
         
         try:
+            collections = []
             # 获取所有数据库
-            db_names = connection.list_database_names()
-            
-            for db_name in db_names:
+            for db_name in sorted(connection.list_database_names()):
                 # 跳过系统数据库
-                if db_name in ['admin', 'config', 'local']:
+                if db_name in _MONGODB_SYSTEM_DATABASES:
                     continue
                 
-                db = connection[db_name]
-                # 获取数据库中的所有集合
-                collection_names = db.list_collection_names()
-                
-                for collection_name in collection_names:
-                    # 跳过系统集合
-                    if collection_name.startswith('system.'):
-                        continue
-                    
-                    collection = db[collection_name]
-                    
-                    # 构建表信息
-                    table_info = {
-                        "schema": db_name,
-                        "name": collection_name,
-                        "columns": [],
-                        "primary_keys": ["_id"]  # MongoDB默认使用_id作为唯一标识符
-                    }
-                    
-                    # 获取集合的文档数量
-                    table_info["row_count"] = collection.count_documents({})
-                    
-                    # 尝试提取字段信息（通过分析少量文档）
-                    sample_docs = collection.find().limit(10)  # 分析前10个文档
-                    field_types = {}
-                    
-                    for doc in sample_docs:
-                        # 递归分析文档结构
-                        def analyze_doc_structure(doc: Dict[str, Any], prefix: str = ""):
-                            for key, value in doc.items():
-                                full_key = f"{prefix}.{key}" if prefix else key
-                                
-                                if isinstance(value, dict):
-                                    # 嵌套文档，递归分析
-                                    analyze_doc_structure(value, full_key)
-                                elif isinstance(value, list) and value and isinstance(value[0], dict):
-                                    # 数组中的对象，只分析第一个元素的结构
-                                    field_types[full_key] = "array<object>"
-                                    # 递归分析数组元素
-                                    analyze_doc_structure(value[0], f"{full_key}[*]")
-                                else:
-                                    # 基本类型字段
-                                    field_type = type(value).__name__ if value is not None else "null"
-                                    if full_key not in field_types:
-                                        field_types[full_key] = field_type
-                                    elif field_types[full_key] != field_type:
-                                        # 如果字段类型不一致，标记为混合类型
-                                        field_types[full_key] = "mixed"
-                        
-                        analyze_doc_structure(doc)
-                    
-                    # 构建列信息
-                    for field_name, field_type in sorted(field_types.items()):
-                        # 转换Python类型为更通用的类型名称
-                        if field_type == "str":
-                            db_type = "string"
-                        elif field_type == "int" or field_type == "float":
-                            db_type = "number"
-                        elif field_type == "bool":
-                            db_type = "boolean"
-                        elif field_type == "datetime.datetime":
-                            db_type = "date"
-                        elif field_type.startswith("array"):
-                            db_type = field_type
-                        else:
-                            db_type = "object"
-                        
-                        column_info = {
-                            "name": field_name,
-                            "type": db_type,
-                            "nullable": True,  # MongoDB字段都可以为null
-                            "description": f"字段类型: {field_type}"
-                        }
-                        table_info["columns"].append(column_info)
-                    
-                    # 添加表信息到结果
-                    metadata["tables"].append(table_info)
+                # 获取数据库中的所有集合，跳过系统集合
+                collections.extend(
+                    (db_name, collection_name)
+                    for collection_name in sorted(connection[db_name].list_collection_names())
+                    if not collection_name.startswith('system.')
+                )
+            
+            metadata["tables"] = MetadataExtractor._iter_mongodb_tables(connection, collections, options, metadata)
             
             return metadata
         except Exception as e:
             logger.error(f"提取MongoDB元数据失败: {e}")
-            raise
\ No newline at end of file
+            raise
+    
+    @staticmethod
+    def _mongodb_options(connection_params: Dict[str, Any]) -> Dict[str, Any]:
+        """解析MongoDB提取选项，同步和异步提取共用"""
+        return {
+            "exact_count": bool(connection_params.get("exact_count", False)),
+            "pipeline": build_schema_pipeline(
+                int(connection_params.get("sample_size", settings.mongo_sample_size)),
+                int(connection_params.get("schema_depth", settings.mongo_schema_depth))
+            ),
+            "timeout": int(connection_params.get("collection_timeout_ms") or settings.mongo_collection_timeout_ms) / 1000,
+            "workers": min(
+                int(connection_params.get("extract_workers") or settings.mongo_extract_workers),
+                int(connection_params.get("maxPoolSize") or settings.mongo_max_pool_size)
+            )
+        }
+    
+    @staticmethod
+    def _mongodb_table_info(db_name: str, collection_name: str, row_count: int,
+                            rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """由文档数和结构推断管道的结果构建集合的表信息"""
+        return {
+            "schema": db_name,
+            "name": collection_name,
+            "columns": columns_from_type_counts(rows),
+            "primary_keys": ["_id"],  # MongoDB默认使用_id作为唯一标识符
+            "row_count": row_count
+        }
+    
+    @staticmethod
+    def _iter_mongodb_tables(connection: MongoClient, collections: List[Tuple[str, str]], options: Dict[str, Any],
+                             metadata: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """在线程池中并行提取各集合，按集合顺序逐个生成表信息，失败的集合记录到metadata的failed_tables和errors"""
+        if not collections:
+            return
+        workers = max(1, min(options["workers"], len(collections)))
+        logger.info(f"并行提取MongoDB元数据: {len(collections)}个集合, {workers}个线程")
+        results = _ordered_results(
+            lambda key: MetadataExtractor._extract_mongodb_collection(
+                connection[key[0]][key[1]], options["pipeline"], options["exact_count"], options["timeout"]
+            ),
+            collections, workers, "mongo-extract"
+        )
+        for (db_name, collection_name), future in results:
+            try:
+                table_info = future.result()
+            except Exception as e:
+                # 单个集合失败不影响其他集合
+                logger.error(f"提取MongoDB集合 {db_name}.{collection_name} 失败: {e}")
+                metadata["failed_tables"].append((db_name, collection_name))
+                metadata["errors"].append({"schema": db_name, "name": collection_name, "error": str(e)})
+                continue
+            yield table_info
+    
+    @staticmethod
+    def _extract_mongodb_collection(collection: Collection, pipeline: List[Dict[str, Any]], exact_count: bool,
+                                    timeout: float) -> Dict[str, Any]:
+        """提取单个集合的文档数和字段结构，所有操作共用timeout秒的时间限制"""
+        with pymongo.timeout(timeout):
+            # 获取集合的文档数量
+            if exact_count:
+                row_count = collection.count_documents({})
+            else:
+                row_count = collection.estimated_document_count()
+            
+            # 在服务端抽样统计字段路径和类型
+            rows = list(collection.aggregate(pipeline, allowDiskUse=True))
+        
+        return MetadataExtractor._mongodb_table_info(collection.database.name, collection.name, row_count, rows)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, ForeignKey, Text, Enum, JSON, DateTime
+from sqlalchemy import create_engine, event, inspect, Column, Integer, Float, String, ForeignKey, Text, Enum, JSON, DateTime
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
@@ -22,6 +22,8 @@ class DataSource(Base):
     type = Column(Enum(DataSourceType), nullable=False)
     connection_config = Column(JSON, nullable=False)  # 存储连接配置
     description = Column(Text, nullable=True)
+    extract_watermark = Column(DateTime, nullable=True)  # 最近一次成功提取开始时数据源的服务器时间，增量提取的水位线
+    refresh_policy = Column(JSON, nullable=True)  # 定时刷新策略，如{"cron": "0 2 * * *", "jitter_seconds": 300}
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -38,6 +40,7 @@ class TableMetadata(Base):
     schema_name = Column(String(100), nullable=True)  # 数据库模式/索引名
     description = Column(Text, nullable=True)
     properties = Column(JSON, nullable=True)  # 存储其他表属性
+    content_hash = Column(String(64), nullable=True)  # 最近一次导入内容（表属性及有序字段定义）的哈希
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -94,6 +97,7 @@ class LineageRelation(Base):
     relation_type = Column(String(50), nullable=False, default="TRANSFORMATION")  # 如：ETL, IMPORT, EXPORT 等
     description = Column(Text, nullable=True)
     relation_details = Column(JSON, nullable=True)  # 存储关系详情
+    content_hash = Column(String(64), nullable=True)  # 最近一次导入内容的哈希
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # 关系
@@ -117,18 +121,110 @@ class ColumnLineageRelation(Base):
     source_column = relationship("ColumnMetadata", foreign_keys=[source_column_id], back_populates="source_column_relationships")
     target_column = relationship("ColumnMetadata", foreign_keys=[target_column_id], back_populates="target_column_relationships")
 
+# 后台导入任务状态枚举
+class ImportJobStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+# 后台导入任务模型
+class ImportJob(Base):
+    __tablename__ = "jobs"
+    
+    id = Column(String(36), primary_key=True, index=True)  # UUID
+    job_type = Column(String(50), nullable=False)  # 如：table_lineage_json
+    file_name = Column(String(255), nullable=True)
+    status = Column(Enum(ImportJobStatus), nullable=False, default=ImportJobStatus.PENDING)
+    total_rows = Column(Integer, default=0)
+    processed_rows = Column(Integer, default=0)
+    failed_rows = Column(Integer, default=0)
+    rows_per_second = Column(Float, nullable=True)
+    errors = Column(JSON, nullable=True)  # 逐行错误信息
+    result = Column(JSON, nullable=True)  # 导入结果
+    cancel_requested = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+# 定时刷新运行状态枚举
+class RefreshRunStatus(str, enum.Enum):
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    SKIPPED = "skipped"  # 到达触发时间时上一次刷新仍在进行
+
+# 数据源定时刷新的运行记录
+class RefreshRun(Base):
+    __tablename__ = "refresh_runs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    data_source_id = Column(Integer, ForeignKey("data_sources.id", ondelete="CASCADE"), nullable=False, index=True)
+    status = Column(Enum(RefreshRunStatus), nullable=False, default=RefreshRunStatus.RUNNING)
+    scheduled_at = Column(DateTime, nullable=True)  # 按cron表达式计算的触发时间（不含抖动）
+    started_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+    duration_seconds = Column(Float, nullable=True)
+    tables_scanned = Column(Integer, default=0)  # 从数据源提取到的表数
+    tables_changed = Column(Integer, default=0)  # 新增、更新、删除的表数
+    errors = Column(JSON, nullable=True)  # 运行失败的异常或提取失败的表
+    result = Column(JSON, nullable=True)  # 导入结果统计
+
 # 创建数据库会话
 engine = None
 session_local = None
 
+def create_metadata_engine(database_url: str, **kwargs):
+    """创建元数据库引擎
+
+    SQLite下由SQLAlchemy显式发出BEGIN，避免pysqlite驱动自行管理事务导致
+    SAVEPOINT提前提交，使导入时的逐行保存点能够正确回滚
+    """
+    db_engine = create_engine(database_url, **kwargs)
+    
+    if db_engine.dialect.name == "sqlite":
+        @event.listens_for(db_engine, "connect")
+        def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+            dbapi_connection.isolation_level = None
+        
+        @event.listens_for(db_engine, "begin")
+        def _emit_begin(conn):
+            conn.exec_driver_sql("BEGIN")
+    
+    return db_engine
+
+# 模型中新增的列，create_all不会修改已存在的表，需在已有数据库上补充
+_ADDED_COLUMNS = {
+    "data_sources": ["extract_watermark", "refresh_policy"],
+    "table_metadata": ["content_hash"],
+    "lineage_relations": ["content_hash"]
+}
+
+def migrate_schema(db_engine):
+    """为已存在的表补充模型中新增的列（ALTER TABLE ... ADD COLUMN）"""
+    inspector = inspect(db_engine)
+    with db_engine.begin() as conn:
+        for table_name, column_names in _ADDED_COLUMNS.items():
+            if not inspector.has_table(table_name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table_name)}
+            for column_name in column_names:
+                if column_name in existing:
+                    continue
+                column = Base.metadata.tables[table_name].c[column_name]
+                column_type = column.type.compile(dialect=db_engine.dialect)
+                conn.exec_driver_sql(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}")
+
 def init_db(database_url: str):
     """初始化数据库连接"""
     global engine, session_local
-    engine = create_engine(database_url)
+    engine = create_metadata_engine(database_url)
     session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     
-    # 创建所有表
+    # 创建所有表，并为已有的表补充新增的列
     Base.metadata.create_all(bind=engine)
+    migrate_schema(engine)
 
 def get_db():
     """获取数据库会话"""
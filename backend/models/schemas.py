@@ -15,6 +15,9 @@ class DataSourceBase(BaseModel):
     type: DataSourceType = Field(..., description="数据源类型")
     connection_config: Dict[str, Any] = Field(..., description="连接配置")
     description: Optional[str] = Field(None, description="数据源描述")
+    refresh_policy: Optional[Dict[str, Any]] = Field(
+        None, description="定时刷新策略：cron（五段式cron表达式，UTC时间）、jitter_seconds、full_resync、enabled"
+    )
 
 # 数据源创建模型
 class DataSourceCreate(DataSourceBase):
@@ -25,10 +28,12 @@ class DataSourceUpdate(BaseModel):
     name: Optional[str] = Field(None, max_length=100)
     connection_config: Optional[Dict[str, Any]] = None
     description: Optional[str] = None
+    refresh_policy: Optional[Dict[str, Any]] = None
 
 # 数据源响应模型
 class DataSourceResponse(DataSourceBase):
     id: int = Field(..., description="数据源ID")
+    extract_watermark: Optional[datetime] = Field(None, description="增量提取的水位线（数据源服务器时间）")
     created_at: datetime = Field(..., description="创建时间")
     updated_at: datetime = Field(..., description="更新时间")
     
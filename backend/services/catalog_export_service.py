@@ -0,0 +1,400 @@
+from typing import Dict, Any, List, Iterator, Iterable, Optional
+from itertools import islice
+from datetime import datetime
+from enum import Enum
+from sqlalchemy.orm import Session, aliased
+import csv
+import json
+import os
+import tempfile
+import logging
+
+from models import DataSource, TableMetadata, ColumnMetadata, LineageRelation, ColumnLineageRelation
+from utils.columnar_utils import (
+    COLUMNAR_EXTENSIONS, require_pyarrow,
+    TABLE_STRUCTURE_COLUMNS, TABLE_LINEAGE_COLUMNS, COLUMN_LINEAGE_COLUMNS
+)
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# 单条IN查询的最大参数个数，避免超过SQLite的变量数限制
+_IN_CHUNK_SIZE = 500
+
+# 单个Excel工作表的最大行数（含表头），超出后续写到新的工作表
+_XLSX_MAX_ROWS = 1048576
+
+# 导出格式及文件扩展名
+EXPORT_FORMATS = {
+    "parquet": ".parquet",
+    "arrow": ".arrow",
+    "xlsx": ".xlsx",
+    "csv": ".csv",
+    "ndjson": ".ndjson"
+}
+
+# 可导出的数据集及其列。data_sources、tables、columns与表结构Excel模板的工作表一致；
+# table_structure、table_lineage、column_lineage与Parquet/Arrow导入的布局一致，导出的文件可直接重新导入
+EXPORT_DATASETS = {
+    "data_sources": ["name", "type", "description", "connection_config", "created_at", "updated_at"],
+    "tables": ["data_source_name", "schema_name", "name", "description", "properties", "created_at", "updated_at"],
+    "columns": ["data_source_name", "schema_name", "table_name", "name", "data_type", "description",
+                "is_primary_key", "properties"],
+    "table_structure": TABLE_STRUCTURE_COLUMNS,
+    "table_lineage": TABLE_LINEAGE_COLUMNS,
+    "column_lineage": COLUMN_LINEAGE_COLUMNS
+}
+
+# 全目录导出为一个Excel工作簿（dataset为catalog）时包含的数据集及工作表名，与Excel导入的工作表名一致
+CATALOG_SHEETS = {
+    "data_sources": "data_sources",
+    "tables": "tables",
+    "columns": "columns",
+    "table_lineage": "lineages",
+    "column_lineage": "column_lineages"
+}
+
+
+def _to_json(value: Any) -> Optional[str]:
+    """JSON列导出为字符串，避免不同行的属性结构不一致导致列类型冲突"""
+    if value is None:
+        return None
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _to_cell(value: Any, keep_json: bool = False) -> Any:
+    """将数据库中的值转换为导出值：时间转为ISO格式，枚举取值，JSON列按需转为字符串"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (dict, list)) and not keep_json:
+        return _to_json(value)
+    return value
+
+
+def _batches(rows: Iterable[Any], batch_size: int) -> Iterator[List[Any]]:
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+class CatalogExportService:
+    """元数据目录导出服务类
+
+    按批次从数据库流式读取（yield_per），逐批写入Parquet、Arrow IPC、Excel（只写模式）、CSV或NDJSON文件，
+    内存占用与目录规模无关
+    """
+
+    @staticmethod
+    def iter_batches(db: Session, dataset: str, batch_size: Optional[int] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        按批次返回数据集的行
+
+        Args:
+            db: 数据库会话
+            dataset: 数据集名称，见EXPORT_DATASETS
+            batch_size: 每批行数，默认取settings.columnar_batch_size
+
+        Returns:
+            逐批返回字典列表的迭代器，JSON列为字典，时间列为datetime
+        """
+        batch_size = batch_size or settings.columnar_batch_size
+        iterators = {
+            "data_sources": CatalogExportService._iter_data_sources,
+            "tables": CatalogExportService._iter_tables,
+            "columns": CatalogExportService._iter_columns,
+            "table_structure": CatalogExportService._iter_table_structure,
+            "table_lineage": CatalogExportService._iter_table_lineage,
+            "column_lineage": CatalogExportService._iter_column_lineage
+        }
+        if dataset not in iterators:
+            raise ValueError(f"不支持导出的数据集: {dataset}")
+        return iterators[dataset](db, batch_size)
+
+    @staticmethod
+    def export_file(db: Session, dataset: str, file_format: str) -> str:
+        """
+        导出数据集为文件
+
+        Args:
+            db: 数据库会话
+            dataset: 数据集名称，见EXPORT_DATASETS；导出为xlsx时还可以是catalog，每个数据集一个工作表
+            file_format: 导出格式，见EXPORT_FORMATS
+
+        Returns:
+            临时文件路径，由调用方在使用后删除
+        """
+        if file_format not in EXPORT_FORMATS:
+            raise ValueError(f"不支持的导出格式: {file_format}")
+        if dataset == "catalog":
+            if file_format != "xlsx":
+                raise ValueError("全目录导出只支持xlsx格式")
+        elif dataset not in EXPORT_DATASETS:
+            raise ValueError(f"不支持导出的数据集: {dataset}")
+
+        fd, path = tempfile.mkstemp(prefix=f"{dataset}_", suffix=EXPORT_FORMATS[file_format])
+        os.close(fd)
+
+        try:
+            if file_format in COLUMNAR_EXTENSIONS:
+                row_count = CatalogExportService._write_columnar(db, path, dataset, file_format)
+            elif file_format == "xlsx":
+                sheets = CATALOG_SHEETS if dataset == "catalog" else {dataset: dataset}
+                row_count = CatalogExportService._write_xlsx(db, path, sheets)
+            elif file_format == "csv":
+                row_count = CatalogExportService._write_csv(db, path, dataset)
+            else:
+                row_count = CatalogExportService._write_ndjson(db, path, dataset)
+        except BaseException:
+            os.remove(path)
+            raise
+        finally:
+            # 结束只读事务，避免长时间持有SQLite的共享锁
+            db.rollback()
+
+        logger.info(f"导出{dataset}为{file_format}完成，共{row_count}行")
+        return path
+
+    # ---------- 各导出格式 ----------
+
+    @staticmethod
+    def _write_columnar(db: Session, path: str, dataset: str, file_format: str) -> int:
+        """逐批写入Parquet或Arrow IPC文件，除主键标记外各列均为字符串"""
+        pa = require_pyarrow()
+        columns = EXPORT_DATASETS[dataset]
+        schema = pa.schema([
+            (name, pa.bool_() if name == "is_primary_key" else pa.string()) for name in columns
+        ])
+        row_count = 0
+        if file_format == "parquet":
+            writer = pa.parquet.ParquetWriter(path, schema)
+        else:
+            writer = pa.ipc.new_file(path, schema)
+        with writer:
+            for rows in CatalogExportService.iter_batches(db, dataset):
+                rows = [{name: _to_cell(row.get(name)) for name in columns} for row in rows]
+                writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+                row_count += len(rows)
+        return row_count
+
+    @staticmethod
+    def _write_xlsx(db: Session, path: str, sheets: Dict[str, str]) -> int:
+        """
+        以只写模式逐行写入Excel工作簿，行数据直接写入磁盘，不在内存中保留整个工作表
+
+        Args:
+            sheets: 数据集名称 -> 工作表名；单个工作表超过Excel的行数上限时续写到"工作表名_2"等新工作表
+        """
+        try:
+            from openpyxl import Workbook
+            from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+        except ImportError as e:
+            raise ImportError("导出Excel文件需要安装openpyxl: pip install openpyxl") from e
+
+        workbook = Workbook(write_only=True)
+        row_count = 0
+        for dataset, sheet_name in sheets.items():
+            columns = EXPORT_DATASETS[dataset]
+            part = 1
+            sheet = workbook.create_sheet(sheet_name)
+            sheet.append(columns)
+            sheet_rows = 1
+            for rows in CatalogExportService.iter_batches(db, dataset):
+                for row in rows:
+                    if sheet_rows >= _XLSX_MAX_ROWS:
+                        part += 1
+                        sheet = workbook.create_sheet(f"{sheet_name}_{part}")
+                        sheet.append(columns)
+                        sheet_rows = 1
+                    values = [_to_cell(row.get(name)) for name in columns]
+                    # Excel不允许单元格中出现控制字符
+                    sheet.append([
+                        ILLEGAL_CHARACTERS_RE.sub("", value) if isinstance(value, str) else value for value in values
+                    ])
+                    sheet_rows += 1
+                row_count += len(rows)
+        workbook.save(path)
+        return row_count
+
+    @staticmethod
+    def _write_csv(db: Session, path: str, dataset: str) -> int:
+        """逐批写入CSV文件，JSON列为JSON字符串；带BOM以便Excel正确识别中文"""
+        columns = EXPORT_DATASETS[dataset]
+        row_count = 0
+        with open(path, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for rows in CatalogExportService.iter_batches(db, dataset):
+                writer.writerows([_to_cell(row.get(name)) for name in columns] for row in rows)
+                row_count += len(rows)
+        return row_count
+
+    @staticmethod
+    def _write_ndjson(db: Session, path: str, dataset: str) -> int:
+        """逐批写入NDJSON文件，每行一个JSON对象，JSON列保持为对象"""
+        columns = EXPORT_DATASETS[dataset]
+        row_count = 0
+        with open(path, "w", encoding="utf-8") as f:
+            for rows in CatalogExportService.iter_batches(db, dataset):
+                f.writelines(
+                    json.dumps({name: _to_cell(row.get(name), keep_json=True) for name in columns},
+                               ensure_ascii=False) + "\n"
+                    for row in rows
+                )
+                row_count += len(rows)
+        return row_count
+
+    # ---------- 各数据集 ----------
+
+    @staticmethod
+    def _iter_data_sources(db: Session, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+        query = db.query(
+            DataSource.name, DataSource.type, DataSource.description, DataSource.connection_config,
+            DataSource.created_at, DataSource.updated_at
+        ).order_by(DataSource.id).yield_per(batch_size)
+
+        for batch in _batches(query, batch_size):
+            yield [dict(row._mapping) for row in batch]
+
+    @staticmethod
+    def _iter_tables(db: Session, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+        query = db.query(
+            DataSource.name.label("data_source_name"), TableMetadata.schema_name, TableMetadata.name,
+            TableMetadata.description, TableMetadata.properties, TableMetadata.created_at, TableMetadata.updated_at
+        ).select_from(TableMetadata).join(
+            DataSource, TableMetadata.data_source_id == DataSource.id
+        ).order_by(TableMetadata.id).yield_per(batch_size)
+
+        for batch in _batches(query, batch_size):
+            yield [dict(row._mapping) for row in batch]
+
+    @staticmethod
+    def _iter_columns(db: Session, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+        query = db.query(
+            DataSource.name.label("data_source_name"), TableMetadata.schema_name,
+            TableMetadata.name.label("table_name"), ColumnMetadata.name, ColumnMetadata.data_type,
+            ColumnMetadata.description, ColumnMetadata.is_primary_key, ColumnMetadata.properties
+        ).select_from(ColumnMetadata).join(
+            TableMetadata, ColumnMetadata.table_id == TableMetadata.id
+        ).join(
+            DataSource, TableMetadata.data_source_id == DataSource.id
+        ).order_by(TableMetadata.id, ColumnMetadata.id).yield_per(batch_size)
+
+        for batch in _batches(query, batch_size):
+            yield [{**row._mapping, "is_primary_key": bool(row.is_primary_key)} for row in batch]
+
+    @staticmethod
+    def _iter_table_structure(db: Session, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+        query = db.query(
+            DataSource.name, TableMetadata.schema_name, TableMetadata.name, TableMetadata.description,
+            TableMetadata.properties, ColumnMetadata.name, ColumnMetadata.data_type, ColumnMetadata.description,
+            ColumnMetadata.is_primary_key, ColumnMetadata.properties
+        ).select_from(TableMetadata).join(
+            DataSource, TableMetadata.data_source_id == DataSource.id
+        ).outerjoin(
+            ColumnMetadata, ColumnMetadata.table_id == TableMetadata.id
+        ).order_by(TableMetadata.id, ColumnMetadata.id).yield_per(batch_size)
+
+        for batch in _batches(query, batch_size):
+            yield [{
+                "data_source_name": ds_name,
+                "schema_name": schema_name,
+                "table_name": table_name,
+                "table_description": table_description,
+                "table_properties": table_properties,
+                "column_name": column_name,
+                "data_type": data_type,
+                "column_description": column_description,
+                "is_primary_key": None if column_name is None else bool(is_primary_key),
+                "column_properties": column_properties
+            } for (ds_name, schema_name, table_name, table_description, table_properties, column_name,
+                   data_type, column_description, is_primary_key, column_properties) in batch]
+
+    @staticmethod
+    def _iter_table_lineage(db: Session, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+        query = db.query(
+            LineageRelation.source_table_ids, DataSource.name, TableMetadata.name, LineageRelation.relation_type,
+            LineageRelation.description, LineageRelation.relation_details
+        ).select_from(LineageRelation).join(
+            TableMetadata, LineageRelation.target_table_id == TableMetadata.id
+        ).join(
+            DataSource, TableMetadata.data_source_id == DataSource.id
+        ).order_by(LineageRelation.id).yield_per(batch_size)
+
+        for batch in _batches(query, batch_size):
+            # 源表名称按批查询，多源血缘关系按源表展开为多行
+            source_ids = sorted({i for source_table_ids, *_ in batch if isinstance(source_table_ids, list)
+                                 for i in source_table_ids})
+            source_tables = {}
+            for i in range(0, len(source_ids), _IN_CHUNK_SIZE):
+                source_tables.update({
+                    table_id: (ds_name, table_name)
+                    for table_id, table_name, ds_name in db.query(
+                        TableMetadata.id, TableMetadata.name, DataSource.name
+                    ).join(DataSource, TableMetadata.data_source_id == DataSource.id).filter(
+                        TableMetadata.id.in_(source_ids[i:i + _IN_CHUNK_SIZE])
+                    )
+                })
+
+            rows = []
+            for source_table_ids, target_ds, target_table, relation_type, description, details in batch:
+                logic = details.get("transformation_logic") if isinstance(details, dict) else None
+                for source_table_id in source_table_ids or []:
+                    if source_table_id not in source_tables:
+                        continue
+                    source_ds, source_table = source_tables[source_table_id]
+                    rows.append({
+                        "source_db_name": source_ds,
+                        "source_table_name": source_table,
+                        "target_db_name": target_ds,
+                        "target_table_name": target_table,
+                        "relation_type": relation_type,
+                        "description": description,
+                        "transformation_logic": logic,
+                        "relation_details": details
+                    })
+            if rows:
+                yield rows
+
+    @staticmethod
+    def _iter_column_lineage(db: Session, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+        source_column, target_column = aliased(ColumnMetadata), aliased(ColumnMetadata)
+        source_table, target_table = aliased(TableMetadata), aliased(TableMetadata)
+        source_ds, target_ds = aliased(DataSource), aliased(DataSource)
+        query = db.query(
+            source_ds.name, source_table.name, source_column.name,
+            target_ds.name, target_table.name, target_column.name,
+            LineageRelation.relation_type, LineageRelation.description, ColumnLineageRelation.transformation_details
+        ).select_from(ColumnLineageRelation).join(
+            LineageRelation, ColumnLineageRelation.lineage_relation_id == LineageRelation.id
+        ).join(
+            source_column, ColumnLineageRelation.source_column_id == source_column.id
+        ).join(
+            source_table, source_column.table_id == source_table.id
+        ).join(
+            source_ds, source_table.data_source_id == source_ds.id
+        ).join(
+            target_column, ColumnLineageRelation.target_column_id == target_column.id
+        ).join(
+            target_table, target_column.table_id == target_table.id
+        ).join(
+            target_ds, target_table.data_source_id == target_ds.id
+        ).order_by(ColumnLineageRelation.id).yield_per(batch_size)
+
+        for batch in _batches(query, batch_size):
+            yield [{
+                "source_db_name": s_ds,
+                "source_table_name": s_table,
+                "source_column_name": s_column,
+                "target_db_name": t_ds,
+                "target_table_name": t_table,
+                "target_column_name": t_column,
+                "relation_type": relation_type,
+                "description": description,
+                "transformation_logic": details.get("logic") if isinstance(details, dict) else None,
+                "transformation_details": details
+            } for (s_ds, s_table, s_column, t_ds, t_table, t_column, relation_type, description, details) in batch]
@@ -0,0 +1,401 @@
+from typing import Dict, Any, List, Optional, Iterator
+from datetime import datetime, timedelta
+import hashlib
+import json
+import math
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+import logging
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# 上传会话ID格式，同时防止路径穿越
+_UPLOAD_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+_MANIFEST_NAME = "manifest.json"
+
+
+class ChunkedUploadService:
+    """分块上传服务类，负责大文件的分块接收、校验、断点续传和合并
+
+    每个上传会话在暂存目录下对应一个子目录，分块以独立文件保存，会话状态记录在
+    manifest.json中。清单保存在磁盘上，服务重启后客户端仍可查询已接收的分块并继续上传。
+    """
+
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _session_dir(upload_id: str) -> Optional[str]:
+        if not _UPLOAD_ID_PATTERN.match(upload_id or ""):
+            return None
+        return os.path.join(settings.upload_staging_dir, upload_id)
+
+    @staticmethod
+    def _chunk_path(session_dir: str, index: int) -> str:
+        return os.path.join(session_dir, f"chunk_{index:06d}.part")
+
+    @staticmethod
+    def _load_manifest(upload_id: str) -> Optional[Dict[str, Any]]:
+        session_dir = ChunkedUploadService._session_dir(upload_id)
+        if session_dir is None:
+            return None
+        manifest_path = os.path.join(session_dir, _MANIFEST_NAME)
+        if not os.path.exists(manifest_path):
+            return None
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def _save_manifest(manifest: Dict[str, Any]) -> None:
+        session_dir = ChunkedUploadService._session_dir(manifest["upload_id"])
+        manifest_path = os.path.join(session_dir, _MANIFEST_NAME)
+        # 先写临时文件再替换，避免中断时留下不完整的清单
+        tmp_path = manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(tmp_path, manifest_path)
+
+    @staticmethod
+    def _expected_chunk_size(manifest: Dict[str, Any], index: int) -> int:
+        if index < manifest["total_chunks"] - 1:
+            return manifest["chunk_size"]
+        return manifest["total_size"] - manifest["chunk_size"] * (manifest["total_chunks"] - 1)
+
+    @staticmethod
+    def initiate(file_name: str, total_size: int, chunk_size: Optional[int] = None,
+                 file_sha256: Optional[str] = None) -> Dict[str, Any]:
+        """
+        创建分块上传会话
+
+        Args:
+            file_name: 原始文件名
+            total_size: 文件总字节数
+            chunk_size: 分块大小，默认取settings.upload_chunk_size
+            file_sha256: 可选的整个文件的SHA-256，合并时校验
+
+        Returns:
+            上传会话状态
+        """
+        chunk_size = chunk_size or settings.upload_chunk_size
+        if total_size <= 0:
+            raise ValueError("文件大小必须大于0")
+        if chunk_size <= 0 or chunk_size > settings.upload_max_chunk_size:
+            raise ValueError(f"分块大小必须在1到{settings.upload_max_chunk_size}字节之间")
+
+        ChunkedUploadService.cleanup_expired()
+
+        upload_id = uuid.uuid4().hex
+        os.makedirs(ChunkedUploadService._session_dir(upload_id), exist_ok=True)
+        manifest = {
+            "upload_id": upload_id,
+            "file_name": file_name,
+            "total_size": total_size,
+            "chunk_size": chunk_size,
+            "total_chunks": math.ceil(total_size / chunk_size),
+            "file_sha256": file_sha256.lower() if file_sha256 else None,
+            "chunks": {},
+            "completed": False,
+            "created_at": datetime.utcnow().isoformat(),
+            "updated_at": datetime.utcnow().isoformat()
+        }
+        ChunkedUploadService._save_manifest(manifest)
+        logger.info(f"创建分块上传会话: {upload_id}, 文件: {file_name}, 大小: {total_size}, 分块数: {manifest['total_chunks']}")
+        return ChunkedUploadService._to_status(manifest)
+
+    @staticmethod
+    def put_chunk(upload_id: str, index: int, data: bytes,
+                  checksum: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        写入一个分块，重复上传相同分块是幂等的
+
+        Args:
+            upload_id: 上传会话ID
+            index: 分块序号，从0开始
+            data: 分块内容
+            checksum: 可选的分块SHA-256，与服务端计算结果不一致时拒绝写入
+
+        Returns:
+            上传会话状态，会话不存在时返回None
+        """
+        manifest = ChunkedUploadService._load_manifest(upload_id)
+        if manifest is None:
+            return None
+        if manifest["completed"]:
+            raise ValueError("上传会话已完成，不能再写入分块")
+        if index < 0 or index >= manifest["total_chunks"]:
+            raise ValueError(f"分块序号超出范围: {index}，有效范围为0到{manifest['total_chunks'] - 1}")
+
+        expected_size = ChunkedUploadService._expected_chunk_size(manifest, index)
+        if len(data) != expected_size:
+            raise ValueError(f"分块{index}大小不正确: 期望{expected_size}字节，实际{len(data)}字节")
+
+        digest = hashlib.sha256(data).hexdigest()
+        if checksum and checksum.lower() != digest:
+            raise ValueError(f"分块{index}校验和不匹配: 期望{checksum}，实际{digest}")
+
+        session_dir = ChunkedUploadService._session_dir(upload_id)
+        chunk_path = ChunkedUploadService._chunk_path(session_dir, index)
+        tmp_path = f"{chunk_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+
+        # 并发上传不同分块时串行更新清单；替换分块文件与合并互斥，合并期间和合并后不能再改写分块
+        with ChunkedUploadService._lock:
+            manifest = ChunkedUploadService._load_manifest(upload_id)
+            if manifest is None or manifest["completed"]:
+                os.remove(tmp_path)
+                if manifest is None:
+                    return None
+                raise ValueError("上传会话已完成，不能再写入分块")
+            os.replace(tmp_path, chunk_path)
+            manifest["chunks"][str(index)] = {"size": len(data), "sha256": digest}
+            manifest["updated_at"] = datetime.utcnow().isoformat()
+            ChunkedUploadService._save_manifest(manifest)
+
+        logger.debug(f"分块上传会话 {upload_id} 接收分块 {index}, 大小: {len(data)}")
+        status = ChunkedUploadService._to_status(manifest)
+        status["chunk"] = {"index": index, "size": len(data), "sha256": digest}
+        return status
+
+    @staticmethod
+    def get_status(upload_id: str) -> Optional[Dict[str, Any]]:
+        """获取上传会话状态，包括已接收和缺失的分块，客户端据此续传"""
+        manifest = ChunkedUploadService._load_manifest(upload_id)
+        if manifest is None:
+            return None
+        return ChunkedUploadService._to_status(manifest)
+
+    @staticmethod
+    def iter_prefix(upload_id: str, block_size: int = 1024 * 1024, follow: bool = False) -> Iterator[bytes]:
+        """
+        按顺序读取从第一个分块开始连续已接收的部分
+
+        适用于可流式解析的格式（如JSON），在全部分块到达前即可开始解析已完成的前缀；
+        Excel文件为zip格式，目录位于文件末尾，必须等待合并完成
+
+        Args:
+            upload_id: 上传会话ID
+            block_size: 每次返回的字节数
+            follow: 为True时读完已接收的前缀后每settings.upload_stream_poll_seconds秒检查一次清单，
+                等待后续分块直到读完整个文件；读完后校验已读取的分块和整个文件的SHA-256
+
+        Raises:
+            ValueError: follow为True时会话不存在或已删除、超过settings.upload_stream_idle_seconds秒没有新分块、
+                已读取的分块被重新上传为不同内容或整个文件的校验和不匹配
+        """
+        manifest = ChunkedUploadService._load_manifest(upload_id)
+        if manifest is None:
+            if follow:
+                raise ValueError("上传会话不存在")
+            return
+        session_dir = ChunkedUploadService._session_dir(upload_id)
+        file_hash = hashlib.sha256()
+        # 从分块文件读取的分块序号及其内容的SHA-256，读完后与清单核对
+        consumed: Dict[int, str] = {}
+        index = 0
+        last_chunk_at = time.monotonic()
+
+        while index < manifest["total_chunks"]:
+            if manifest["completed"]:
+                # 分块已合并并删除，从合并后的文件中当前位置继续读取
+                path = os.path.join(session_dir, "assembled")
+                offset = index * manifest["chunk_size"]
+            elif str(index) in manifest["chunks"]:
+                path, offset = ChunkedUploadService._chunk_path(session_dir, index), 0
+            elif not follow:
+                return
+            else:
+                if time.monotonic() - last_chunk_at > settings.upload_stream_idle_seconds:
+                    raise ValueError(f"等待分块{index}超时")
+                time.sleep(settings.upload_stream_poll_seconds)
+                manifest = ChunkedUploadService._load_manifest(upload_id)
+                if manifest is None:
+                    raise ValueError("上传会话已删除")
+                continue
+
+            try:
+                f = open(path, "rb")
+            except FileNotFoundError:
+                # 打开前分块已被合并删除，重新读取清单
+                manifest = ChunkedUploadService._load_manifest(upload_id)
+                if manifest is None:
+                    raise ValueError("上传会话已删除")
+                continue
+            chunk_hash = hashlib.sha256()
+            with f:
+                f.seek(offset)
+                while True:
+                    block = f.read(block_size)
+                    if not block:
+                        break
+                    chunk_hash.update(block)
+                    file_hash.update(block)
+                    yield block
+            if manifest["completed"]:
+                index = manifest["total_chunks"]
+            else:
+                consumed[index] = chunk_hash.hexdigest()
+                index += 1
+                last_chunk_at = time.monotonic()
+
+        if not follow:
+            return
+        manifest = ChunkedUploadService._load_manifest(upload_id)
+        if manifest is None:
+            raise ValueError("上传会话已删除")
+        for index, digest in consumed.items():
+            if manifest["chunks"].get(str(index), {}).get("sha256", digest) != digest:
+                raise ValueError(f"分块{index}在读取后被重新上传为不同内容")
+        if manifest["file_sha256"] and file_hash.hexdigest() != manifest["file_sha256"]:
+            raise ValueError(f"文件校验和不匹配: 期望{manifest['file_sha256']}，实际{file_hash.hexdigest()}")
+
+    @staticmethod
+    def attach_import(upload_id: str, job_id: str) -> None:
+        """
+        记录正在边上传边导入该会话的后台任务，此后不能再用complete合并导入
+
+        Raises:
+            ValueError: 会话不存在、已合并或已有导入任务
+        """
+        with ChunkedUploadService._lock:
+            manifest = ChunkedUploadService._load_manifest(upload_id)
+            if manifest is None:
+                raise ValueError("上传会话不存在")
+            if manifest["completed"]:
+                raise ValueError("上传会话已完成合并，请使用complete导入")
+            if manifest.get("import_job_id"):
+                raise ValueError(f"上传会话已有导入任务: {manifest['import_job_id']}")
+            manifest["import_job_id"] = job_id
+            ChunkedUploadService._save_manifest(manifest)
+
+    @staticmethod
+    def detach_import(upload_id: str) -> None:
+        """导入任务失败后解除关联，保留已上传的分块，可重新导入"""
+        with ChunkedUploadService._lock:
+            manifest = ChunkedUploadService._load_manifest(upload_id)
+            if manifest is not None and manifest.get("import_job_id"):
+                manifest["import_job_id"] = None
+                ChunkedUploadService._save_manifest(manifest)
+
+    @staticmethod
+    def complete(upload_id: str) -> Optional[str]:
+        """
+        校验所有分块并合并为完整文件
+
+        检查、合并和标记完成在锁内进行，与写入分块互斥，合并期间不会有分块被重新上传
+
+        Args:
+            upload_id: 上传会话ID
+
+        Returns:
+            合并后文件的路径，会话不存在时返回None
+        """
+        with ChunkedUploadService._lock:
+            manifest = ChunkedUploadService._load_manifest(upload_id)
+            if manifest is None:
+                return None
+
+            session_dir = ChunkedUploadService._session_dir(upload_id)
+            assembled_path = os.path.join(session_dir, "assembled")
+            if manifest["completed"] and os.path.exists(assembled_path):
+                return assembled_path
+
+            if manifest.get("import_job_id"):
+                raise ValueError(f"上传会话正在由导入任务 {manifest['import_job_id']} 边上传边导入")
+            missing = ChunkedUploadService._missing_chunks(manifest)
+            if missing:
+                raise ValueError(f"还有{len(missing)}个分块未上传: {missing[:20]}")
+
+            # 逐块合并并重新计算校验和，发现磁盘上损坏的分块
+            file_hash = hashlib.sha256()
+            tmp_path = assembled_path + ".tmp"
+            with open(tmp_path, "wb") as out:
+                for index in range(manifest["total_chunks"]):
+                    with open(ChunkedUploadService._chunk_path(session_dir, index), "rb") as f:
+                        data = f.read()
+                    if hashlib.sha256(data).hexdigest() != manifest["chunks"][str(index)]["sha256"]:
+                        del manifest["chunks"][str(index)]
+                        ChunkedUploadService._save_manifest(manifest)
+                        out.close()
+                        os.remove(tmp_path)
+                        raise ValueError(f"分块{index}已损坏，请重新上传该分块")
+                    file_hash.update(data)
+                    out.write(data)
+
+            if manifest["file_sha256"] and file_hash.hexdigest() != manifest["file_sha256"]:
+                os.remove(tmp_path)
+                raise ValueError(f"文件校验和不匹配: 期望{manifest['file_sha256']}，实际{file_hash.hexdigest()}")
+
+            os.replace(tmp_path, assembled_path)
+            # 合并完成后删除分块文件，释放暂存空间
+            for index in range(manifest["total_chunks"]):
+                os.remove(ChunkedUploadService._chunk_path(session_dir, index))
+            manifest["completed"] = True
+            manifest["updated_at"] = datetime.utcnow().isoformat()
+            ChunkedUploadService._save_manifest(manifest)
+        logger.info(f"分块上传会话 {upload_id} 合并完成, 文件: {manifest['file_name']}")
+        return assembled_path
+
+    @staticmethod
+    def discard(upload_id: str) -> bool:
+        """删除上传会话及其暂存文件"""
+        session_dir = ChunkedUploadService._session_dir(upload_id)
+        if session_dir is None or not os.path.isdir(session_dir):
+            return False
+        shutil.rmtree(session_dir, ignore_errors=True)
+        logger.info(f"已删除分块上传会话: {upload_id}")
+        return True
+
+    @staticmethod
+    def cleanup_expired() -> int:
+        """清理超过保留时长未更新的上传会话，返回清理数量"""
+        staging_dir = settings.upload_staging_dir
+        if not os.path.isdir(staging_dir):
+            return 0
+
+        deadline = datetime.utcnow() - timedelta(hours=settings.upload_session_ttl_hours)
+        removed = 0
+        for upload_id in os.listdir(staging_dir):
+            try:
+                manifest = ChunkedUploadService._load_manifest(upload_id)
+            except (OSError, ValueError):
+                manifest = None
+            if manifest is None:
+                continue
+            if datetime.fromisoformat(manifest["updated_at"]) < deadline:
+                ChunkedUploadService.discard(upload_id)
+                removed += 1
+        return removed
+
+    @staticmethod
+    def _missing_chunks(manifest: Dict[str, Any]) -> List[int]:
+        return [i for i in range(manifest["total_chunks"]) if str(i) not in manifest["chunks"]]
+
+    @staticmethod
+    def _to_status(manifest: Dict[str, Any]) -> Dict[str, Any]:
+        """将清单转换为返回给客户端的会话状态"""
+        received = sorted(int(i) for i in manifest["chunks"])
+        # 从第一个分块开始连续已接收的分块数
+        prefix_chunks = 0
+        while str(prefix_chunks) in manifest["chunks"]:
+            prefix_chunks += 1
+        return {
+            "upload_id": manifest["upload_id"],
+            "file_name": manifest["file_name"],
+            "total_size": manifest["total_size"],
+            "chunk_size": manifest["chunk_size"],
+            "total_chunks": manifest["total_chunks"],
+            "received_chunks": received,
+            "missing_chunks": ChunkedUploadService._missing_chunks(manifest),
+            "received_bytes": sum(c["size"] for c in manifest["chunks"].values()),
+            "prefix_chunks": prefix_chunks,
+            "completed": manifest["completed"],
+            "import_job_id": manifest.get("import_job_id"),
+            "created_at": manifest["created_at"],
+            "updated_at": manifest["updated_at"]
+        }
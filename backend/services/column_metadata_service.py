@@ -2,13 +2,18 @@ from typing import List, Optional
 from sqlalchemy.orm import Session
 from models import ColumnMetadata
 from models.schemas import ColumnMetadataCreate, ColumnMetadataUpdate
+from services.table_metadata_service import TableMetadataService
 
 class ColumnMetadataService:
     """列元数据服务类，提供列元数据管理的业务逻辑"""
     
     @staticmethod
-    def create(db: Session, column_metadata: ColumnMetadataCreate) -> ColumnMetadata:
-        """创建新列元数据"""
+    def create(db: Session, column_metadata: ColumnMetadataCreate, commit: bool = True,
+               invalidate_hash: bool = True) -> ColumnMetadata:
+        """创建新列元数据
+
+        invalidate_hash为False时不清除所属表的内容哈希，由调用方（如文件导入）自行写入哈希或每张表清除一次
+        """
         # 检查同名列是否已存在于同一表
         existing = db.query(ColumnMetadata).filter(
             ColumnMetadata.name == column_metadata.name,
@@ -20,8 +25,13 @@ class ColumnMetadataService:
         # 创建新列元数据
         db_column = ColumnMetadata(**column_metadata.model_dump())
         db.add(db_column)
-        db.commit()
-        db.refresh(db_column)
+        if invalidate_hash:
+            TableMetadataService.invalidate_content_hash(db, column_metadata.table_id)
+        if commit:
+            db.commit()
+            db.refresh(db_column)
+        else:
+            db.flush()
         return db_column
     
     @staticmethod
@@ -49,8 +59,9 @@ class ColumnMetadataService:
         ).first()
     
     @staticmethod
-    def update(db: Session, column_id: int, column_update: ColumnMetadataUpdate) -> Optional[ColumnMetadata]:
-        """更新列元数据"""
+    def update(db: Session, column_id: int, column_update: ColumnMetadataUpdate, commit: bool = True,
+               invalidate_hash: bool = True) -> Optional[ColumnMetadata]:
+        """更新列元数据，invalidate_hash同create"""
         db_column = db.query(ColumnMetadata).filter(ColumnMetadata.id == column_id).first()
         if not db_column:
             return None
@@ -59,9 +70,12 @@ class ColumnMetadataService:
         update_data = column_update.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_column, field, value)
+        if invalidate_hash:
+            TableMetadataService.invalidate_content_hash(db, db_column.table_id)
         
-        db.commit()
-        db.refresh(db_column)
+        if commit:
+            db.commit()
+            db.refresh(db_column)
         return db_column
     
     @staticmethod
@@ -76,6 +90,7 @@ class ColumnMetadataService:
             raise ValueError("无法删除，该列参与列级血缘关系")
         
         db.delete(db_column)
+        TableMetadataService.invalidate_content_hash(db, db_column.table_id)
         db.commit()
         return True
     
@@ -83,6 +98,7 @@ class ColumnMetadataService:
     def batch_create(db: Session, columns: List[ColumnMetadataCreate]) -> List[ColumnMetadata]:
         """批量创建列元数据"""
         created_columns = []
+        table_ids = set()
         for column in columns:
             # 检查是否已存在
             existing = db.query(ColumnMetadata).filter(
@@ -94,7 +110,11 @@ class ColumnMetadataService:
                 db_column = ColumnMetadata(**column.model_dump())
                 db.add(db_column)
                 created_columns.append(db_column)
+                table_ids.add(column.table_id)
         
+        # 每张表只清除一次内容哈希
+        for table_id in table_ids:
+            TableMetadataService.invalidate_content_hash(db, table_id)
         db.commit()
         # 刷新以获取ID等自动生成的字段
         for column in created_columns:
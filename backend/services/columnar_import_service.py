@@ -0,0 +1,530 @@
+from typing import Dict, Any, List, Optional, Callable, Set, Tuple
+from functools import partial
+from datetime import datetime
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+import logging
+
+from models import TableMetadata, ColumnMetadata, LineageRelation, ColumnLineageRelation
+from services.import_unit_of_work import ImportUnitOfWork
+from services.lineage_resolution_index import LineageResolutionIndex
+from utils.columnar_utils import (
+    ColumnarReader, parse_properties,
+    TABLE_STRUCTURE_COLUMNS, TABLE_LINEAGE_COLUMNS, COLUMN_LINEAGE_COLUMNS
+)
+from utils.content_hash_utils import TableHashBuilder, lineage_content_hash
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# 单条IN查询的最大参数个数，避免超过SQLite的变量数限制
+_IN_CHUNK_SIZE = 500
+
+
+def _is_true(value: Any) -> bool:
+    """主键标记可以是布尔、数字或字符串"""
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "y", "是")
+    return bool(value)
+
+
+class _BatchChanges:
+    """一批数据的写入结果，该批的保存点提交后才计入统计并登记到名称索引"""
+
+    def __init__(self):
+        self.counts: List[Tuple[str, str, int]] = []
+        self.registrations: List[Tuple[Callable[..., None], tuple]] = []
+
+    def count(self, key: str, action: str, n: int) -> None:
+        if n:
+            self.counts.append((key, action, n))
+
+    def register(self, func: Callable[..., None], *args) -> None:
+        self.registrations.append((func, args))
+
+    def apply(self, result: Dict[str, Any]) -> None:
+        for key, action, n in self.counts:
+            result[key][action] += n
+        for func, args in self.registrations:
+            func(*args)
+
+
+class ColumnarImportService:
+    """Parquet/Arrow IPC文件导入服务类
+
+    文件按批次读取（只读取导入需要的列），每批先通过名称索引批量解析数据源、表和字段，
+    再以批量INSERT ... RETURNING和按主键的批量UPDATE写入，不再逐行调用服务层方法。
+    每批使用一个保存点，某批写入失败只回滚该批。
+    表和表级血缘关系与上次导入的内容哈希相同时跳过，不产生任何写操作。
+    """
+
+    @staticmethod
+    def import_table_structure(db: Session, contents: bytes, file_format: str,
+                               progress: Optional[Any] = None) -> Dict[str, Any]:
+        """
+        导入Parquet/Arrow文件中的表结构和字段信息
+
+        文件为扁平布局，每个字段一行，列见TABLE_STRUCTURE_COLUMNS；数据源需已存在。
+        写入前先扫描一遍文件计算每张表的内容哈希（表属性及按顺序排列的字段定义），
+        与上次导入相同的表及其字段不再写入，计入skipped
+
+        Args:
+            db: 数据库会话
+            contents: 上传文件的原始内容
+            file_format: parquet或arrow
+            progress: 可选的进度跟踪对象，由后台导入任务传入
+
+        Returns:
+            导入结果
+        """
+        result = {
+            "tables": {"created": 0, "updated": 0, "skipped": 0},
+            "columns": {"created": 0, "updated": 0, "skipped": 0},
+            "validation_errors": []
+        }
+        table_hashes, last_rows = ColumnarImportService._table_structure_hashes(contents, file_format)
+        ColumnarImportService._import_batches(
+            db, contents, file_format, TABLE_STRUCTURE_COLUMNS,
+            partial(ColumnarImportService._apply_table_structure_batch,
+                    table_hashes=table_hashes, last_rows=last_rows, skipped_table_ids=set()),
+            result, progress
+        )
+        return ColumnarImportService._build_result("表结构", result, ["tables", "columns"])
+
+    @staticmethod
+    def import_table_lineage(db: Session, contents: bytes, file_format: str,
+                             progress: Optional[Any] = None) -> Dict[str, Any]:
+        """
+        导入Parquet/Arrow文件中的表级血缘关系，列见TABLE_LINEAGE_COLUMNS
+
+        Args:
+            db: 数据库会话
+            contents: 上传文件的原始内容
+            file_format: parquet或arrow
+            progress: 可选的进度跟踪对象，由后台导入任务传入
+
+        Returns:
+            导入结果
+        """
+        result = {
+            "lineages": {"created": 0, "updated": 0, "skipped": 0},
+            "validation_errors": []
+        }
+        ColumnarImportService._import_batches(
+            db, contents, file_format, TABLE_LINEAGE_COLUMNS,
+            ColumnarImportService._apply_table_lineage_batch, result, progress
+        )
+        return ColumnarImportService._build_result("表血缘关系", result, ["lineages"])
+
+    @staticmethod
+    def import_column_lineage(db: Session, contents: bytes, file_format: str,
+                              progress: Optional[Any] = None) -> Dict[str, Any]:
+        """
+        导入Parquet/Arrow文件中的字段血缘关系，列见COLUMN_LINEAGE_COLUMNS
+
+        对应的表级血缘关系不存在时自动创建；已存在的字段血缘关系更新转换细节，重复导入不会产生重复数据
+
+        Args:
+            db: 数据库会话
+            contents: 上传文件的原始内容
+            file_format: parquet或arrow
+            progress: 可选的进度跟踪对象，由后台导入任务传入
+
+        Returns:
+            导入结果
+        """
+        result = {
+            "lineages": {"created": 0, "updated": 0},
+            "column_lineages": {"created": 0, "updated": 0},
+            "validation_errors": []
+        }
+        ColumnarImportService._import_batches(
+            db, contents, file_format, COLUMN_LINEAGE_COLUMNS,
+            ColumnarImportService._apply_column_lineage_batch, result, progress
+        )
+        return ColumnarImportService._build_result("字段血缘关系", result, ["column_lineages"])
+
+    # ---------- 按批处理 ----------
+
+    @staticmethod
+    def _import_batches(db: Session, contents: bytes, file_format: str, columns: List[str],
+                        apply_batch: Callable[..., _BatchChanges], result: Dict[str, Any],
+                        progress: Optional[Any]) -> None:
+        """按批次读取文件并写入，apply_batch负责一批数据的解析和批量写入"""
+        reader = ColumnarReader(contents, file_format, columns)
+        present = set(reader.columns)
+        logger.info(f"开始导入{file_format}文件，读取列: {reader.columns}，总行数: {reader.num_rows}")
+
+        index = LineageResolutionIndex()
+        with ImportUnitOfWork(db, progress=progress) as uow:
+            if reader.num_rows is not None:
+                uow.expect_rows(reader.num_rows)
+            first_row = 1
+            for rows in reader.iter_batches(settings.columnar_batch_size):
+                if reader.num_rows is None:
+                    uow.expect_rows(len(rows))
+                try:
+                    with uow.batch(len(rows)):
+                        changes = apply_batch(db, index, rows, first_row, present, result["validation_errors"])
+                except Exception as e:
+                    error_msg = f"处理第{first_row}-{first_row + len(rows) - 1}行时出错: {str(e)}"
+                    logger.error(error_msg, exc_info=True)
+                    result["validation_errors"].append(error_msg)
+                else:
+                    changes.apply(result)
+                first_row += len(rows)
+
+    @staticmethod
+    def _resolve_table(index: LineageResolutionIndex, row: Dict[str, Any], side: str,
+                       label: str) -> Tuple[Optional[int], Optional[str]]:
+        """解析血缘数据行中一侧的表，返回(表ID, 错误信息)"""
+        db_name = row.get(f"{side}_db_name")
+        table_name = row.get(f"{side}_table_name")
+        ds_id = index.data_source_id(db_name)
+        if not ds_id:
+            return None, f"{label}数据库不存在: {db_name}"
+        table_id = index.table_id(ds_id, table_name)
+        if not table_id:
+            return None, f"{label}表不存在: {table_name} 于数据库 {db_name}"
+        return table_id, None
+
+    @staticmethod
+    def _parse_table_structure_row(row: Dict[str, Any], present: Set[str]) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """将一行数据转换为表属性和字段定义（没有字段名的行只包含表属性），数据不完整时抛出ValueError"""
+        table_name = row.get("table_name")
+        if not isinstance(table_name, str) or not table_name:
+            raise ValueError("缺少必填字段: table_name")
+
+        table = {"name": table_name}
+        if "schema_name" in present:
+            table["schema_name"] = row.get("schema_name")
+        if "table_description" in present:
+            table["description"] = row.get("table_description")
+        if "table_properties" in present:
+            table["properties"] = parse_properties(row.get("table_properties"))
+
+        column = None
+        column_name = row.get("column_name")
+        if isinstance(column_name, str) and column_name:
+            if not row.get("data_type"):
+                raise ValueError(f"缺少必填字段: data_type（字段 {column_name}）")
+            column = {"name": column_name, "data_type": row.get("data_type")}
+            if "column_description" in present:
+                column["description"] = row.get("column_description")
+            if "is_primary_key" in present:
+                column["is_primary_key"] = int(_is_true(row.get("is_primary_key")))
+            if "column_properties" in present:
+                column["properties"] = parse_properties(row.get("column_properties"))
+        return table, column
+
+    @staticmethod
+    def _table_structure_hashes(contents: bytes, file_format: str) -> Tuple[Dict[Tuple[str, str], str], Dict[Tuple[str, str], int]]:
+        """
+        预先扫描文件，计算每张表的内容哈希
+
+        Returns:
+            (表键 -> 内容哈希, 表键 -> 该表最后一行的行号)，表键为(数据源名称, 小写表名)
+        """
+        reader = ColumnarReader(contents, file_format, TABLE_STRUCTURE_COLUMNS)
+        present = set(reader.columns)
+        builder = TableHashBuilder()
+        last_rows = {}
+        row_number = 0
+        for rows in reader.iter_batches(settings.columnar_batch_size):
+            for row in rows:
+                row_number += 1
+                try:
+                    table, column = ColumnarImportService._parse_table_structure_row(row, present)
+                except ValueError:
+                    continue
+                key = (row.get("data_source_name"), table["name"].lower())
+                builder.add(key, table, column)
+                last_rows[key] = row_number
+        return builder.hashes(), last_rows
+
+    @staticmethod
+    def _apply_table_structure_batch(db: Session, index: LineageResolutionIndex, rows: List[Dict[str, Any]],
+                                     first_row: int, present: Set[str], errors: List[str],
+                                     table_hashes: Dict[Tuple[str, str], str],
+                                     last_rows: Dict[Tuple[str, str], int],
+                                     skipped_table_ids: Set[int]) -> _BatchChanges:
+        changes = _BatchChanges()
+        index.load_names(
+            db,
+            (row.get("data_source_name") for row in rows),
+            (row.get("table_name") for row in rows),
+            (row.get("column_name") for row in rows)
+        )
+
+        # 同一批中同一张表、同一个字段出现多次时，以最后一行为准
+        tables: Dict[Tuple[int, str], Dict[str, Any]] = {}
+        columns: Dict[Tuple[Tuple[int, str], str], Dict[str, Any]] = {}
+        hash_keys: Dict[Tuple[int, str], Tuple[str, str]] = {}
+        for offset, row in enumerate(rows):
+            row_number = first_row + offset
+            try:
+                ds_id = index.data_source_id(row.get("data_source_name"))
+                if not ds_id:
+                    raise ValueError(f"数据源不存在: {row.get('data_source_name')}")
+                table, column = ColumnarImportService._parse_table_structure_row(row, present)
+            except ValueError as e:
+                errors.append(f"第{row_number}行: {str(e)}")
+                continue
+
+            table_key = (ds_id, table["name"].lower())
+            tables[table_key] = {**tables.get(table_key, {}), **table}
+            hash_keys[table_key] = (row.get("data_source_name"), table["name"].lower())
+            if column is not None:
+                columns[(table_key, column["name"].lower())] = column
+
+        # 表：内容哈希未变化的跳过，其余已存在的按主键批量更新，新表批量插入。
+        # 一张表的行跨越多个批次时，只在包含其最后一行的批次写入哈希，之前的批次先清除旧哈希
+        now = datetime.utcnow()
+        table_ids: Dict[Tuple[int, str], int] = {}
+        skipped: Set[Tuple[int, str]] = set()
+        table_updates, table_inserts = [], []
+        last_row = first_row + len(rows) - 1
+        for table_key, table in tables.items():
+            hash_key = hash_keys[table_key]
+            file_hash = table_hashes.get(hash_key)
+            content_hash = file_hash if last_rows.get(hash_key, 0) <= last_row else None
+            table_id = index.table_id(table_key[0], table["name"])
+            if table_id and file_hash is not None and index.table_hash(table_id) == file_hash:
+                table_ids[table_key] = table_id
+                skipped.add(table_key)
+            elif table_id:
+                table_ids[table_key] = table_id
+                table_updates.append({**table, "id": table_id, "content_hash": content_hash, "updated_at": now})
+                changes.register(index.set_table_hash, table_id, content_hash)
+            else:
+                table_inserts.append({**table, "data_source_id": table_key[0], "content_hash": content_hash,
+                                      "created_at": now, "updated_at": now})
+        ColumnarImportService._bulk_update(db, TableMetadata, table_updates)
+        inserted = ColumnarImportService._bulk_insert(
+            db, TableMetadata, table_inserts,
+            TableMetadata.id, TableMetadata.data_source_id, TableMetadata.schema_name, TableMetadata.name,
+            TableMetadata.content_hash
+        )
+        for table_id, ds_id, schema_name, name, content_hash in inserted:
+            table_ids[(ds_id, name.lower())] = table_id
+            changes.register(index.add_table, ds_id, schema_name, name, table_id)
+            changes.register(index.set_table_hash, table_id, content_hash)
+        changes.count("tables", "updated", len(table_updates))
+        changes.count("tables", "created", len(table_inserts))
+        # 跨越多个批次的表只计一次跳过
+        newly_skipped = {table_ids[table_key] for table_key in skipped} - skipped_table_ids
+        changes.register(skipped_table_ids.update, newly_skipped)
+        changes.count("tables", "skipped", len(newly_skipped))
+
+        # 字段：所属的表未变化时跳过
+        column_updates, column_inserts = [], []
+        columns_skipped = 0
+        for (table_key, _), column in columns.items():
+            if table_key in skipped:
+                columns_skipped += 1
+                continue
+            table_id = table_ids[table_key]
+            column_id = index.column_id(table_id, column["name"])
+            if column_id:
+                column_updates.append({**column, "id": column_id})
+            else:
+                column_inserts.append({**column, "table_id": table_id})
+        ColumnarImportService._bulk_update(db, ColumnMetadata, column_updates)
+        inserted = ColumnarImportService._bulk_insert(
+            db, ColumnMetadata, column_inserts, ColumnMetadata.id, ColumnMetadata.table_id, ColumnMetadata.name
+        )
+        for column_id, table_id, name in inserted:
+            changes.register(index.add_column, table_id, name, column_id)
+        changes.count("columns", "updated", len(column_updates))
+        changes.count("columns", "created", len(column_inserts))
+        changes.count("columns", "skipped", columns_skipped)
+        return changes
+
+    @staticmethod
+    def _apply_table_lineage_batch(db: Session, index: LineageResolutionIndex, rows: List[Dict[str, Any]],
+                                   first_row: int, present: Set[str], errors: List[str]) -> _BatchChanges:
+        changes = _BatchChanges()
+        index.load(db, rows)
+
+        lineages: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        for offset, row in enumerate(rows):
+            row_number = first_row + offset
+            try:
+                source_table_id, error = ColumnarImportService._resolve_table(index, row, "source", "源")
+                if error is None:
+                    target_table_id, error = ColumnarImportService._resolve_table(index, row, "target", "目标")
+                if error is not None:
+                    raise ValueError(error)
+                relation_details = parse_properties(row.get("relation_details")) or {
+                    "transformation_logic": row.get("transformation_logic") or ""
+                }
+            except ValueError as e:
+                errors.append(f"第{row_number}行: {str(e)}")
+                continue
+            lineage = {
+                "relation_type": row.get("relation_type") or "TRANSFORMATION",
+                "description": row.get("description") or "",
+                "relation_details": relation_details
+            }
+            lineage["content_hash"] = lineage_content_hash([source_table_id], target_table_id, lineage)
+            lineages[(source_table_id, target_table_id)] = lineage
+
+        # 内容哈希未变化的跳过
+        updates, inserts = [], []
+        skipped = 0
+        for (source_table_id, target_table_id), lineage in lineages.items():
+            lineage_id = index.table_lineage_id([source_table_id], target_table_id)
+            if lineage_id and index.lineage_hash(lineage_id) == lineage["content_hash"]:
+                skipped += 1
+            elif lineage_id:
+                updates.append({**lineage, "id": lineage_id})
+                changes.register(index.set_lineage_hash, lineage_id, lineage["content_hash"])
+            else:
+                inserts.append({**lineage, "source_table_ids": [source_table_id], "target_table_id": target_table_id})
+        ColumnarImportService._bulk_update(db, LineageRelation, updates)
+        inserted = ColumnarImportService._bulk_insert(
+            db, LineageRelation, inserts,
+            LineageRelation.id, LineageRelation.source_table_ids, LineageRelation.target_table_id,
+            LineageRelation.content_hash
+        )
+        for lineage_id, source_table_ids, target_table_id, content_hash in inserted:
+            changes.register(index.register_table_lineage, lineage_id, source_table_ids, target_table_id)
+            changes.register(index.set_lineage_hash, lineage_id, content_hash)
+        changes.count("lineages", "updated", len(updates))
+        changes.count("lineages", "created", len(inserts))
+        changes.count("lineages", "skipped", skipped)
+        return changes
+
+    @staticmethod
+    def _apply_column_lineage_batch(db: Session, index: LineageResolutionIndex, rows: List[Dict[str, Any]],
+                                    first_row: int, present: Set[str], errors: List[str]) -> _BatchChanges:
+        changes = _BatchChanges()
+        index.load(db, rows, include_columns=True)
+
+        resolved = []
+        for offset, row in enumerate(rows):
+            row_number = first_row + offset
+            try:
+                source_table_id, error = ColumnarImportService._resolve_table(index, row, "source", "源")
+                if error is None:
+                    target_table_id, error = ColumnarImportService._resolve_table(index, row, "target", "目标")
+                if error is not None:
+                    raise ValueError(error)
+                source_column_id = index.column_id(source_table_id, row.get("source_column_name"))
+                if not source_column_id:
+                    raise ValueError(f"源字段不存在: {row.get('source_column_name')} 于表 {row.get('source_table_name')}")
+                target_column_id = index.column_id(target_table_id, row.get("target_column_name"))
+                if not target_column_id:
+                    raise ValueError(f"目标字段不存在: {row.get('target_column_name')} 于表 {row.get('target_table_name')}")
+                transformation_details = parse_properties(row.get("transformation_details")) or {
+                    "logic": row.get("transformation_logic") or ""
+                }
+            except ValueError as e:
+                errors.append(f"第{row_number}行: {str(e)}")
+                continue
+            resolved.append((source_table_id, target_table_id, source_column_id, target_column_id,
+                             transformation_details, row))
+
+        # 缺少的表级血缘关系先批量创建
+        lineage_ids: Dict[Tuple[int, int], int] = {}
+        missing: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        for source_table_id, target_table_id, _, _, _, row in resolved:
+            pair = (source_table_id, target_table_id)
+            lineage_id = index.table_lineage_id([source_table_id], target_table_id)
+            if lineage_id:
+                lineage_ids[pair] = lineage_id
+            elif pair not in missing:
+                missing[pair] = {
+                    "source_table_ids": [source_table_id],
+                    "target_table_id": target_table_id,
+                    "relation_type": row.get("relation_type") or "TRANSFORMATION",
+                    "description": row.get("description") or "",
+                    "relation_details": {}
+                }
+        inserted = ColumnarImportService._bulk_insert(
+            db, LineageRelation, list(missing.values()),
+            LineageRelation.id, LineageRelation.source_table_ids, LineageRelation.target_table_id
+        )
+        for lineage_id, source_table_ids, target_table_id in inserted:
+            lineage_ids[(source_table_ids[0], target_table_id)] = lineage_id
+            changes.register(index.register_table_lineage, lineage_id, source_table_ids, target_table_id)
+        changes.count("lineages", "created", len(missing))
+
+        # 已存在的字段血缘关系更新转换细节，其余批量插入
+        existing = ColumnarImportService._existing_column_lineages(
+            db, {target_column_id for _, _, _, target_column_id, _, _ in resolved}
+        )
+        column_lineages: Dict[Tuple[int, int, int], Dict[str, Any]] = {}
+        for source_table_id, target_table_id, source_column_id, target_column_id, details, _ in resolved:
+            lineage_id = lineage_ids[(source_table_id, target_table_id)]
+            column_lineages[(lineage_id, source_column_id, target_column_id)] = details
+        updates, inserts = [], []
+        for (lineage_id, source_column_id, target_column_id), details in column_lineages.items():
+            column_lineage_id = existing.get((lineage_id, source_column_id, target_column_id))
+            if column_lineage_id:
+                updates.append({"id": column_lineage_id, "transformation_details": details})
+            else:
+                inserts.append({
+                    "lineage_relation_id": lineage_id,
+                    "source_column_id": source_column_id,
+                    "target_column_id": target_column_id,
+                    "transformation_details": details
+                })
+        ColumnarImportService._bulk_update(db, ColumnLineageRelation, updates)
+        ColumnarImportService._bulk_insert(db, ColumnLineageRelation, inserts)
+        changes.count("column_lineages", "updated", len(updates))
+        changes.count("column_lineages", "created", len(inserts))
+        return changes
+
+    # ---------- 批量写入 ----------
+
+    @staticmethod
+    def _bulk_insert(db: Session, model: Any, rows: List[Dict[str, Any]], *returning: Any) -> List[Any]:
+        """批量插入，指定returning时返回插入行的对应列"""
+        if not rows:
+            return []
+        if not returning:
+            db.execute(insert(model), rows)
+            return []
+        return db.execute(insert(model).returning(*returning), rows).all()
+
+    @staticmethod
+    def _bulk_update(db: Session, model: Any, rows: List[Dict[str, Any]]) -> None:
+        """按主键批量更新，每行需包含id"""
+        if rows:
+            db.execute(update(model), rows)
+
+    @staticmethod
+    def _existing_column_lineages(db: Session, target_column_ids: Set[int]) -> Dict[Tuple[int, int, int], int]:
+        """查询目标字段范围内已有的字段血缘关系，键为(表级血缘ID, 源字段ID, 目标字段ID)"""
+        existing = {}
+        ids = sorted(target_column_ids)
+        for i in range(0, len(ids), _IN_CHUNK_SIZE):
+            query = db.query(
+                ColumnLineageRelation.id, ColumnLineageRelation.lineage_relation_id,
+                ColumnLineageRelation.source_column_id, ColumnLineageRelation.target_column_id
+            ).filter(ColumnLineageRelation.target_column_id.in_(ids[i:i + _IN_CHUNK_SIZE]))
+            for column_lineage_id, lineage_id, source_column_id, target_column_id in query:
+                existing.setdefault((lineage_id, source_column_id, target_column_id), column_lineage_id)
+        return existing
+
+    @staticmethod
+    def _build_result(label: str, result: Dict[str, Any], counted: List[str]) -> Dict[str, Any]:
+        """根据统计和错误确定导入状态，与Excel/JSON导入的返回格式一致；内容未变化而跳过的数据不计入成功数"""
+        success_count = sum(result[key]["created"] + result[key]["updated"] for key in counted)
+        skipped_count = sum(result[key].get("skipped", 0) for key in counted)
+        error_count = len(result["validation_errors"])
+        if not error_count:
+            status, message = "success", f"{label}导入成功，共{success_count}个"
+        elif success_count + skipped_count == 0:
+            status, message = "error", f"{label}导入失败，共{error_count}个错误"
+        else:
+            status, message = "partial_success", f"{label}导入完成，成功{success_count}个，失败{error_count}个"
+        if skipped_count:
+            message += f"，{skipped_count}个未变化已跳过"
+        logger.info(message)
+
+        result["success_count"] = success_count
+        result["skipped_count"] = skipped_count
+        result["error_count"] = error_count
+        return {"status": status, "message": message, "result": result}
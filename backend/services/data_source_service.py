@@ -2,23 +2,28 @@ from typing import List, Optional
 from sqlalchemy.orm import Session
 from models import DataSource, DataSourceType
 from models.schemas import DataSourceCreate, DataSourceUpdate
+from services.refresh_scheduler_service import RefreshSchedulerService
 
 class DataSourceService:
     """数据源服务类，提供数据源管理的业务逻辑"""
     
     @staticmethod
-    def create(db: Session, data_source: DataSourceCreate) -> DataSource:
+    def create(db: Session, data_source: DataSourceCreate, commit: bool = True) -> DataSource:
         """创建新数据源"""
         # 检查数据源名称是否已存在
         existing = db.query(DataSource).filter(DataSource.name == data_source.name).first()
         if existing:
             raise ValueError(f"数据源名称 '{data_source.name}' 已存在")
+        RefreshSchedulerService.parse_policy(data_source.refresh_policy)
         
         # 创建新数据源
         db_data_source = DataSource(**data_source.model_dump())
         db.add(db_data_source)
-        db.commit()
-        db.refresh(db_data_source)
+        if commit:
+            db.commit()
+            db.refresh(db_data_source)
+        else:
+            db.flush()
         return db_data_source
     
     @staticmethod
@@ -42,7 +47,7 @@ class DataSourceService:
         return db.query(DataSource).filter(DataSource.type == data_source_type).all()
     
     @staticmethod
-    def update(db: Session, data_source_id: int, data_source_update: DataSourceUpdate) -> Optional[DataSource]:
+    def update(db: Session, data_source_id: int, data_source_update: DataSourceUpdate, commit: bool = True) -> Optional[DataSource]:
         """更新数据源信息"""
         db_data_source = db.query(DataSource).filter(DataSource.id == data_source_id).first()
         if not db_data_source:
@@ -50,11 +55,13 @@ class DataSourceService:
         
         # 更新字段
         update_data = data_source_update.model_dump(exclude_unset=True)
+        RefreshSchedulerService.parse_policy(update_data.get("refresh_policy"))
         for field, value in update_data.items():
             setattr(db_data_source, field, value)
         
-        db.commit()
-        db.refresh(db_data_source)
+        if commit:
+            db.commit()
+            db.refresh(db_data_source)
         return db_data_source
     
     @staticmethod
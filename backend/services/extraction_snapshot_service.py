@@ -0,0 +1,227 @@
+from typing import Dict, Any, List, Iterator, Optional
+from datetime import datetime, timedelta
+import json
+import os
+import re
+import logging
+
+from config.settings import settings
+from utils.snapshot_utils import (
+    SNAPSHOT_EXTENSIONS, SnapshotWriter, iter_snapshot, read_snapshot_header, resolve_codec
+)
+
+logger = logging.getLogger(__name__)
+
+# 快照ID为创建时间（UTC，精确到微秒），按字典序即时间顺序
+_SNAPSHOT_ID = re.compile(r"^\d{8}T\d{12}Z$")
+_SNAPSHOT_ID_FORMAT = "%Y%m%dT%H%M%S%fZ"
+# 导入快照时删除的表的下游影响，与快照同名保存
+_IMPACT_EXTENSION = ".impact.json"
+
+
+class ExtractionSnapshotService:
+    """提取快照服务类，将每次从数据源提取的元数据保存为压缩的NDJSON快照，并可从快照重新导入
+
+    快照按数据源保存在settings.extraction_snapshot_dir下的子目录中，文件名为快照ID（创建时间）加压缩扩展名。
+    记录快照时不额外读取数据源：导入逐表消费提取结果的同时写入快照，导入中途失败时继续取完提取结果，
+    使快照完整，修复导入问题后可以直接从快照重新导入
+    """
+
+    @staticmethod
+    def _source_dir(data_source_id: int) -> str:
+        return os.path.join(settings.extraction_snapshot_dir, str(int(data_source_id)))
+
+    @staticmethod
+    def _snapshot_path(data_source_id: int, snapshot_id: str) -> str:
+        """快照文件路径，快照不存在时抛出FileNotFoundError"""
+        if not _SNAPSHOT_ID.match(snapshot_id or ""):
+            raise ValueError(f"无效的快照ID: {snapshot_id}")
+        source_dir = ExtractionSnapshotService._source_dir(data_source_id)
+        for extension in SNAPSHOT_EXTENSIONS.values():
+            path = os.path.join(source_dir, snapshot_id + extension)
+            if os.path.exists(path):
+                return path
+        raise FileNotFoundError(f"快照 {snapshot_id} 不存在")
+
+    @staticmethod
+    def _impact_path(data_source_id: int, snapshot_id: str) -> str:
+        """快照对应的删除影响文件路径，快照不存在时抛出FileNotFoundError"""
+        ExtractionSnapshotService._snapshot_path(data_source_id, snapshot_id)
+        return os.path.join(ExtractionSnapshotService._source_dir(data_source_id), snapshot_id + _IMPACT_EXTENSION)
+
+    @staticmethod
+    def _list_files(data_source_id: int) -> List[Dict[str, str]]:
+        """数据源已完成的快照文件，按快照ID倒序"""
+        source_dir = ExtractionSnapshotService._source_dir(data_source_id)
+        if not os.path.isdir(source_dir):
+            return []
+        files = []
+        for file_name in os.listdir(source_dir):
+            for codec, extension in SNAPSHOT_EXTENSIONS.items():
+                snapshot_id = file_name[:-len(extension)]
+                if file_name.endswith(extension) and _SNAPSHOT_ID.match(snapshot_id):
+                    files.append({"id": snapshot_id, "codec": codec, "path": os.path.join(source_dir, file_name)})
+        return sorted(files, key=lambda item: item["id"], reverse=True)
+
+    @staticmethod
+    def record(data_source_id: int, data_source_type: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        在提取结果被消费的同时写入快照
+
+        Args:
+            data_source_id: 数据源ID
+            data_source_type: 数据源类型
+            metadata: MetadataExtractor.stream_metadata的返回值
+
+        Returns:
+            tables替换为边写快照边生成表信息的迭代器、并带有snapshot_id的metadata；
+            迭代完成后快照才生效，并按保留策略清理旧快照
+        """
+        source_dir = ExtractionSnapshotService._source_dir(data_source_id)
+        os.makedirs(source_dir, exist_ok=True)
+        codec = resolve_codec(settings.extraction_snapshot_codec)
+        snapshot_id = datetime.utcnow().strftime(_SNAPSHOT_ID_FORMAT)
+        path = os.path.join(source_dir, snapshot_id + SNAPSHOT_EXTENSIONS[codec])
+        header = {
+            "id": snapshot_id,
+            "data_source_id": data_source_id,
+            "data_source_type": data_source_type,
+            "created_at": datetime.utcnow(),
+            "metadata": {key: value for key, value in metadata.items() if key != "tables"}
+        }
+        tables = metadata.get("tables", [])
+
+        def recorded() -> Iterator[Dict[str, Any]]:
+            # 开始消费时才创建文件，未被迭代的快照不留下临时文件
+            writer = SnapshotWriter(path, header, codec)
+            completed = False
+            try:
+                for table_info in tables:
+                    writer.write_table(table_info)
+                    yield table_info
+                completed = True
+            except GeneratorExit:
+                # 导入中途失败或停止，取完剩余的提取结果使快照完整
+                try:
+                    for table_info in tables:
+                        writer.write_table(table_info)
+                    completed = True
+                except Exception as e:
+                    logger.error(f"导入中止后继续写入快照失败: {str(e)}")
+                raise
+            finally:
+                if completed:
+                    # failed_tables、errors等在提取结束后才完整，写入尾信息
+                    writer.commit({key: value for key, value in metadata.items() if key != "tables"})
+                    logger.info(f"已保存数据源 {data_source_id} 的提取快照 {snapshot_id}，共{writer.table_count}张表")
+                    ExtractionSnapshotService.apply_retention(data_source_id)
+                else:
+                    writer.abort()
+
+        return {**metadata, "snapshot_id": snapshot_id, "tables": recorded()}
+
+    @staticmethod
+    def load(data_source_id: int, snapshot_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        读取快照，返回与MetadataExtractor.stream_metadata相同结构的元数据，tables逐表读取
+
+        Args:
+            data_source_id: 数据源ID
+            snapshot_id: 快照ID，默认为最新的快照
+
+        Raises:
+            FileNotFoundError: 快照不存在
+            ValueError: 快照ID无效、快照不属于该数据源或格式不受支持
+        """
+        if snapshot_id is None:
+            files = ExtractionSnapshotService._list_files(data_source_id)
+            if not files:
+                raise FileNotFoundError(f"数据源 {data_source_id} 没有提取快照")
+            path = files[0]["path"]
+        else:
+            path = ExtractionSnapshotService._snapshot_path(data_source_id, snapshot_id)
+
+        header, tables, trailer = iter_snapshot(path)
+        if header.get("data_source_id") != data_source_id:
+            raise ValueError(f"快照 {header.get('id')} 不属于数据源 {data_source_id}")
+        metadata = dict(header.get("metadata") or {})
+
+        def replay() -> Iterator[Dict[str, Any]]:
+            yield from tables
+            # 尾信息中的failed_tables、errors等在迭代结束后补充到元数据中，与流式提取一致
+            trailer.pop("table_count", None)
+            metadata.update(trailer)
+
+        metadata["tables"] = replay()
+        metadata["snapshot_id"] = header["id"]
+        return metadata
+
+    @staticmethod
+    def save_removal_impact(data_source_id: int, snapshot_id: str, tables_removed: List[Dict[str, Any]]) -> None:
+        """
+        保存导入快照时删除的表的下游影响
+
+        表删除后其列不再能从元数据目录中按名称找到，下游影响须在删除前计算并随快照保存
+
+        Args:
+            data_source_id: 数据源ID
+            snapshot_id: 快照ID
+            tables_removed: 每张表的schema、name、downstream_columns、downstream_tables
+        """
+        path = ExtractionSnapshotService._impact_path(data_source_id, snapshot_id)
+        with open(path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump({"tables_removed": tables_removed}, file, ensure_ascii=False)
+        os.replace(path + ".tmp", path)
+
+    @staticmethod
+    def load_removal_impact(data_source_id: int, snapshot_id: str) -> List[Dict[str, Any]]:
+        """读取导入快照时删除的表的下游影响，没有记录时返回空列表"""
+        path = ExtractionSnapshotService._impact_path(data_source_id, snapshot_id)
+        if not os.path.exists(path):
+            return []
+        with open(path, encoding="utf-8") as file:
+            return json.load(file).get("tables_removed", [])
+
+    @staticmethod
+    def list_snapshots(data_source_id: int) -> List[Dict[str, Any]]:
+        """获取数据源的快照列表，按创建时间倒序"""
+        snapshots = []
+        for item in ExtractionSnapshotService._list_files(data_source_id):
+            try:
+                header = read_snapshot_header(item["path"])
+            except (OSError, ValueError) as e:
+                logger.warning(f"无法读取快照 {item['path']}: {str(e)}")
+                continue
+            created_at = header.get("created_at")
+            snapshots.append({
+                "id": item["id"],
+                "codec": item["codec"],
+                "size_bytes": os.path.getsize(item["path"]),
+                "created_at": created_at.isoformat() if isinstance(created_at, datetime) else created_at,
+                "incremental": bool((header.get("metadata") or {}).get("incremental"))
+            })
+        return snapshots
+
+    @staticmethod
+    def apply_retention(data_source_id: int) -> int:
+        """
+        按保留策略删除旧快照：每个数据源只保留最近settings.extraction_snapshot_retention个，
+        并删除早于settings.extraction_snapshot_max_age_days天的快照（最新的一个始终保留）
+
+        Returns:
+            删除的快照数
+        """
+        files = ExtractionSnapshotService._list_files(data_source_id)
+        expired = files[max(1, settings.extraction_snapshot_retention):]
+        if settings.extraction_snapshot_max_age_days > 0:
+            cutoff = (datetime.utcnow() - timedelta(days=settings.extraction_snapshot_max_age_days)).strftime(
+                _SNAPSHOT_ID_FORMAT
+            )
+            expired.extend(item for item in files[1:max(1, settings.extraction_snapshot_retention)] if item["id"] < cutoff)
+        for item in expired:
+            impact_path = ExtractionSnapshotService._impact_path(data_source_id, item["id"])
+            os.remove(item["path"])
+            if os.path.exists(impact_path):
+                os.remove(impact_path)
+            logger.info(f"删除过期的提取快照: {item['path']}")
+        return len(expired)
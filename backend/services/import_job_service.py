@@ -0,0 +1,370 @@
+from typing import Dict, Any, List, Optional, Callable
+from concurrent.futures import ThreadPoolExecutor, Future
+from datetime import datetime
+from sqlalchemy.orm import Session
+import threading
+import time
+import uuid
+import logging
+
+import models
+from models import ImportJob, ImportJobStatus
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# 已结束的任务状态
+TERMINAL_JOB_STATUSES = {ImportJobStatus.SUCCEEDED, ImportJobStatus.FAILED, ImportJobStatus.CANCELLED}
+
+
+class ImportCancelledError(BaseException):
+    """导入任务被取消
+
+    继承BaseException而非Exception，避免被导入逻辑中逐行的except Exception吞掉，
+    从而能一直传播到导入工作单元并回滚未提交的写操作
+    """
+
+
+class ImportJobProgress:
+    """运行中导入任务的进度跟踪对象，由导入工作单元逐行回调"""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.status = ImportJobStatus.PENDING
+        self.total_rows = 0
+        self.processed_rows = 0
+        self.failed_rows = 0
+        self.errors: List[str] = []
+        self.started_at: Optional[float] = None
+        self.future: Optional[Future] = None
+        self.cleanup: Optional[Callable[[], None]] = None
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def add_total(self, count: int) -> None:
+        with self._lock:
+            self.total_rows += count
+
+    def row_done(self, error: Optional[str] = None) -> None:
+        with self._lock:
+            self.processed_rows += 1
+            if error is not None:
+                self.failed_rows += 1
+                if len(self.errors) < settings.import_job_max_errors:
+                    self.errors.append(f"第{self.processed_rows}行: {error}")
+
+    def rows_done(self, count: int, error: Optional[str] = None) -> None:
+        """批量写入时一次上报一批行，出错时整批计为失败"""
+        with self._lock:
+            first_row = self.processed_rows + 1
+            self.processed_rows += count
+            if error is not None:
+                self.failed_rows += count
+                if len(self.errors) < settings.import_job_max_errors:
+                    self.errors.append(f"第{first_row}-{self.processed_rows}行: {error}")
+
+    def request_cancel(self) -> None:
+        self._cancel_event.set()
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self) -> None:
+        if self._cancel_event.is_set():
+            raise ImportCancelledError(f"导入任务 {self.job_id} 已取消")
+
+    @property
+    def rows_per_second(self) -> Optional[float]:
+        if self.started_at is None:
+            return None
+        elapsed = time.monotonic() - self.started_at
+        return round(self.processed_rows / elapsed, 2) if elapsed > 0 else None
+
+    def persist(self, db: Session) -> None:
+        """将当前进度写入任务记录，使用导入自身的会话，随导入事务一起提交"""
+        with self._lock:
+            values = {
+                ImportJob.total_rows: self.total_rows,
+                ImportJob.processed_rows: self.processed_rows,
+                ImportJob.failed_rows: self.failed_rows
+            }
+        values[ImportJob.rows_per_second] = self.rows_per_second
+        db.query(ImportJob).filter(ImportJob.id == self.job_id).update(values, synchronize_session=False)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """返回当前进度的快照"""
+        with self._lock:
+            return {
+                "status": self.status.value,
+                "total_rows": self.total_rows,
+                "processed_rows": self.processed_rows,
+                "failed_rows": self.failed_rows,
+                "rows_per_second": self.rows_per_second,
+                "errors": list(self.errors),
+                "cancel_requested": self.cancel_requested
+            }
+
+
+class ImportJobService:
+    """后台导入任务服务类，负责任务的提交、执行、进度查询和取消
+
+    任务在有界线程池中执行，状态持久化在jobs表中。运行中的实时进度保存在内存中，
+    导入工作单元每次flush和提交时通过导入自身的会话写入任务记录，不与导入事务争用SQLite写锁，
+    已提交的进度与已提交的数据一致。服务启动时未结束的任务标记为失败。
+    """
+
+    # 任务线程池和运行中任务的进度对象
+    _executor: Optional[ThreadPoolExecutor] = None
+    _live_jobs: Dict[str, ImportJobProgress] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        with cls._lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=max(1, settings.import_job_workers),
+                    thread_name_prefix="import-job"
+                )
+            return cls._executor
+
+    @classmethod
+    def recover_interrupted(cls) -> int:
+        """
+        将服务重启前未结束（pending或running）的任务标记为失败，在服务启动时调用
+
+        Returns:
+            标记为失败的任务数
+        """
+        with cls._lock:
+            live_ids = list(cls._live_jobs)
+        db = models.session_local()
+        try:
+            query = db.query(ImportJob).filter(
+                ImportJob.status.in_([ImportJobStatus.PENDING, ImportJobStatus.RUNNING])
+            )
+            if live_ids:
+                query = query.filter(ImportJob.id.notin_(live_ids))
+            interrupted = query.update(
+                {
+                    ImportJob.status: ImportJobStatus.FAILED,
+                    ImportJob.errors: ["服务重启时任务被中断"],
+                    ImportJob.finished_at: datetime.utcnow()
+                },
+                synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+        if interrupted:
+            logger.warning(f"{interrupted}个未结束的后台导入任务已标记为失败")
+        return interrupted
+
+    @classmethod
+    def submit(cls, db: Session, job_type: str, file_name: Optional[str],
+               import_func: Callable[..., Dict[str, Any]], contents: Any,
+               job_id: Optional[str] = None, cleanup: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+        """
+        提交后台导入任务，立即返回任务信息
+
+        Args:
+            db: 数据库会话
+            job_type: 任务类型
+            file_name: 上传的文件名
+            import_func: 导入函数，签名为(db, contents, progress=...)
+            contents: 上传文件内容，原样传给import_func
+            job_id: 预先分配的任务ID，默认生成新的ID
+            cleanup: 任务结束后（包括开始前被取消）调用，如删除暂存的上传文件
+
+        Returns:
+            任务信息字典
+        """
+        job = ImportJob(
+            id=job_id or str(uuid.uuid4()),
+            job_type=job_type,
+            file_name=file_name,
+            status=ImportJobStatus.PENDING,
+            errors=[],
+            cancel_requested=0
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        job_info = cls._to_dict(job)
+        # 结束读事务，避免SQLite共享锁阻塞工作线程写入任务状态
+        db.commit()
+
+        progress = ImportJobProgress(job_info["id"])
+        progress.cleanup = cleanup
+        with cls._lock:
+            cls._live_jobs[job_info["id"]] = progress
+        progress.future = cls._get_executor().submit(cls._run_job, job_info["id"], import_func, contents, progress)
+        logger.info(f"已提交后台导入任务: {job_info['id']}, 类型: {job_type}, 文件: {file_name}")
+        return job_info
+
+    @classmethod
+    def _run_job(cls, job_id: str, import_func: Callable[..., Dict[str, Any]],
+                 contents: bytes, progress: ImportJobProgress) -> None:
+        """在工作线程中执行导入任务"""
+        db = models.session_local()
+        try:
+            if progress.cancel_requested:
+                cls._finish_job(db, job_id, progress, ImportJobStatus.CANCELLED)
+                return
+
+            progress.status = ImportJobStatus.RUNNING
+            progress.started_at = time.monotonic()
+            job = db.query(ImportJob).filter(ImportJob.id == job_id).first()
+            job.status = ImportJobStatus.RUNNING
+            job.started_at = datetime.utcnow()
+            db.commit()
+
+            logger.info(f"开始执行后台导入任务: {job_id}")
+            result = import_func(db, contents, progress=progress)
+
+            status = ImportJobStatus.SUCCEEDED
+            if isinstance(result, dict) and result.get("status") == "error":
+                status = ImportJobStatus.FAILED
+            cls._finish_job(db, job_id, progress, status, result=result)
+        except ImportCancelledError as e:
+            logger.info(str(e))
+            db.rollback()
+            cls._finish_job(db, job_id, progress, ImportJobStatus.CANCELLED)
+        except Exception as e:
+            logger.error(f"后台导入任务 {job_id} 执行失败: {str(e)}", exc_info=True)
+            db.rollback()
+            with progress._lock:
+                progress.errors.append(str(e))
+            cls._finish_job(db, job_id, progress, ImportJobStatus.FAILED)
+        finally:
+            with cls._lock:
+                cls._live_jobs.pop(job_id, None)
+            db.close()
+            cls._cleanup(progress)
+
+    @staticmethod
+    def _cleanup(progress: ImportJobProgress) -> None:
+        """调用任务的清理函数，清理失败只记录日志"""
+        if progress.cleanup is None:
+            return
+        try:
+            progress.cleanup()
+        except Exception as e:
+            logger.warning(f"后台导入任务 {progress.job_id} 清理失败: {str(e)}")
+
+    @staticmethod
+    def _finish_job(db: Session, job_id: str, progress: ImportJobProgress,
+                    status: ImportJobStatus, result: Optional[Dict[str, Any]] = None) -> None:
+        """将任务最终状态写回数据库"""
+        job = db.query(ImportJob).filter(ImportJob.id == job_id).first()
+        if not job:
+            return
+
+        errors = list(progress.errors)
+        # 导入结果中的校验错误包含未抛出异常而被跳过的行，以其为准
+        if isinstance(result, dict):
+            validation_errors = (result.get("result") or {}).get("validation_errors")
+            if validation_errors:
+                errors = validation_errors[:settings.import_job_max_errors]
+
+        progress.status = status
+        job.status = status
+        job.total_rows = progress.total_rows
+        job.processed_rows = progress.processed_rows
+        job.failed_rows = progress.failed_rows
+        job.rows_per_second = progress.rows_per_second
+        job.errors = errors
+        job.result = result
+        job.cancel_requested = 1 if progress.cancel_requested else 0
+        job.finished_at = datetime.utcnow()
+        db.commit()
+        logger.info(f"后台导入任务结束: {job_id}, 状态: {status.value}, 处理行数: {progress.processed_rows}")
+
+    @classmethod
+    def get_job(cls, db: Session, job_id: str) -> Optional[Dict[str, Any]]:
+        """获取任务详情，运行中的任务返回内存中的实时进度"""
+        job = db.query(ImportJob).filter(ImportJob.id == job_id).first()
+        if not job:
+            return None
+        # 确保读取到工作线程写入的最新状态
+        db.refresh(job)
+        with cls._lock:
+            progress = cls._live_jobs.get(job_id)
+        return cls._to_dict(job, progress)
+
+    @classmethod
+    def list_jobs(cls, db: Session, skip: int = 0, limit: int = 100,
+                  status: Optional[ImportJobStatus] = None) -> List[Dict[str, Any]]:
+        """获取任务列表，按创建时间倒序"""
+        query = db.query(ImportJob)
+        if status:
+            query = query.filter(ImportJob.status == status)
+        jobs = query.order_by(ImportJob.created_at.desc()).offset(skip).limit(limit).all()
+        with cls._lock:
+            live_jobs = dict(cls._live_jobs)
+        return [cls._to_dict(job, live_jobs.get(job.id)) for job in jobs]
+
+    @classmethod
+    def cancel_job(cls, db: Session, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        请求取消任务
+
+        运行中的任务在处理下一行前停止，并回滚尚未提交的写操作；
+        尚未开始的任务直接标记为已取消
+        """
+        job = db.query(ImportJob).filter(ImportJob.id == job_id).first()
+        if not job:
+            return None
+
+        with cls._lock:
+            progress = cls._live_jobs.get(job_id)
+
+        if progress is not None:
+            progress.request_cancel()
+            # 尚未开始执行的任务直接从线程池队列中移除
+            if progress.future is not None and progress.future.cancel():
+                with cls._lock:
+                    cls._live_jobs.pop(job_id, None)
+                cls._finish_job(db, job_id, progress, ImportJobStatus.CANCELLED)
+                cls._cleanup(progress)
+                db.refresh(job)
+                progress = None
+        elif job.status not in TERMINAL_JOB_STATUSES:
+            # 任务不在本进程中运行（如服务重启前遗留的任务），直接标记为已取消
+            job.status = ImportJobStatus.CANCELLED
+            job.cancel_requested = 1
+            job.finished_at = datetime.utcnow()
+            db.commit()
+            db.refresh(job)
+
+        job_info = cls._to_dict(job, progress)
+        # 结束读事务，运行中的任务随后需要写入取消状态
+        db.commit()
+        return job_info
+
+    @staticmethod
+    def _to_dict(job: ImportJob, progress: Optional[ImportJobProgress] = None) -> Dict[str, Any]:
+        """将任务对象转换为字典，运行中的任务合并实时进度"""
+        data = {
+            "id": job.id,
+            "job_type": job.job_type,
+            "file_name": job.file_name,
+            "status": job.status.value if hasattr(job.status, "value") else job.status,
+            "total_rows": job.total_rows or 0,
+            "processed_rows": job.processed_rows or 0,
+            "failed_rows": job.failed_rows or 0,
+            "rows_per_second": job.rows_per_second,
+            "errors": job.errors or [],
+            "result": job.result,
+            "cancel_requested": bool(job.cancel_requested),
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+            "started_at": job.started_at.isoformat() if job.started_at else None,
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None
+        }
+        if progress is not None and data["status"] not in {s.value for s in TERMINAL_JOB_STATUSES}:
+            data.update(progress.snapshot())
+
+        total = data["total_rows"]
+        data["progress"] = round(data["processed_rows"] / total * 100, 2) if total else None
+        return data
@@ -0,0 +1,163 @@
+from contextlib import contextmanager
+from typing import Any, Optional
+from sqlalchemy.orm import Session
+import logging
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+class ImportUnitOfWork:
+    """
+    文件导入工作单元
+
+    整个导入共用一个事务：服务层方法以commit=False调用，只暂存写操作；
+    每行数据可包裹在保存点中，单行失败只回滚该行；全部处理完成后统一提交一次。
+    对于超大文件，可通过commit_every配置分块提交。
+    传入progress时，每行开始前检查是否已请求取消，并在每行结束后上报进度；
+    progress提供persist方法时，每次flush和提交前用同一会话写入进度，与数据一起提交。
+    按批次批量写入时（如Parquet导入）可用batch()代替row()，整批共用一个保存点。
+
+    用法:
+        with ImportUnitOfWork(db) as uow:
+            for row in rows:
+                try:
+                    with uow.row():
+                        service.create(db, data, commit=False)
+                except Exception as e:
+                    errors.append(str(e))
+    """
+
+    def __init__(self, db: Session, flush_batch_size: Optional[int] = None,
+                 commit_every: Optional[int] = None, isolate_rows: bool = True,
+                 progress: Optional[Any] = None):
+        """
+        Args:
+            db: 数据库会话
+            flush_batch_size: 每多少行flush一次，默认取settings.import_flush_batch_size
+            commit_every: 每多少行提交一次，0表示只在结束时提交，默认取settings.import_commit_every
+            isolate_rows: 是否为每行创建保存点；为False时任一行失败将回滚整个导入
+            progress: 可选的进度跟踪对象，需提供add_total、row_done和check_cancelled方法，
+                      使用batch()时还需提供rows_done方法
+        """
+        self.db = db
+        self.flush_batch_size = flush_batch_size if flush_batch_size is not None else settings.import_flush_batch_size
+        self.commit_every = commit_every if commit_every is not None else settings.import_commit_every
+        self.isolate_rows = isolate_rows
+        self.progress = progress
+
+        # 统计信息
+        self.rows_processed = 0
+        self.rows_failed = 0
+        self.commits = 0
+
+        self._rows_since_flush = 0
+        self._rows_since_commit = 0
+
+    def __enter__(self) -> "ImportUnitOfWork":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        if exc_type is None:
+            self.commit()
+        else:
+            logger.error(f"导入过程中出现异常，回滚未提交的写操作: {exc_value}")
+            self.rollback()
+        return False
+
+    def expect_rows(self, count: int) -> None:
+        """登记即将处理的行数，用于计算进度"""
+        if self.progress is not None:
+            self.progress.add_total(count)
+
+    @contextmanager
+    def row(self):
+        """包裹单行数据的写操作，开启保存点时该行出错只回滚本行并重新抛出异常"""
+        if self.progress is not None:
+            self.progress.check_cancelled()
+
+        if not self.isolate_rows:
+            yield
+            self._after_row()
+            return
+
+        savepoint = self.db.begin_nested()
+        try:
+            yield
+            savepoint.commit()
+        except Exception as e:
+            if savepoint.is_active:
+                savepoint.rollback()
+            self.rows_failed += 1
+            if self.progress is not None:
+                self.progress.row_done(error=str(e))
+            raise
+        self._after_row()
+
+    @contextmanager
+    def batch(self, count: int):
+        """包裹一批数据的批量写操作，开启保存点时该批出错只回滚本批并重新抛出异常"""
+        if self.progress is not None:
+            self.progress.check_cancelled()
+
+        if not self.isolate_rows:
+            yield
+            self._after_rows(count)
+            return
+
+        savepoint = self.db.begin_nested()
+        try:
+            yield
+            savepoint.commit()
+        except Exception as e:
+            if savepoint.is_active:
+                savepoint.rollback()
+            self.rows_failed += count
+            if self.progress is not None:
+                self.progress.rows_done(count, error=str(e))
+            raise
+        if self.progress is not None:
+            self.progress.rows_done(count)
+        self._after_rows(count)
+
+    def _after_row(self) -> None:
+        """单行处理完成后，按批次flush并按配置分块提交"""
+        if self.progress is not None:
+            self.progress.row_done()
+        self._after_rows(1)
+
+    def _after_rows(self, count: int) -> None:
+        """若干行处理完成后，按批次flush并按配置分块提交"""
+        self.rows_processed += count
+        self._rows_since_flush += count
+        self._rows_since_commit += count
+
+        if self.flush_batch_size and self._rows_since_flush >= self.flush_batch_size:
+            self.flush()
+        if self.commit_every and self._rows_since_commit >= self.commit_every:
+            self.commit()
+
+    def _persist_progress(self) -> None:
+        if self.progress is not None and hasattr(self.progress, "persist"):
+            self.progress.persist(self.db)
+
+    def flush(self) -> None:
+        """将暂存的写操作下发到数据库（不提交）"""
+        self._persist_progress()
+        self.db.flush()
+        self._rows_since_flush = 0
+
+    def commit(self) -> None:
+        """提交当前事务"""
+        self._persist_progress()
+        self.db.commit()
+        self.commits += 1
+        self._rows_since_flush = 0
+        self._rows_since_commit = 0
+        logger.info(f"导入事务提交完成，第{self.commits}次提交，累计处理{self.rows_processed}行，失败{self.rows_failed}行")
+
+    def rollback(self) -> None:
+        """回滚当前事务中尚未提交的写操作"""
+        self.db.rollback()
+        self._rows_since_flush = 0
+        self._rows_since_commit = 0
@@ -0,0 +1,210 @@
+from typing import Dict, Any, List, Optional, Iterable, Mapping, Tuple, FrozenSet
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+import logging
+
+from models import DataSource, TableMetadata, ColumnMetadata, LineageRelation
+
+logger = logging.getLogger(__name__)
+
+# 单条IN查询的最大参数个数，避免超过SQLite的变量数限制
+_IN_CHUNK_SIZE = 500
+
+
+def _chunks(values: List[Any], size: int = _IN_CHUNK_SIZE) -> Iterable[List[Any]]:
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _normalize(name: Any) -> Optional[str]:
+    """表名、字段名按大小写不敏感匹配；Excel中的空单元格为NaN，不参与匹配"""
+    if not isinstance(name, str) or not name:
+        return None
+    return name.lower()
+
+
+class LineageResolutionIndex:
+    """
+    血缘导入的名称解析索引
+
+    在一次导入开始时，根据文件中出现的数据源、表和字段名称批量查询，建立以下映射：
+    - 数据源名称 -> 数据源ID
+    - (数据源ID, 模式, 表名) -> 表ID
+    - (表ID, 字段名) -> 字段ID
+    - (源表ID集合, 目标表ID) -> 表级血缘关系ID
+    - 表ID、表级血缘关系ID -> 最近一次导入的内容哈希，用于跳过未变化的数据
+
+    索引只在本次导入内共享，逐行处理时只需字典查找，不再逐行查询数据库。
+    导入过程中新建的表级血缘关系需通过add_table_lineage登记。
+    """
+
+    def __init__(self):
+        self._data_sources: Dict[str, int] = {}
+        self._tables: Dict[Tuple[int, Optional[str], str], int] = {}
+        self._columns: Dict[Tuple[int, str], int] = {}
+        self._lineages: Dict[Tuple[FrozenSet[int], int], int] = {}
+        # 单个源表到目标表的血缘关系，兼容源表包含在多源血缘关系中的情况
+        self._lineages_by_pair: Dict[Tuple[int, int], int] = {}
+        self._table_hashes: Dict[int, Optional[str]] = {}
+        self._lineage_hashes: Dict[int, Optional[str]] = {}
+
+    @classmethod
+    def build(cls, db: Session, rows: Iterable[Mapping[str, Any]],
+              include_columns: bool = False) -> "LineageResolutionIndex":
+        """
+        根据导入数据中引用的名称批量建立索引
+
+        Args:
+            db: 数据库会话
+            rows: 导入的血缘关系数据行，包含source_db_name、source_table_name、target_db_name、
+                  target_table_name，字段血缘还包含source_column_name、target_column_name
+            include_columns: 是否同时建立字段索引
+
+        Returns:
+            名称解析索引
+        """
+        index = cls()
+        index.load(db, rows, include_columns)
+        return index
+
+    def load(self, db: Session, rows: Iterable[Mapping[str, Any]], include_columns: bool = False) -> None:
+        """将血缘关系数据行中引用的名称加载到索引中，可按批次多次调用"""
+        data_source_names, table_names, column_names = set(), set(), set()
+        for row in rows:
+            if not isinstance(row, Mapping):
+                continue
+            for side in ("source", "target"):
+                data_source_names.add(row.get(f"{side}_db_name"))
+                table_names.add(row.get(f"{side}_table_name"))
+                if include_columns:
+                    column_names.add(row.get(f"{side}_column_name"))
+        self.load_names(db, data_source_names, table_names, column_names)
+
+    def load_names(self, db: Session, data_source_names: Iterable[Any], table_names: Iterable[Any],
+                   column_names: Iterable[Any] = ()) -> None:
+        """
+        按名称批量查询数据源、表、字段以及目标表在范围内的表级血缘关系，加入索引
+
+        已在索引中的条目保持不变，因此可按批次多次调用，导入过程中登记的新对象不会被覆盖
+        """
+        data_source_names = sorted({n for n in data_source_names if isinstance(n, str) and n})
+        table_names = sorted({n for n in map(_normalize, table_names) if n})
+        column_names = sorted({n for n in map(_normalize, column_names) if n})
+
+        # 数据源
+        for names in _chunks([n for n in data_source_names if n not in self._data_sources]):
+            for ds_id, name in db.query(DataSource.id, DataSource.name).filter(DataSource.name.in_(names)):
+                self._data_sources[name] = ds_id
+
+        # 表：同名表按ID顺序取第一个，与逐行查询的结果一致
+        data_source_ids = sorted({self._data_sources[n] for n in data_source_names if n in self._data_sources})
+        table_ids = set()
+        if data_source_ids and table_names:
+            for names in _chunks(table_names):
+                query = db.query(
+                    TableMetadata.id, TableMetadata.data_source_id, TableMetadata.schema_name, TableMetadata.name,
+                    TableMetadata.content_hash
+                ).filter(
+                    TableMetadata.data_source_id.in_(data_source_ids),
+                    func.lower(TableMetadata.name).in_(names)
+                ).order_by(TableMetadata.id)
+                for table_id, ds_id, schema_name, name, content_hash in query:
+                    self.add_table(ds_id, schema_name, name, table_id)
+                    self._table_hashes.setdefault(table_id, content_hash)
+                    table_ids.add(table_id)
+
+        table_ids = sorted(table_ids)
+
+        # 字段
+        if table_ids and column_names:
+            for ids in _chunks(table_ids):
+                query = db.query(ColumnMetadata.id, ColumnMetadata.table_id, ColumnMetadata.name).filter(
+                    ColumnMetadata.table_id.in_(ids),
+                    func.lower(ColumnMetadata.name).in_(column_names)
+                ).order_by(ColumnMetadata.id)
+                for column_id, table_id, name in query:
+                    self.add_column(table_id, name, column_id)
+
+        # 已有的表级血缘关系，只加载目标表在本次导入范围内的部分
+        for ids in _chunks(table_ids):
+            query = db.query(
+                LineageRelation.id, LineageRelation.source_table_ids, LineageRelation.target_table_id,
+                LineageRelation.content_hash
+            ).filter(LineageRelation.target_table_id.in_(ids)).order_by(LineageRelation.id)
+            for lineage_id, source_table_ids, target_table_id, content_hash in query:
+                self.register_table_lineage(lineage_id, source_table_ids, target_table_id)
+                self._lineage_hashes.setdefault(lineage_id, content_hash)
+
+        logger.info(
+            f"血缘导入名称索引加载完成: 数据源{len(self._data_sources)}个，表{len(self._tables)}个，"
+            f"字段{len(self._columns)}个，表级血缘关系{len(self._lineages)}个"
+        )
+
+    def add_table(self, data_source_id: int, schema_name: Optional[str], name: str, table_id: int) -> None:
+        """登记表，已存在同名表时保留先登记的表"""
+        self._tables.setdefault((data_source_id, None, name.lower()), table_id)
+        if schema_name:
+            self._tables.setdefault((data_source_id, schema_name.lower(), name.lower()), table_id)
+
+    def add_column(self, table_id: int, name: str, column_id: int) -> None:
+        """登记字段，已存在同名字段时保留先登记的字段"""
+        self._columns.setdefault((table_id, name.lower()), column_id)
+
+    def register_table_lineage(self, lineage_id: int, source_table_ids: Any, target_table_id: int) -> None:
+        """登记表级血缘关系"""
+        if not isinstance(source_table_ids, list):
+            return
+        self._lineages.setdefault((frozenset(source_table_ids), target_table_id), lineage_id)
+        for source_table_id in source_table_ids:
+            self._lineages_by_pair.setdefault((source_table_id, target_table_id), lineage_id)
+
+    def data_source_id(self, name: Any) -> Optional[int]:
+        """根据名称解析数据源ID"""
+        return self._data_sources.get(name) if isinstance(name, str) else None
+
+    def table_id(self, data_source_id: int, table_name: Any, schema_name: Optional[str] = None) -> Optional[int]:
+        """根据数据源ID、模式和表名解析表ID，不指定模式时匹配任意模式"""
+        name = _normalize(table_name)
+        if name is None:
+            return None
+        return self._tables.get((data_source_id, _normalize(schema_name), name))
+
+    def column_id(self, table_id: int, column_name: Any) -> Optional[int]:
+        """根据表ID和字段名解析字段ID"""
+        name = _normalize(column_name)
+        if name is None:
+            return None
+        return self._columns.get((table_id, name))
+
+    def table_lineage_id(self, source_table_ids: Iterable[int], target_table_id: int) -> Optional[int]:
+        """
+        查找已有的表级血缘关系ID
+
+        优先匹配源表集合完全相同的血缘关系；单个源表时，也匹配包含该源表的多源血缘关系
+        """
+        source_table_ids = frozenset(source_table_ids)
+        lineage_id = self._lineages.get((source_table_ids, target_table_id))
+        if lineage_id is None and len(source_table_ids) == 1:
+            lineage_id = self._lineages_by_pair.get((next(iter(source_table_ids)), target_table_id))
+        return lineage_id
+
+    def add_table_lineage(self, lineage: LineageRelation) -> None:
+        """登记导入过程中新建的表级血缘关系，应在该行的保存点提交后调用"""
+        self.register_table_lineage(lineage.id, lineage.source_table_ids, lineage.target_table_id)
+        self._lineage_hashes[lineage.id] = lineage.content_hash
+
+    def table_hash(self, table_id: int) -> Optional[str]:
+        """表最近一次导入的内容哈希"""
+        return self._table_hashes.get(table_id)
+
+    def set_table_hash(self, table_id: int, content_hash: Optional[str]) -> None:
+        """登记表新的内容哈希，应在写入提交后调用"""
+        self._table_hashes[table_id] = content_hash
+
+    def lineage_hash(self, lineage_id: int) -> Optional[str]:
+        """表级血缘关系最近一次导入的内容哈希"""
+        return self._lineage_hashes.get(lineage_id)
+
+    def set_lineage_hash(self, lineage_id: int, content_hash: Optional[str]) -> None:
+        """登记表级血缘关系新的内容哈希，应在写入提交后调用"""
+        self._lineage_hashes[lineage_id] = content_hash
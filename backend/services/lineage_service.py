@@ -23,8 +23,11 @@ class LineageService:
     
     # 表级血缘关系方法
     @staticmethod
-    def create_table_lineage(db: Session, lineage: LineageRelationCreate) -> LineageRelation:
-        """创建表级血缘关系"""
+    def create_table_lineage(db: Session, lineage: LineageRelationCreate, commit: bool = True) -> LineageRelation:
+        """创建表级血缘关系
+        
+        commit为False时只flush不提交，出错时也不回滚，由调用方（如导入工作单元的保存点）处理
+        """
         try:
             # 记录传入的参数
             logger.info(f"开始创建表级血缘关系，传入参数: source_table_ids={lineage.source_table_ids}, target_table_id={lineage.target_table_id}, relation_type={lineage.relation_type}, description={lineage.description}")
@@ -65,18 +68,22 @@ class LineageService:
             logger.info("将血缘关系对象添加到数据库会话")
             db.add(db_lineage)
             
-            logger.info("提交数据库事务")
-            db.commit()
-            
-            logger.info("刷新对象以获取数据库生成的ID")
-            db.refresh(db_lineage)
+            if commit:
+                logger.info("提交数据库事务")
+                db.commit()
+                
+                logger.info("刷新对象以获取数据库生成的ID")
+                db.refresh(db_lineage)
+            else:
+                db.flush()
             
             logger.info(f"表级血缘关系创建成功，ID: {db_lineage.id}")
             return db_lineage
         
         except Exception as e:
             logger.error(f"创建表级血缘关系时发生错误: {str(e)}", exc_info=True)
-            db.rollback()
+            if commit:
+                db.rollback()
             raise
     
     @staticmethod
@@ -229,7 +236,7 @@ class LineageService:
         return result
     
     @staticmethod
-    def update_table_lineage(db: Session, lineage_id: int, lineage_update: LineageRelationUpdate) -> Optional[LineageRelation]:
+    def update_table_lineage(db: Session, lineage_id: int, lineage_update: LineageRelationUpdate, commit: bool = True) -> Optional[LineageRelation]:
         """更新表级血缘关系"""
         db_lineage = db.query(LineageRelation).filter(LineageRelation.id == lineage_id).first()
         if not db_lineage:
@@ -253,9 +260,12 @@ class LineageService:
         
         for field, value in update_data.items():
             setattr(db_lineage, field, value)
+        # 血缘关系已被修改，清除内容哈希，由导入调用时再写入新的哈希
+        db_lineage.content_hash = None
         
-        db.commit()
-        db.refresh(db_lineage)
+        if commit:
+            db.commit()
+            db.refresh(db_lineage)
         return db_lineage
     
     @staticmethod
@@ -276,7 +286,7 @@ class LineageService:
     
     # 列级血缘关系方法
     @staticmethod
-    def create_column_lineage(db: Session, column_lineage: ColumnLineageRelationCreate) -> ColumnLineageRelation:
+    def create_column_lineage(db: Session, column_lineage: ColumnLineageRelationCreate, commit: bool = True) -> ColumnLineageRelation:
         """创建列级血缘关系"""
         # 检查表级血缘关系是否存在
         lineage_relation = db.query(LineageRelation).filter(
@@ -335,8 +345,11 @@ class LineageService:
         # 创建新的列级血缘关系
         db_column_lineage = ColumnLineageRelation(**column_lineage.model_dump())
         db.add(db_column_lineage)
-        db.commit()
-        db.refresh(db_column_lineage)
+        if commit:
+            db.commit()
+            db.refresh(db_column_lineage)
+        else:
+            db.flush()
         return db_column_lineage
     
     @staticmethod
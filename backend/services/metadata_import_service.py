@@ -1,23 +1,37 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Set, Tuple
+from datetime import datetime
+import anyio.to_thread
 from sqlalchemy.orm import Session
 import logging
 from models import DataSource, TableMetadata, ColumnMetadata
 from core.metadata_extractor import MetadataExtractor
-from models.schemas import DataSourceCreate, TableMetadataCreate, ColumnMetadataCreate
+from core.async_metadata_extractor import AsyncMetadataExtractor, iterate_in_thread
+from config.settings import settings
+from services.extraction_snapshot_service import ExtractionSnapshotService
+from services.schema_diff_service import SchemaDiffService
+from utils.json_stream_utils import chunked
 
 logger = logging.getLogger(__name__)
 
+# 提取结果中作为表/列自身字段的键，其余键（表空间、行数、长度、精度等）存入properties
+_TABLE_FIELDS = {"schema", "name", "description", "columns", "primary_keys"}
+_COLUMN_FIELDS = {"name", "type", "description"}
+
 class MetadataImportService:
     """元数据导入服务类，负责将提取的元数据导入到数据模型中"""
     
     @staticmethod
-    def import_metadata_from_source(db: Session, data_source_id: int) -> Dict[str, Any]:
+    def import_metadata_from_source(db: Session, data_source_id: int, full_resync: bool = False) -> Dict[str, Any]:
         """
         从指定数据源导入元数据
         
+        数据源记录了水位线时（上次成功提取的时间）只提取此后新建或修改过的表，并删除数据源中已不存在的表，
+        其余表保持不变；full_resync为True或没有水位线时全量提取
+        
         Args:
             db: 数据库会话
             data_source_id: 数据源ID
+            full_resync: 是否忽略水位线，全量提取
             
         Returns:
             导入结果统计信息
@@ -29,13 +43,17 @@ class MetadataImportService:
         
         try:
             # 提取元数据
-            logger.info(f"开始从数据源 {data_source.name} 提取元数据...")
-            metadata = MetadataExtractor.extract_metadata(
-                data_source.type,
-                data_source.connection_params
+            since = None if full_resync else data_source.extract_watermark
+            logger.info(f"开始从数据源 {data_source.name} 提取元数据..." + (f"（增量，水位线 {since}）" if since else ""))
+            metadata = MetadataExtractor.stream_metadata(
+                data_source.type.value,
+                data_source.connection_config,
+                since=since
             )
+            if settings.extraction_snapshot_enabled:
+                metadata = ExtractionSnapshotService.record(data_source_id, data_source.type.value, metadata)
             
-            # 导入元数据
+            # 边提取边导入，新的水位线与导入结果在同一事务中提交
             logger.info(f"开始导入元数据到数据库...")
             result = MetadataImportService._import_metadata_to_db(
                 db, 
@@ -46,14 +64,97 @@ class MetadataImportService:
             logger.info(f"元数据导入完成。导入表: {result['tables_imported']}, 导入列: {result['columns_imported']}")
             return result
         except Exception as e:
+            db.rollback()
             logger.error(f"导入元数据失败: {e}")
             raise
     
+    @staticmethod
+    async def import_metadata_from_source_async(db: Session, data_source_id: int, full_resync: bool = False) -> Dict[str, Any]:
+        """
+        从指定数据源导入元数据，供API处理函数在事件循环中调用，提取期间不阻塞其他请求
+        
+        MongoDB和Elasticsearch在事件循环上用异步驱动并发提取，导入在工作线程中逐表消费提取结果；
+        Oracle的提取和导入整体在工作线程中执行。参数、返回值和增量规则同import_metadata_from_source
+        """
+        # 获取数据源信息
+        data_source = db.query(DataSource).filter(DataSource.id == data_source_id).first()
+        if not data_source:
+            raise ValueError(f"数据源ID {data_source_id} 不存在")
+        if data_source.type.value.upper() == "ORACLE":
+            return await anyio.to_thread.run_sync(
+                MetadataImportService.import_metadata_from_source, db, data_source_id, full_resync
+            )
+        
+        try:
+            # 提取元数据
+            since = None if full_resync else data_source.extract_watermark
+            logger.info(f"开始从数据源 {data_source.name} 异步提取元数据...")
+            metadata = await AsyncMetadataExtractor.stream_metadata(
+                data_source.type.value,
+                data_source.connection_config,
+                since=since
+            )
+            
+            # 导入在工作线程中进行，每取一张表回到事件循环
+            logger.info(f"开始导入元数据到数据库...")
+            metadata["tables"] = iterate_in_thread(metadata["tables"])
+            if settings.extraction_snapshot_enabled:
+                metadata = ExtractionSnapshotService.record(data_source_id, data_source.type.value, metadata)
+            result = await anyio.to_thread.run_sync(
+                MetadataImportService._import_metadata_to_db, db, data_source_id, metadata
+            )
+            
+            logger.info(f"元数据导入完成。导入表: {result['tables_imported']}, 导入列: {result['columns_imported']}")
+            return result
+        except Exception as e:
+            db.rollback()
+            logger.error(f"导入元数据失败: {e}")
+            raise
+    
+    @staticmethod
+    def import_metadata_from_snapshot(db: Session, data_source_id: int, snapshot_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        从保存的提取快照重新导入元数据，不连接数据源
+        
+        导入规则与import_metadata_from_source相同：快照来自增量提取时只更新其中变化的表，
+        水位线更新为快照中记录的水位线
+        
+        Args:
+            db: 数据库会话
+            data_source_id: 数据源ID
+            snapshot_id: 快照ID，默认为最新的快照
+            
+        Returns:
+            导入结果统计信息，snapshot_id为使用的快照
+        """
+        data_source = db.query(DataSource).filter(DataSource.id == data_source_id).first()
+        if not data_source:
+            raise ValueError(f"数据源ID {data_source_id} 不存在")
+        
+        metadata = ExtractionSnapshotService.load(data_source_id, snapshot_id)
+        try:
+            logger.info(f"开始从快照 {metadata['snapshot_id']} 重新导入数据源 {data_source.name} 的元数据...")
+            result = MetadataImportService._import_metadata_to_db(db, data_source_id, metadata)
+            logger.info(f"元数据导入完成。导入表: {result['tables_imported']}, 导入列: {result['columns_imported']}")
+            return {"snapshot_id": metadata["snapshot_id"], **result}
+        except Exception as e:
+            db.rollback()
+            logger.error(f"从快照导入元数据失败: {e}")
+            raise
+    
     @staticmethod
     def _import_metadata_to_db(db: Session, data_source_id: int, metadata: Dict[str, Any]) -> Dict[str, Any]:
         """
         将元数据导入到数据库
         
+        metadata["tables"]可以是逐表生成的迭代器，按settings.metadata_stream_batch_size张表一批处理：
+        每批用一次查询预取已有的表、一次查询预取这些表的字段，写入后释放会话中的对象，内存中只保留一批表和已处理表的键。
+        所有批次在同一事务中提交，提取中途失败时不会留下部分结果。
+        
+        表按(模式, 表名)匹配。全量结果中没有的表被删除；增量结果（incremental为True）只包含变化的表，
+        此时只删除table_names中没有的表，未重新扫描的表保持不变。提取失败的表（failed_tables）保持不变，
+        有表提取或导入失败时不更新水位线
+        
         Args:
             db: 数据库会话
             data_source_id: 数据源ID
@@ -64,118 +165,184 @@ class MetadataImportService:
         """
         # 初始化统计信息
         stats = {
+            "incremental": bool(metadata.get("incremental")),
+            "tables_scanned": 0,
             "tables_imported": 0,
             "tables_updated": 0,
             "tables_skipped": 0,
+            "tables_deleted": 0,
+            "tables_unchanged": 0,
             "columns_imported": 0,
             "columns_updated": 0,
             "columns_deleted": 0
         }
         
-        # 获取数据源的所有现有表
-        existing_tables = {table.name: table for table in 
-                          db.query(TableMetadata).filter(TableMetadata.data_source_id == data_source_id).all()}
+        # 已处理的表，用于识别不再存在的表
+        seen: Set[Tuple[str, str]] = set()
+        tables = metadata.get("tables", [])
+        try:
+            for batch in chunked(tables, settings.metadata_stream_batch_size):
+                stats["tables_scanned"] += len(batch)
+                MetadataImportService._import_table_batch(db, data_source_id, batch, seen, stats)
+                # 已写入事务，释放会话中的对象
+                db.flush()
+                db.expunge_all()
+        except BaseException:
+            # 在消费提取结果的线程中立即关闭，释放数据源连接；记录快照时会取完剩余的表使快照完整
+            if hasattr(tables, "close"):
+                tables.close()
+            raise
+        
+        # 迭代结束后failed_tables才完整
+        keep = set(seen)
+        keep.update((owner or "", name) for owner, name in metadata.get("failed_tables", []))
+        stats["tables_skipped"] += len(metadata.get("failed_tables", []))
+        if metadata.get("errors"):
+            stats["errors"] = metadata["errors"]
+        current_tables = set()
+        if metadata.get("incremental"):
+            current_tables = {(owner or "", name) for owner, name in metadata.get("table_names", [])}
+        
+        stale_tables = []
+        for table_id, schema_name, table_name in db.query(
+            TableMetadata.id, TableMetadata.schema_name, TableMetadata.name
+        ).filter(TableMetadata.data_source_id == data_source_id):
+            key = (schema_name or "", table_name)
+            if key in keep:
+                continue
+            # 增量提取时，未出现的表中仍存在于数据源的只是没有变化，不能删除
+            if key in current_tables:
+                stats["tables_unchanged"] += 1
+                continue
+            logger.info(f"删除不存在的表: {schema_name}.{table_name}" if schema_name else f"删除不存在的表: {table_name}")
+            stale_tables.append((table_id, schema_name, table_name))
+        
+        # 删除后这些表的列不再能按名称找到，导入的是快照时在删除前计算下游影响，随快照保存供表结构变化检测使用
+        removed_impact = None
+        if stale_tables and metadata.get("snapshot_id"):
+            removed_impact = SchemaDiffService.removal_impact(db, stale_tables)
+        
+        # 删除不再存在的表及其关联的列
+        stale_ids = [table_id for table_id, _, _ in stale_tables]
+        for ids in chunked(stale_ids, settings.metadata_stream_batch_size):
+            db.query(ColumnMetadata).filter(ColumnMetadata.table_id.in_(ids)).delete(synchronize_session=False)
+            stats["tables_deleted"] += db.query(TableMetadata).filter(TableMetadata.id.in_(ids)).delete(synchronize_session=False)
+        
+        # 新的水位线与导入结果一起提交；有表提取或导入失败时保持原水位线，
+        # 否则这些表的DDL时间早于新水位线，此后的增量提取不会再扫描它们
+        if stats["tables_skipped"]:
+            logger.warning(f"{stats['tables_skipped']}张表提取或导入失败，水位线保持不变，下次增量提取时重新扫描")
+        else:
+            db.query(DataSource).filter(DataSource.id == data_source_id).update(
+                {DataSource.extract_watermark: metadata.get("watermark")}, synchronize_session=False
+            )
+        
+        # 提交事务
+        db.commit()
+        
+        if removed_impact is not None:
+            try:
+                ExtractionSnapshotService.save_removal_impact(data_source_id, metadata["snapshot_id"], removed_impact)
+            except (OSError, ValueError) as e:
+                logger.warning(f"保存快照 {metadata['snapshot_id']} 删除的表的下游影响失败: {str(e)}")
+        
+        return stats
+    
+    @staticmethod
+    def _import_table_batch(db: Session, data_source_id: int, batch: List[Dict[str, Any]],
+                            seen: Set[Tuple[str, str]], stats: Dict[str, Any]) -> None:
+        """导入一批表，已有的表和字段各用一次查询预取，每张表在独立的保存点中写入，出错时只跳过该表"""
+        names = {table_info["name"] for table_info in batch}
+        existing_tables = {
+            (table.schema_name or "", table.name): table
+            for table in db.query(TableMetadata).filter(
+                TableMetadata.data_source_id == data_source_id, TableMetadata.name.in_(names)
+            )
+        }
+        existing_columns: Dict[int, Dict[str, ColumnMetadata]] = {table.id: {} for table in existing_tables.values()}
+        if existing_columns:
+            for column in db.query(ColumnMetadata).filter(ColumnMetadata.table_id.in_(list(existing_columns))):
+                existing_columns[column.table_id][column.name] = column
         
         # 处理每个表
-        for table_info in metadata.get("tables", []):
+        for table_info in batch:
             table_name = table_info["name"]
-            schema_name = table_info.get("schema", "")
+            schema_name = table_info.get("schema") or ""
             
             # 构建表的唯一标识
             table_identifier = f"{schema_name}.{table_name}" if schema_name else table_name
+            seen.add((schema_name, table_name))
             
             try:
-                # 检查表是否已存在
-                if table_name in existing_tables:
-                    # 更新现有表
-                    existing_table = existing_tables[table_name]
-                    stats["tables_updated"] += 1
-                    
-                    # 更新表信息
-                    existing_table.row_count = table_info.get("row_count", 0)
-                    existing_table.schema = schema_name
-                    existing_table.last_analyzed = table_info.get("last_analyzed")
-                    
-                    # 更新列信息
-                    col_stats = MetadataImportService._update_table_columns(
-                        db, 
-                        existing_table.id, 
-                        table_info.get("columns", []),
-                        table_info.get("primary_keys", [])
-                    )
-                    
-                    # 累加列统计信息
-                    stats["columns_imported"] += col_stats["imported"]
-                    stats["columns_updated"] += col_stats["updated"]
-                    stats["columns_deleted"] += col_stats["deleted"]
-                    
-                    # 从现有表字典中移除，剩下的就是需要删除的表
-                    del existing_tables[table_name]
-                else:
-                    # 创建新表
-                    stats["tables_imported"] += 1
-                    
-                    # 准备表创建数据
-                    table_create = TableMetadataCreate(
-                        name=table_name,
-                        data_source_id=data_source_id,
-                        schema=schema_name,
-                        row_count=table_info.get("row_count", 0),
-                        last_analyzed=table_info.get("last_analyzed")
-                    )
-                    
-                    # 创建表
-                    new_table = TableMetadata(**table_create.model_dump())
-                    db.add(new_table)
-                    db.flush()  # 获取表ID
-                    
-                    # 创建列
-                    primary_keys = set(table_info.get("primary_keys", []))
-                    for column_info in table_info.get("columns", []):
-                        # 检查是否为主键
-                        is_primary_key = column_info["name"] in primary_keys
+                with db.begin_nested():
+                    # 检查表是否已存在
+                    existing_table = existing_tables.pop((schema_name, table_name), None)
+                    if existing_table is not None:
+                        # 更新现有表，保留手工维护的描述和其他属性
+                        existing_table.schema_name = schema_name or None
+                        if table_info.get("description"):
+                            existing_table.description = table_info["description"]
+                        existing_table.properties = {
+                            **(existing_table.properties or {}),
+                            **MetadataImportService._extra_properties(table_info, _TABLE_FIELDS)
+                        }
+                        # 表结构已变化，使上次文件导入记录的内容哈希失效
+                        existing_table.content_hash = None
                         
-                        # 准备列创建数据
-                        column_create = ColumnMetadataCreate(
-                            name=column_info["name"],
-                            table_id=new_table.id,
-                            type=column_info["type"],
-                            length=column_info.get("length"),
-                            precision=column_info.get("precision"),
-                            scale=column_info.get("scale"),
-                            nullable=column_info.get("nullable", True),
-                            position=column_info.get("position"),
-                            description=column_info.get("description", ""),
-                            is_primary_key=is_primary_key
+                        # 更新列信息
+                        col_stats = MetadataImportService._update_table_columns(
+                            db, 
+                            existing_table.id, 
+                            table_info.get("columns", []),
+                            table_info.get("primary_keys", []),
+                            existing_columns.get(existing_table.id, {})
                         )
                         
+                        # 累加列统计信息
+                        stats["tables_updated"] += 1
+                        stats["columns_imported"] += col_stats["imported"]
+                        stats["columns_updated"] += col_stats["updated"]
+                        stats["columns_deleted"] += col_stats["deleted"]
+                    else:
+                        # 创建新表
+                        new_table = TableMetadata(
+                            name=table_name,
+                            data_source_id=data_source_id,
+                            schema_name=schema_name or None,
+                            description=table_info.get("description"),
+                            properties=MetadataImportService._extra_properties(table_info, _TABLE_FIELDS)
+                        )
+                        db.add(new_table)
+                        db.flush()  # 获取表ID
+                        
                         # 创建列
-                        new_column = ColumnMetadata(**column_create.model_dump())
-                        db.add(new_column)
-                        stats["columns_imported"] += 1
+                        col_stats = MetadataImportService._update_table_columns(
+                            db,
+                            new_table.id,
+                            table_info.get("columns", []),
+                            table_info.get("primary_keys", []),
+                            {}
+                        )
+                        stats["tables_imported"] += 1
+                        stats["columns_imported"] += col_stats["imported"]
             except Exception as e:
                 logger.error(f"处理表 {table_identifier} 时出错: {e}")
                 stats["tables_skipped"] += 1
                 continue
-        
-        # 删除不再存在的表及其关联的列
-        for table_name, table in existing_tables.items():
-            logger.info(f"删除不存在的表: {table_name}")
-            
-            # 删除表关联的所有列
-            db.query(ColumnMetadata).filter(ColumnMetadata.table_id == table.id).delete()
-            
-            # 删除表
-            db.delete(table)
-        
-        # 提交事务
-        db.commit()
-        
-        return stats
+    
+    @staticmethod
+    def _extra_properties(info: Dict[str, Any], fields: set) -> Dict[str, Any]:
+        """提取结果中除表/列自身字段外的非空属性，时间转换为ISO格式字符串以便存入JSON列"""
+        return {
+            key: value.isoformat() if isinstance(value, datetime) else value
+            for key, value in info.items()
+            if key not in fields and value is not None
+        }
     
     @staticmethod
     def _update_table_columns(db: Session, table_id: int, columns_info: List[Dict[str, Any]], 
-                             primary_keys: List[str]) -> Dict[str, int]:
+                             primary_keys: List[str],
+                             existing_columns: Optional[Dict[str, ColumnMetadata]] = None) -> Dict[str, int]:
         """
         更新表的列信息
         
@@ -184,6 +351,7 @@ class MetadataImportService:
             table_id: 表ID
             columns_info: 列信息列表
             primary_keys: 主键列名列表
+            existing_columns: 预取的现有列（列名到列），未提供时查询
             
         Returns:
             列操作统计
@@ -199,56 +367,38 @@ class MetadataImportService:
         primary_keys_set = set(primary_keys)
         
         # 获取表的所有现有列
-        existing_columns = {column.name: column for column in 
-                           db.query(ColumnMetadata).filter(ColumnMetadata.table_id == table_id).all()}
+        if existing_columns is None:
+            existing_columns = {column.name: column for column in 
+                               db.query(ColumnMetadata).filter(ColumnMetadata.table_id == table_id).all()}
+        else:
+            existing_columns = dict(existing_columns)
         
         # 处理每一列
         for column_info in columns_info:
             column_name = column_info["name"]
+            properties = MetadataImportService._extra_properties(column_info, _COLUMN_FIELDS)
             
-            try:
-                # 检查列是否已存在
-                if column_name in existing_columns:
-                    # 更新现有列
-                    existing_column = existing_columns[column_name]
-                    stats["updated"] += 1
-                    
-                    # 更新列信息
-                    existing_column.type = column_info["type"]
-                    existing_column.length = column_info.get("length")
-                    existing_column.precision = column_info.get("precision")
-                    existing_column.scale = column_info.get("scale")
-                    existing_column.nullable = column_info.get("nullable", True)
-                    existing_column.position = column_info.get("position")
-                    existing_column.description = column_info.get("description", "")
-                    existing_column.is_primary_key = column_name in primary_keys_set
-                    
-                    # 从现有列字典中移除，剩下的就是需要删除的列
-                    del existing_columns[column_name]
-                else:
-                    # 创建新列
-                    stats["imported"] += 1
-                    
-                    # 准备列创建数据
-                    column_create = ColumnMetadataCreate(
-                        name=column_name,
-                        table_id=table_id,
-                        type=column_info["type"],
-                        length=column_info.get("length"),
-                        precision=column_info.get("precision"),
-                        scale=column_info.get("scale"),
-                        nullable=column_info.get("nullable", True),
-                        position=column_info.get("position"),
-                        description=column_info.get("description", ""),
-                        is_primary_key=column_name in primary_keys_set
-                    )
-                    
-                    # 创建列
-                    new_column = ColumnMetadata(**column_create.model_dump())
-                    db.add(new_column)
-            except Exception as e:
-                logger.error(f"处理列 {column_name} 时出错: {e}")
-                continue
+            # 检查列是否已存在
+            if column_name in existing_columns:
+                # 更新现有列，保留手工维护的描述和其他属性
+                existing_column = existing_columns.pop(column_name)
+                existing_column.data_type = column_info["type"]
+                if column_info.get("description"):
+                    existing_column.description = column_info["description"]
+                existing_column.is_primary_key = int(column_name in primary_keys_set)
+                existing_column.properties = {**(existing_column.properties or {}), **properties}
+                stats["updated"] += 1
+            else:
+                # 创建新列
+                db.add(ColumnMetadata(
+                    name=column_name,
+                    table_id=table_id,
+                    data_type=column_info["type"],
+                    description=column_info.get("description"),
+                    is_primary_key=int(column_name in primary_keys_set),
+                    properties=properties
+                ))
+                stats["imported"] += 1
         
         # 删除不再存在的列
         for column_name, column in existing_columns.items():
@@ -274,14 +424,15 @@ class MetadataImportService:
             # 尝试提取一小部分元数据来验证连接
             logger.info(f"验证 {data_source_type} 数据源连接...")
             
-            # 提取元数据（这会验证连接）
-            metadata = MetadataExtractor.extract_metadata(data_source_type, connection_params)
+            # 提取元数据（这会验证连接），只计数不保留表信息
+            metadata = MetadataExtractor.stream_metadata(data_source_type, connection_params)
+            tables_count = sum(1 for _ in metadata["tables"])
             
             # 返回验证结果
             return {
                 "valid": True,
                 "message": "连接成功",
-                "tables_count": len(metadata.get("tables", []))
+                "tables_count": tables_count
             }
         except Exception as e:
             logger.error(f"连接验证失败: {e}")
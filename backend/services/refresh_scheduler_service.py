@@ -0,0 +1,370 @@
+from typing import Dict, Any, List, Optional, Tuple
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+import random
+import threading
+import time
+import logging
+
+import models
+from models import DataSource, RefreshRun, RefreshRunStatus
+from config.settings import settings
+from utils.cron_utils import CronSchedule
+
+logger = logging.getLogger(__name__)
+
+# 刷新策略支持的键
+_POLICY_KEYS = {"cron", "jitter_seconds", "full_resync", "enabled"}
+
+
+class _SourceSchedule:
+    """一个数据源的调度状态：当前生效的策略和下一次触发时间"""
+
+    __slots__ = ("policy", "cron", "scheduled_at", "due_at")
+
+    def __init__(self, policy: Dict[str, Any], now: datetime):
+        self.policy = policy
+        self.cron = CronSchedule(policy["cron"])
+        self.advance(now)
+
+    def advance(self, now: datetime) -> None:
+        """计算now之后的下一次触发时间，错过的触发不补跑；实际执行时间在触发时间后随机延迟0到jitter_seconds秒"""
+        self.scheduled_at = self.cron.next_after(now)
+        self.due_at = self.scheduled_at + timedelta(seconds=random.uniform(0, self.policy["jitter_seconds"]))
+
+
+class RefreshSchedulerService:
+    """数据源元数据定时刷新服务类，按各数据源的refresh_policy定时从数据源提取并导入元数据
+
+    调度线程每settings.refresh_poll_seconds秒重新读取数据源的刷新策略，到达触发时间的数据源进入等待队列，
+    再按全局并发数（settings.refresh_max_workers）和各数据源类型的并发数（settings.refresh_type_limits）
+    从队列中分派到线程池执行。触发时该数据源上一次刷新仍在执行或排队时，本次记为skipped。
+    每次刷新的耗时、扫描和变化的表数、错误信息记录在refresh_runs表中。
+    """
+
+    # 调度线程、刷新线程池和调度状态，均由_lock保护
+    _thread: Optional[threading.Thread] = None
+    _executor: Optional[ThreadPoolExecutor] = None
+    _wakeup = threading.Event()
+    _stopping = False
+    _lock = threading.Lock()
+    _schedules: Dict[int, _SourceSchedule] = {}
+    # 等待执行的(数据源ID, 数据源类型, 触发时间, 是否全量)
+    _queue: deque = deque()
+    # 执行中的数据源ID到数据源类型
+    _running: Dict[int, str] = {}
+    # 因上一次刷新仍在进行而跳过的触发时间，由该数据源的刷新结束时一并写入，避免与执行中的导入事务争用SQLite写锁
+    _skipped: Dict[int, List[Tuple[datetime, datetime]]] = {}
+    # 刷新策略无效的数据源及错误信息
+    _invalid_policies: Dict[int, str] = {}
+
+    @staticmethod
+    def parse_policy(policy: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        校验并补全刷新策略
+
+        Args:
+            policy: 数据源的refresh_policy，包含cron（必填）、jitter_seconds（默认settings.refresh_jitter_seconds）、
+                full_resync（默认False）、enabled（默认True）
+
+        Returns:
+            补全后的策略，没有策略时返回None
+
+        Raises:
+            ValueError: 策略格式或cron表达式无效
+        """
+        if not policy:
+            return None
+        if not isinstance(policy, dict):
+            raise ValueError("refresh_policy必须是对象")
+        unknown = set(policy) - _POLICY_KEYS
+        if unknown:
+            raise ValueError(f"refresh_policy包含不支持的键: {', '.join(sorted(unknown))}")
+        if not isinstance(policy.get("cron"), str):
+            raise ValueError("refresh_policy缺少cron表达式")
+        # 语法正确但永远不会触发的表达式（如0 0 30 2 *）同样拒绝
+        CronSchedule(policy["cron"]).next_after(datetime.utcnow())
+
+        jitter_seconds = policy.get("jitter_seconds", settings.refresh_jitter_seconds)
+        if not isinstance(jitter_seconds, (int, float)) or jitter_seconds < 0:
+            raise ValueError("refresh_policy的jitter_seconds必须是非负数")
+        return {
+            "cron": policy["cron"],
+            "jitter_seconds": jitter_seconds,
+            "full_resync": bool(policy.get("full_resync", False)),
+            "enabled": bool(policy.get("enabled", True))
+        }
+
+    @classmethod
+    def start(cls) -> None:
+        """启动调度线程，将服务重启前未结束的刷新记录标记为失败"""
+        with cls._lock:
+            if cls._thread is not None and cls._thread.is_alive():
+                return
+            cls._stopping = False
+            cls._wakeup.clear()
+            cls._schedules.clear()
+            cls._queue.clear()
+            cls._running.clear()
+            cls._skipped.clear()
+            cls._executor = ThreadPoolExecutor(
+                max_workers=max(1, settings.refresh_max_workers),
+                thread_name_prefix="metadata-refresh"
+            )
+            cls._thread = threading.Thread(target=cls._loop, name="metadata-refresh-scheduler", daemon=True)
+
+        db = models.session_local()
+        try:
+            interrupted = db.query(RefreshRun).filter(RefreshRun.status == RefreshRunStatus.RUNNING).update(
+                {
+                    RefreshRun.status: RefreshRunStatus.FAILED,
+                    RefreshRun.errors: ["服务重启时刷新被中断"],
+                    RefreshRun.finished_at: datetime.utcnow()
+                },
+                synchronize_session=False
+            )
+            db.commit()
+            if interrupted:
+                logger.warning(f"{interrupted}次未结束的定时刷新已标记为失败")
+        finally:
+            db.close()
+
+        cls._thread.start()
+        logger.info("元数据定时刷新调度已启动")
+
+    @classmethod
+    def stop(cls, timeout: float = 5.0) -> None:
+        """停止调度，执行中的刷新继续运行到结束，队列中尚未开始的刷新不再执行"""
+        with cls._lock:
+            thread, executor = cls._thread, cls._executor
+            cls._stopping = True
+            cls._thread = None
+            cls._executor = None
+            cls._queue.clear()
+        cls._wakeup.set()
+        if thread is not None:
+            thread.join(timeout)
+        if executor is not None:
+            executor.shutdown(wait=False)
+        logger.info("元数据定时刷新调度已停止")
+
+    @classmethod
+    def _loop(cls) -> None:
+        """调度循环：处理到期的数据源后等待到下一次触发、下一次重新读取策略或有刷新结束时"""
+        while not cls._stopping:
+            try:
+                timeout = cls.tick(datetime.utcnow())
+            except Exception as e:
+                logger.error(f"定时刷新调度失败: {str(e)}", exc_info=True)
+                timeout = settings.refresh_poll_seconds
+            cls._wakeup.wait(timeout)
+            cls._wakeup.clear()
+
+    @classmethod
+    def tick(cls, now: datetime) -> float:
+        """
+        执行一轮调度：重新读取刷新策略，到期的数据源入队，并分派队列中可以执行的刷新
+
+        Args:
+            now: 当前时间（UTC）
+
+        Returns:
+            距下一次需要调度的秒数
+        """
+        db = models.session_local()
+        try:
+            sources = db.query(DataSource.id, DataSource.name, DataSource.type, DataSource.refresh_policy).all()
+        finally:
+            db.close()
+
+        with cls._lock:
+            active = set()
+            for source_id, name, source_type, policy in sources:
+                # 单个数据源的策略无效（包括此后不再触发的cron表达式）时跳过该数据源，不影响其他数据源的调度
+                try:
+                    policy = cls.parse_policy(policy)
+                    if policy is None or not policy["enabled"]:
+                        cls._invalid_policies.pop(source_id, None)
+                        cls._schedules.pop(source_id, None)
+                        continue
+
+                    schedule = cls._schedules.get(source_id)
+                    if schedule is None or schedule.policy != policy:
+                        # 新增或修改了策略，从现在起重新计算触发时间
+                        cls._schedules[source_id] = _SourceSchedule(policy, now)
+                    elif schedule.due_at <= now:
+                        queued = any(item[0] == source_id for item in cls._queue)
+                        if source_id in cls._running or queued:
+                            logger.info(f"数据源 {name} 的上一次刷新仍在进行，跳过{schedule.scheduled_at}的定时刷新")
+                            cls._skipped.setdefault(source_id, []).append((schedule.scheduled_at, now))
+                        else:
+                            cls._queue.append(
+                                (source_id, source_type.value, schedule.scheduled_at, policy["full_resync"])
+                            )
+                        schedule.advance(now)
+                except ValueError as e:
+                    # 同一无效策略只提示一次
+                    if cls._invalid_policies.get(source_id) != str(e):
+                        logger.warning(f"数据源 {name} 的刷新策略无效，不进行定时刷新: {str(e)}")
+                    cls._invalid_policies[source_id] = str(e)
+                    cls._schedules.pop(source_id, None)
+                    continue
+                cls._invalid_policies.pop(source_id, None)
+                active.add(source_id)
+
+            # 删除或关闭了策略的数据源
+            for source_id in set(cls._schedules) - active:
+                del cls._schedules[source_id]
+            cls._dispatch()
+            next_due = min((schedule.due_at for schedule in cls._schedules.values()), default=None)
+
+        timeout = float(settings.refresh_poll_seconds)
+        if next_due is not None:
+            timeout = min(timeout, max((next_due - now).total_seconds(), 0.0))
+        return timeout
+
+    @classmethod
+    def _dispatch(cls) -> None:
+        """按全局和各数据源类型的并发上限，将队列中的刷新分派到线程池（调用方持有_lock）"""
+        if cls._executor is None:
+            return
+        running_by_type: Dict[str, int] = {}
+        for source_type in cls._running.values():
+            running_by_type[source_type] = running_by_type.get(source_type, 0) + 1
+
+        waiting = deque()
+        while cls._queue and len(cls._running) < max(1, settings.refresh_max_workers):
+            item = cls._queue.popleft()
+            source_id, source_type, scheduled_at, full_resync = item
+            limit = settings.refresh_type_limits.get(source_type)
+            if limit is not None and running_by_type.get(source_type, 0) >= limit:
+                # 该类型已达上限，让出给其他类型的数据源，保持原有顺序
+                waiting.append(item)
+                continue
+            cls._running[source_id] = source_type
+            running_by_type[source_type] = running_by_type.get(source_type, 0) + 1
+            cls._executor.submit(cls._run_refresh, source_id, scheduled_at, full_resync)
+        waiting.extend(cls._queue)
+        cls._queue = waiting
+
+    @staticmethod
+    def _import_metadata(db: Session, data_source_id: int, full_resync: bool) -> Dict[str, Any]:
+        """从数据源提取并导入元数据"""
+        # 提取依赖各数据源的驱动，在调用时才导入
+        from services.metadata_import_service import MetadataImportService
+        return MetadataImportService.import_metadata_from_source(db, data_source_id, full_resync)
+
+    @classmethod
+    def _run_refresh(cls, data_source_id: int, scheduled_at: datetime, full_resync: bool) -> None:
+        """在工作线程中执行一次刷新并记录运行结果"""
+        db = models.session_local()
+        try:
+            run = RefreshRun(
+                data_source_id=data_source_id,
+                status=RefreshRunStatus.RUNNING,
+                scheduled_at=scheduled_at,
+                started_at=datetime.utcnow()
+            )
+            db.add(run)
+            db.flush()
+            run_id = run.id
+            db.commit()
+            started = time.monotonic()
+
+            result, errors = None, []
+            try:
+                logger.info(f"开始定时刷新数据源 {data_source_id}")
+                result = cls._import_metadata(db, data_source_id, full_resync)
+                status = RefreshRunStatus.SUCCEEDED
+                errors = result.get("errors") or []
+            except Exception as e:
+                logger.error(f"定时刷新数据源 {data_source_id} 失败: {str(e)}", exc_info=True)
+                db.rollback()
+                status = RefreshRunStatus.FAILED
+                errors = [str(e)]
+
+            # 只写不读，避免SQLite下多个刷新线程先读后写时升级锁死锁
+            duration_seconds = round(time.monotonic() - started, 3)
+            values = {
+                RefreshRun.status: status,
+                RefreshRun.finished_at: datetime.utcnow(),
+                RefreshRun.duration_seconds: duration_seconds,
+                RefreshRun.errors: errors,
+                RefreshRun.result: result
+            }
+            if result is not None:
+                values[RefreshRun.tables_scanned] = result.get("tables_scanned", 0)
+                values[RefreshRun.tables_changed] = (
+                    result["tables_imported"] + result["tables_updated"] + result["tables_deleted"]
+                )
+            db.query(RefreshRun).filter(RefreshRun.id == run_id).update(values, synchronize_session=False)
+            with cls._lock:
+                skipped = cls._skipped.pop(data_source_id, [])
+            for skipped_at, triggered_at in skipped:
+                db.add(RefreshRun(
+                    data_source_id=data_source_id,
+                    status=RefreshRunStatus.SKIPPED,
+                    scheduled_at=skipped_at,
+                    started_at=triggered_at,
+                    finished_at=triggered_at,
+                    duration_seconds=0.0,
+                    errors=[]
+                ))
+            cls._prune_history(db, data_source_id)
+            db.commit()
+            logger.info(f"定时刷新数据源 {data_source_id} 结束, 状态: {status.value}, 耗时: {duration_seconds}秒")
+        except Exception as e:
+            logger.error(f"记录数据源 {data_source_id} 的定时刷新结果失败: {str(e)}", exc_info=True)
+            db.rollback()
+        finally:
+            db.close()
+            with cls._lock:
+                cls._running.pop(data_source_id, None)
+            # 唤醒调度线程分派等待中的刷新
+            cls._wakeup.set()
+
+    @staticmethod
+    def _prune_history(db: Session, data_source_id: int) -> None:
+        """每个数据源只保留最近settings.refresh_run_history_limit条运行记录（不提交）"""
+        cutoff = db.query(RefreshRun.id).filter(RefreshRun.data_source_id == data_source_id).order_by(
+            RefreshRun.id.desc()
+        ).offset(settings.refresh_run_history_limit).limit(1).scalar_subquery()
+        db.query(RefreshRun).filter(
+            RefreshRun.data_source_id == data_source_id, RefreshRun.id <= cutoff
+        ).delete(synchronize_session=False)
+
+    @classmethod
+    def list_runs(cls, db: Session, data_source_id: int, skip: int = 0, limit: int = 100,
+                  status: Optional[RefreshRunStatus] = None) -> List[Dict[str, Any]]:
+        """获取数据源的定时刷新记录，按开始时间倒序"""
+        query = db.query(RefreshRun).filter(RefreshRun.data_source_id == data_source_id)
+        if status:
+            query = query.filter(RefreshRun.status == status)
+        runs = query.order_by(RefreshRun.id.desc()).offset(skip).limit(limit).all()
+        return [cls._to_dict(run) for run in runs]
+
+    @classmethod
+    def next_run(cls, data_source_id: int) -> Optional[str]:
+        """数据源下一次计划刷新的时间（含抖动），未启用定时刷新时返回None"""
+        with cls._lock:
+            schedule = cls._schedules.get(data_source_id)
+            return schedule.due_at.isoformat() if schedule is not None else None
+
+    @staticmethod
+    def _to_dict(run: RefreshRun) -> Dict[str, Any]:
+        """将运行记录转换为字典"""
+        return {
+            "id": run.id,
+            "data_source_id": run.data_source_id,
+            "status": run.status.value if hasattr(run.status, "value") else run.status,
+            "scheduled_at": run.scheduled_at.isoformat() if run.scheduled_at else None,
+            "started_at": run.started_at.isoformat() if run.started_at else None,
+            "finished_at": run.finished_at.isoformat() if run.finished_at else None,
+            "duration_seconds": run.duration_seconds,
+            "tables_scanned": run.tables_scanned or 0,
+            "tables_changed": run.tables_changed or 0,
+            "errors": run.errors or [],
+            "result": run.result
+        }
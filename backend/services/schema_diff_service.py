@@ -0,0 +1,241 @@
+from typing import Dict, Any, List, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+import logging
+
+from models import DataSource, TableMetadata, ColumnMetadata, ColumnLineageRelation
+from config.settings import settings
+from services.extraction_snapshot_service import ExtractionSnapshotService
+from utils.json_stream_utils import chunked
+from utils.schema_diff_utils import SchemaIndex, TableKey, apply_extraction, column_signature, diff_schema_indexes
+
+logger = logging.getLogger(__name__)
+
+# 比较对象：上一次提取的快照、当前元数据目录
+DIFF_TARGETS = ("previous", "catalog")
+
+
+class SchemaDiffService:
+    """表结构变化检测服务类，比较最近一次提取与上一次提取（或当前元数据目录）的表和字段差异
+
+    两侧都整理为按(模式, 表名)索引、带结构哈希的SchemaIndex，按键哈希匹配，只有哈希不同的表才逐列比较。
+    删除和变化的列按当前元数据目录中的列级血缘标注下游影响：可到达的下游列数和所在的表数。
+    导入快照时被删除的表已不在元数据目录中，其下游影响在删除前由removal_impact计算并随快照保存
+    """
+
+    @staticmethod
+    def diff(db: Session, data_source_id: int, against: str = "previous",
+             snapshot_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        比较数据源的表结构变化
+
+        Args:
+            db: 数据库会话
+            data_source_id: 数据源ID
+            against: previous与上一次提取的快照比较；catalog与当前元数据目录比较（快照尚未导入时可预览导入带来的变化）
+            snapshot_id: 作为最新一侧的快照，默认为最新的快照
+
+        Returns:
+            diff_schema_indexes的结果，另有snapshot_id、base_snapshot_id（与快照比较时上一次的快照）、
+            baseline_complete（上一次的表结构能否完整还原）
+
+        Raises:
+            ValueError: 数据源不存在、比较对象无效或没有可比较的上一次快照
+            FileNotFoundError: 快照不存在
+        """
+        if against not in DIFF_TARGETS:
+            raise ValueError(f"不支持的比较对象: {against}")
+        data_source = db.query(DataSource).filter(DataSource.id == data_source_id).first()
+        if not data_source:
+            raise ValueError(f"数据源ID {data_source_id} 不存在")
+
+        snapshots = ExtractionSnapshotService.list_snapshots(data_source_id)
+        if not snapshots:
+            raise FileNotFoundError(f"数据源 {data_source_id} 没有提取快照")
+        position = 0
+        if snapshot_id is not None:
+            position = next((i for i, snapshot in enumerate(snapshots) if snapshot["id"] == snapshot_id), None)
+            if position is None:
+                raise FileNotFoundError(f"快照 {snapshot_id} 不存在")
+        latest = snapshots[position]
+
+        base_snapshot_id, baseline_complete = None, True
+        if against == "catalog":
+            old = SchemaDiffService._catalog_index(db, data_source_id)
+        else:
+            older = snapshots[position + 1:]
+            if not older:
+                raise ValueError("没有上一次提取的快照可供比较")
+            base_snapshot_id = older[0]["id"]
+            old, baseline_complete = SchemaDiffService._snapshot_index(data_source_id, older)
+        new = apply_extraction(old, ExtractionSnapshotService.load(data_source_id, latest["id"]))
+
+        result = diff_schema_indexes(old, new)
+        SchemaDiffService._annotate_impact(
+            db, data_source_id, result, ExtractionSnapshotService.load_removal_impact(data_source_id, latest["id"])
+        )
+        logger.info(f"数据源 {data_source.name} 的表结构变化: {result['summary']}")
+        return {
+            "data_source_id": data_source_id,
+            "against": against,
+            "snapshot_id": latest["id"],
+            "base_snapshot_id": base_snapshot_id,
+            "baseline_complete": baseline_complete,
+            **result
+        }
+
+    @staticmethod
+    def _snapshot_index(data_source_id: int, older: List[Dict[str, Any]]) -> Tuple[SchemaIndex, bool]:
+        """
+        还原上一次提取时的表结构：从不晚于它的最近一次全量快照开始，依次叠加之后的增量快照
+
+        Returns:
+            (表结构, 是否找到了全量快照)，保留的快照中没有全量快照时从最早的增量快照开始，未变化的表缺失
+        """
+        full = next((i for i, snapshot in enumerate(older) if not snapshot["incremental"]), None)
+        chain = older[:len(older) if full is None else full + 1]
+        index = None
+        for snapshot in reversed(chain):
+            index = apply_extraction(index, ExtractionSnapshotService.load(data_source_id, snapshot["id"]))
+        return index, full is not None
+
+    @staticmethod
+    def _catalog_index(db: Session, data_source_id: int) -> SchemaIndex:
+        """由当前元数据目录得到数据源的表结构，每批settings.metadata_stream_batch_size张表查询一次字段"""
+        index = SchemaIndex()
+        tables = db.query(TableMetadata.id, TableMetadata.schema_name, TableMetadata.name).filter(
+            TableMetadata.data_source_id == data_source_id
+        ).all()
+        for batch in chunked(tables, settings.metadata_stream_batch_size):
+            columns: Dict[int, List[Tuple[str, Dict[str, Any]]]] = {table_id: [] for table_id, _, _ in batch}
+            for table_id, name, data_type, is_primary_key, properties in db.query(
+                ColumnMetadata.table_id, ColumnMetadata.name, ColumnMetadata.data_type,
+                ColumnMetadata.is_primary_key, ColumnMetadata.properties
+            ).filter(ColumnMetadata.table_id.in_(list(columns))):
+                column = {**(properties or {}), "type": data_type}
+                columns[table_id].append((name, column_signature(column, bool(is_primary_key))))
+            for table_id, schema_name, table_name in batch:
+                index.add(schema_name, table_name, columns[table_id])
+        return index
+
+    @staticmethod
+    def removal_impact(db: Session, tables: List[Tuple[int, Optional[str], str]]) -> List[Dict[str, Any]]:
+        """
+        计算即将删除的表的下游影响，须在删除表和列之前调用
+
+        Args:
+            db: 数据库会话
+            tables: 即将删除的表的(表ID, 模式, 表名)
+
+        Returns:
+            每张表的schema、name、downstream_columns、downstream_tables
+        """
+        _, table_columns = SchemaDiffService._table_columns(db, [table_id for table_id, _, _ in tables])
+        impacts = SchemaDiffService._downstream_impact(
+            db, [table_columns.get(table_id, set()) for table_id, _, _ in tables]
+        )
+        return [
+            {"schema": schema_name or None, "name": name,
+             "downstream_columns": column_count, "downstream_tables": table_count}
+            for (_, schema_name, name), (column_count, table_count) in zip(tables, impacts)
+        ]
+
+    @staticmethod
+    def _table_columns(db: Session, table_ids: List[int]) -> Tuple[Dict[Tuple[int, str], int], Dict[int, Set[int]]]:
+        """查询表的列，返回((表ID, 列名)到列ID, 表ID到列ID集合)"""
+        column_ids: Dict[Tuple[int, str], int] = {}
+        table_columns: Dict[int, Set[int]] = {}
+        for ids in chunked(table_ids, settings.metadata_stream_batch_size):
+            for column_id, table_id, name in db.query(
+                ColumnMetadata.id, ColumnMetadata.table_id, ColumnMetadata.name
+            ).filter(ColumnMetadata.table_id.in_(ids)):
+                column_ids[(table_id, name)] = column_id
+                table_columns.setdefault(table_id, set()).add(column_id)
+        return column_ids, table_columns
+
+    @staticmethod
+    def _annotate_impact(db: Session, data_source_id: int, result: Dict[str, Any],
+                         removed_impact: List[Dict[str, Any]]) -> None:
+        """
+        为删除的表、删除和变化的列标注下游影响（downstream_columns、downstream_tables）
+
+        removed_impact为导入快照时保存的被删除表的下游影响，这些表优先使用保存的结果
+        """
+        stored = {(item["schema"] or "", item["name"]): item for item in removed_impact}
+        targets: List[Tuple[Dict[str, Any], TableKey, Optional[str]]] = []
+        for table in result["tables_removed"]:
+            key = (table["schema"] or "", table["name"])
+            if key in stored:
+                table["downstream_columns"] = stored[key]["downstream_columns"]
+                table["downstream_tables"] = stored[key]["downstream_tables"]
+            else:
+                targets.append((table, key, None))
+        for table in result["tables_changed"]:
+            key = (table["schema"] or "", table["name"])
+            for column in table["columns_removed"] + table["columns_changed"]:
+                targets.append((column, key, column["name"]))
+        if not targets:
+            return
+
+        # 按(模式, 表名)和列名找到元数据目录中的列，删除的表取其所有列
+        table_ids = {
+            (schema_name or "", name): table_id
+            for table_id, schema_name, name in db.query(
+                TableMetadata.id, TableMetadata.schema_name, TableMetadata.name
+            ).filter(TableMetadata.data_source_id == data_source_id)
+        }
+        column_ids, table_columns = SchemaDiffService._table_columns(
+            db, list({table_ids[key] for _, key, _ in targets if key in table_ids})
+        )
+
+        groups = []
+        for _, key, column_name in targets:
+            table_id = table_ids.get(key)
+            if table_id is None:
+                groups.append(set())
+            elif column_name is None:
+                groups.append(table_columns.get(table_id, set()))
+            else:
+                column_id = column_ids.get((table_id, column_name))
+                groups.append({column_id} if column_id is not None else set())
+
+        impacts = SchemaDiffService._downstream_impact(db, groups)
+        for (item, _, _), (column_count, table_count) in zip(targets, impacts):
+            item["downstream_columns"] = column_count
+            item["downstream_tables"] = table_count
+
+    @staticmethod
+    def _downstream_impact(db: Session, groups: List[Set[int]]) -> List[Tuple[int, int]]:
+        """
+        计算每组列经列级血缘可到达的下游列数和这些列所在的表数（不含组内的列本身）
+
+        先从所有起点逐层批量查询血缘边，把可到达的子图载入内存（列ID到下游列ID的哈希表），再在内存中逐组遍历
+        """
+        adjacency: Dict[int, List[int]] = {}
+        frontier = set().union(*groups) if groups else set()
+        while frontier:
+            for column_id in frontier:
+                adjacency[column_id] = []
+            for ids in chunked(list(frontier), settings.metadata_stream_batch_size):
+                for source_id, target_id in db.query(
+                    ColumnLineageRelation.source_column_id, ColumnLineageRelation.target_column_id
+                ).filter(ColumnLineageRelation.source_column_id.in_(ids)):
+                    adjacency[source_id].append(target_id)
+            frontier = {target_id for column_id in frontier for target_id in adjacency[column_id]
+                        if target_id not in adjacency}
+
+        # 遍历到的列都已在adjacency中，查询它们所在的表
+        column_tables: Dict[int, int] = {}
+        for ids in chunked(list(adjacency), settings.metadata_stream_batch_size):
+            column_tables.update(db.query(ColumnMetadata.id, ColumnMetadata.table_id).filter(ColumnMetadata.id.in_(ids)))
+
+        impacts = []
+        for group in groups:
+            visited: Set[int] = set()
+            stack = list(group)
+            while stack:
+                for target_id in adjacency.get(stack.pop(), []):
+                    if target_id not in visited and target_id not in group:
+                        visited.add(target_id)
+                        stack.append(target_id)
+            impacts.append((len(visited), len({column_tables[c] for c in visited if c in column_tables})))
+        return impacts
@@ -9,8 +9,11 @@ class TableMetadataService:
     """表元数据服务类，提供表元数据管理的业务逻辑"""
     
     @staticmethod
-    def create(db: Session, table_metadata: TableMetadataCreate) -> TableMetadata:
-        """创建新表元数据，包括关联的列数据"""
+    def create(db: Session, table_metadata: TableMetadataCreate, commit: bool = True) -> TableMetadata:
+        """创建新表元数据，包括关联的列数据
+        
+        commit为False时只flush不提交，由调用方（如导入工作单元）统一提交
+        """
         import logging
         logger = logging.getLogger(__name__)
         
@@ -37,8 +40,7 @@ class TableMetadataService:
         # 创建新表元数据
         db_table = TableMetadata(**table_data)
         db.add(db_table)
-        db.commit()
-        db.refresh(db_table)
+        db.flush()  # 获取表ID，与列数据在同一事务中提交
         
         logger.info(f"表创建成功，table_id={db_table.id}")
         
@@ -59,8 +61,11 @@ class TableMetadataService:
             db.add(db_column)
             logger.info(f"添加列到数据库: {column_data['name']}")
         
-        db.commit()
-        db.refresh(db_table)
+        if commit:
+            db.commit()
+            db.refresh(db_table)
+        else:
+            db.flush()
         logger.info(f"表创建完成，table_id={db_table.id}")
         return db_table
     
@@ -127,8 +132,11 @@ class TableMetadataService:
         return query.first()
     
     @staticmethod
-    def update(db: Session, table_id: int, table_update: TableMetadataUpdate) -> Optional[TableMetadata]:
-        """更新表元数据，包括关联的列数据"""
+    def update(db: Session, table_id: int, table_update: TableMetadataUpdate, commit: bool = True) -> Optional[TableMetadata]:
+        """更新表元数据，包括关联的列数据
+        
+        commit为False时只暂存修改，由调用方（如导入工作单元）统一flush和提交
+        """
         import logging
         logger = logging.getLogger(__name__)
         
@@ -207,14 +215,25 @@ class TableMetadataService:
         for field, value in update_data.items():
             logger.info(f"更新字段 {field}: {value}")
             setattr(db_table, field, value)
+        # 表已被修改，清除内容哈希，下次导入时不会因哈希相同而跳过该表
+        db_table.content_hash = None
         
-        logger.info("提交数据库事务")
-        db.commit()
-        logger.info("刷新数据库对象")
-        db.refresh(db_table)
+        if commit:
+            logger.info("提交数据库事务")
+            db.commit()
+            logger.info("刷新数据库对象")
+            db.refresh(db_table)
         logger.info(f"表更新完成，table_id={table_id}")
         return db_table
     
+    @staticmethod
+    def invalidate_content_hash(db: Session, table_id: int) -> None:
+        """表的字段被单独修改后清除表的内容哈希，下次导入时重新比较并写入"""
+        db.query(TableMetadata).filter(
+            TableMetadata.id == table_id,
+            TableMetadata.content_hash.isnot(None)
+        ).update({TableMetadata.content_hash: None}, synchronize_session="fetch")
+    
     @staticmethod
     def delete(db: Session, table_id: int) -> bool:
         """删除表元数据"""
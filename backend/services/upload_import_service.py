@@ -0,0 +1,1376 @@
+from typing import Dict, Any, List, Optional, Set, Callable, Tuple, Iterable, Iterator, Union, BinaryIO
+from functools import partial
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+import pandas as pd
+import json
+import io
+import logging
+
+from models.schemas import (
+    DataSourceCreate, DataSourceUpdate,
+    TableMetadataCreate, TableMetadataUpdate,
+    ColumnMetadataCreate, ColumnMetadataUpdate,
+    LineageRelationCreate, LineageRelationUpdate,
+    ColumnLineageRelationCreate
+)
+from models import TableMetadata
+from services.data_source_service import DataSourceService
+from services.table_metadata_service import TableMetadataService
+from services.column_metadata_service import ColumnMetadataService
+from services.lineage_service import LineageService
+from services.import_unit_of_work import ImportUnitOfWork
+from services.lineage_resolution_index import LineageResolutionIndex
+from services.columnar_import_service import ColumnarImportService
+from utils.file_processing_utils import read_excel_sheets
+from utils.columnar_utils import COLUMNAR_EXTENSIONS
+from utils.content_hash_utils import table_content_hash, lineage_content_hash
+from utils.json_stream_utils import JsonStructureError, iter_bytes, iter_json_array, iter_ndjson, chunked
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+class UploadImportService:
+    """上传文件导入服务类，负责解析上传文件内容并写入元数据和血缘关系
+
+    各导入方法与上传接口一一对应，既可在请求中同步执行，也可由后台导入任务调用
+    """
+    
+    @staticmethod
+    def import_excel(db: Session, contents: bytes, progress: Optional[Any] = None) -> Dict[str, Any]:
+        """
+        导入Excel文件中的数据源、表、列及血缘关系
+        
+        每行在保存点中写入，出错的行只回滚该行，错误记入validation_errors，其余行照常按块提交
+        
+        Args:
+            db: 数据库会话
+            contents: 上传文件的原始内容
+            progress: 可选的进度跟踪对象，由后台导入任务传入
+            
+        Returns:
+            导入结果
+        """
+        # 各工作表并行解析，再按数据源、表、列、血缘关系的依赖顺序写入
+        sheets = read_excel_sheets(contents, ["data_sources", "tables", "columns", "lineages"])
+        
+        # 处理结果统计
+        result = {
+            "data_sources": {"created": 0, "updated": 0},
+            "tables": {"created": 0, "updated": 0},
+            "columns": {"created": 0, "updated": 0},
+            "lineages": {"created": 0, "updated": 0}
+        }
+        # 逐行错误，出错的行各自回滚，不影响其他行
+        errors: List[str] = []
+        # 已清除内容哈希的表ID
+        cleared_tables: Set[int] = set()
+        
+        with ImportUnitOfWork(db, progress=progress) as uow:
+            # 处理数据源信息
+            if "data_sources" in sheets:
+                data_sources_df = sheets["data_sources"]
+                uow.expect_rows(len(data_sources_df))
+                for index, row in data_sources_df.iterrows():
+                    try:
+                        with uow.row():
+                            # 构建正确的数据源数据结构，将非模型字段放入connection_config
+                            source_type = row.get("source_type")
+                            # 确保数据源类型为小写，兼容枚举值
+                            if source_type:
+                                source_type = source_type.lower()
+                
+                            source_data = {
+                                "name": row.get("name"),
+                                "description": row.get("description", ""),
+                                "type": source_type,  # 映射source_type到type，确保小写
+                                "connection_config": {
+                                    "connection_string": row.get("connection_string", ""),
+                                    "schema_name": row.get("schema_name", ""),
+                                    "is_active": row.get("is_active", True)
+                                }
+                            }
+                
+                            # 检查数据源是否已存在
+                            existing_source = DataSourceService.get_by_name(db, source_data["name"])
+                            if existing_source:
+                                # 更新现有数据源 - 确保使用正确的Pydantic模型
+                                try:
+                                    data_source_update = DataSourceUpdate(**source_data)
+                                    DataSourceService.update(db, existing_source.id, data_source_update, commit=False)
+                                    result["data_sources"]["updated"] += 1
+                                except Exception as e:
+                                    raise ValueError(f"更新数据源时出错: {str(e)}")
+                            else:
+                                # 创建新数据源
+                                try:
+                                    # 确保传入的是正确的Pydantic模型对象
+                                    data_source_create = DataSourceCreate(**source_data)
+                                    DataSourceService.create(db, data_source_create, commit=False)
+                                    result["data_sources"]["created"] += 1
+                                except Exception as e:
+                                    raise ValueError(f"创建数据源时出错: {str(e)}")
+                    except Exception as e:
+                        UploadImportService._row_failed(errors, "数据源数据", index, e)
+        
+            # 处理表元数据信息
+            if "tables" in sheets:
+                tables_df = sheets["tables"]
+                uow.expect_rows(len(tables_df))
+                for index, row in tables_df.iterrows():
+                    try:
+                        with uow.row():
+                            # 获取数据源
+                            source = DataSourceService.get_by_name(db, row.get("data_source_name"))
+                            if not source:
+                                continue
+                
+                            # 构建正确的表元数据结构，将非模型字段放入properties
+                            table_data = {
+                                "data_source_id": source.id,
+                                "name": row.get("name"),
+                                "description": row.get("description", ""),
+                                "properties": {
+                                    "table_type": row.get("table_type", "TABLE"),
+                                    "row_count": row.get("row_count", 0)
+                                }
+                            }
+                
+                            # 检查表是否已存在
+                            existing_table = TableMetadataService.get_by_name_and_source(
+                                db, table_data["name"], source.id
+                            )
+                            if existing_table:
+                                # 更新现有表 - 使用正确的Pydantic模型
+                                table_update = TableMetadataUpdate(**table_data)
+                                TableMetadataService.update(db, existing_table.id, table_update, commit=False)
+                                result["tables"]["updated"] += 1
+                            else:
+                                # 创建新表
+                                TableMetadataService.create(db, TableMetadataCreate(**table_data), commit=False)
+                                result["tables"]["created"] += 1
+                    except Exception as e:
+                        UploadImportService._row_failed(errors, "表数据", index, e)
+        
+            # 处理列元数据信息
+            if "columns" in sheets:
+                columns_df = sheets["columns"]
+                uow.expect_rows(len(columns_df))
+                for index, row in columns_df.iterrows():
+                    try:
+                        with uow.row():
+                            # 获取数据源和表
+                            source = DataSourceService.get_by_name(db, row.get("data_source_name"))
+                            if not source:
+                                continue
+                
+                            table = TableMetadataService.get_by_name_and_source(
+                                db, row.get("table_name"), source.id
+                            )
+                            if not table:
+                                continue
+                
+                            # 构建正确的列元数据结构，将非模型字段放入properties
+                            column_data = {
+                                "table_id": table.id,
+                                "name": row.get("name"),
+                                "data_type": row.get("data_type"),
+                                "description": row.get("description", ""),
+                                "is_primary_key": row.get("is_primary_key", False),
+                                "properties": {
+                                    "is_nullable": row.get("is_nullable", True),
+                                    "column_order": row.get("column_order", 0),
+                                    "length": row.get("length")
+                                }
+                            }
+                
+                            # 检查列是否已存在
+                            existing_column = ColumnMetadataService.get_by_name_and_table(
+                                db, column_data["name"], table.id
+                            )
+                            if existing_column:
+                                # 更新现有列 - 使用正确的Pydantic模型
+                                column_update = ColumnMetadataUpdate(**column_data)
+                                ColumnMetadataService.update(db, existing_column.id, column_update, commit=False, invalidate_hash=False)
+                                result["columns"]["updated"] += 1
+                            else:
+                                # 创建新列
+                                ColumnMetadataService.create(db, ColumnMetadataCreate(**column_data), commit=False, invalidate_hash=False)
+                                result["columns"]["created"] += 1
+                            # 字段写入后清除所属表的内容哈希，每张表只清除一次
+                            UploadImportService._clear_table_hash_once(db, table.id, cleared_tables)
+                    except Exception as e:
+                        UploadImportService._row_failed(errors, "字段数据", index, e)
+        
+            # 处理血缘关系信息
+            if "lineages" in sheets:
+                lineages_df = sheets["lineages"]
+                uow.expect_rows(len(lineages_df))
+                for index, row in lineages_df.iterrows():
+                    try:
+                        with uow.row():
+                            # 获取源表和目标表
+                            source_db = DataSourceService.get_by_name(db, row.get("source_db_name"))
+                            target_db = DataSourceService.get_by_name(db, row.get("target_db_name"))
+                            if not source_db or not target_db:
+                                continue
+                
+                            source_table = TableMetadataService.get_by_name_and_source(
+                                db, row.get("source_table_name"), source_db.id
+                            )
+                            target_table = TableMetadataService.get_by_name_and_source(
+                                db, row.get("target_table_name"), target_db.id
+                            )
+                            if not source_table or not target_table:
+                                continue
+                
+                            # 构建血缘关系数据
+                            lineage_data = {
+                                "source_table_id": source_table.id,
+                                "target_table_id": target_table.id,
+                                "description": row.get("description", ""),
+                                "lineage_type": row.get("lineage_type", "TRANSFORMATION"),
+                                "transformation_logic": row.get("transformation_logic", "")
+                            }
+                
+                            # 如果有列级血缘关系，获取源列和目标列
+                            if pd.notna(row.get("source_column_name")) and pd.notna(row.get("target_column_name")):
+                                source_column = ColumnMetadataService.get_by_name_and_table(
+                                    db, row.get("source_column_name"), source_table.id
+                                )
+                                target_column = ColumnMetadataService.get_by_name_and_table(
+                                    db, row.get("target_column_name"), target_table.id
+                                )
+                    
+                                if source_column and target_column:
+                                    lineage_data["source_column_id"] = source_column.id
+                                    lineage_data["target_column_id"] = target_column.id
+                
+                            # 对于表级血缘关系，使用LineageRelationCreate
+                            lineage_create = LineageRelationCreate(
+                                source_table_ids=[lineage_data["source_table_id"]],
+                                target_table_id=lineage_data["target_table_id"],
+                                relation_type=lineage_data.get("lineage_type", "TRANSFORMATION"),
+                                description=lineage_data.get("description", ""),
+                                relation_details={"transformation_logic": lineage_data.get("transformation_logic", "")}
+                            )
+                
+                            # 检查表级血缘关系是否已存在
+                            existing_lineage = LineageService.get_table_lineages_by_source(db, source_table.id)
+                            existing_lineage = next((l for l in existing_lineage if l.target_table_id == target_table.id), None)
+                
+                            if existing_lineage:
+                                # 更新现有表级血缘关系
+                                lineage_update = LineageRelationUpdate(
+                                    relation_type=lineage_data.get("lineage_type", "TRANSFORMATION"),
+                                    description=lineage_data.get("description", ""),
+                                    relation_details={"transformation_logic": lineage_data.get("transformation_logic", "")}
+                                )
+                                LineageService.update_table_lineage(db, existing_lineage.id, lineage_update, commit=False)
+                                result["lineages"]["updated"] += 1
+                            else:
+                                # 创建新表级血缘关系
+                                created_lineage = LineageService.create_table_lineage(db, lineage_create, commit=False)
+                                result["lineages"]["created"] += 1
+                    
+                                # 如果有列级血缘关系，创建列级血缘关系
+                                if lineage_data.get("source_column_id") and lineage_data.get("target_column_id"):
+                                    column_lineage_create = ColumnLineageRelationCreate(
+                                        lineage_relation_id=created_lineage.id,
+                                        source_column_id=lineage_data["source_column_id"],
+                                        target_column_id=lineage_data["target_column_id"]
+                                    )
+                                    LineageService.create_column_lineage(db, column_lineage_create, commit=False)
+                    except Exception as e:
+                        UploadImportService._row_failed(errors, "血缘关系数据", index, e)
+        
+        return UploadImportService._structure_import_result(result, errors, "Excel文件")
+    
+    @staticmethod
+    def import_table_structure_excel(db: Session, contents: bytes, progress: Optional[Any] = None) -> Dict[str, Any]:
+        """
+        导入Excel文件中的表结构和字段信息
+        
+        每张表的内容哈希由tables工作表中的表属性和columns工作表中按顺序排列的字段定义计算，
+        与上次导入相同的表及其字段不再写入，计入skipped
+        
+        每行在保存点中写入，出错的行只回滚该行，错误记入validation_errors，其余行照常按块提交
+        
+        Args:
+            db: 数据库会话
+            contents: 上传文件的原始内容
+            progress: 可选的进度跟踪对象，由后台导入任务传入
+            
+        Returns:
+            导入结果
+        """
+        # 各工作表并行解析，再按数据源、表、列的依赖顺序写入
+        sheets = read_excel_sheets(contents, ["data_sources", "tables", "columns"])
+        
+        # 处理结果统计
+        result = {
+            "data_sources": {"created": 0, "updated": 0},
+            "tables": {"created": 0, "updated": 0, "skipped": 0},
+            "columns": {"created": 0, "updated": 0, "skipped": 0}
+        }
+        # 逐行错误，出错的行各自回滚，不影响其他行
+        errors: List[str] = []
+        # 已清除内容哈希的表ID
+        cleared_tables: Set[int] = set()
+        
+        # 按(数据源名称, 小写表名)计算每张表的内容哈希
+        tables_df = sheets.get("tables")
+        columns_df = sheets.get("columns")
+        table_rows, column_rows = [], []
+        table_hashes = {}
+        if tables_df is not None:
+            table_rows = [UploadImportService._table_structure_row(row) for row in tables_df.to_dict("records")]
+            column_rows = [] if columns_df is None else [
+                UploadImportService._column_structure_row(row) for row in columns_df.to_dict("records")
+            ]
+            table_columns = {}
+            for key, column_data in column_rows:
+                table_columns.setdefault(key, []).append(column_data)
+            for key, table_data in table_rows:
+                table_hashes[key] = table_content_hash(table_data, table_columns.get(key, []))
+        # 已有表的内容哈希，批量查询
+        resolution_index = LineageResolutionIndex()
+        resolution_index.load_names(db, [key[0] for key, _ in table_rows], [key[1] for key, _ in table_rows])
+        unchanged_tables = set()
+        changed_tables = {}
+        # 有行写入失败的表，不记录新的内容哈希，下次导入时重新写入
+        failed_tables = set()
+        
+        with ImportUnitOfWork(db, progress=progress) as uow:
+            # 处理数据源信息
+            if "data_sources" in sheets:
+                data_sources_df = sheets["data_sources"]
+                uow.expect_rows(len(data_sources_df))
+                for index, row in data_sources_df.iterrows():
+                    try:
+                        with uow.row():
+                            source_data = {
+                                "name": row.get("name"),
+                                "description": row.get("description", ""),
+                                "type": row.get("type"),
+                                "connection_config": row.get("connection_config", {})
+                            }
+                
+                            # 检查数据源是否已存在
+                            existing_source = DataSourceService.get_by_name(db, source_data["name"])
+                            if existing_source:
+                                # 更新现有数据源
+                                data_source_update = DataSourceUpdate(**source_data)
+                                DataSourceService.update(db, existing_source.id, data_source_update, commit=False)
+                                result["data_sources"]["updated"] += 1
+                            else:
+                                # 创建新数据源
+                                data_source_create = DataSourceCreate(**source_data)
+                                DataSourceService.create(db, data_source_create, commit=False)
+                                result["data_sources"]["created"] += 1
+                    except Exception as e:
+                        UploadImportService._row_failed(errors, "数据源数据", index, e)
+        
+            # 处理表元数据信息
+            if tables_df is not None:
+                uow.expect_rows(len(tables_df))
+                for index, (key, table_data) in enumerate(table_rows):
+                    try:
+                        with uow.row():
+                            # 获取数据源
+                            source = DataSourceService.get_by_name(db, key[0])
+                            if not source:
+                                continue
+                
+                            table_data = {"data_source_id": source.id, **table_data}
+                
+                            # 检查表是否已存在
+                            existing_table = TableMetadataService.get_by_name_and_source(
+                                db, table_data["name"], source.id
+                            )
+                            if existing_table and resolution_index.table_hash(existing_table.id) == table_hashes[key]:
+                                # 内容未变化，表及其字段都不再写入
+                                unchanged_tables.add(key)
+                                result["tables"]["skipped"] += 1
+                            elif existing_table:
+                                # 更新现有表
+                                TableMetadataService.update(db, existing_table.id, TableMetadataUpdate(**table_data), commit=False)
+                                changed_tables[key] = existing_table.id
+                                result["tables"]["updated"] += 1
+                            else:
+                                # 创建新表
+                                created_table = TableMetadataService.create(db, TableMetadataCreate(**table_data), commit=False)
+                                changed_tables[key] = created_table.id
+                                result["tables"]["created"] += 1
+                    except Exception as e:
+                        failed_tables.add(key)
+                        UploadImportService._row_failed(errors, "表数据", index, e)
+        
+            # 处理列元数据信息
+            if columns_df is not None:
+                if tables_df is None:
+                    column_rows = [UploadImportService._column_structure_row(row) for row in columns_df.to_dict("records")]
+                uow.expect_rows(len(columns_df))
+                for index, (key, column_data) in enumerate(column_rows):
+                    try:
+                        with uow.row():
+                            if key in unchanged_tables:
+                                result["columns"]["skipped"] += 1
+                                continue
+                            if key in failed_tables and key not in changed_tables:
+                                raise ValueError(f"所属表导入失败: {column_data['table_name']}")
+                
+                            # 获取数据源和表
+                            source = DataSourceService.get_by_name(db, key[0])
+                            if not source:
+                                continue
+                
+                            table = TableMetadataService.get_by_name_and_source(
+                                db, column_data.pop("table_name"), source.id
+                            )
+                            if not table:
+                                continue
+                
+                            column_data = {"table_id": table.id, **column_data}
+                
+                            # 检查列是否已存在
+                            existing_column = ColumnMetadataService.get_by_name_and_table(
+                                db, column_data["name"], table.id
+                            )
+                            if existing_column:
+                                # 更新现有列
+                                ColumnMetadataService.update(db, existing_column.id, ColumnMetadataUpdate(**column_data), commit=False, invalidate_hash=False)
+                                result["columns"]["updated"] += 1
+                            else:
+                                # 创建新列
+                                ColumnMetadataService.create(db, ColumnMetadataCreate(**column_data), commit=False, invalidate_hash=False)
+                                result["columns"]["created"] += 1
+                            # 写入了内容哈希的表在最后统一记录新的哈希，其余表清除一次哈希
+                            if key not in changed_tables:
+                                UploadImportService._clear_table_hash_once(db, table.id, cleared_tables)
+                    except Exception as e:
+                        failed_tables.add(key)
+                        UploadImportService._row_failed(errors, "字段数据", index, e)
+            
+            # 表和字段都写入后再记录新的内容哈希（更新表时已清除原有的哈希），有字段写入失败的表清除哈希
+            if changed_tables:
+                uow.flush()
+                db.execute(update(TableMetadata), [
+                    {"id": table_id, "content_hash": None if key in failed_tables else table_hashes[key]}
+                    for key, table_id in changed_tables.items()
+                ])
+        
+        return UploadImportService._structure_import_result(result, errors, "表结构Excel文件")
+    
+    @staticmethod
+    def _clear_table_hash_once(db: Session, table_id: int, cleared_tables: Set[int]) -> None:
+        """
+        导入写入字段后清除所属表的内容哈希，每张表只执行一次UPDATE
+
+        在该行的字段写入之后调用，写入失败而回滚的行不会登记该表，下一次写入该表的字段时仍会清除
+        """
+        if table_id not in cleared_tables:
+            TableMetadataService.invalidate_content_hash(db, table_id)
+            cleared_tables.add(table_id)
+    
+    @staticmethod
+    def _row_failed(errors: List[str], label: str, index: int, error: Exception) -> None:
+        """记录一行的错误，该行已在保存点中回滚"""
+        error_msg = f"处理第 {index+1} 条{label}时出错: {str(error)}"
+        logger.error(error_msg)
+        errors.append(error_msg)
+    
+    @staticmethod
+    def _structure_import_result(result: Dict[str, Dict[str, int]], errors: List[str], label: str) -> Dict[str, Any]:
+        """按逐行错误确定返回状态：没有错误为success，部分行失败为partial_success，没有一行成功为error"""
+        if not errors:
+            return {
+                "status": "success",
+                "message": f"{label}上传并解析成功",
+                "result": result
+            }
+        
+        error_count = len(errors)
+        # 内容未变化而跳过的行也计为成功
+        success_count = sum(count for counts in result.values() for count in counts.values())
+        if success_count == 0:
+            status = "error"
+            message = f"{label}导入失败，共{error_count}个错误"
+            logger.error(message)
+        else:
+            status = "partial_success"
+            message = f"{label}导入完成，成功{success_count}行，失败{error_count}行"
+            logger.warning(message)
+        return {
+            "status": status,
+            "message": message,
+            "result": {
+                **result,
+                "validation_errors": errors,
+                "error_count": error_count,
+                "success_count": success_count
+            }
+        }
+    
+    @staticmethod
+    def _table_structure_row(row: Dict[str, Any]) -> Tuple[Tuple[Any, str], Dict[str, Any]]:
+        """将tables工作表的一行转换为(表键, 表数据)，表键为(数据源名称, 小写表名)"""
+        table_data = {
+            "name": row.get("name"),
+            "schema_name": row.get("schema_name"),
+            "description": row.get("description", ""),
+            "properties": row.get("properties", {})
+        }
+        return (row.get("data_source_name"), str(row.get("name")).lower()), table_data
+    
+    @staticmethod
+    def _column_structure_row(row: Dict[str, Any]) -> Tuple[Tuple[Any, str], Dict[str, Any]]:
+        """将columns工作表的一行转换为(表键, 字段数据)，字段数据中的table_name在写入前移除"""
+        column_data = {
+            "table_name": row.get("table_name"),
+            "name": row.get("name"),
+            "data_type": row.get("data_type"),
+            "description": row.get("description", ""),
+            "is_primary_key": row.get("is_primary_key", False),
+            "properties": row.get("properties", {})
+        }
+        return (row.get("data_source_name"), str(row.get("table_name")).lower()), column_data
+    
+    @staticmethod
+    def import_table_structure_json(db: Session, contents: bytes, progress: Optional[Any] = None) -> Dict[str, Any]:
+        """
+        导入JSON文件中的表结构和字段信息
+        
+        每行在保存点中写入，出错的行只回滚该行，错误记入validation_errors，其余行照常按块提交
+        
+        Args:
+            db: 数据库会话
+            contents: 上传文件的原始内容
+            progress: 可选的进度跟踪对象，由后台导入任务传入
+            
+        Returns:
+            导入结果
+        """
+        data = json.loads(contents)
+        
+        # 处理结果统计
+        result = {
+            "data_sources": {"created": 0, "updated": 0},
+            "tables": {"created": 0, "updated": 0},
+            "columns": {"created": 0, "updated": 0}
+        }
+        # 逐行错误，出错的行各自回滚，不影响其他行
+        errors: List[str] = []
+        # 已清除内容哈希的表ID
+        cleared_tables: Set[int] = set()
+        
+        with ImportUnitOfWork(db, progress=progress) as uow:
+            # 处理数据源信息
+            if "data_sources" in data:
+                uow.expect_rows(len(data["data_sources"]))
+                for index, source_data in enumerate(data["data_sources"]):
+                    try:
+                        with uow.row():
+                            # 检查数据源是否已存在
+                            existing_source = DataSourceService.get_by_name(db, source_data["name"])
+                            if existing_source:
+                                # 更新现有数据源
+                                data_source_update = DataSourceUpdate(**source_data)
+                                DataSourceService.update(db, existing_source.id, data_source_update, commit=False)
+                                result["data_sources"]["updated"] += 1
+                            else:
+                                # 创建新数据源
+                                data_source_create = DataSourceCreate(**source_data)
+                                DataSourceService.create(db, data_source_create, commit=False)
+                                result["data_sources"]["created"] += 1
+                    except Exception as e:
+                        UploadImportService._row_failed(errors, "数据源数据", index, e)
+        
+            # 处理表元数据信息
+            if "tables" in data:
+                uow.expect_rows(len(data["tables"]))
+                for index, table_data in enumerate(data["tables"]):
+                    try:
+                        with uow.row():
+                            # 检查数据源是否存在
+                            source_id = table_data.get("data_source_id")
+                            source_name = table_data.get("data_source_name")
+                
+                            if not source_id and source_name:
+                                source = DataSourceService.get_by_name(db, source_name)
+                                if source:
+                                    table_data["data_source_id"] = source.id
+                                else:
+                                    continue
+                
+                            # 检查表是否已存在
+                            existing_table = TableMetadataService.get_by_id(db, table_data.get("id"))
+                            if existing_table:
+                                # 更新现有表
+                                table_update = TableMetadataUpdate(**table_data)
+                                TableMetadataService.update(db, existing_table.id, table_update, commit=False)
+                                result["tables"]["updated"] += 1
+                            else:
+                                # 创建新表
+                                TableMetadataService.create(db, TableMetadataCreate(**table_data), commit=False)
+                                result["tables"]["created"] += 1
+                    except Exception as e:
+                        UploadImportService._row_failed(errors, "表数据", index, e)
+        
+            # 处理列元数据信息
+            if "columns" in data:
+                uow.expect_rows(len(data["columns"]))
+                for index, column_data in enumerate(data["columns"]):
+                    try:
+                        with uow.row():
+                            # 检查表是否存在
+                            table_id = column_data.get("table_id")
+                            table_name = column_data.get("table_name")
+                            source_name = column_data.get("data_source_name")
+                
+                            if not table_id and table_name and source_name:
+                                source = DataSourceService.get_by_name(db, source_name)
+                                if source:
+                                    table = TableMetadataService.get_by_name_and_source(db, table_name, source.id)
+                                    if table:
+                                        column_data["table_id"] = table.id
+                                    else:
+                                        continue
+                                else:
+                                    continue
+                
+                            # 检查列是否已存在
+                            existing_column = ColumnMetadataService.get_by_id(db, column_data.get("id"))
+                            if existing_column:
+                                # 更新现有列
+                                column_update = ColumnMetadataUpdate(**column_data)
+                                ColumnMetadataService.update(db, existing_column.id, column_update, commit=False, invalidate_hash=False)
+                                result["columns"]["updated"] += 1
+                            else:
+                                # 创建新列
+                                ColumnMetadataService.create(db, ColumnMetadataCreate(**column_data), commit=False, invalidate_hash=False)
+                                result["columns"]["created"] += 1
+                            # 字段写入后清除所属表的内容哈希，每张表只清除一次
+                            UploadImportService._clear_table_hash_once(db, column_data["table_id"], cleared_tables)
+                    except Exception as e:
+                        UploadImportService._row_failed(errors, "字段数据", index, e)
+        
+        return UploadImportService._structure_import_result(result, errors, "表结构JSON文件")
+    
+    @staticmethod
+    def import_table_lineage_excel(db: Session, contents: bytes, progress: Optional[Any] = None) -> Dict[str, Any]:
+        """
+        导入Excel文件中的表血缘关系
+        
+        Args:
+            db: 数据库会话
+            contents: 上传文件的原始内容
+            progress: 可选的进度跟踪对象，由后台导入任务传入
+            
+        Returns:
+            导入结果
+        """
+        logger.info("开始处理表血缘关系Excel文件")
+        excel_data = pd.ExcelFile(io.BytesIO(contents))
+        
+        # 处理结果统计
+        result = {
+            "lineages": {"created": 0, "updated": 0, "skipped": 0},
+            "validation_errors": []
+        }
+        
+        with ImportUnitOfWork(db, progress=progress) as uow:
+            # 处理血缘关系信息
+            if "lineages" in excel_data.sheet_names:
+                logger.info(f"找到lineages工作表，开始处理")
+                lineages_df = pd.read_excel(excel_data, "lineages")
+                uow.expect_rows(len(lineages_df))
+                logger.info(f"共找到 {len(lineages_df)} 条血缘关系数据")
+                resolution_index = LineageResolutionIndex.build(db, lineages_df.to_dict("records"))
+            
+                for index, row in lineages_df.iterrows():
+                    created_lineage = None
+                    try:
+                        with uow.row():
+                            logger.info(f"处理第 {index+1} 条血缘关系数据: {row.get('source_db_name')}.{row.get('source_table_name')} -> {row.get('target_db_name')}.{row.get('target_table_name')}")
+                    
+                            # 获取源表和目标表
+                            source_db_id = resolution_index.data_source_id(row.get("source_db_name"))
+                            target_db_id = resolution_index.data_source_id(row.get("target_db_name"))
+                    
+                            if not source_db_id:
+                                error_msg = f"源数据库不存在: {row.get('source_db_name')}"
+                                logger.warning(error_msg)
+                                result["validation_errors"].append(error_msg)
+                                continue
+                            if not target_db_id:
+                                error_msg = f"目标数据库不存在: {row.get('target_db_name')}"
+                                logger.warning(error_msg)
+                                result["validation_errors"].append(error_msg)
+                                continue
+                    
+                            source_table_id = resolution_index.table_id(source_db_id, row.get("source_table_name"))
+                            target_table_id = resolution_index.table_id(target_db_id, row.get("target_table_name"))
+                    
+                            if not source_table_id:
+                                error_msg = f"源表不存在: {row.get('source_table_name')} 于数据库 {row.get('source_db_name')}"
+                                logger.warning(error_msg)
+                                result["validation_errors"].append(error_msg)
+                                continue
+                            if not target_table_id:
+                                error_msg = f"目标表不存在: {row.get('target_table_name')} 于数据库 {row.get('target_db_name')}"
+                                logger.warning(error_msg)
+                                result["validation_errors"].append(error_msg)
+                                continue
+                    
+                            # 构建血缘关系数据
+                            lineage_data = {
+                                "source_table_id": source_table_id,
+                                "target_table_id": target_table_id,
+                                "description": row.get("description", ""),
+                                "relation_type": row.get("relation_type", "TRANSFORMATION"),
+                                "relation_details": {"transformation_logic": row.get("transformation_logic", "")}
+                            }
+                    
+                            # 对于表级血缘关系，使用LineageRelationCreate
+                            lineage_create = LineageRelationCreate(
+                                source_table_ids=[lineage_data["source_table_id"]],
+                                target_table_id=lineage_data["target_table_id"],
+                                relation_type=lineage_data.get("relation_type", "TRANSFORMATION"),
+                                description=lineage_data.get("description", ""),
+                                relation_details=lineage_data.get("relation_details", {})
+                            )
+                    
+                            # 检查表级血缘关系是否已存在
+                            existing_lineage_id = resolution_index.table_lineage_id([source_table_id], target_table_id)
+                            content_hash = lineage_content_hash([source_table_id], target_table_id, lineage_create.model_dump())
+                    
+                            if existing_lineage_id and resolution_index.lineage_hash(existing_lineage_id) == content_hash:
+                                # 内容未变化，不再写入
+                                result["lineages"]["skipped"] += 1
+                                continue
+                            elif existing_lineage_id:
+                                # 更新现有表级血缘关系
+                                lineage_update = LineageRelationUpdate(
+                                    relation_type=lineage_data.get("relation_type", "TRANSFORMATION"),
+                                    description=lineage_data.get("description", ""),
+                                    relation_details=lineage_data.get("relation_details", {})
+                                )
+                                updated_lineage = LineageService.update_table_lineage(db, existing_lineage_id, lineage_update, commit=False)
+                                updated_lineage.content_hash = content_hash
+                                result["lineages"]["updated"] += 1
+                                logger.info(f"更新表级血缘关系成功: {row.get('source_table_name')} -> {row.get('target_table_name')}")
+                            else:
+                                # 创建新表级血缘关系
+                                created_lineage = LineageService.create_table_lineage(db, lineage_create, commit=False)
+                                created_lineage.content_hash = content_hash
+                                result["lineages"]["created"] += 1
+                                logger.info(f"创建表级血缘关系成功: {row.get('source_table_name')} -> {row.get('target_table_name')}")
+                    except Exception as e:
+                        error_msg = f"处理第 {index+1} 条血缘关系时出错: {str(e)}"
+                        logger.error(error_msg, exc_info=True)
+                        result["validation_errors"].append(error_msg)
+                        continue
+                    # 该行的保存点已提交，登记新建的血缘关系和新的内容哈希供后续行复用
+                    if created_lineage is not None:
+                        resolution_index.add_table_lineage(created_lineage)
+                    elif existing_lineage_id:
+                        resolution_index.set_lineage_hash(existing_lineage_id, content_hash)
+            else:
+                logger.warning(f"未找到lineages工作表")
+                result["validation_errors"].append("未找到lineages工作表")
+        
+        # 根据结果返回不同状态
+        logger.info(f"表血缘关系处理完成，创建: {result['lineages']['created']}，更新: {result['lineages']['updated']}，未变化跳过: {result['lineages']['skipped']}，错误: {len(result['validation_errors'])}")
+        
+        if result["validation_errors"]:
+            # 统计错误数量
+            error_count = len(result["validation_errors"])
+            # 计算成功导入的数量，内容未变化而跳过的不计入
+            success_count = result["lineages"]["created"] + result["lineages"]["updated"]
+            skipped_count = result["lineages"]["skipped"]
+            
+            # 确定状态和消息
+            if success_count + skipped_count == 0:
+                # 完全失败
+                status = "error"
+                message = f"表血缘关系导入失败，共{error_count}个错误"
+                logger.error(message)
+            else:
+                # 部分成功
+                status = "partial_success"
+                message = f"表血缘关系导入完成，成功{success_count}个，未变化跳过{skipped_count}个，失败{error_count}个"
+                logger.warning(message)
+            
+            return {
+                "status": status,
+                "message": message,
+                "result": {
+                    "lineages": result["lineages"],
+                    "validation_errors": result["validation_errors"],
+                    "error_count": error_count,
+                    "success_count": success_count,
+                    "skipped_count": skipped_count
+                }
+            }
+        else:
+            # 完全成功
+            success_count = result["lineages"]["created"] + result["lineages"]["updated"]
+            skipped_count = result["lineages"]["skipped"]
+            message = f"表血缘关系导入成功，共{success_count}个，未变化跳过{skipped_count}个"
+            logger.info(message)
+            return {
+                "status": "success",
+                "message": message,
+                "result": {
+                    "lineages": result["lineages"],
+                    "success_count": success_count,
+                    "skipped_count": skipped_count
+                }
+            }
+    
+    @staticmethod
+    def import_table_lineage_json(db: Session, contents: Union[bytes, BinaryIO, Iterable[bytes]], progress: Optional[Any] = None) -> Dict[str, Any]:
+        """
+        导入JSON文件中的表血缘关系，边解析lineages数组边导入，不会一次性加载整个文件
+        
+        Args:
+            db: 数据库会话
+            contents: 上传文件的原始内容、二进制文件对象或字节块的迭代器
+            progress: 可选的进度跟踪对象，由后台导入任务传入
+            
+        Returns:
+            导入结果
+        """
+        logger.info("开始处理表血缘关系JSON文件")
+        records = iter_json_array(iter_bytes(contents, settings.json_stream_block_size), "lineages")
+        return UploadImportService._import_table_lineage_records(db, records, progress)
+
+    @staticmethod
+    def import_table_lineage_ndjson(db: Session, contents: Union[bytes, BinaryIO, Iterable[bytes]], progress: Optional[Any] = None) -> Dict[str, Any]:
+        """
+        导入NDJSON文件中的表血缘关系，每行一个与JSON格式中lineages条目相同的对象
+        
+        Args:
+            db: 数据库会话
+            contents: 上传文件的原始内容、二进制文件对象或字节块的迭代器
+            progress: 可选的进度跟踪对象，由后台导入任务传入
+            
+        Returns:
+            导入结果
+        """
+        logger.info("开始处理表血缘关系NDJSON文件")
+        records = iter_ndjson(iter_bytes(contents, settings.json_stream_block_size))
+        return UploadImportService._import_table_lineage_records(db, records, progress)
+
+    @staticmethod
+    def _import_table_lineage_records(db: Session, records: Iterator[Any], progress: Optional[Any] = None) -> Dict[str, Any]:
+        """
+        按批处理流式解析出的表血缘关系记录，每批解析settings.json_stream_chunk_size条后批量加载名称索引再逐条写入
+        """
+        # 处理结果统计
+        result = {
+            "lineages": {"created": 0, "updated": 0, "skipped": 0},
+            "validation_errors": []
+        }
+        
+        with ImportUnitOfWork(db, progress=progress) as uow:
+            resolution_index = LineageResolutionIndex()
+            row_offset = 0
+            try:
+                # 处理血缘关系信息，解析器最多领先处理进度一批记录
+                for chunk in chunked(records, settings.json_stream_chunk_size):
+                    uow.expect_rows(len(chunk))
+                    resolution_index.load(db, chunk)
+                    for index, lineage_data in enumerate(chunk, start=row_offset):
+                        created_lineage = None
+                        try:
+                            with uow.row():
+                                logger.info(f"处理第 {index+1} 条血缘关系数据: {lineage_data.get('source_db_name')}.{lineage_data.get('source_table_name')} -> {lineage_data.get('target_db_name')}.{lineage_data.get('target_table_name')}")
+                        
+                                # 检查必要字段
+                                if not lineage_data.get("source_db_name") or not lineage_data.get("source_table_name") or \
+                                   not lineage_data.get("target_db_name") or not lineage_data.get("target_table_name"):
+                                    error_msg = f"第 {index+1} 条血缘关系数据缺少必要字段"
+                                    logger.warning(error_msg)
+                                    result["validation_errors"].append(error_msg)
+                                    continue
+                        
+                                # 获取源表和目标表
+                                source_db_id = resolution_index.data_source_id(lineage_data["source_db_name"])
+                                target_db_id = resolution_index.data_source_id(lineage_data["target_db_name"])
+                        
+                                if not source_db_id:
+                                    error_msg = f"第 {index+1} 条血缘关系数据: 源数据库不存在: {lineage_data['source_db_name']}"
+                                    logger.warning(error_msg)
+                                    result["validation_errors"].append(error_msg)
+                                    continue
+                                if not target_db_id:
+                                    error_msg = f"第 {index+1} 条血缘关系数据: 目标数据库不存在: {lineage_data['target_db_name']}"
+                                    logger.warning(error_msg)
+                                    result["validation_errors"].append(error_msg)
+                                    continue
+                        
+                                source_table_id = resolution_index.table_id(source_db_id, lineage_data["source_table_name"])
+                                target_table_id = resolution_index.table_id(target_db_id, lineage_data["target_table_name"])
+                        
+                                if not source_table_id:
+                                    error_msg = f"第 {index+1} 条血缘关系数据: 源表不存在: {lineage_data['source_table_name']} 于数据库 {lineage_data['source_db_name']}"
+                                    logger.warning(error_msg)
+                                    result["validation_errors"].append(error_msg)
+                                    continue
+                                if not target_table_id:
+                                    error_msg = f"第 {index+1} 条血缘关系数据: 目标表不存在: {lineage_data['target_table_name']} 于数据库 {lineage_data['target_db_name']}"
+                                    logger.warning(error_msg)
+                                    result["validation_errors"].append(error_msg)
+                                    continue
+                        
+                                # 对于表级血缘关系，使用LineageRelationCreate
+                                lineage_create = LineageRelationCreate(
+                                    source_table_ids=[source_table_id],
+                                    target_table_id=target_table_id,
+                                    relation_type=lineage_data.get("relation_type", "TRANSFORMATION"),
+                                    description=lineage_data.get("description", ""),
+                                    relation_details=lineage_data.get("relation_details", {})
+                                )
+                        
+                                # 检查表级血缘关系是否已存在
+                                existing_lineage_id = resolution_index.table_lineage_id([source_table_id], target_table_id)
+                                content_hash = lineage_content_hash([source_table_id], target_table_id, lineage_create.model_dump())
+                        
+                                if existing_lineage_id and resolution_index.lineage_hash(existing_lineage_id) == content_hash:
+                                    # 内容未变化，不再写入
+                                    result["lineages"]["skipped"] += 1
+                                    continue
+                                elif existing_lineage_id:
+                                    # 更新现有表级血缘关系
+                                    lineage_update = LineageRelationUpdate(
+                                        relation_type=lineage_data.get("relation_type", "TRANSFORMATION"),
+                                        description=lineage_data.get("description", ""),
+                                        relation_details=lineage_data.get("relation_details", {})
+                                    )
+                                    updated_lineage = LineageService.update_table_lineage(db, existing_lineage_id, lineage_update, commit=False)
+                                    updated_lineage.content_hash = content_hash
+                                    result["lineages"]["updated"] += 1
+                                    logger.info(f"第 {index+1} 条血缘关系数据: 更新表级血缘关系成功: {lineage_data['source_table_name']} -> {lineage_data['target_table_name']}")
+                                else:
+                                    # 创建新表级血缘关系
+                                    created_lineage = LineageService.create_table_lineage(db, lineage_create, commit=False)
+                                    created_lineage.content_hash = content_hash
+                                    result["lineages"]["created"] += 1
+                                    logger.info(f"第 {index+1} 条血缘关系数据: 创建表级血缘关系成功: {lineage_data['source_table_name']} -> {lineage_data['target_table_name']}")
+                        except Exception as e:
+                            error_msg = f"第 {index+1} 条血缘关系数据处理出错: {str(e)}"
+                            logger.error(error_msg, exc_info=True)
+                            result["validation_errors"].append(error_msg)
+                            continue
+                        # 该行的保存点已提交，登记新建的血缘关系和新的内容哈希供后续行复用
+                        if created_lineage is not None:
+                            resolution_index.add_table_lineage(created_lineage)
+                        elif existing_lineage_id:
+                            resolution_index.set_lineage_hash(existing_lineage_id, content_hash)
+                    row_offset += len(chunk)
+                    logger.info(f"已处理 {row_offset} 条血缘关系数据")
+            except JsonStructureError as e:
+                # JSON文件中没有lineages字段或其不是数组
+                logger.warning(str(e))
+                result["validation_errors"].append(str(e))
+        
+        # 根据结果返回不同状态
+        logger.info(f"表血缘关系JSON文件处理完成，创建: {result['lineages']['created']}，更新: {result['lineages']['updated']}，未变化跳过: {result['lineages']['skipped']}，错误: {len(result['validation_errors'])}")
+        
+        if result["validation_errors"]:
+            # 统计错误数量
+            error_count = len(result["validation_errors"])
+            # 计算成功导入的数量，内容未变化而跳过的不计入
+            success_count = result["lineages"]["created"] + result["lineages"]["updated"]
+            skipped_count = result["lineages"]["skipped"]
+            
+            # 确定状态和消息
+            if success_count + skipped_count == 0:
+                # 完全失败
+                status = "error"
+                message = f"表血缘关系导入失败，共{error_count}个错误"
+                logger.error(message)
+            else:
+                # 部分成功
+                status = "partial_success"
+                message = f"表血缘关系导入完成，成功{success_count}个，未变化跳过{skipped_count}个，失败{error_count}个"
+                logger.warning(message)
+            
+            return {
+                "status": status,
+                "message": message,
+                "result": {
+                    "lineages": result["lineages"],
+                    "validation_errors": result["validation_errors"],
+                    "error_count": error_count,
+                    "success_count": success_count,
+                    "skipped_count": skipped_count
+                }
+            }
+        else:
+            # 完全成功
+            success_count = result["lineages"]["created"] + result["lineages"]["updated"]
+            skipped_count = result["lineages"]["skipped"]
+            message = f"表血缘关系导入成功，共{success_count}个，未变化跳过{skipped_count}个"
+            logger.info(message)
+            return {
+                "status": "success",
+                "message": message,
+                "result": {
+                    "lineages": result["lineages"],
+                    "success_count": success_count,
+                    "skipped_count": skipped_count
+                }
+            }
+    
+    @staticmethod
+    def import_column_lineage_excel(db: Session, contents: bytes, progress: Optional[Any] = None) -> Dict[str, Any]:
+        """
+        导入Excel文件中的字段血缘关系
+        
+        Args:
+            db: 数据库会话
+            contents: 上传文件的原始内容
+            progress: 可选的进度跟踪对象，由后台导入任务传入
+            
+        Returns:
+            导入结果
+        """
+        excel_data = pd.ExcelFile(io.BytesIO(contents))
+        
+        # 处理结果统计
+        result = {
+            "column_lineages": {"created": 0},
+            "validation_errors": []
+        }
+        
+        with ImportUnitOfWork(db, progress=progress) as uow:
+            # 处理字段血缘关系信息
+            if "column_lineages" in excel_data.sheet_names:
+                lineages_df = pd.read_excel(excel_data, "column_lineages")
+                uow.expect_rows(len(lineages_df))
+                resolution_index = LineageResolutionIndex.build(db, lineages_df.to_dict("records"), include_columns=True)
+                for _, row in lineages_df.iterrows():
+                    created_lineage = None
+                    try:
+                        with uow.row():
+                            # 获取源数据库和目标数据库
+                            source_db_id = resolution_index.data_source_id(row.get("source_db_name"))
+                            target_db_id = resolution_index.data_source_id(row.get("target_db_name"))
+                    
+                            if not source_db_id:
+                                result["validation_errors"].append(f"源数据库不存在: {row.get('source_db_name')}")
+                                continue
+                            if not target_db_id:
+                                result["validation_errors"].append(f"目标数据库不存在: {row.get('target_db_name')}")
+                                continue
+                    
+                            # 获取源表和目标表
+                            source_table_id = resolution_index.table_id(source_db_id, row.get("source_table_name"))
+                            target_table_id = resolution_index.table_id(target_db_id, row.get("target_table_name"))
+                    
+                            if not source_table_id:
+                                result["validation_errors"].append(
+                                    f"源表不存在: {row.get('source_table_name')} 于数据库 {row.get('source_db_name')}"
+                                )
+                                continue
+                            if not target_table_id:
+                                result["validation_errors"].append(
+                                    f"目标表不存在: {row.get('target_table_name')} 于数据库 {row.get('target_db_name')}"
+                                )
+                                continue
+                    
+                            # 获取源列和目标列
+                            source_column_id = resolution_index.column_id(source_table_id, row.get("source_column_name"))
+                            target_column_id = resolution_index.column_id(target_table_id, row.get("target_column_name"))
+                    
+                            if not source_column_id:
+                                result["validation_errors"].append(
+                                    f"源字段不存在: {row.get('source_column_name')} 于表 {row.get('source_table_name')}"
+                                )
+                                continue
+                            if not target_column_id:
+                                result["validation_errors"].append(
+                                    f"目标字段不存在: {row.get('target_column_name')} 于表 {row.get('target_table_name')}"
+                                )
+                                continue
+                    
+                            # 检查表级血缘关系是否已存在，如果不存在则创建
+                            table_lineage_id = resolution_index.table_lineage_id([source_table_id], target_table_id)
+                    
+                            if not table_lineage_id:
+                                # 创建表级血缘关系
+                                lineage_create = LineageRelationCreate(
+                                    source_table_ids=[source_table_id],
+                                    target_table_id=target_table_id,
+                                    relation_type=row.get("relation_type", "TRANSFORMATION"),
+                                    description=row.get("description", ""),
+                                    relation_details={}
+                                )
+                                created_lineage = LineageService.create_table_lineage(db, lineage_create, commit=False)
+                                table_lineage_id = created_lineage.id
+                    
+                            # 创建列级血缘关系
+                            column_lineage_create = ColumnLineageRelationCreate(
+                                lineage_relation_id=table_lineage_id,
+                                source_column_id=source_column_id,
+                                target_column_id=target_column_id,
+                                transformation_details={"logic": row.get("transformation_logic", "")}
+                            )
+                            LineageService.create_column_lineage(db, column_lineage_create, commit=False)
+                            result["column_lineages"]["created"] += 1
+                    except Exception as e:
+                        result["validation_errors"].append(f"处理字段血缘关系时出错: {str(e)}")
+                        continue
+                    # 该行的保存点已提交，登记新建的血缘关系供后续行复用
+                    if created_lineage is not None:
+                        resolution_index.add_table_lineage(created_lineage)
+        
+        return {
+            "status": "success" if not result["validation_errors"] else "partial_success",
+            "message": "字段血缘关系Excel文件上传并解析" + ("成功" if not result["validation_errors"] else "，但有验证错误"),
+            "result": result
+        }
+    
+    @staticmethod
+    def import_column_lineage_json(db: Session, contents: Union[bytes, BinaryIO, Iterable[bytes]], progress: Optional[Any] = None) -> Dict[str, Any]:
+        """
+        导入JSON文件中的字段血缘关系，边解析column_lineages数组边导入，不会一次性加载整个文件
+        
+        Args:
+            db: 数据库会话
+            contents: 上传文件的原始内容、二进制文件对象或字节块的迭代器
+            progress: 可选的进度跟踪对象，由后台导入任务传入
+            
+        Returns:
+            导入结果
+        """
+        logger.info("开始处理字段血缘关系JSON文件")
+        records = iter_json_array(iter_bytes(contents, settings.json_stream_block_size), "column_lineages")
+        return UploadImportService._import_column_lineage_records(db, records, progress)
+
+    @staticmethod
+    def import_column_lineage_ndjson(db: Session, contents: Union[bytes, BinaryIO, Iterable[bytes]], progress: Optional[Any] = None) -> Dict[str, Any]:
+        """
+        导入NDJSON文件中的字段血缘关系，每行一个与JSON格式中column_lineages条目相同的对象
+        
+        Args:
+            db: 数据库会话
+            contents: 上传文件的原始内容、二进制文件对象或字节块的迭代器
+            progress: 可选的进度跟踪对象，由后台导入任务传入
+            
+        Returns:
+            导入结果
+        """
+        logger.info("开始处理字段血缘关系NDJSON文件")
+        records = iter_ndjson(iter_bytes(contents, settings.json_stream_block_size))
+        return UploadImportService._import_column_lineage_records(db, records, progress)
+
+    @staticmethod
+    def _import_column_lineage_records(db: Session, records: Iterator[Any], progress: Optional[Any] = None) -> Dict[str, Any]:
+        """
+        按批处理流式解析出的字段血缘关系记录，每批解析settings.json_stream_chunk_size条后批量加载名称索引再逐条写入
+        """
+        # 处理结果统计
+        result = {
+            "column_lineages": {"created": 0},
+            "validation_errors": []
+        }
+        
+        with ImportUnitOfWork(db, progress=progress) as uow:
+            resolution_index = LineageResolutionIndex()
+            row_offset = 0
+            try:
+                # 处理字段血缘关系信息，解析器最多领先处理进度一批记录
+                for chunk in chunked(records, settings.json_stream_chunk_size):
+                    uow.expect_rows(len(chunk))
+                    resolution_index.load(db, chunk, include_columns=True)
+                    for index, lineage_data in enumerate(chunk, start=row_offset):
+                        created_lineage = None
+                        try:
+                            with uow.row():
+                                # 验证单个血缘关系条目是否为对象
+                                if not isinstance(lineage_data, dict):
+                                    result["validation_errors"].append(f"第{index+1}个血缘关系条目必须是对象格式")
+                                    continue
+                        
+                                # 检查必要字段
+                                required_fields = ["source_db_name", "source_table_name", "source_column_name", 
+                                                  "target_db_name", "target_table_name", "target_column_name"]
+                        
+                                # 检查必填字段是否存在
+                                missing_fields = [field for field in required_fields if field not in lineage_data]
+                                if missing_fields:
+                                    result["validation_errors"].append(f"第{index+1}个血缘关系条目缺少必要字段: {', '.join(missing_fields)}")
+                                    continue
+                        
+                                # 检查必填字段是否有值
+                                empty_fields = [field for field in required_fields if not lineage_data.get(field)]
+                                if empty_fields:
+                                    result["validation_errors"].append(f"第{index+1}个血缘关系条目字段值不能为空: {', '.join(empty_fields)}")
+                                    continue
+                        
+                                # 获取源数据库和目标数据库
+                                source_db_id = resolution_index.data_source_id(lineage_data["source_db_name"])
+                                target_db_id = resolution_index.data_source_id(lineage_data["target_db_name"])
+                        
+                                if not source_db_id:
+                                    result["validation_errors"].append(f"第{index+1}个血缘关系条目: 源数据库不存在: {lineage_data['source_db_name']}")
+                                    continue
+                                if not target_db_id:
+                                    result["validation_errors"].append(f"第{index+1}个血缘关系条目: 目标数据库不存在: {lineage_data['target_db_name']}")
+                                    continue
+                        
+                                # 获取源表和目标表
+                                source_table_id = resolution_index.table_id(source_db_id, lineage_data["source_table_name"])
+                                target_table_id = resolution_index.table_id(target_db_id, lineage_data["target_table_name"])
+                        
+                                if not source_table_id:
+                                    result["validation_errors"].append(
+                                        f"第{index+1}个血缘关系条目: 源表不存在: {lineage_data['source_table_name']} 于数据库 {lineage_data['source_db_name']}"
+                                    )
+                                    continue
+                                if not target_table_id:
+                                    result["validation_errors"].append(
+                                        f"第{index+1}个血缘关系条目: 目标表不存在: {lineage_data['target_table_name']} 于数据库 {lineage_data['target_db_name']}"
+                                    )
+                                    continue
+                        
+                                # 获取源列和目标列
+                                source_column_id = resolution_index.column_id(source_table_id, lineage_data["source_column_name"])
+                                target_column_id = resolution_index.column_id(target_table_id, lineage_data["target_column_name"])
+                        
+                                if not source_column_id:
+                                    result["validation_errors"].append(
+                                        f"第{index+1}个血缘关系条目: 源字段不存在: {lineage_data['source_column_name']} 于表 {lineage_data['source_table_name']}"
+                                    )
+                                    continue
+                                if not target_column_id:
+                                    result["validation_errors"].append(
+                                        f"第{index+1}个血缘关系条目: 目标字段不存在: {lineage_data['target_column_name']} 于表 {lineage_data['target_table_name']}"
+                                    )
+                                    continue
+                        
+                                # 检查表级血缘关系是否已存在，如果不存在则创建
+                                table_lineage_id = resolution_index.table_lineage_id([source_table_id], target_table_id)
+                        
+                                if not table_lineage_id:
+                                    # 创建表级血缘关系
+                                    lineage_create = LineageRelationCreate(
+                                        source_table_ids=[source_table_id],
+                                        target_table_id=target_table_id,
+                                        relation_type=lineage_data.get("relation_type", "TRANSFORMATION"),
+                                        description=lineage_data.get("description", ""),
+                                        relation_details={}
+                                    )
+                                    created_lineage = LineageService.create_table_lineage(db, lineage_create, commit=False)
+                                    table_lineage_id = created_lineage.id
+                        
+                                # 创建列级血缘关系
+                                column_lineage_create = ColumnLineageRelationCreate(
+                                    lineage_relation_id=table_lineage_id,
+                                    source_column_id=source_column_id,
+                                    target_column_id=target_column_id,
+                                    transformation_details=lineage_data.get("transformation_details", {})
+                                )
+                                LineageService.create_column_lineage(db, column_lineage_create, commit=False)
+                                result["column_lineages"]["created"] += 1
+                        except Exception as e:
+                            result["validation_errors"].append(f"第{index+1}个血缘关系条目处理出错: {str(e)}")
+                            continue
+                        # 该行的保存点已提交，登记新建的血缘关系供后续行复用
+                        if created_lineage is not None:
+                            resolution_index.add_table_lineage(created_lineage)
+                    row_offset += len(chunk)
+            except JsonStructureError as e:
+                # 缺少column_lineages字段或其不是数组
+                result["validation_errors"].append(str(e))
+        
+        # 根据结果返回不同状态
+        if result["validation_errors"]:
+            # 统计错误数量
+            error_count = len(result["validation_errors"])
+            # 计算成功导入的数量
+            success_count = result["column_lineages"]["created"]
+            
+            # 确定状态和消息
+            if success_count == 0:
+                # 完全失败
+                status = "error"
+                message = f"字段血缘关系导入失败，共{error_count}个错误"
+            else:
+                # 部分成功
+                status = "partial_success"
+                message = f"字段血缘关系导入完成，成功{success_count}个，失败{error_count}个"
+            
+            return {
+                "status": status,
+                "message": message,
+                "result": {
+                    "column_lineages": result["column_lineages"],
+                    "validation_errors": result["validation_errors"],
+                    "error_count": error_count,
+                    "success_count": success_count
+                }
+            }
+        else:
+            # 完全成功
+            success_count = result["column_lineages"]["created"]
+            return {
+                "status": "success",
+                "message": f"字段血缘关系导入成功，共{success_count}个",
+                "result": {
+                    "column_lineages": result["column_lineages"],
+                    "success_count": success_count
+                }
+            }
+
+    @staticmethod
+    def get_importer(import_type: str) -> Optional[Tuple[Callable[..., Dict[str, Any]], Tuple[str, ...]]]:
+        """
+        按导入类型获取导入方法及允许的文件扩展名，供分块上传等按类型分派导入的场景使用
+        
+        Args:
+            import_type: 导入类型，与后台导入任务的job_type一致
+            
+        Returns:
+            (导入方法, 允许的扩展名)，类型不存在时返回None
+        """
+        entry = IMPORT_TYPES.get(import_type)
+        if entry is None:
+            return None
+        importer, extensions = entry
+        if isinstance(importer, str):
+            importer = getattr(UploadImportService, importer)
+        return importer, extensions
+
+
+# 导入类型与导入方法（UploadImportService的方法名或可调用对象）、允许的文件扩展名的对应关系
+IMPORT_TYPES = {
+    "excel": ("import_excel", (".xlsx", ".xls")),
+    "table_structure_excel": ("import_table_structure_excel", (".xlsx", ".xls")),
+    "table_structure_json": ("import_table_structure_json", (".json",)),
+    "table_lineage_excel": ("import_table_lineage_excel", (".xlsx", ".xls")),
+    "table_lineage_json": ("import_table_lineage_json", (".json",)),
+    "column_lineage_excel": ("import_column_lineage_excel", (".xlsx", ".xls")),
+    "column_lineage_json": ("import_column_lineage_json", (".json",)),
+    "table_lineage_ndjson": ("import_table_lineage_ndjson", (".ndjson", ".jsonl")),
+    "column_lineage_ndjson": ("import_column_lineage_ndjson", (".ndjson", ".jsonl"))
+}
+
+# 支持直接传入二进制文件对象、边读取边解析导入的类型
+STREAMING_IMPORT_TYPES = {"table_lineage_json", "column_lineage_json", "table_lineage_ndjson", "column_lineage_ndjson"}
+
+# Parquet/Arrow IPC格式
+for _file_format, _extensions in COLUMNAR_EXTENSIONS.items():
+    IMPORT_TYPES[f"table_structure_{_file_format}"] = (
+        partial(ColumnarImportService.import_table_structure, file_format=_file_format), _extensions
+    )
+    IMPORT_TYPES[f"table_lineage_{_file_format}"] = (
+        partial(ColumnarImportService.import_table_lineage, file_format=_file_format), _extensions
+    )
+    IMPORT_TYPES[f"column_lineage_{_file_format}"] = (
+        partial(ColumnarImportService.import_column_lineage, file_format=_file_format), _extensions
+    )
@@ -0,0 +1,658 @@
+from typing import Dict, Any, List, Optional, Iterable, Tuple, Union, BinaryIO
+from functools import partial
+from sqlalchemy.orm import Session
+import pandas as pd
+import json
+import logging
+
+from config.settings import settings
+from models import DataSource, DataSourceType, TableMetadata, ColumnMetadata, LineageRelation, ColumnLineageRelation
+from utils.file_processing_utils import read_excel_sheets
+from utils.json_stream_utils import iter_bytes, iter_ndjson
+from utils.columnar_utils import (
+    COLUMNAR_EXTENSIONS, ColumnarReader, parse_properties,
+    TABLE_STRUCTURE_COLUMNS, TABLE_LINEAGE_COLUMNS, COLUMN_LINEAGE_COLUMNS
+)
+
+logger = logging.getLogger(__name__)
+
+# 单条IN查询的最大参数个数，避免超过SQLite的变量数限制
+_IN_CHUNK_SIZE = 500
+
+# 数据源类型的合法取值
+_DATA_SOURCE_TYPES = {t.value for t in DataSourceType}
+
+_TABLE_LINEAGE_FIELDS = ["source_db_name", "source_table_name", "target_db_name", "target_table_name"]
+_COLUMN_LINEAGE_FIELDS = ["source_db_name", "source_table_name", "source_column_name",
+                          "target_db_name", "target_table_name", "target_column_name"]
+
+
+def _chunks(values: List[Any], size: int = _IN_CHUNK_SIZE) -> Iterable[List[Any]]:
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _blank(df: pd.DataFrame, field: str) -> pd.Series:
+    """字段缺失、为空或只包含空白字符"""
+    if field not in df.columns:
+        return pd.Series(True, index=df.index)
+    values = df[field]
+    return values.isna() | values.astype(str).str.strip().eq("")
+
+
+def _is_na(value: Any) -> bool:
+    return not isinstance(value, (dict, list)) and pd.isna(value)
+
+
+def _name_key(df: pd.DataFrame, field: str) -> pd.Series:
+    """数据源名称按原值精确匹配，空值为NA"""
+    if field not in df.columns:
+        return pd.Series(pd.NA, index=df.index, dtype="string")
+    return df[field].astype("string").mask(_blank(df, field))
+
+
+def _lower_key(df: pd.DataFrame, field: str) -> pd.Series:
+    """表名、字段名按大小写不敏感匹配，空值为NA"""
+    return _name_key(df, field).str.lower()
+
+
+class _Section:
+    """待校验的一个工作表或JSON数组，行号按Excel行号（含表头）或JSON条目序号计算"""
+
+    def __init__(self, name: str, df: pd.DataFrame, row_offset: int):
+        self.name = name
+        self.df = df.reset_index(drop=True)
+        self.row_offset = row_offset
+        self.issues: List[pd.DataFrame] = []
+
+    def add(self, mask: pd.Series, code: str, field: Optional[str], message: Any, severity: str = "error") -> None:
+        """将mask为True的行记录为问题，message可以是字符串或与行对齐的Series"""
+        mask = mask.fillna(False).astype(bool)
+        if not mask.any():
+            return
+        if isinstance(message, pd.Series):
+            messages = message[mask].astype(str).to_numpy()
+        else:
+            messages = message
+        self.issues.append(pd.DataFrame({
+            "sheet": self.name,
+            "row": mask[mask].index.to_numpy() + self.row_offset,
+            "field": field,
+            "code": code,
+            "severity": severity,
+            "message": messages
+        }))
+
+    def require(self, fields: List[str]) -> pd.Series:
+        """检查必填字段，返回所有必填字段都有值的行"""
+        complete = pd.Series(True, index=self.df.index)
+        for field in fields:
+            missing = _blank(self.df, field)
+            self.add(missing, "missing_field", field, f"缺少必填字段: {field}")
+            complete &= ~missing
+        return complete
+
+    def duplicates(self, keys: pd.DataFrame, label: str, valid: pd.Series) -> None:
+        """文件内重复：同一键第二次及以后出现的行报告为错误，并指出首次出现的行号"""
+        keys = keys[valid]
+        if keys.empty:
+            return
+        # 每行所属键第一次出现的位置
+        first_index = pd.Series(keys.index, index=keys.index).groupby(
+            [keys[c] for c in keys.columns], dropna=False, sort=False
+        ).transform("min")
+        later = first_index[first_index != first_index.index]
+        if later.empty:
+            return
+        mask = pd.Series(False, index=self.df.index)
+        mask[later.index] = True
+        message = pd.Series("", index=self.df.index)
+        message[later.index] = f"文件中重复的{label}，与第" + (later + self.row_offset).astype(str) + "行相同"
+        self.add(mask, "duplicate_in_file", None, message)
+
+    def report(self) -> pd.DataFrame:
+        if not self.issues:
+            return pd.DataFrame(columns=["sheet", "row", "field", "code", "severity", "message"])
+        return pd.concat(self.issues, ignore_index=True)
+
+
+class _CatalogKeys:
+    """按需批量加载元数据目录中的键，只加载导入文件引用到的范围"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._data_sources: Optional[pd.DataFrame] = None
+
+    def data_sources(self) -> pd.DataFrame:
+        """列: data_source_id, ds"""
+        if self._data_sources is None:
+            rows = self.db.query(DataSource.id, DataSource.name).all()
+            self._data_sources = pd.DataFrame(rows, columns=["data_source_id", "ds"]).astype({"ds": "string"})
+        return self._data_sources
+
+    def tables(self, ds_names: Iterable[str]) -> pd.DataFrame:
+        """列: table_id, ds, table（小写）；同名表按ID取第一个，与导入时的匹配规则一致"""
+        sources = self.data_sources()
+        sources = sources[sources["ds"].isin(set(ds_names))]
+        rows = []
+        for ids in _chunks(sources["data_source_id"].tolist()):
+            rows.extend(self.db.query(TableMetadata.id, TableMetadata.data_source_id, TableMetadata.name).filter(
+                TableMetadata.data_source_id.in_(ids)
+            ).all())
+        tables = pd.DataFrame(rows, columns=["table_id", "data_source_id", "table"])
+        tables["table"] = tables["table"].astype("string").str.lower()
+        tables = tables.merge(sources, on="data_source_id")[["table_id", "ds", "table"]]
+        return tables.sort_values("table_id").drop_duplicates(["ds", "table"])
+
+    def columns(self, table_ids: Iterable[int]) -> pd.DataFrame:
+        """列: column_id, table_id, column（小写）"""
+        rows = []
+        for ids in _chunks(sorted(set(table_ids))):
+            rows.extend(self.db.query(ColumnMetadata.id, ColumnMetadata.table_id, ColumnMetadata.name).filter(
+                ColumnMetadata.table_id.in_(ids)
+            ).all())
+        columns = pd.DataFrame(rows, columns=["column_id", "table_id", "column"])
+        columns["column"] = columns["column"].astype("string").str.lower()
+        return columns.sort_values("column_id").drop_duplicates(["table_id", "column"])
+
+    def table_lineage_pairs(self, target_table_ids: Iterable[int]) -> pd.DataFrame:
+        """已有表级血缘关系展开为(源表, 目标表)对，列: lineage_id, source_table_id, target_table_id"""
+        rows = []
+        for ids in _chunks(sorted(set(target_table_ids))):
+            rows.extend(self.db.query(
+                LineageRelation.id, LineageRelation.source_table_ids, LineageRelation.target_table_id
+            ).filter(LineageRelation.target_table_id.in_(ids)).all())
+        pairs = [
+            (lineage_id, source_table_id, target_table_id)
+            for lineage_id, source_table_ids, target_table_id in rows
+            if isinstance(source_table_ids, list)
+            for source_table_id in source_table_ids
+        ]
+        return pd.DataFrame(pairs, columns=["lineage_id", "source_table_id", "target_table_id"]).drop_duplicates(
+            ["source_table_id", "target_table_id"]
+        )
+
+    def column_lineage_pairs(self, target_column_ids: Iterable[int]) -> pd.DataFrame:
+        """已有字段血缘关系，列: source_column_id, target_column_id"""
+        rows = []
+        for ids in _chunks(sorted(set(target_column_ids))):
+            rows.extend(self.db.query(
+                ColumnLineageRelation.source_column_id, ColumnLineageRelation.target_column_id
+            ).filter(ColumnLineageRelation.target_column_id.in_(ids)).all())
+        return pd.DataFrame(rows, columns=["source_column_id", "target_column_id"]).drop_duplicates()
+
+
+def _resolve(keys: pd.DataFrame, lookup: pd.DataFrame, on: List[str], value: str) -> pd.Series:
+    """左连接查找，返回与keys行对齐的值，未匹配为NA"""
+    merged = keys[on].merge(lookup[on + [value]], on=on, how="left")
+    merged.index = keys.index
+    return merged[value]
+
+
+class UploadValidationService:
+    """上传文件校验服务类，用于dry_run模式
+
+    将文件各工作表（或JSON数组）转为DataFrame，与元数据目录中的键做集合运算（反连接），
+    一次性找出缺失字段、未知的数据源/表/字段、文件内重复及与目录重复的行，不写入任何数据。
+    """
+
+    @staticmethod
+    def validate(db: Session, import_type: str, contents: Union[bytes, BinaryIO]) -> Dict[str, Any]:
+        """
+        按导入类型校验文件内容
+
+        Args:
+            db: 数据库会话
+            import_type: 导入类型，与后台导入任务的job_type一致
+            contents: 上传文件的原始内容，JSON/NDJSON血缘文件也可以是二进制文件对象
+
+        Returns:
+            逐行校验报告
+        """
+        validators = {
+            "excel": UploadValidationService._validate_excel,
+            "table_structure_excel": UploadValidationService._validate_table_structure_excel,
+            "table_structure_json": UploadValidationService._validate_table_structure_json,
+            "table_lineage_excel": UploadValidationService._validate_table_lineage_excel,
+            "table_lineage_json": UploadValidationService._validate_table_lineage_json,
+            "column_lineage_excel": UploadValidationService._validate_column_lineage_excel,
+            "column_lineage_json": UploadValidationService._validate_column_lineage_json,
+            "table_lineage_ndjson": partial(UploadValidationService._validate_lineage_ndjson,
+                                            key="lineages", with_columns=False),
+            "column_lineage_ndjson": partial(UploadValidationService._validate_lineage_ndjson,
+                                             key="column_lineages", with_columns=True)
+        }
+        for file_format in COLUMNAR_EXTENSIONS:
+            validators[f"table_structure_{file_format}"] = partial(
+                UploadValidationService._validate_table_structure_columnar, file_format=file_format
+            )
+            validators[f"table_lineage_{file_format}"] = partial(
+                UploadValidationService._validate_lineage_columnar, file_format=file_format, with_columns=False
+            )
+            validators[f"column_lineage_{file_format}"] = partial(
+                UploadValidationService._validate_lineage_columnar, file_format=file_format, with_columns=True
+            )
+        validator = validators.get(import_type)
+        if validator is None:
+            raise ValueError(f"不支持的导入类型: {import_type}")
+
+        logger.info(f"开始校验上传文件(dry_run)，导入类型: {import_type}")
+        sections, file_errors = validator(db, contents, _CatalogKeys(db))
+        return UploadValidationService._build_report(sections, file_errors)
+
+    # ---------- 文件解析 ----------
+
+    @staticmethod
+    def _read_excel_sheets(contents: bytes, sheet_names: List[str]) -> Dict[str, pd.DataFrame]:
+        return read_excel_sheets(contents, sheet_names)
+
+    @staticmethod
+    def _read_columnar(contents: bytes, file_format: str, columns: List[str]) -> pd.DataFrame:
+        return ColumnarReader(contents, file_format, columns).read_frame()
+
+    @staticmethod
+    def _json_section(data: Dict[str, Any], key: str, file_errors: List[str]) -> Optional[_Section]:
+        """将JSON中的数组转为待校验的分段，非对象的条目单独报告"""
+        if key not in data:
+            return None
+        entries = data[key]
+        if not isinstance(entries, list):
+            file_errors.append(f"{key}必须是数组格式")
+            return None
+        section = _Section(key, pd.DataFrame([e if isinstance(e, dict) else {} for e in entries]), row_offset=1)
+        not_object = pd.Series([not isinstance(e, dict) for e in entries], index=section.df.index, dtype=bool)
+        section.add(not_object, "invalid_entry", None, "条目必须是对象格式")
+        return section
+
+    # ---------- 各类数据的校验 ----------
+
+    @staticmethod
+    def _check_data_sources(section: _Section, type_field: str, catalog: _CatalogKeys) -> None:
+        """数据源：必填字段、类型取值、文件内重复，已存在的数据源导入时将被更新"""
+        df = section.df
+        complete = section.require(["name", type_field])
+
+        source_type = df[type_field].astype("string").str.lower() if type_field in df.columns else None
+        if source_type is not None:
+            invalid_type = complete & ~source_type.isin(_DATA_SOURCE_TYPES)
+            section.add(invalid_type, "invalid_value", type_field,
+                        "不支持的数据源类型: " + df[type_field].astype(str))
+
+        names = _name_key(df, "name")
+        section.duplicates(names.to_frame(), "数据源", complete)
+        existing = complete & names.isin(catalog.data_sources()["ds"])
+        section.add(existing, "exists_in_catalog", "name", "数据源已存在，导入时将更新: " + names.astype(str),
+                    severity="warning")
+
+    @staticmethod
+    def _check_data_source_refs(section: _Section, field: str, known_sources: pd.Series, valid: pd.Series,
+                                label: str = "数据源") -> pd.Series:
+        """引用的数据源必须存在于目录或同一文件中，返回引用有效的行"""
+        names = _name_key(section.df, field)
+        unknown = valid & ~names.isin(known_sources)
+        section.add(unknown, "unknown_data_source", field, f"{label}不存在: " + names.astype(str))
+        return valid & ~unknown
+
+    @staticmethod
+    def _check_table_refs(section: _Section, ds_field: str, table_field: str, known_tables: pd.DataFrame,
+                          valid: pd.Series, label: str = "表") -> pd.Series:
+        """引用的表必须存在，known_tables列为ds、table"""
+        keys = pd.DataFrame({"ds": _name_key(section.df, ds_field), "table": _lower_key(section.df, table_field)})
+        found = keys.merge(known_tables[["ds", "table"]].drop_duplicates().assign(_found=True),
+                           on=["ds", "table"], how="left")["_found"]
+        found.index = keys.index
+        unknown = valid & found.isna()
+        section.add(unknown, "unknown_table", table_field,
+                    f"{label}不存在: " + section.df[table_field].astype(str) + " 于数据库 " + keys["ds"].astype(str))
+        return valid & ~unknown
+
+    @staticmethod
+    def _check_column_refs(section: _Section, ds_field: str, table_field: str, column_field: str,
+                           known_columns: pd.DataFrame, valid: pd.Series, label: str = "字段") -> pd.Series:
+        """引用的字段必须存在，known_columns列为ds、table、column"""
+        keys = pd.DataFrame({
+            "ds": _name_key(section.df, ds_field),
+            "table": _lower_key(section.df, table_field),
+            "column": _lower_key(section.df, column_field)
+        })
+        found = keys.merge(known_columns[["ds", "table", "column"]].drop_duplicates().assign(_found=True),
+                           on=["ds", "table", "column"], how="left")["_found"]
+        found.index = keys.index
+        unknown = valid & found.isna()
+        section.add(unknown, "unknown_column", column_field,
+                    f"{label}不存在: " + section.df[column_field].astype(str) + " 于表 " + section.df[table_field].astype(str))
+        return valid & ~unknown
+
+    @staticmethod
+    def _structure_sections(sections: Dict[str, _Section], catalog: _CatalogKeys,
+                            type_field: str) -> Tuple[pd.Series, pd.DataFrame, pd.DataFrame]:
+        """
+        校验数据源、表、列三个分段（Excel格式），后面的分段可以引用同一文件中前面分段定义的对象
+
+        Returns:
+            (已知数据源名称, 已知表(ds, table), 已知列(ds, table, column))
+        """
+        known_sources = catalog.data_sources()["ds"]
+        if "data_sources" in sections:
+            section = sections["data_sources"]
+            UploadValidationService._check_data_sources(section, type_field, catalog)
+            known_sources = pd.concat([known_sources, _name_key(section.df, "name").dropna()], ignore_index=True)
+
+        referenced = set(known_sources.dropna())
+        catalog_tables = catalog.tables(referenced)
+        known_tables = catalog_tables[["ds", "table"]]
+        if "tables" in sections:
+            section = sections["tables"]
+            df = section.df
+            complete = section.require(["data_source_name", "name"])
+            valid = UploadValidationService._check_data_source_refs(section, "data_source_name", known_sources, complete)
+            keys = pd.DataFrame({"ds": _name_key(df, "data_source_name"), "table": _lower_key(df, "name")})
+            section.duplicates(keys, "表", complete)
+            existing = valid & keys.merge(catalog_tables.assign(_found=True), on=["ds", "table"], how="left")["_found"].set_axis(keys.index).notna()
+            section.add(existing, "exists_in_catalog", "name", "表已存在，导入时将更新: " + df["name"].astype(str),
+                        severity="warning")
+            known_tables = pd.concat([known_tables, keys[valid]], ignore_index=True)
+
+        catalog_columns = catalog.columns(catalog_tables["table_id"]).merge(catalog_tables, on="table_id")
+        known_columns = catalog_columns[["ds", "table", "column"]]
+        if "columns" in sections:
+            section = sections["columns"]
+            df = section.df
+            complete = section.require(["data_source_name", "table_name", "name", "data_type"])
+            valid = UploadValidationService._check_data_source_refs(section, "data_source_name", known_sources, complete)
+            valid = UploadValidationService._check_table_refs(section, "data_source_name", "table_name", known_tables, valid)
+            keys = pd.DataFrame({
+                "ds": _name_key(df, "data_source_name"),
+                "table": _lower_key(df, "table_name"),
+                "column": _lower_key(df, "name")
+            })
+            section.duplicates(keys, "字段", complete)
+            existing = valid & keys.merge(catalog_columns.assign(_found=True), on=["ds", "table", "column"], how="left")["_found"].set_axis(keys.index).notna()
+            section.add(existing, "exists_in_catalog", "name", "字段已存在，导入时将更新: " + df["name"].astype(str),
+                        severity="warning")
+            known_columns = pd.concat([known_columns, keys[valid]], ignore_index=True)
+
+        return known_sources, known_tables, known_columns
+
+    @staticmethod
+    def _check_lineages(section: _Section, catalog: _CatalogKeys, with_columns: bool,
+                        known_sources: Optional[pd.Series] = None,
+                        known_tables: Optional[pd.DataFrame] = None,
+                        known_columns: Optional[pd.DataFrame] = None,
+                        upsert_column_lineages: bool = False) -> None:
+        """
+        校验表级或字段级血缘关系分段
+
+        引用的数据源、表、字段需存在于目录（或同一文件的结构分段）中；
+        已存在的表级血缘关系导入时将被更新，已存在的字段血缘关系导入时会重复创建，报告为错误；
+        upsert_column_lineages为True时（Parquet/Arrow导入）已存在的字段血缘关系将被更新，只报告警告
+        """
+        df = section.df
+        fields = _COLUMN_LINEAGE_FIELDS if with_columns else _TABLE_LINEAGE_FIELDS
+        valid = section.require(fields)
+
+        if known_sources is None:
+            known_sources = catalog.data_sources()["ds"]
+        source_ok = UploadValidationService._check_data_source_refs(section, "source_db_name", known_sources, valid, "源数据库")
+        target_ok = UploadValidationService._check_data_source_refs(section, "target_db_name", known_sources, valid, "目标数据库")
+
+        referenced = set(_name_key(df, "source_db_name").dropna()) | set(_name_key(df, "target_db_name").dropna())
+        catalog_tables = catalog.tables(referenced)
+        if known_tables is None:
+            known_tables = catalog_tables[["ds", "table"]]
+        source_ok = UploadValidationService._check_table_refs(section, "source_db_name", "source_table_name",
+                                                              known_tables, source_ok, "源表")
+        target_ok = UploadValidationService._check_table_refs(section, "target_db_name", "target_table_name",
+                                                              known_tables, target_ok, "目标表")
+
+        keys = pd.DataFrame({
+            "source_ds": _name_key(df, "source_db_name"),
+            "source_table": _lower_key(df, "source_table_name"),
+            "target_ds": _name_key(df, "target_db_name"),
+            "target_table": _lower_key(df, "target_table_name")
+        })
+        table_ids = catalog_tables.rename(columns={"ds": "_ds", "table": "_table"})
+        source_table_id = _resolve(keys.rename(columns={"source_ds": "_ds", "source_table": "_table"}),
+                                   table_ids, ["_ds", "_table"], "table_id")
+        target_table_id = _resolve(keys.rename(columns={"target_ds": "_ds", "target_table": "_table"}),
+                                   table_ids, ["_ds", "_table"], "table_id")
+
+        if not with_columns:
+            section.duplicates(keys, "血缘关系", valid)
+            pairs = catalog.table_lineage_pairs(target_table_id.dropna().astype(int))
+            resolved = pd.DataFrame({"source_table_id": source_table_id, "target_table_id": target_table_id})
+            existing = source_ok & target_ok & _resolve(
+                resolved.astype("Int64"), pairs.astype("Int64"), ["source_table_id", "target_table_id"], "lineage_id"
+            ).notna()
+            section.add(existing, "exists_in_catalog", None,
+                        "表级血缘关系已存在，导入时将更新: " + df["source_table_name"].astype(str) + " -> " + df["target_table_name"].astype(str),
+                        severity="warning")
+            return
+
+        catalog_columns = catalog.columns(catalog_tables["table_id"]).merge(catalog_tables, on="table_id")
+        if known_columns is None:
+            known_columns = catalog_columns[["ds", "table", "column"]]
+        source_ok = UploadValidationService._check_column_refs(section, "source_db_name", "source_table_name",
+                                                               "source_column_name", known_columns, source_ok, "源字段")
+        target_ok = UploadValidationService._check_column_refs(section, "target_db_name", "target_table_name",
+                                                               "target_column_name", known_columns, target_ok, "目标字段")
+
+        keys["source_column"] = _lower_key(df, "source_column_name")
+        keys["target_column"] = _lower_key(df, "target_column_name")
+        section.duplicates(keys, "字段血缘关系", valid)
+
+        column_ids = catalog_columns.rename(columns={"ds": "_ds", "table": "_table", "column": "_column"})
+        on = ["_ds", "_table", "_column"]
+        source_column_id = _resolve(keys.rename(columns={"source_ds": "_ds", "source_table": "_table", "source_column": "_column"}),
+                                    column_ids, on, "column_id")
+        target_column_id = _resolve(keys.rename(columns={"target_ds": "_ds", "target_table": "_table", "target_column": "_column"}),
+                                    column_ids, on, "column_id")
+        pairs = catalog.column_lineage_pairs(target_column_id.dropna().astype(int)).assign(_found=True)
+        resolved = pd.DataFrame({"source_column_id": source_column_id, "target_column_id": target_column_id}).astype("Int64")
+        existing = source_ok & target_ok & _resolve(
+            resolved, pairs.astype({"source_column_id": "Int64", "target_column_id": "Int64"}),
+            ["source_column_id", "target_column_id"], "_found"
+        ).notna()
+        pair_text = df["source_column_name"].astype(str) + " -> " + df["target_column_name"].astype(str)
+        if upsert_column_lineages:
+            section.add(existing, "exists_in_catalog", None, "字段血缘关系已存在，导入时将更新: " + pair_text,
+                        severity="warning")
+        else:
+            section.add(existing, "exists_in_catalog", None, "字段血缘关系已存在，导入时将重复创建: " + pair_text)
+
+    # ---------- 各导入类型 ----------
+
+    @staticmethod
+    def _validate_excel(db: Session, contents: bytes, catalog: _CatalogKeys):
+        sheets = UploadValidationService._read_excel_sheets(contents, ["data_sources", "tables", "columns", "lineages"])
+        sections = {name: _Section(name, df, row_offset=2) for name, df in sheets.items()}
+        known_sources, known_tables, known_columns = UploadValidationService._structure_sections(
+            sections, catalog, "source_type"
+        )
+        if "lineages" in sections:
+            section = sections["lineages"]
+            with_columns = {"source_column_name", "target_column_name"} <= set(section.df.columns)
+            UploadValidationService._check_lineages(section, catalog, with_columns,
+                                                    known_sources, known_tables, known_columns)
+        return list(sections.values()), []
+
+    @staticmethod
+    def _validate_table_structure_excel(db: Session, contents: bytes, catalog: _CatalogKeys):
+        sheets = UploadValidationService._read_excel_sheets(contents, ["data_sources", "tables", "columns"])
+        sections = {name: _Section(name, df, row_offset=2) for name, df in sheets.items()}
+        UploadValidationService._structure_sections(sections, catalog, "type")
+        return list(sections.values()), []
+
+    @staticmethod
+    def _validate_table_structure_json(db: Session, contents: bytes, catalog: _CatalogKeys):
+        data = json.loads(contents)
+        file_errors: List[str] = []
+        sections = {}
+        for key in ["data_sources", "tables", "columns"]:
+            section = UploadValidationService._json_section(data, key, file_errors)
+            if section is not None:
+                sections[key] = section
+
+        # JSON中的表和列可以直接通过ID引用数据源和表，先将ID换算为名称再统一校验
+        data_sources = catalog.data_sources().astype({"data_source_id": "Int64"})
+        if "tables" in sections and "data_source_id" in sections["tables"].df.columns:
+            df = sections["tables"].df
+            ids = pd.to_numeric(df["data_source_id"], errors="coerce").astype("Int64").to_frame()
+            by_id = _resolve(ids, data_sources, ["data_source_id"], "ds")
+            df["data_source_name"] = _name_key(df, "data_source_name").fillna(by_id) if "data_source_name" in df.columns else by_id
+        if "columns" in sections and "table_id" in sections["columns"].df.columns:
+            df = sections["columns"].df
+            ids = pd.to_numeric(df["table_id"], errors="coerce").astype("Int64").to_frame()
+            table_ids = ids["table_id"].dropna().astype(int).tolist()
+            rows = []
+            for ids in _chunks(sorted(set(table_ids))):
+                rows.extend(db.query(TableMetadata.id, TableMetadata.name, DataSource.name).join(
+                    DataSource, TableMetadata.data_source_id == DataSource.id
+                ).filter(TableMetadata.id.in_(ids)).all())
+            tables = pd.DataFrame(rows, columns=["table_id", "_table_name", "_ds"]).astype({"table_id": "Int64"})
+            resolved = ids.merge(tables, on="table_id", how="left").set_axis(df.index)
+            for field, source in (("table_name", "_table_name"), ("data_source_name", "_ds")):
+                df[field] = df[field].where(~_blank(df, field), resolved[source]) if field in df.columns else resolved[source]
+
+        UploadValidationService._structure_sections(sections, catalog, "type")
+        return list(sections.values()), file_errors
+
+    @staticmethod
+    def _validate_lineage_excel(contents: bytes, catalog: _CatalogKeys, sheet: str, with_columns: bool):
+        sheets = UploadValidationService._read_excel_sheets(contents, [sheet])
+        if sheet not in sheets:
+            return [], [f"未找到{sheet}工作表"]
+        section = _Section(sheet, sheets[sheet], row_offset=2)
+        UploadValidationService._check_lineages(section, catalog, with_columns)
+        return [section], []
+
+    @staticmethod
+    def _validate_lineage_json(contents: Union[bytes, BinaryIO], catalog: _CatalogKeys, key: str, with_columns: bool):
+        data = json.load(contents) if hasattr(contents, "read") else json.loads(contents)
+        file_errors: List[str] = []
+        section = UploadValidationService._json_section(data, key, file_errors)
+        if section is None:
+            if not file_errors:
+                file_errors.append(f"JSON文件缺少必要的{key}字段")
+            return [], file_errors
+        UploadValidationService._check_lineages(section, catalog, with_columns)
+        return [section], file_errors
+
+    @staticmethod
+    def _validate_lineage_ndjson(db: Session, contents: Union[bytes, BinaryIO], catalog: _CatalogKeys, key: str, with_columns: bool):
+        """NDJSON每行一个条目，行号即文件行号（不含空行时）"""
+        records = list(iter_ndjson(iter_bytes(contents, settings.json_stream_block_size)))
+        file_errors: List[str] = []
+        section = UploadValidationService._json_section({key: records}, key, file_errors)
+        UploadValidationService._check_lineages(section, catalog, with_columns)
+        return [section], file_errors
+
+    @staticmethod
+    def _validate_table_lineage_excel(db: Session, contents: bytes, catalog: _CatalogKeys):
+        return UploadValidationService._validate_lineage_excel(contents, catalog, "lineages", False)
+
+    @staticmethod
+    def _validate_table_lineage_json(db: Session, contents: Union[bytes, BinaryIO], catalog: _CatalogKeys):
+        return UploadValidationService._validate_lineage_json(contents, catalog, "lineages", False)
+
+    @staticmethod
+    def _validate_column_lineage_excel(db: Session, contents: bytes, catalog: _CatalogKeys):
+        return UploadValidationService._validate_lineage_excel(contents, catalog, "column_lineages", True)
+
+    @staticmethod
+    def _validate_column_lineage_json(db: Session, contents: Union[bytes, BinaryIO], catalog: _CatalogKeys):
+        return UploadValidationService._validate_lineage_json(contents, catalog, "column_lineages", True)
+
+    @staticmethod
+    def _validate_table_structure_columnar(db: Session, contents: bytes, catalog: _CatalogKeys, file_format: str):
+        """扁平布局的表结构：每个字段一行，数据源需已存在于目录中"""
+        section = _Section("table_structure", UploadValidationService._read_columnar(
+            contents, file_format, TABLE_STRUCTURE_COLUMNS
+        ), row_offset=1)
+        df = section.df
+        complete = section.require(["data_source_name", "table_name"])
+        valid = UploadValidationService._check_data_source_refs(
+            section, "data_source_name", catalog.data_sources()["ds"], complete
+        )
+
+        for field in ("table_properties", "column_properties"):
+            if field in df.columns:
+                invalid = df[field].map(UploadValidationService._invalid_properties).astype(bool)
+                section.add(invalid, "invalid_value", field, "属性必须是JSON对象")
+
+        has_column = ~_blank(df, "column_name")
+        section.add(valid & has_column & _blank(df, "data_type"), "missing_field", "data_type",
+                    "缺少必填字段: data_type")
+        keys = pd.DataFrame({
+            "ds": _name_key(df, "data_source_name"),
+            "table": _lower_key(df, "table_name"),
+            "column": _lower_key(df, "column_name")
+        })
+        section.duplicates(keys, "字段", complete & has_column)
+
+        if has_column.any():
+            catalog_tables = catalog.tables(set(keys["ds"].dropna()))
+            catalog_columns = catalog.columns(catalog_tables["table_id"]).merge(catalog_tables, on="table_id")
+            existing = valid & has_column & keys.merge(
+                catalog_columns[["ds", "table", "column"]].assign(_found=True), on=["ds", "table", "column"], how="left"
+            )["_found"].set_axis(keys.index).notna()
+            section.add(existing, "exists_in_catalog", "column_name",
+                        "字段已存在，导入时将更新: " + df["column_name"].astype(str), severity="warning")
+        return [section], []
+
+    @staticmethod
+    def _validate_lineage_columnar(db: Session, contents: bytes, catalog: _CatalogKeys, file_format: str,
+                                   with_columns: bool):
+        columns = COLUMN_LINEAGE_COLUMNS if with_columns else TABLE_LINEAGE_COLUMNS
+        name = "column_lineages" if with_columns else "lineages"
+        section = _Section(name, UploadValidationService._read_columnar(contents, file_format, columns), row_offset=1)
+        UploadValidationService._check_lineages(section, catalog, with_columns, upsert_column_lineages=True)
+        return [section], []
+
+    @staticmethod
+    def _invalid_properties(value: Any) -> bool:
+        try:
+            parse_properties(None if _is_na(value) else value)
+        except ValueError:
+            return True
+        return False
+
+    # ---------- 报告 ----------
+
+    @staticmethod
+    def _build_report(sections: List[_Section], file_errors: List[str]) -> Dict[str, Any]:
+        """汇总各分段的问题，按工作表和行号排序"""
+        summary = {}
+        reports = []
+        for section in sections:
+            issues = section.report()
+            reports.append(issues)
+            summary[section.name] = {
+                "rows": len(section.df),
+                "error_rows": int(issues.loc[issues["severity"] == "error", "row"].nunique()),
+                "errors": int((issues["severity"] == "error").sum()),
+                "warnings": int((issues["severity"] == "warning").sum())
+            }
+
+        issues = pd.concat(reports, ignore_index=True) if reports else pd.DataFrame(
+            columns=["sheet", "row", "field", "code", "severity", "message"]
+        )
+        issues = issues.sort_values(["sheet", "row"], kind="stable")
+        issues["field"] = issues["field"].astype(object).where(issues["field"].notna(), None)
+        issues["row"] = issues["row"].astype(int)
+
+        error_count = int((issues["severity"] == "error").sum()) + len(file_errors)
+        warning_count = int((issues["severity"] == "warning").sum())
+        logger.info(f"上传文件校验完成(dry_run)，错误: {error_count}，警告: {warning_count}")
+        return {
+            "status": "invalid" if error_count else "valid",
+            "dry_run": True,
+            "message": f"文件校验完成，共{error_count}个错误，{warning_count}个警告，未写入任何数据",
+            "result": {
+                "summary": summary,
+                "error_count": error_count,
+                "warning_count": warning_count,
+                "file_errors": file_errors,
+                "issues": issues.to_dict("records")
+            }
+        }
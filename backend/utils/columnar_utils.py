@@ -0,0 +1,116 @@
+import json
+import logging
+from typing import Any, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 支持的列式文件格式及对应的扩展名
+COLUMNAR_EXTENSIONS = {
+    "parquet": (".parquet",),
+    "arrow": (".arrow", ".feather", ".ipc")
+}
+
+# 列式文件的扁平布局，导入和导出共用
+# 表结构：每个字段一行，表的信息在各行重复；没有字段的表只有一行，字段列为空
+TABLE_STRUCTURE_COLUMNS = [
+    "data_source_name", "schema_name", "table_name", "table_description", "table_properties",
+    "column_name", "data_type", "column_description", "is_primary_key", "column_properties"
+]
+# 表级血缘：每个(源表, 目标表)对一行，多源血缘关系按源表展开为多行
+TABLE_LINEAGE_COLUMNS = [
+    "source_db_name", "source_table_name", "target_db_name", "target_table_name",
+    "relation_type", "description", "transformation_logic", "relation_details"
+]
+# 字段血缘：每个(源字段, 目标字段)对一行
+COLUMN_LINEAGE_COLUMNS = [
+    "source_db_name", "source_table_name", "source_column_name",
+    "target_db_name", "target_table_name", "target_column_name",
+    "relation_type", "description", "transformation_logic", "transformation_details"
+]
+
+
+def require_pyarrow():
+    """按需导入pyarrow，未安装时给出明确的提示"""
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("读写Parquet/Arrow文件需要安装pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+class ColumnarReader:
+    """
+    Parquet或Arrow IPC文件的按批读取器
+
+    只读取需要的列（列投影），按批次返回字典列表，不会一次性把整个文件转为Python对象
+    """
+
+    def __init__(self, contents: bytes, file_format: str, columns: List[str]):
+        """
+        Args:
+            contents: 文件原始内容
+            file_format: parquet或arrow
+            columns: 需要读取的列，文件中不存在的列忽略
+        """
+        if file_format not in COLUMNAR_EXTENSIONS:
+            raise ValueError(f"不支持的列式文件格式: {file_format}")
+        pa = require_pyarrow()
+        self.file_format = file_format
+        self._buffer = pa.BufferReader(contents)
+
+        if file_format == "parquet":
+            self._parquet = pa.parquet.ParquetFile(self._buffer)
+            names = self._parquet.schema_arrow.names
+            self.num_rows: Optional[int] = self._parquet.metadata.num_rows
+        else:
+            # Arrow IPC有文件格式（.arrow/.feather）和流格式两种，先按文件格式打开
+            try:
+                self._ipc = pa.ipc.open_file(self._buffer)
+                self.num_rows = sum(self._ipc.get_batch(i).num_rows for i in range(self._ipc.num_record_batches))
+            except pa.ArrowInvalid:
+                self._buffer = pa.BufferReader(contents)
+                self._ipc = pa.ipc.open_stream(self._buffer)
+                self.num_rows = None
+            names = self._ipc.schema.names
+
+        self.columns = [c for c in columns if c in names]
+
+    def iter_batches(self, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+        """按批次返回数据行，每批最多batch_size行"""
+        if self.file_format == "parquet":
+            for batch in self._parquet.iter_batches(batch_size=batch_size, columns=self.columns):
+                yield batch.to_pylist()
+            return
+
+        if hasattr(self._ipc, "num_record_batches"):
+            batches = (self._ipc.get_batch(i) for i in range(self._ipc.num_record_batches))
+        else:
+            batches = iter(self._ipc)
+        for batch in batches:
+            batch = batch.select(self.columns)
+            # 写入端的记录批可能很大，按batch_size切片（零拷贝）
+            for offset in range(0, batch.num_rows, batch_size):
+                yield batch.slice(offset, batch_size).to_pylist()
+
+    def read_frame(self) -> pd.DataFrame:
+        """一次读取需要的列为DataFrame，供dry_run校验使用"""
+        if self.file_format == "parquet":
+            table = self._parquet.read(columns=self.columns)
+        else:
+            table = self._ipc.read_all().select(self.columns)
+        return table.to_pandas()
+
+
+def parse_properties(value: Any) -> Optional[Dict[str, Any]]:
+    """属性列可以是结构体（读取为字典）或JSON字符串"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        value = json.loads(value)
+    if not isinstance(value, dict):
+        raise ValueError("属性必须是JSON对象")
+    return value
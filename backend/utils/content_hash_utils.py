@@ -0,0 +1,88 @@
+import hashlib
+import json
+from typing import Any, Iterable, Mapping, Optional
+
+# 参与哈希计算的表属性和字段属性；导入数据中未提供的属性不参与计算
+TABLE_HASH_FIELDS = ("name", "schema_name", "description", "properties")
+COLUMN_HASH_FIELDS = ("name", "data_type", "description", "is_primary_key", "properties")
+LINEAGE_HASH_FIELDS = ("relation_type", "description", "relation_details")
+
+
+def _digest(value: Any) -> str:
+    """按键排序序列化后计算SHA-256，同样的内容总是得到同样的哈希"""
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _pick(data: Mapping[str, Any], fields: Iterable[str]) -> dict:
+    return {field: data[field] for field in fields if field in data}
+
+
+def _update_columns(columns_hasher: Any, column: Mapping[str, Any]) -> None:
+    """字段定义按顺序逐个计入，字段较多时不需要保留全部字段"""
+    columns_hasher.update(_digest(_pick(column, COLUMN_HASH_FIELDS)).encode("ascii"))
+
+
+def table_content_hash(table: Mapping[str, Any], columns: Iterable[Mapping[str, Any]]) -> str:
+    """
+    计算表的内容哈希
+
+    Args:
+        table: 表属性，见TABLE_HASH_FIELDS
+        columns: 按导入顺序排列的字段定义，见COLUMN_HASH_FIELDS
+
+    Returns:
+        64位十六进制哈希
+    """
+    columns_hasher = hashlib.sha256()
+    for column in columns:
+        _update_columns(columns_hasher, column)
+    return _digest({"table": _pick(table, TABLE_HASH_FIELDS), "columns": columns_hasher.hexdigest()})
+
+
+def lineage_content_hash(source_table_ids: Iterable[int], target_table_id: int,
+                         lineage: Mapping[str, Any]) -> str:
+    """
+    计算表级血缘关系的内容哈希
+
+    Args:
+        source_table_ids: 源表ID
+        target_table_id: 目标表ID
+        lineage: 血缘关系属性，见LINEAGE_HASH_FIELDS
+
+    Returns:
+        64位十六进制哈希
+    """
+    return _digest({
+        "source_table_ids": sorted(source_table_ids),
+        "target_table_id": target_table_id,
+        "lineage": _pick(lineage, LINEAGE_HASH_FIELDS)
+    })
+
+
+class TableHashBuilder:
+    """
+    逐行累积表的内容哈希，用于每个字段一行的扁平文件
+
+    同一张表的行不要求相邻，字段按出现顺序计入哈希，结果与table_content_hash一致；
+    每张表只保留表属性和一个增量哈希对象
+    """
+
+    def __init__(self):
+        self._tables: dict = {}
+
+    def add(self, key: Any, table: Mapping[str, Any], column: Optional[Mapping[str, Any]]) -> None:
+        """登记一行数据，同一张表的表属性以最后一行为准"""
+        entry = self._tables.get(key)
+        if entry is None:
+            entry = self._tables[key] = ({}, hashlib.sha256())
+        entry[0].update(_pick(table, TABLE_HASH_FIELDS))
+        if column is not None:
+            _update_columns(entry[1], column)
+
+    def hashes(self) -> dict:
+        """返回各表的内容哈希"""
+        return {
+            key: _digest({"table": table, "columns": columns_hasher.hexdigest()})
+            for key, (table, columns_hasher) in self._tables.items()
+        }
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+from typing import FrozenSet, Tuple
+
+# 常用的简写
+_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+}
+# 各字段的取值范围：分、时、日、月、星期（0和7都表示星期日）
+_FIELD_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+_FIELD_NAMES = ("分钟", "小时", "日", "月", "星期")
+# 查找下一次触发时间时最多向后查找的年数（如2月30日永远不会触发）
+_MAX_SEARCH_YEARS = 5
+
+
+def _to_int(text: str, field: str, index: int) -> int:
+    if not text.isdigit():
+        raise ValueError(f"cron表达式的{_FIELD_NAMES[index]}字段无效: {field}")
+    return int(text)
+
+
+def _parse_field(field: str, index: int) -> Tuple[FrozenSet[int], bool]:
+    """解析一个字段，返回(允许的取值集合, 是否为*)"""
+    low, high = _FIELD_RANGES[index]
+    values = set()
+    for part in field.split(","):
+        value_range, _, step_text = part.partition("/")
+        step = _to_int(step_text, field, index) if step_text else 1
+        if step <= 0:
+            raise ValueError(f"cron表达式的{_FIELD_NAMES[index]}字段步长必须大于0: {field}")
+        if value_range == "*":
+            start, end = low, high
+        elif "-" in value_range:
+            start, end = (_to_int(value, field, index) for value in value_range.split("-", 1))
+        else:
+            start = _to_int(value_range, field, index)
+            # 5/15表示从5开始每15个取一个
+            end = high if step_text else start
+        if not low <= start <= end <= high:
+            raise ValueError(f"cron表达式的{_FIELD_NAMES[index]}字段超出范围{low}-{high}: {field}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values), field == "*"
+
+
+class CronSchedule:
+    """
+    五段式cron表达式（分 时 日 月 星期），支持*、列表（1,15）、范围（1-5）、步长（*/10、8-18/2）和@daily等简写
+
+    日和星期都不是*时，两者满足其一即触发（与crontab一致）。时间按调用方传入的时区解释，不处理夏令时
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        fields = _ALIASES.get(expression.strip().lower(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"cron表达式应包含5个字段（分 时 日 月 星期）: {expression}")
+        parsed = [_parse_field(field, index) for index, field in enumerate(fields)]
+        (self.minutes, _), (self.hours, _), (self.days, days_any), (self.months, _), (weekdays, weekdays_any) = parsed
+        # 统一为Python的星期表示（星期一为0）
+        self.weekdays = frozenset((day - 1) % 7 for day in weekdays)
+        self._days_any = days_any
+        self._weekdays_any = weekdays_any
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_match = moment.day in self.days
+        weekday_match = moment.weekday() in self.weekdays
+        if self._days_any or self._weekdays_any:
+            return day_match and weekday_match
+        return day_match or weekday_match
+
+    def next_after(self, moment: datetime) -> datetime:
+        """
+        返回moment之后（不含）的下一次触发时间，精确到分钟
+
+        不满足的字段整体跳过（如月份不符时直接跳到下个月1日0点），查找次数与年数成正比而非分钟数
+
+        Raises:
+            ValueError: 表达式在此后若干年内都不会触发（如0 0 30 2 *）
+        """
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate.replace(year=candidate.year + _MAX_SEARCH_YEARS, month=1, day=1)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                year, month = divmod(candidate.month, 12)
+                candidate = candidate.replace(year=candidate.year + year, month=month + 1, day=1, hour=0, minute=0)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"cron表达式在{_MAX_SEARCH_YEARS}年内不会触发: {self.expression}")
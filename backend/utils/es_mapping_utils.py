@@ -0,0 +1,130 @@
+import hashlib
+import json
+import re
+from fnmatch import fnmatchcase
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Union
+
+# 字段映射中作为列属性保留的参数
+_FIELD_ATTRIBUTES = ("format", "analyzer")
+
+
+def normalize_patterns(patterns: Optional[Union[str, Iterable[str]]]) -> List[str]:
+    """将逗号分隔的字符串或列表形式的索引名通配符统一为列表"""
+    if not patterns:
+        return []
+    if isinstance(patterns, str):
+        patterns = patterns.split(",")
+    return [pattern.strip() for pattern in patterns if pattern and pattern.strip()]
+
+
+def index_selected(index_name: str, include: List[str], exclude: List[str]) -> bool:
+    """
+    判断索引是否在提取范围内
+
+    Args:
+        index_name: 索引名
+        include: 包含的通配符，为空时包含所有不以.开头的索引
+        exclude: 排除的通配符，优先于include
+
+    Returns:
+        是否提取
+    """
+    if any(fnmatchcase(index_name, pattern) for pattern in exclude):
+        return False
+    if not include:
+        return not index_name.startswith(".")
+    return any(fnmatchcase(index_name, pattern) for pattern in include)
+
+
+def flatten_mapping_properties(properties: Mapping[str, Any]) -> List[Dict[str, Any]]:
+    """
+    将索引映射的properties展开为字段列表
+
+    对象类型（含properties）按路径展开为其下的字段，多字段（fields）作为"父字段.子字段"跟在父字段之后。
+    使用显式栈迭代，嵌套层数不受递归深度限制，字段顺序与映射中的定义顺序一致（深度优先）
+
+    Args:
+        properties: 映射中的properties
+
+    Returns:
+        字段信息列表，包含name、type、description、nullable，以及映射中的format、analyzer
+    """
+    fields = []
+    # 栈中每项为(路径前缀, 该层剩余字段的迭代器, 是否为多字段)
+    stack = [("", iter(properties.items()), False)]
+    while stack:
+        prefix, items, multi_field = stack[-1]
+        item = next(items, None)
+        if item is None:
+            stack.pop()
+            continue
+
+        field_name, field_props = item
+        full_field_name = f"{prefix}.{field_name}" if prefix else field_name
+
+        # 对象或nested类型，继续展开其下的字段
+        if "properties" in field_props:
+            stack.append((full_field_name, iter(field_props["properties"].items()), False))
+            continue
+
+        field_info = {
+            "name": full_field_name,
+            "type": field_props.get("type", "object"),
+            "description": field_props.get("description", ""),
+            "nullable": True  # Elasticsearch字段都可以为null
+        }
+        for attribute in _FIELD_ATTRIBUTES:
+            if attribute in field_props:
+                field_info[attribute] = field_props[attribute]
+        if multi_field:
+            field_info["multi_field"] = True
+        fields.append(field_info)
+
+        if field_props.get("fields"):
+            stack.append((full_field_name, iter(field_props["fields"].items()), True))
+    return fields
+
+
+def mapping_hash(mapping: Mapping[str, Any]) -> str:
+    """按键排序序列化后计算映射的SHA-256，定义相同的映射总是得到同样的哈希"""
+    payload = json.dumps(mapping, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def collapse_time_series(index_hashes: Mapping[str, str], suffix_pattern: Optional[str]) -> List[Dict[str, Any]]:
+    """
+    将名称只差时间后缀且映射相同的索引合并为一个逻辑表
+
+    名称匹配suffix_pattern（正则表达式，匹配名称末尾的时间部分）的索引按"去掉后缀的前缀*"和映射哈希分组，
+    如logs-2024.01.01、logs-2024.01.02合并为logs-*。同一前缀下有多种映射时，包含最新（名称最大）索引的一组
+    使用logs-*，其余各组名称后加#和哈希前8位。不匹配的索引各自成组
+
+    Args:
+        index_hashes: 索引名到映射哈希的映射
+        suffix_pattern: 时间后缀的正则表达式，为空时不合并
+
+    Returns:
+        按名称排序的分组列表，每组包含name、indices（按名称排序的成员索引）、mapping_hash、collapsed（是否为合并的逻辑表）
+    """
+    suffix = re.compile(suffix_pattern) if suffix_pattern else None
+    groups: Dict[tuple, Dict[str, Any]] = {}
+    for index_name in sorted(index_hashes):
+        match = suffix.search(index_name) if suffix else None
+        if match and match.start() > 0:
+            key = (index_name[:match.start()] + "*", index_hashes[index_name], True)
+        else:
+            key = (index_name, index_hashes[index_name], False)
+        groups.setdefault(key, {
+            "name": key[0], "indices": [], "mapping_hash": key[1], "collapsed": key[2]
+        })["indices"].append(index_name)
+
+    # 同一逻辑名称下有多种映射时，只有包含最新索引的一组保留逻辑名称
+    latest: Dict[str, Dict[str, Any]] = {}
+    for group in groups.values():
+        if group["collapsed"] and (group["name"] not in latest or group["indices"][-1] > latest[group["name"]]["indices"][-1]):
+            latest[group["name"]] = group
+    for group in groups.values():
+        if group["collapsed"] and latest[group["name"]] is not group:
+            group["name"] = f"{group['name']}#{group['mapping_hash'][:8]}"
+
+    return sorted(groups.values(), key=lambda group: group["name"])
@@ -1,8 +1,23 @@
 import pandas as pd
 import json
+import io
+import os
+import threading
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# 解析Excel工作表的进程池，首次使用时创建
+_parse_executor: Optional[ProcessPoolExecutor] = None
+_parse_executor_lock = threading.Lock()
+
 
 def validate_excel_sheet_structure(df: pd.DataFrame, required_columns: List[str], sheet_name: str) -> tuple[bool, str]:
     """
@@ -253,3 +268,68 @@ def extract_relationships(data: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]
             relationships["column_relationships"].append(column_relationship)
     
     return relationships
+
+
+def _parse_excel_sheet(contents: bytes, sheet_name: str) -> pd.DataFrame:
+    """在工作进程中解析单个工作表，返回的DataFrame按列序列化传回主进程"""
+    return pd.read_excel(io.BytesIO(contents), sheet_name=sheet_name)
+
+
+def _parse_workers() -> int:
+    """并行解析的进程数，未配置时按CPU核数确定，最多4个"""
+    return settings.excel_parse_workers or min(4, os.cpu_count() or 1)
+
+
+def _get_parse_executor() -> ProcessPoolExecutor:
+    global _parse_executor
+    with _parse_executor_lock:
+        if _parse_executor is None:
+            # 使用spawn方式启动工作进程，避免在多线程的服务进程中fork
+            _parse_executor = ProcessPoolExecutor(
+                max_workers=_parse_workers(),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _parse_executor
+
+
+def read_excel_sheets(contents: bytes, sheet_names: List[str]) -> Dict[str, pd.DataFrame]:
+    """
+    解析Excel文件中的多个工作表，多个工作表在进程池中并行解析
+
+    解析时间取决于最大的工作表而非所有工作表之和。文件较小、只有一个工作表或
+    只有一个可用的解析进程时，直接在当前进程中依次解析。
+
+    Args:
+        contents: Excel文件的原始内容
+        sheet_names: 需要解析的工作表名称，文件中不存在的工作表会被忽略
+
+    Returns:
+        工作表名称到DataFrame的字典，顺序与sheet_names一致
+    """
+    excel_data = pd.ExcelFile(io.BytesIO(contents))
+    names = [name for name in sheet_names if name in excel_data.sheet_names]
+
+    parallel = (
+        len(names) > 1
+        and _parse_workers() > 1
+        and len(contents) >= settings.excel_parallel_min_bytes
+    )
+    if parallel:
+        try:
+            executor = _get_parse_executor()
+            futures = {name: executor.submit(_parse_excel_sheet, contents, name) for name in names}
+            return {name: futures[name].result() for name in names}
+        except (BrokenProcessPool, OSError) as e:
+            # 进程池不可用时（如运行环境限制创建子进程）退回到当前进程解析
+            logger.warning(f"并行解析Excel工作表失败，改为依次解析: {str(e)}")
+            _shutdown_parse_executor()
+
+    return {name: pd.read_excel(excel_data, name) for name in names}
+
+
+def _shutdown_parse_executor() -> None:
+    global _parse_executor
+    with _parse_executor_lock:
+        if _parse_executor is not None:
+            _parse_executor.shutdown(wait=False, cancel_futures=True)
+            _parse_executor = None
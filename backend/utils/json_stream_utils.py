@@ -0,0 +1,191 @@
+import codecs
+import json
+from itertools import islice
+from typing import Any, BinaryIO, Iterable, Iterator, List, Optional, Union
+
+_WHITESPACE = " \t\n\r"
+# 一个JSON值之后可能出现的字符
+_VALUE_TERMINATORS = _WHITESPACE + ",:]}"
+# NDJSON中的空行
+_EMPTY = object()
+
+
+class JsonStructureError(ValueError):
+    """JSON结构不符合要求，如缺少必要的数组字段或字段不是数组"""
+
+
+def iter_bytes(source: Union[bytes, BinaryIO, Iterable[bytes]], block_size: int) -> Iterator[bytes]:
+    """将字节串或二进制文件对象按块返回，文件对象不会被一次性读入内存；字节块的迭代器原样返回"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+        for i in range(0, len(view), block_size):
+            yield bytes(view[i:i + block_size])
+        return
+    if not hasattr(source, "read"):
+        yield from source
+        return
+    while True:
+        block = source.read(block_size)
+        if not block:
+            return
+        yield block
+
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """将迭代器按固定大小分组"""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class _TextBuffer:
+    """按块增量解码的文本缓冲区，已解析的部分在读取下一块时丢弃"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        # utf-8-sig兼容带BOM的文件
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """读取下一块，已到文件末尾时返回False"""
+        if self.eof:
+            return False
+        chunk = next(self._chunks, None)
+        if self.pos:
+            self.text = self.text[self.pos:]
+            self.pos = 0
+        if chunk is None:
+            self.text += self._decoder.decode(b"", final=True)
+            self.eof = True
+            return False
+        self.text += self._decoder.decode(chunk)
+        return True
+
+    def peek(self) -> Optional[str]:
+        """跳过空白字符，返回下一个字符，文件结束时返回None"""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return None
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self.text, self.pos)
+        self.pos += 1
+
+    def decode_value(self, decoder: json.JSONDecoder) -> Any:
+        """解析下一个完整的JSON值，缓冲区中的内容不完整时继续读取"""
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.text, self.pos)
+                # 数字可能被块边界截断（如"1e"、"12."），值之后不是分隔符时需读取更多内容确认
+                if self.eof or (end < len(self.text) and self.text[end] in _VALUE_TERMINATORS):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill()
+
+
+def iter_json_array(chunks: Iterable[bytes], key: str) -> Iterator[Any]:
+    """
+    增量解析顶层JSON对象中指定数组字段的元素，边解析边返回
+
+    只在内存中保留当前元素，适用于{"lineages": [...]}这类的大文件；
+    其他字段会被解析后丢弃。JSON格式错误时抛出json.JSONDecodeError。
+
+    Args:
+        chunks: 文件内容的字节块
+        key: 顶层对象中数组字段的名称
+
+    Returns:
+        数组元素的迭代器；字段缺失或不是数组时抛出JsonStructureError
+    """
+    buffer = _TextBuffer(chunks)
+    decoder = json.JSONDecoder()
+    found = False
+
+    buffer.expect("{")
+    if buffer.peek() == "}":
+        buffer.pos += 1
+    else:
+        while True:
+            name = buffer.decode_value(decoder)
+            if not isinstance(name, str):
+                raise json.JSONDecodeError("Expecting property name enclosed in double quotes", buffer.text, buffer.pos)
+            buffer.expect(":")
+
+            if name == key:
+                if buffer.peek() != "[":
+                    raise JsonStructureError(f"{key}必须是数组格式")
+                buffer.pos += 1
+                found = True
+                if buffer.peek() == "]":
+                    buffer.pos += 1
+                else:
+                    while True:
+                        yield buffer.decode_value(decoder)
+                        char = buffer.peek()
+                        buffer.pos += 1
+                        if char == "]":
+                            break
+                        if char != ",":
+                            raise json.JSONDecodeError("Expecting ',' delimiter", buffer.text, buffer.pos - 1)
+            else:
+                buffer.decode_value(decoder)
+
+            char = buffer.peek()
+            buffer.pos += 1
+            if char == "}":
+                break
+            if char != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer.text, buffer.pos - 1)
+
+    if buffer.peek() is not None:
+        raise json.JSONDecodeError("Extra data", buffer.text, buffer.pos)
+    if not found:
+        raise JsonStructureError(f"JSON文件缺少必要的{key}字段")
+
+
+def iter_ndjson(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """
+    逐行解析NDJSON（每行一个JSON值），跳过空行
+
+    JSON格式错误时抛出json.JSONDecodeError，错误信息包含行号
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    line_number = 0
+    for chunk in chunks:
+        lines = (pending + decoder.decode(chunk)).split("\n")
+        pending = lines.pop()
+        for line in lines:
+            line_number += 1
+            value = _loads_line(line, line_number)
+            if value is not _EMPTY:
+                yield value
+    pending += decoder.decode(b"", final=True)
+    value = _loads_line(pending, line_number + 1)
+    if value is not _EMPTY:
+        yield value
+
+
+def _loads_line(line: str, line_number: int) -> Any:
+    line = line.strip()
+    if not line:
+        return _EMPTY
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as e:
+        raise json.JSONDecodeError(f"第{line_number}行: {e.msg}", e.doc, e.pos) from e
@@ -0,0 +1,108 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+from utils.schema_inference_utils import SchemaInferrer
+
+
+def _array_length(value: str) -> Dict[str, Any]:
+    """字段值为数组时的长度，其他类型为null（$min、$max、$sum会忽略）"""
+    return {"$cond": [{"$isArray": value}, {"$size": value}, None]}
+
+
+def _expand_level() -> List[Dict[str, Any]]:
+    """
+    将每个字段条目展开一层：条目本身只保留路径和类型，值为对象时追加其下的字段，
+    值为首元素是对象的数组时按首元素追加"路径[*].子字段"
+    """
+    is_object = {"$eq": [{"$type": "$v"}, "object"]}
+    first = {"$arrayElemAt": ["$v", 0]}
+    is_object_array = {"$and": [
+        {"$eq": [{"$type": "$v"}, "array"]},
+        {"$eq": [{"$type": first}, "object"]}
+    ]}
+    nested = {"$cond": [is_object, "$v", {"$cond": [is_object_array, first, None]}]}
+    prefix = {"$cond": [is_object, "$p", {"$concat": ["$p", "[*]"]}]}
+    return [
+        {"$project": {"_f": {"$concatArrays": [
+            [{"p": "$p", "t": "$t", "l": "$l"}],
+            {"$cond": [
+                {"$eq": [{"$type": nested}, "object"]},
+                {"$map": {
+                    "input": {"$objectToArray": nested},
+                    "as": "f",
+                    "in": {
+                        "p": {"$concat": [prefix, ".", "$$f.k"]}, "t": {"$type": "$$f.v"},
+                        "l": _array_length("$$f.v"), "v": "$$f.v"
+                    }
+                }},
+                []
+            ]}
+        ]}}},
+        {"$unwind": "$_f"},
+        {"$replaceRoot": {"newRoot": "$_f"}}
+    ]
+
+
+def build_schema_pipeline(sample_size: int, max_depth: int) -> List[Dict[str, Any]]:
+    """
+    构建在服务端推断集合结构的聚合管道
+
+    随机抽取sample_size个文档，用$objectToArray展开为(字段路径, $type)条目，嵌套文档逐层展开到max_depth层，
+    最后按字段路径分组统计各类型出现的次数和数组长度。返回的每行为
+    {"_id": 字段路径, "n": 出现次数, "types": [{"t": 类型, "n": 次数}], "lmin"/"lmax"/"lsum": 数组长度的最小值、最大值、总和}，
+    按字段路径排序，不传输文档本身
+
+    Args:
+        sample_size: 抽样文档数
+        max_depth: 展开的最大嵌套层数，1表示只统计顶层字段
+
+    Returns:
+        聚合管道
+    """
+    pipeline = [
+        {"$sample": {"size": sample_size}},
+        {"$project": {"_id": 0, "_f": {"$map": {
+            "input": {"$objectToArray": "$$ROOT"},
+            "as": "f",
+            "in": {"p": "$$f.k", "t": {"$type": "$$f.v"}, "l": _array_length("$$f.v"), "v": "$$f.v"}
+        }}}},
+        {"$unwind": "$_f"},
+        {"$replaceRoot": {"newRoot": "$_f"}}
+    ]
+    for _ in range(max_depth - 1):
+        pipeline.extend(_expand_level())
+    pipeline.extend([
+        {"$group": {
+            "_id": {"p": "$p", "t": "$t"}, "n": {"$sum": 1},
+            "lmin": {"$min": "$l"}, "lmax": {"$max": "$l"}, "lsum": {"$sum": "$l"}
+        }},
+        {"$group": {
+            "_id": "$_id.p", "n": {"$sum": "$n"}, "types": {"$push": {"t": "$_id.t", "n": "$n"}},
+            "lmin": {"$min": "$lmin"}, "lmax": {"$max": "$lmax"}, "lsum": {"$sum": "$lsum"}
+        }},
+        {"$sort": {"_id": 1}}
+    ])
+    return pipeline
+
+
+def columns_from_type_counts(rows: Iterable[Dict[str, Any]], max_paths: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    将结构推断聚合管道的结果合并到SchemaInferrer并输出列信息
+
+    抽样文档数按_id字段的出现次数计算
+
+    Args:
+        rows: build_schema_pipeline的聚合结果
+        max_paths: 跟踪的字段路径上限，默认settings.schema_inference_max_paths
+
+    Returns:
+        SchemaInferrer.columns的列信息列表
+    """
+    rows = list(rows)
+    inferrer = SchemaInferrer(max_paths=max_paths)
+    inferrer.documents = next((row["n"] for row in rows if row["_id"] == "_id"), 0) or max((row["n"] for row in rows), default=0)
+    for row in rows:
+        inferrer.add_path_counts(
+            row["_id"], {item["t"]: item["n"] for item in row["types"]},
+            array_lengths=(row.get("lmin"), row.get("lmax"), row.get("lsum") or 0)
+        )
+    return inferrer.columns()
@@ -0,0 +1,135 @@
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+# 参与结构比较的列属性，描述和抽样统计（frequency、type_counts等）的变化不视为结构变化
+SCHEMA_COLUMN_FIELDS = ("length", "precision", "scale", "nullable")
+
+TableKey = Tuple[str, str]
+
+
+def column_signature(column: Mapping[str, Any], primary_key: bool = False) -> Dict[str, Any]:
+    """列的结构签名：类型、长度/精度/小数位数、是否可空以及是否为主键"""
+    signature = {"type": column.get("type")}
+    for field in SCHEMA_COLUMN_FIELDS:
+        if column.get(field) is not None:
+            signature[field] = column[field]
+    if primary_key:
+        signature["primary_key"] = True
+    return signature
+
+
+class SchemaIndex:
+    """
+    按(模式, 表名)索引的表结构
+
+    每张表只保存结构哈希和按列名排序的列签名JSON：比较两侧时按键匹配，哈希相同的表直接跳过，
+    只有哈希不同的表才解析列签名逐列比较，大量表时内存中也只保留紧凑的字符串
+    """
+
+    def __init__(self):
+        self.tables: Dict[TableKey, Tuple[str, str]] = {}
+
+    def add(self, schema_name: Optional[str], table_name: str, columns: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        """加入一张表，columns为(列名, 列签名)"""
+        payload = json.dumps(
+            sorted(columns, key=lambda column: column[0]),
+            sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str
+        )
+        digest = hashlib.sha1(payload.encode("utf-8")).hexdigest()
+        self.tables[(schema_name or "", table_name)] = (digest, payload)
+
+    def add_extracted(self, table_info: Mapping[str, Any]) -> None:
+        """加入一张提取结果中的表"""
+        primary_keys = set(table_info.get("primary_keys") or [])
+        self.add(table_info.get("schema"), table_info["name"], (
+            (column["name"], column_signature(column, column["name"] in primary_keys))
+            for column in table_info.get("columns", [])
+        ))
+
+    @staticmethod
+    def columns(entry: Tuple[str, str]) -> Dict[str, Dict[str, Any]]:
+        """解析表的列签名，返回列名到列签名的映射"""
+        return {name: signature for name, signature in json.loads(entry[1])}
+
+
+def apply_extraction(base: Optional[SchemaIndex], metadata: Mapping[str, Any]) -> SchemaIndex:
+    """
+    由一次提取结果得到数据源当时的表结构
+
+    增量提取只包含变化的表，table_names中其余仍存在的表沿用base中的结构；提取失败的表（failed_tables）同样沿用base，
+    不视为删除。metadata["tables"]可以是逐表生成的迭代器，failed_tables等在迭代结束后读取
+
+    Args:
+        base: 上一次的表结构，没有时为None
+        metadata: MetadataExtractor.stream_metadata的返回值或读取的快照
+
+    Returns:
+        新的表结构
+    """
+    index = SchemaIndex()
+    for table_info in metadata.get("tables", []):
+        index.add_extracted(table_info)
+    if base is None:
+        return index
+
+    carried = {(owner or "", name) for owner, name in metadata.get("failed_tables", [])}
+    if metadata.get("incremental"):
+        carried.update((owner or "", name) for owner, name in metadata.get("table_names", []))
+    for key in carried:
+        if key not in index.tables and key in base.tables:
+            index.tables[key] = base.tables[key]
+    return index
+
+
+def _table_ref(key: TableKey) -> Dict[str, Any]:
+    return {"schema": key[0] or None, "name": key[1]}
+
+
+def diff_schema_indexes(old: SchemaIndex, new: SchemaIndex) -> Dict[str, Any]:
+    """
+    比较两份表结构
+
+    Returns:
+        tables_added（新增的表及其列数）、tables_removed、tables_changed（每张表的columns_added、columns_removed、
+        columns_changed，变化的列给出前后的列签名），以及各项计数的summary，各列表按(模式, 表名)排序
+    """
+    added: List[Dict[str, Any]] = []
+    changed: List[Dict[str, Any]] = []
+    for key, entry in sorted(new.tables.items()):
+        old_entry = old.tables.get(key)
+        if old_entry is None:
+            added.append({**_table_ref(key), "columns": len(SchemaIndex.columns(entry))})
+        elif old_entry[0] != entry[0]:
+            old_columns, new_columns = SchemaIndex.columns(old_entry), SchemaIndex.columns(entry)
+            changed.append({
+                **_table_ref(key),
+                "columns_added": [
+                    {"name": name, "after": signature}
+                    for name, signature in sorted(new_columns.items()) if name not in old_columns
+                ],
+                "columns_removed": [
+                    {"name": name, "before": signature}
+                    for name, signature in sorted(old_columns.items()) if name not in new_columns
+                ],
+                "columns_changed": [
+                    {"name": name, "before": old_columns[name], "after": signature}
+                    for name, signature in sorted(new_columns.items())
+                    if name in old_columns and old_columns[name] != signature
+                ]
+            })
+    removed = [_table_ref(key) for key in sorted(old.tables.keys() - new.tables.keys())]
+
+    return {
+        "summary": {
+            "tables_added": len(added),
+            "tables_removed": len(removed),
+            "tables_changed": len(changed),
+            "columns_added": sum(len(table["columns_added"]) for table in changed),
+            "columns_removed": sum(len(table["columns_removed"]) for table in changed),
+            "columns_changed": sum(len(table["columns_changed"]) for table in changed)
+        },
+        "tables_added": added,
+        "tables_removed": removed,
+        "tables_changed": changed
+    }
@@ -0,0 +1,267 @@
+import datetime
+import decimal
+import re
+import uuid
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from config.settings import settings
+
+# 数组元素在字段路径中的标记
+ARRAY_MARKER = "[*]"
+_PATH_SEGMENT = re.compile(r"\[\*\]|[^.\[]+")
+
+# 类型名称（与MongoDB $type的别名一致）到通用列类型的映射，未列出的类型视为object
+_GENERIC_TYPES = {
+    "string": "string",
+    "int": "number",
+    "long": "number",
+    "double": "number",
+    "decimal": "number",
+    "bool": "boolean",
+    "date": "date",
+    "timestamp": "date",
+    "objectId": "objectId",
+    "binData": "binary",
+    "array": "array",
+    "object": "object",
+}
+# 不参与列类型判断的类型
+_EMPTY_TYPES = ("null", "undefined")
+
+
+def value_type(value: Any) -> str:
+    """返回值的类型名称，使用MongoDB $type的别名；BSON特有类型按类名识别，不依赖bson包"""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int" if -2 ** 31 <= value < 2 ** 31 else "long"
+    if isinstance(value, float):
+        return "double"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, Mapping):
+        return "object"
+    if isinstance(value, (list, tuple)):
+        return "array"
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return "date"
+    if isinstance(value, decimal.Decimal):
+        return "decimal"
+    if isinstance(value, (bytes, bytearray, uuid.UUID)):
+        return "binData"
+    return {
+        "ObjectId": "objectId", "Decimal128": "decimal", "Int64": "long", "Timestamp": "timestamp",
+        "Binary": "binData", "DatetimeMS": "date"
+    }.get(type(value).__name__, type(value).__name__)
+
+
+class _PathNode:
+    """字段路径前缀树的节点，记录该路径上值的类型分布和数组长度"""
+
+    __slots__ = ("children", "type_counts", "count", "documents", "last_document",
+                 "array_count", "array_min", "array_max", "array_total")
+
+    def __init__(self):
+        self.children: Dict[str, "_PathNode"] = {}
+        self.type_counts: Dict[str, int] = {}
+        self.count = 0
+        self.documents = 0
+        self.last_document = -1
+        self.array_count = 0
+        self.array_min: Optional[int] = None
+        self.array_max: Optional[int] = None
+        self.array_total = 0
+
+    def add_array_lengths(self, count: int, minimum: Optional[int], maximum: Optional[int], total: int) -> None:
+        if not count:
+            return
+        self.array_count += count
+        self.array_total += total
+        if minimum is not None:
+            self.array_min = minimum if self.array_min is None else min(self.array_min, minimum)
+        if maximum is not None:
+            self.array_max = maximum if self.array_max is None else max(self.array_max, maximum)
+
+
+class SchemaInferrer:
+    """
+    逐个合并抽样文档，推断文档型数据源的字段结构
+
+    字段路径保存在前缀树中，每个路径记录各类型的出现次数、null比例、出现该路径的文档数，
+    数组路径还记录数组长度的最小、最大和平均值。数组的所有元素（最多max_array_elements个）都计入"路径[*]"，
+    元素为对象时继续展开为"路径[*].子字段"；array_marker为空字符串时数组对路径透明（与Elasticsearch映射的字段名一致）。
+    跟踪的路径数超过max_paths后新路径不再记录，只计入dropped_paths。文档按显式栈遍历，嵌套层数不受递归深度限制
+
+    也可以用add_path_counts合并已在服务端聚合好的路径统计，最后由columns输出列信息
+    """
+
+    def __init__(self, max_paths: Optional[int] = None, max_array_elements: Optional[int] = None,
+                 array_marker: str = ARRAY_MARKER):
+        self.max_paths = max_paths or settings.schema_inference_max_paths
+        self.max_array_elements = max_array_elements or settings.schema_inference_max_array_elements
+        self.array_marker = array_marker
+        self.documents = 0
+        self.path_count = 0
+        self.dropped_paths = 0
+        self._root = _PathNode()
+
+    def _child(self, node: _PathNode, key: str) -> Optional[_PathNode]:
+        child = node.children.get(key)
+        if child is None:
+            if self.path_count >= self.max_paths:
+                self.dropped_paths += 1
+                return None
+            child = node.children[key] = _PathNode()
+            self.path_count += 1
+        return child
+
+    def _record(self, node: _PathNode, type_name: str) -> None:
+        node.type_counts[type_name] = node.type_counts.get(type_name, 0) + 1
+        node.count += 1
+        if node.last_document != self.documents:
+            node.last_document = self.documents
+            node.documents += 1
+
+    def add(self, document: Mapping[str, Any]) -> None:
+        """合并一个文档"""
+        self.documents += 1
+        # 栈中每项为(父节点, 字段名, 值)
+        stack: List[Tuple[_PathNode, str, Any]] = [
+            (self._root, key, value) for key, value in reversed(list(document.items()))
+        ]
+        while stack:
+            parent, key, value = stack.pop()
+            node = self._child(parent, key) if key else parent
+            if node is None:
+                continue
+            type_name = value_type(value)
+            # 数组对路径透明时只记录元素的类型
+            if type_name != "array" or self.array_marker:
+                self._record(node, type_name)
+
+            if type_name == "object":
+                stack.extend((node, str(child_key), child_value) for child_key, child_value in reversed(list(value.items())))
+            elif type_name == "array":
+                node.add_array_lengths(1, len(value), len(value), len(value))
+                elements = value[:self.max_array_elements]
+                # 数组标记为空时，元素直接计入数组所在的路径
+                stack.extend((node, self.array_marker, element) for element in reversed(elements))
+
+    def add_path_counts(self, path: str, type_counts: Mapping[str, int], documents: Optional[int] = None,
+                        array_lengths: Optional[Tuple[Optional[int], Optional[int], int]] = None) -> None:
+        """
+        合并一个路径的聚合统计
+
+        Args:
+            path: 字段路径，如items[*].sku
+            type_counts: 各类型的出现次数
+            documents: 出现该路径的文档数，默认为出现次数之和
+            array_lengths: 数组长度的(最小值, 最大值, 总和)，数组个数取type_counts中array的次数
+        """
+        node = self._root
+        for segment in _PATH_SEGMENT.findall(path):
+            node = self._child(node, segment)
+            if node is None:
+                return
+        total = sum(type_counts.values())
+        for type_name, count in type_counts.items():
+            node.type_counts[type_name] = node.type_counts.get(type_name, 0) + count
+        node.count += total
+        node.documents += total if documents is None else documents
+        if array_lengths is not None:
+            node.add_array_lengths(type_counts.get("array", 0), *array_lengths)
+
+    def columns(self) -> List[Dict[str, Any]]:
+        """
+        输出推断出的列信息
+
+        列类型取出现最多的非空类型对应的通用类型，非空类型对应不止一种通用类型时记为mixed，只出现过null时为null
+
+        Returns:
+            按字段路径排序的列信息列表，包含name、type、nullable、description、type_counts（按次数降序）、
+            frequency（出现该路径的文档比例）、null_ratio，数组路径另有array_min_length、array_max_length、array_avg_length
+        """
+        columns = []
+        stack = [("", self._root)]
+        while stack:
+            path, node = stack.pop()
+            for key, child in node.children.items():
+                if not path:
+                    child_path = key
+                elif key == ARRAY_MARKER:
+                    child_path = path + key
+                else:
+                    child_path = f"{path}.{key}"
+                stack.append((child_path, child))
+            if not path or not node.count:
+                continue
+            columns.append(self._column(path, node))
+        return sorted(columns, key=lambda column: column["name"])
+
+    def _column(self, path: str, node: _PathNode) -> Dict[str, Any]:
+        type_counts = dict(sorted(node.type_counts.items(), key=lambda item: (-item[1], item[0])))
+        generic_types = {
+            _GENERIC_TYPES.get(type_name, "object") for type_name in type_counts if type_name not in _EMPTY_TYPES
+        }
+        if len(generic_types) > 1:
+            column_type = "mixed"
+        elif generic_types:
+            column_type = generic_types.pop()
+        else:
+            column_type = "null"
+        null_count = sum(type_counts.get(type_name, 0) for type_name in _EMPTY_TYPES)
+
+        column = {
+            "name": path,
+            "type": column_type,
+            "nullable": True,  # 文档型数据源的字段都可以为null
+            "description": "字段类型: " + ", ".join(f"{type_name}({count})" for type_name, count in type_counts.items()),
+            "type_counts": type_counts,
+            "frequency": round(node.documents / self.documents, 4) if self.documents else 0,
+            "null_ratio": round(null_count / node.count, 4)
+        }
+        if node.array_count:
+            column["array_min_length"] = node.array_min
+            column["array_max_length"] = node.array_max
+            column["array_avg_length"] = round(node.array_total / node.array_count, 2)
+        return column
+
+
+# 由抽样统计补充到已知列上的属性
+_STATISTIC_FIELDS = ("type_counts", "frequency", "null_ratio", "array_min_length", "array_max_length", "array_avg_length")
+
+
+def merge_column_statistics(columns: List[Dict[str, Any]], inferred: Iterable[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    将抽样推断出的统计信息补充到已知的列上（如由Elasticsearch映射得到的列），按列名匹配，
+    已知列的名称和类型保持不变；抽样中没有出现的列frequency为0，多字段（multi_field）不出现在文档中，保持不变
+
+    Returns:
+        补充统计信息后的新列表
+    """
+    statistics = {column["name"]: column for column in inferred}
+    merged = []
+    for column in columns:
+        inferred_column = statistics.get(column["name"])
+        if column.get("multi_field"):
+            merged.append(column)
+        elif inferred_column is None:
+            merged.append({**column, "frequency": 0})
+        else:
+            merged.append({**column, **{key: inferred_column[key] for key in _STATISTIC_FIELDS if key in inferred_column}})
+    return merged
+
+
+def infer_columns(documents: Iterable[Mapping[str, Any]], **options: Any) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    从文档流推断列信息
+
+    Returns:
+        (列信息列表, 因超过路径上限而未记录的路径次数)
+    """
+    inferrer = SchemaInferrer(**options)
+    for document in documents:
+        inferrer.add(document)
+    return inferrer.columns(), inferrer.dropped_paths
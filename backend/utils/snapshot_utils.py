@@ -0,0 +1,162 @@
+import gzip
+import io
+import json
+import os
+from datetime import date, datetime
+from typing import Any, Dict, IO, Iterable, Iterator, Optional, Tuple
+
+# 快照文件格式版本，格式不兼容地变化时递增
+SNAPSHOT_FORMAT_VERSION = 1
+# 压缩方式对应的文件扩展名
+SNAPSHOT_EXTENSIONS = {"zstd": ".ndjson.zst", "gzip": ".ndjson.gz"}
+
+
+def _zstandard() -> Optional[Any]:
+    """按需导入zstandard，未安装时返回None"""
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        return None
+
+
+def resolve_codec(codec: str) -> str:
+    """返回实际使用的压缩方式：要求zstd但未安装zstandard时退回gzip"""
+    if codec not in SNAPSHOT_EXTENSIONS:
+        raise ValueError(f"不支持的快照压缩方式: {codec}")
+    if codec == "zstd" and _zstandard() is None:
+        return "gzip"
+    return codec
+
+
+def codec_from_path(path: str) -> str:
+    """根据文件扩展名判断压缩方式"""
+    for codec, extension in SNAPSHOT_EXTENSIONS.items():
+        if path.endswith(extension):
+            return codec
+    raise ValueError(f"无法识别的快照文件: {os.path.basename(path)}")
+
+
+def _encode(value: Any) -> Any:
+    """JSON无法表示的日期时间编码为{"$datetime": ISO格式}，读取时还原"""
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, date):
+        return {"$date": value.isoformat()}
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    return str(value)
+
+
+def _decode(value: Dict[str, Any]) -> Any:
+    if len(value) == 1:
+        if "$datetime" in value:
+            return datetime.fromisoformat(value["$datetime"])
+        if "$date" in value:
+            return date.fromisoformat(value["$date"])
+    return value
+
+
+def _open_text(path: str, mode: str, codec: str) -> IO[str]:
+    if codec == "gzip":
+        # 快照写一次读少数几次，中等压缩级别兼顾速度
+        return gzip.open(path, mode + "t", encoding="utf-8", compresslevel=6)
+    zstandard = _zstandard()
+    if zstandard is None:
+        raise ValueError("读写zstd压缩的快照需要安装zstandard")
+    raw = open(path, mode + "b")
+    if mode == "w":
+        stream = zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=True)
+    else:
+        stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+    return io.TextIOWrapper(stream, encoding="utf-8")
+
+
+class SnapshotWriter:
+    """
+    逐行写入提取快照（NDJSON）：首行为{"snapshot": 头信息}，每张表一行{"table": 表信息}，
+    末行为{"end": 尾信息}。先写入临时文件，commit时才改名为正式文件，未完成的快照不会被读到
+    """
+
+    def __init__(self, path: str, header: Dict[str, Any], codec: str):
+        self.path = path
+        self.table_count = 0
+        self._temp_path = path + ".tmp"
+        self._file = _open_text(self._temp_path, "w", codec)
+        self._write({"snapshot": {"format_version": SNAPSHOT_FORMAT_VERSION, **header}})
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=_encode))
+        self._file.write("\n")
+
+    def write_table(self, table_info: Dict[str, Any]) -> None:
+        self._write({"table": table_info})
+        self.table_count += 1
+
+    def commit(self, trailer: Dict[str, Any]) -> None:
+        """写入尾信息并改名为正式文件"""
+        self._write({"end": {"table_count": self.table_count, **trailer}})
+        self._file.close()
+        os.replace(self._temp_path, self.path)
+
+    def abort(self) -> None:
+        """放弃未完成的快照"""
+        try:
+            self._file.close()
+        finally:
+            if os.path.exists(self._temp_path):
+                os.remove(self._temp_path)
+
+
+def read_snapshot_header(path: str) -> Dict[str, Any]:
+    """只读取快照的头信息（首行）"""
+    with _open_text(path, "r", codec_from_path(path)) as file:
+        first = json.loads(file.readline(), object_hook=_decode)
+    if "snapshot" not in first:
+        raise ValueError(f"快照文件缺少头信息: {os.path.basename(path)}")
+    return first["snapshot"]
+
+
+def iter_snapshot(path: str) -> Tuple[Dict[str, Any], Iterator[Dict[str, Any]], Dict[str, Any]]:
+    """
+    读取快照
+
+    Returns:
+        (头信息, 逐表生成表信息的迭代器, 尾信息)。尾信息在迭代器结束后才被填充；
+        文件缺少尾信息（快照不完整）时迭代器在末尾抛出ValueError
+
+    Raises:
+        ValueError: 文件不是快照或格式版本不受支持
+    """
+    header = read_snapshot_header(path)
+    if header.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"不支持的快照格式版本: {header.get('format_version')}")
+    trailer: Dict[str, Any] = {}
+
+    def tables() -> Iterator[Dict[str, Any]]:
+        with _open_text(path, "r", codec_from_path(path)) as file:
+            file.readline()
+            for line in file:
+                record = json.loads(line, object_hook=_decode)
+                if "table" in record:
+                    yield record["table"]
+                elif "end" in record:
+                    trailer.update(record["end"])
+                    return
+        raise ValueError(f"快照不完整: {os.path.basename(path)}")
+
+    return header, tables(), trailer
+
+
+def write_snapshot(path: str, header: Dict[str, Any], tables: Iterable[Dict[str, Any]],
+                   trailer: Dict[str, Any], codec: str) -> int:
+    """将全部表写入快照，返回表数"""
+    writer = SnapshotWriter(path, header, codec)
+    try:
+        for table_info in tables:
+            writer.write_table(table_info)
+    except BaseException:
+        writer.abort()
+        raise
+    writer.commit(trailer)
+    return writer.table_count
@@ -2,6 +2,7 @@ import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from backend.app import app
 from backend.models import Base, get_db
@@ -37,4 +38,23 @@ def client():
         yield c
     
     # 测试结束后清理数据库表
-    Base.metadata.drop_all(bind=engine)
\ No newline at end of file
+    Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def db_session():
+    """服务层测试使用的独立内存数据库会话"""
+    # 与应用代码保持一致，使用顶层models模块（需将backend加入PYTHONPATH）
+    from models import Base as MetadataBase, create_metadata_engine
+    
+    service_engine = create_metadata_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    MetadataBase.metadata.create_all(bind=service_engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=service_engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        MetadataBase.metadata.drop_all(bind=service_engine)
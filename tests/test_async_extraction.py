@@ -0,0 +1,146 @@
+import asyncio
+
+import anyio
+import anyio.to_thread
+
+from core.async_metadata_extractor import AsyncMetadataExtractor, _ordered_concurrent, iterate_in_thread
+
+# 测试用例：基于asyncio的元数据提取（按顺序并发、提前停止时的清理、MongoDB集合超时）
+
+
+def test_ordered_concurrent_keeps_order_and_limits_concurrency():
+    running = []
+    peak = []
+
+    async def work(item):
+        running.append(item)
+        peak.append(len(running))
+        # 前面的元素完成得更慢
+        await asyncio.sleep(0.01 * (5 - item))
+        running.remove(item)
+        return item * 10
+
+    async def main():
+        return [(item, task.result()) async for item, task in _ordered_concurrent(work, range(5), 2)]
+
+    assert asyncio.run(main()) == [(0, 0), (1, 10), (2, 20), (3, 30), (4, 40)]
+    assert max(peak) == 2
+
+
+def test_ordered_concurrent_cancels_pending_tasks_when_stopped_early():
+    started = []
+    cancelled = []
+
+    async def work(item):
+        started.append(item)
+        try:
+            await asyncio.sleep(0 if item == 0 else 10)
+        except asyncio.CancelledError:
+            cancelled.append(item)
+            raise
+        return item
+
+    async def main():
+        results = _ordered_concurrent(work, range(10), 2)
+        item, task = await results.__anext__()
+        await results.aclose()
+        # 让被取消的任务处理CancelledError
+        await asyncio.sleep(0)
+        return item, task.result()
+
+    assert asyncio.run(main()) == (0, 0)
+    # 最多创建concurrency*2个任务，未完成的都被取消
+    assert len(started) <= 4
+    assert sorted(cancelled) == sorted(item for item in started if item != 0)
+
+
+def test_iterate_in_thread_closes_async_iterator_when_consumer_stops():
+    events = []
+
+    async def tables():
+        try:
+            for index in range(10):
+                events.append(index)
+                yield {"name": f"T{index}"}
+        finally:
+            events.append("closed")
+
+    def consume(iterator):
+        tables_in_thread = iterate_in_thread(iterator)
+        first = next(tables_in_thread)
+        tables_in_thread.close()
+        return first
+
+    async def main():
+        return await anyio.to_thread.run_sync(consume, tables())
+
+    assert anyio.run(main) == {"name": "T0"}
+    assert events == [0, "closed"]
+
+
+class FakeMotorCollection:
+    def __init__(self, db_name, name, slow):
+        self.db_name = db_name
+        self.name = name
+        self.slow = slow
+
+    async def estimated_document_count(self, maxTimeMS=None):
+        return 100
+
+    def aggregate(self, pipeline, allowDiskUse=False, maxTimeMS=None):
+        collection = self
+
+        class Cursor:
+            async def to_list(self, length=None):
+                if collection.slow:
+                    await asyncio.sleep(10)
+                return [{"_id": "_id", "n": 10, "types": [{"t": "objectId", "n": 10}]}]
+
+        return Cursor()
+
+
+class FakeMotorClient:
+    databases = {"shop": ["orders", "customers", "system.views"], "admin": ["system.users"]}
+    slow = {("shop", "customers")}
+    instances = []
+
+    def __init__(self, **kwargs):
+        self.closed = False
+        self.admin = self
+        FakeMotorClient.instances.append(self)
+
+    async def command(self, name):
+        return {"ok": 1}
+
+    async def list_database_names(self):
+        return list(self.databases)
+
+    def __getitem__(self, db_name):
+        client = self
+
+        class Database:
+            async def list_collection_names(self):
+                return list(client.databases[db_name])
+
+            def __getitem__(self, name):
+                return FakeMotorCollection(db_name, name, (db_name, name) in client.slow)
+
+        return Database()
+
+    def close(self):
+        self.closed = True
+
+
+def test_async_mongodb_collection_timeout_is_recorded_in_failed_tables():
+    async def main():
+        metadata = await AsyncMetadataExtractor._stream_mongodb_metadata(
+            FakeMotorClient, {"collection_timeout_ms": 100, "async_concurrency": 2}
+        )
+        tables = [table_info async for table_info in metadata["tables"]]
+        return metadata, tables
+
+    metadata, tables = asyncio.run(main())
+    assert [(t["schema"], t["name"]) for t in tables] == [("shop", "orders")]
+    assert metadata["failed_tables"] == [("shop", "customers")]
+    assert metadata["errors"][0]["error"] == "TimeoutError"
+    assert FakeMotorClient.instances[-1].closed
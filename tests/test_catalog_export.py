@@ -0,0 +1,79 @@
+import csv
+import json
+import os
+
+from openpyxl import load_workbook
+
+from models.schemas import DataSourceCreate, TableMetadataCreate, LineageRelationCreate
+from services import catalog_export_service
+from services.catalog_export_service import CatalogExportService
+from services.data_source_service import DataSourceService
+from services.table_metadata_service import TableMetadataService
+from services.lineage_service import LineageService
+
+# 测试用例：全目录导出为Excel、CSV和NDJSON
+
+
+def _setup_catalog(db):
+    source = DataSourceService.create(db, DataSourceCreate(name="ods", type="oracle", connection_config={"host": "db1"}))
+    tables = [
+        TableMetadataService.create(db, TableMetadataCreate(
+            name=name, data_source_id=source.id, properties={"owner": "etl"},
+            columns=[{"name": "ID", "data_type": "NUMBER", "is_primary_key": True},
+                     {"name": "NOTE", "data_type": "VARCHAR2", "description": "备注\x07"}]
+        ))
+        for name in ["ORDERS", "ORDERS_DW"]
+    ]
+    LineageService.create_table_lineage(db, LineageRelationCreate(
+        source_table_ids=[tables[0].id], target_table_id=tables[1].id,
+        relation_type="ETL", relation_details={"transformation_logic": "copy"}
+    ))
+
+
+def _export(db, dataset, file_format):
+    path = CatalogExportService.export_file(db, dataset, file_format)
+    try:
+        if file_format == "xlsx":
+            workbook = load_workbook(path, read_only=True)
+            sheets = {ws.title: [list(row) for row in ws.iter_rows(values_only=True)] for ws in workbook.worksheets}
+            workbook.close()
+            return sheets
+        with open(path, encoding="utf-8-sig") as f:
+            return f.read()
+    finally:
+        os.remove(path)
+
+
+def test_catalog_workbook_rolls_over_full_sheets(db_session, monkeypatch):
+    """工作表达到行数上限后续写到新的工作表，每个工作表都有表头"""
+    _setup_catalog(db_session)
+    monkeypatch.setattr(catalog_export_service, "_XLSX_MAX_ROWS", 3)
+
+    sheets = _export(db_session, "catalog", "xlsx")
+
+    assert list(sheets) == ["data_sources", "tables", "columns", "columns_2", "lineages", "column_lineages"]
+    assert sheets["data_sources"][1][:4] == ["ods", "oracle", None, '{"host": "db1"}']
+    assert [row[2:5] for row in sheets["columns"] + sheets["columns_2"]] == [
+        ["table_name", "name", "data_type"], ["ORDERS", "ID", "NUMBER"], ["ORDERS", "NOTE", "VARCHAR2"],
+        ["table_name", "name", "data_type"], ["ORDERS_DW", "ID", "NUMBER"], ["ORDERS_DW", "NOTE", "VARCHAR2"],
+    ]
+    # 控制字符被移除
+    assert sheets["columns"][2][5] == "备注"
+    assert sheets["lineages"][1][:4] == ["ods", "ORDERS", "ods", "ORDERS_DW"]
+    assert sheets["column_lineages"] == [sheets["column_lineages"][0]]
+
+
+def test_csv_and_ndjson_export(db_session):
+    _setup_catalog(db_session)
+
+    rows = list(csv.DictReader(_export(db_session, "tables", "csv").splitlines()))
+    assert [(r["data_source_name"], r["name"], r["properties"]) for r in rows] == [
+        ("ods", "ORDERS", '{"owner": "etl"}'), ("ods", "ORDERS_DW", '{"owner": "etl"}')
+    ]
+
+    lineages = [json.loads(line) for line in _export(db_session, "table_lineage", "ndjson").splitlines()]
+    assert lineages == [{
+        "source_db_name": "ods", "source_table_name": "ORDERS", "target_db_name": "ods",
+        "target_table_name": "ORDERS_DW", "relation_type": "ETL", "description": None,
+        "transformation_logic": "copy", "relation_details": {"transformation_logic": "copy"}
+    }]
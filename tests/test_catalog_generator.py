@@ -0,0 +1,57 @@
+from benchmarks.catalog_generator import CatalogSpec, generate_catalog
+from models import TableMetadata, ColumnMetadata, LineageRelation, ColumnLineageRelation
+from services.lineage_service import LineageService
+from services.upload_import_service import UploadImportService
+
+# 测试用例：合成目录生成器
+
+
+def test_generator_is_deterministic_and_respects_shape():
+    spec = CatalogSpec(seed=7, tables=300, columns_per_table=4, depth=3, fan_in=2, fan_out=3, diamond_ratio=0.5)
+    catalog = generate_catalog(spec)
+
+    assert catalog.edges == generate_catalog(spec).edges
+    assert catalog.edges != generate_catalog(spec.model_copy(update={"seed": 8})).edges
+    assert len(set(catalog.edges)) == len(catalog.edges)
+    # 不生成环时所有边都从上一层指向下一层；菱形会超出fan_in，但不超过fan_in+1
+    assert all(catalog.layers[target] == catalog.layers[source] + 1 for source, target in catalog.edges)
+    in_degree = {}
+    for _, target in catalog.edges:
+        in_degree[target] = in_degree.get(target, 0) + 1
+    assert max(in_degree.values()) <= spec.fan_in + 1
+    assert {target for _, target in catalog.edges} == {i for i, layer in enumerate(catalog.layers) if layer > 0}
+
+    # 回边从下游层指向上游层
+    cyclic = generate_catalog(spec.model_copy(update={"cycle_ratio": 1.0}))
+    assert any(cyclic.layers[source] > cyclic.layers[target] for source, target in cyclic.edges)
+
+
+def test_upload_files_import_into_counted_catalog(db_session, tmp_path):
+    catalog = generate_catalog(seed=1, data_sources=2, tables=12, columns_per_table=3, depth=2,
+                               column_lineage_per_relation=2)
+    counts = catalog.summary()
+    paths = catalog.write_upload_files(str(tmp_path), include_parquet=False)
+
+    with open(paths["table_structure_json"], "rb") as f:
+        UploadImportService.import_table_structure_json(db_session, f.read())
+    with open(paths["table_lineage_json"], "rb") as f:
+        assert UploadImportService.import_table_lineage_json(db_session, f)["status"] == "success"
+    with open(paths["column_lineage_json"], "rb") as f:
+        assert UploadImportService.import_column_lineage_json(db_session, f)["status"] == "success"
+
+    assert db_session.query(TableMetadata).count() == counts["tables"]
+    assert db_session.query(ColumnMetadata).count() == counts["columns"]
+    assert db_session.query(LineageRelation).count() == counts["table_lineages"]
+    assert db_session.query(ColumnLineageRelation).count() == counts["column_lineages"]
+
+
+def test_write_to_db(db_session):
+    catalog = generate_catalog(seed=1, data_sources=2, tables=12, columns_per_table=3, depth=2)
+    counts = catalog.summary()
+
+    assert catalog.write_to_db(db_session) == counts
+    assert db_session.query(ColumnMetadata).count() == counts["columns"]
+    assert db_session.query(ColumnLineageRelation).count() == counts["column_lineages"]
+    target = db_session.query(LineageRelation).first().target_table_id
+    graph = LineageService.get_table_lineage_graph(db_session, target, depth=2)
+    assert any(node["id"] == target for node in graph["nodes"])
@@ -0,0 +1,135 @@
+import hashlib
+import os
+import threading
+
+import pytest
+
+from config.settings import settings
+from services.chunked_upload_service import ChunkedUploadService
+from utils.json_stream_utils import iter_ndjson
+
+# 测试用例：分块上传
+
+
+@pytest.fixture(autouse=True)
+def staging_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "upload_staging_dir", str(tmp_path / "staging"))
+
+
+def _chunks(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def test_resume_and_complete():
+    """分块可乱序上传，中断后根据缺失分块续传，合并结果与原文件一致"""
+    data = b"".join(f"line-{i}\n".encode() for i in range(1000))
+    session = ChunkedUploadService.initiate("data.json", len(data), chunk_size=1024,
+                                            file_sha256=hashlib.sha256(data).hexdigest())
+    upload_id = session["upload_id"]
+    parts = _chunks(data, 1024)
+    assert session["total_chunks"] == len(parts)
+
+    # 模拟中断：只上传了部分分块
+    for index in [0, 1, 3]:
+        ChunkedUploadService.put_chunk(upload_id, index, parts[index])
+    status = ChunkedUploadService.get_status(upload_id)
+    assert status["prefix_chunks"] == 2
+    assert b"".join(ChunkedUploadService.iter_prefix(upload_id)) == data[:2048]
+    with pytest.raises(ValueError):
+        ChunkedUploadService.complete(upload_id)
+
+    # 续传缺失的分块，重复上传已有分块也不影响结果
+    for index in status["missing_chunks"] + [0]:
+        ChunkedUploadService.put_chunk(upload_id, index, parts[index],
+                                       checksum=hashlib.sha256(parts[index]).hexdigest())
+
+    path = ChunkedUploadService.complete(upload_id)
+    with open(path, "rb") as f:
+        assert f.read() == data
+    assert ChunkedUploadService.get_status(upload_id)["completed"] is True
+    assert ChunkedUploadService.discard(upload_id)
+    assert ChunkedUploadService.get_status(upload_id) is None
+
+
+def test_chunk_checksum_mismatch_is_rejected():
+    """分块校验和不一致时拒绝写入"""
+    session = ChunkedUploadService.initiate("data.xlsx", 10, chunk_size=4)
+    with pytest.raises(ValueError):
+        ChunkedUploadService.put_chunk(session["upload_id"], 0, b"abcd", checksum="0" * 64)
+    with pytest.raises(ValueError):
+        ChunkedUploadService.put_chunk(session["upload_id"], 2, b"abcd")
+    assert ChunkedUploadService.get_status(session["upload_id"])["received_chunks"] == []
+    assert ChunkedUploadService.get_status("../etc") is None
+
+
+def test_follow_prefix_parses_while_uploading(monkeypatch):
+    """边上传边解析：已到达的前缀先被解析，后续分块到达后继续，读完后校验整个文件"""
+    monkeypatch.setattr(settings, "upload_stream_poll_seconds", 0.01)
+    data = b"".join(f'{{"id": {i}}}\n'.encode() for i in range(300))
+    session = ChunkedUploadService.initiate("data.ndjson", len(data), chunk_size=512,
+                                            file_sha256=hashlib.sha256(data).hexdigest())
+    upload_id = session["upload_id"]
+    parts = _chunks(data, 512)
+    ChunkedUploadService.put_chunk(upload_id, 0, parts[0])
+
+    records = iter_ndjson(ChunkedUploadService.iter_prefix(upload_id, block_size=128, follow=True))
+    # 只有第一个分块到达时已能解析出记录
+    assert next(records) == {"id": 0}
+    received = [{"id": 0}]
+    for index in range(1, len(parts)):
+        ChunkedUploadService.put_chunk(upload_id, index, parts[index])
+    received.extend(records)
+    assert received == [{"id": i} for i in range(300)]
+
+
+def test_follow_prefix_rejects_rewritten_chunk(monkeypatch):
+    monkeypatch.setattr(settings, "upload_stream_poll_seconds", 0.01)
+    session = ChunkedUploadService.initiate("data.ndjson", 8, chunk_size=4)
+    upload_id = session["upload_id"]
+    ChunkedUploadService.put_chunk(upload_id, 0, b"abcd")
+    blocks = ChunkedUploadService.iter_prefix(upload_id, follow=True)
+    assert next(blocks) == b"abcd"
+    # 已读取的分块被重新上传为不同内容
+    ChunkedUploadService.put_chunk(upload_id, 0, b"wxyz")
+    ChunkedUploadService.put_chunk(upload_id, 1, b"efgh")
+    assert next(blocks) == b"efgh"
+    with pytest.raises(ValueError):
+        next(blocks)
+
+    monkeypatch.setattr(settings, "upload_stream_idle_seconds", 0)
+    waiting = ChunkedUploadService.initiate("data.ndjson", 8, chunk_size=4)
+    with pytest.raises(ValueError):
+        list(ChunkedUploadService.iter_prefix(waiting["upload_id"], follow=True))
+
+
+def test_chunk_put_is_serialized_with_assembly():
+    """合并在锁内进行：合并期间到达的分块等待合并结束，随后因会话已完成被拒绝，不改写已合并的内容"""
+    session = ChunkedUploadService.initiate("data.json", 8, chunk_size=4)
+    upload_id = session["upload_id"]
+    ChunkedUploadService.put_chunk(upload_id, 0, b"abcd")
+    ChunkedUploadService.put_chunk(upload_id, 1, b"efgh")
+
+    errors = []
+
+    def rewrite():
+        try:
+            ChunkedUploadService.put_chunk(upload_id, 0, b"wxyz")
+        except ValueError as e:
+            errors.append(str(e))
+
+    # 持有锁模拟合并进行中
+    with ChunkedUploadService._lock:
+        writer = threading.Thread(target=rewrite)
+        writer.start()
+        writer.join(0.1)
+        assert writer.is_alive()
+        with open(os.path.join(settings.upload_staging_dir, upload_id, "chunk_000000.part"), "rb") as f:
+            assert f.read() == b"abcd"
+        manifest = ChunkedUploadService._load_manifest(upload_id)
+        manifest["completed"] = True
+        ChunkedUploadService._save_manifest(manifest)
+    writer.join()
+
+    assert errors == ["上传会话已完成，不能再写入分块"]
+    assert not [name for name in os.listdir(os.path.join(settings.upload_staging_dir, upload_id))
+                if name.endswith(".tmp")]
@@ -0,0 +1,151 @@
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from config.settings import settings
+from models import TableMetadata, ColumnMetadata, LineageRelation, ColumnLineageRelation
+from models.schemas import DataSourceCreate, TableMetadataCreate, LineageRelationCreate
+from services.data_source_service import DataSourceService
+from services.table_metadata_service import TableMetadataService
+from services.lineage_service import LineageService
+from services.catalog_export_service import CatalogExportService
+from services.columnar_import_service import ColumnarImportService
+from services.upload_validation_service import UploadValidationService
+
+# 测试用例：Parquet/Arrow IPC导入导出
+
+
+def _parquet(rows):
+    sink = pa.BufferOutputStream()
+    pq.write_table(pa.Table.from_pylist(rows), sink)
+    return sink.getvalue().to_pybytes()
+
+
+def _arrow_stream(rows):
+    table = pa.Table.from_pylist(rows)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _export(db, dataset, file_format):
+    path = CatalogExportService.export_file(db, dataset, file_format)
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    finally:
+        os.remove(path)
+
+
+def _setup_catalog(db):
+    source = DataSourceService.create(db, DataSourceCreate(name="ods", type="oracle", connection_config={}))
+    tables = {}
+    for name in ["ORDERS", "ORDERS_DW"]:
+        tables[name] = TableMetadataService.create(db, TableMetadataCreate(
+            name=name,
+            data_source_id=source.id,
+            properties={"owner": "etl"},
+            columns=[{"name": "ID", "data_type": "NUMBER", "is_primary_key": True},
+                     {"name": "AMOUNT", "data_type": "NUMBER"}]
+        ))
+    LineageService.create_table_lineage(db, LineageRelationCreate(
+        source_table_ids=[tables["ORDERS"].id], target_table_id=tables["ORDERS_DW"].id,
+        relation_type="ETL", relation_details={"transformation_logic": "copy"}
+    ))
+    return source
+
+
+def test_table_structure_batches_create_and_update(db_session, monkeypatch):
+    """小批次导入：后面批次引用前面批次新建的表，已存在的表和字段按主键批量更新"""
+    _setup_catalog(db_session)
+    monkeypatch.setattr(settings, "columnar_batch_size", 2)
+
+    rows = [
+        {"data_source_name": "ods", "table_name": "CUSTOMERS", "table_description": "客户",
+         "column_name": "ID", "data_type": "NUMBER", "is_primary_key": True, "column_properties": None},
+        {"data_source_name": "ods", "table_name": "CUSTOMERS", "table_description": "客户",
+         "column_name": "NAME", "data_type": "VARCHAR2", "is_primary_key": False, "column_properties": '{"len": 50}'},
+        {"data_source_name": "ods", "table_name": "customers", "table_description": "客户表",
+         "column_name": "EMAIL", "data_type": "VARCHAR2", "is_primary_key": False, "column_properties": None},
+        {"data_source_name": "ods", "table_name": "ORDERS", "table_description": "订单",
+         "column_name": "AMOUNT", "data_type": "NUMBER(10,2)", "is_primary_key": False, "column_properties": None},
+        {"data_source_name": "missing", "table_name": "X", "table_description": None,
+         "column_name": None, "data_type": None, "is_primary_key": None, "column_properties": None},
+    ]
+    result = ColumnarImportService.import_table_structure(db_session, _parquet(rows), "parquet")
+
+    assert result["status"] == "partial_success"
+    assert result["result"]["tables"] == {"created": 1, "updated": 2, "skipped": 0}
+    assert result["result"]["columns"] == {"created": 3, "updated": 1, "skipped": 0}
+    assert result["result"]["validation_errors"] == ["第5行: 数据源不存在: missing"]
+
+    customers = db_session.query(TableMetadata).filter(TableMetadata.name.in_(["CUSTOMERS", "customers"])).all()
+    assert len(customers) == 1 and customers[0].description == "客户表"
+    names = {c.name: c for c in db_session.query(ColumnMetadata).filter(ColumnMetadata.table_id == customers[0].id)}
+    assert set(names) == {"ID", "NAME", "EMAIL"}
+    assert names["ID"].is_primary_key == 1 and names["NAME"].properties == {"len": 50}
+    amount = db_session.query(ColumnMetadata).join(TableMetadata).filter(
+        TableMetadata.name == "ORDERS", ColumnMetadata.name == "AMOUNT"
+    ).one()
+    assert amount.data_type == "NUMBER(10,2)"
+
+
+def test_export_round_trip_is_idempotent(db_session):
+    """导出的文件可直接重新导入，重复导入只更新不新增"""
+    _setup_catalog(db_session)
+    orders_id, amount_id = db_session.query(TableMetadata.id, ColumnMetadata.id).join(ColumnMetadata).filter(
+        TableMetadata.name == "ORDERS", ColumnMetadata.name == "AMOUNT"
+    ).one()
+
+    # 字段血缘：表级血缘已存在，复用
+    contents = _arrow_stream([{
+        "source_db_name": "ods", "source_table_name": "orders", "source_column_name": "amount",
+        "target_db_name": "ods", "target_table_name": "ORDERS_DW", "target_column_name": "AMOUNT",
+        "transformation_logic": "sum"
+    }])
+    result = ColumnarImportService.import_column_lineage(db_session, contents, "arrow")
+    assert result["status"] == "success"
+    assert result["result"]["lineages"]["created"] == 0
+    assert result["result"]["column_lineages"] == {"created": 1, "updated": 0}
+
+    for dataset, importer, file_format in [
+        ("table_structure", ColumnarImportService.import_table_structure, "parquet"),
+        ("table_lineage", ColumnarImportService.import_table_lineage, "arrow"),
+        ("column_lineage", ColumnarImportService.import_column_lineage, "parquet"),
+    ]:
+        result = importer(db_session, _export(db_session, dataset, file_format), file_format)
+        assert result["status"] == "success", result
+        assert result["result"]["validation_errors"] == []
+
+    assert result["result"]["column_lineages"] == {"created": 0, "updated": 1}
+    assert db_session.query(TableMetadata).count() == 2
+    assert db_session.query(ColumnMetadata).count() == 4
+    assert db_session.query(LineageRelation).count() == 1
+    column_lineage = db_session.query(ColumnLineageRelation).one()
+    assert column_lineage.source_column_id == amount_id
+    assert column_lineage.transformation_details == {"logic": "sum"}
+    lineage = db_session.query(LineageRelation).one()
+    assert lineage.source_table_ids == [orders_id]
+    assert lineage.relation_details == {"transformation_logic": "copy"}
+
+    exported = pq.read_table(pa.BufferReader(_export(db_session, "table_structure", "parquet"))).to_pylist()
+    assert [(r["table_name"], r["column_name"], r["is_primary_key"]) for r in exported] == [
+        ("ORDERS", "ID", True), ("ORDERS", "AMOUNT", False), ("ORDERS_DW", "ID", True), ("ORDERS_DW", "AMOUNT", False)
+    ]
+
+
+def test_columnar_dry_run_reports_unknown_references(db_session):
+    _setup_catalog(db_session)
+    contents = _parquet([
+        {"source_db_name": "ods", "source_table_name": "ORDERS", "target_db_name": "ods", "target_table_name": "ORDERS_DW"},
+        {"source_db_name": "ods", "source_table_name": "NOPE", "target_db_name": "ods", "target_table_name": "ORDERS_DW"},
+    ])
+
+    report = UploadValidationService.validate(db_session, "table_lineage_parquet", contents)
+
+    assert report["status"] == "invalid"
+    assert [(i["row"], i["code"]) for i in report["result"]["issues"]] == [
+        (1, "exists_in_catalog"), (2, "unknown_table")
+    ]
@@ -0,0 +1,162 @@
+import io
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import create_engine, inspect
+
+from config.settings import settings
+from models import TableMetadata, ColumnMetadata, migrate_schema
+from models.schemas import DataSourceCreate, TableMetadataCreate, ColumnMetadataUpdate
+from services.data_source_service import DataSourceService
+from services.table_metadata_service import TableMetadataService
+from services.column_metadata_service import ColumnMetadataService
+from services.columnar_import_service import ColumnarImportService
+from services.upload_import_service import UploadImportService
+
+# 测试用例：按内容哈希跳过未变化的表和血缘关系
+
+
+def _parquet(rows):
+    sink = pa.BufferOutputStream()
+    pq.write_table(pa.Table.from_pylist(rows), sink)
+    return sink.getvalue().to_pybytes()
+
+
+def _structure_rows(order_type="NUMBER"):
+    rows = []
+    for table in ["ORDERS", "CUSTOMERS"]:
+        for column, data_type in [("ID", "NUMBER"), ("TYPE", order_type if table == "ORDERS" else "VARCHAR2")]:
+            rows.append({"data_source_name": "ods", "table_name": table, "table_description": table.lower(),
+                         "column_name": column, "data_type": data_type, "is_primary_key": column == "ID"})
+    return rows
+
+
+def test_columnar_reimport_skips_unchanged_tables(db_session, monkeypatch):
+    """重复导入同一文件时不产生写操作；只有内容变化或被单独修改过的表重新写入"""
+    DataSourceService.create(db_session, DataSourceCreate(name="ods", type="oracle", connection_config={}))
+    # 每批3行，CUSTOMERS的字段跨越两个批次
+    monkeypatch.setattr(settings, "columnar_batch_size", 3)
+
+    result = ColumnarImportService.import_table_structure(db_session, _parquet(_structure_rows()), "parquet")
+    assert result["result"]["tables"]["created"] == 2
+    updated_at = dict(db_session.query(TableMetadata.name, TableMetadata.updated_at))
+
+    result = ColumnarImportService.import_table_structure(db_session, _parquet(_structure_rows()), "parquet")
+    assert result["status"] == "success"
+    assert result["result"]["tables"] == {"created": 0, "updated": 0, "skipped": 2}
+    assert result["result"]["columns"] == {"created": 0, "updated": 0, "skipped": 4}
+    assert result["result"]["skipped_count"] == 6
+    db_session.expire_all()
+    assert dict(db_session.query(TableMetadata.name, TableMetadata.updated_at)) == updated_at
+
+    # 字段类型变化的表重新写入
+    result = ColumnarImportService.import_table_structure(db_session, _parquet(_structure_rows("VARCHAR2")), "parquet")
+    assert result["result"]["columns"]["updated"] == 2 and result["result"]["columns"]["skipped"] == 2
+    assert db_session.query(ColumnMetadata).join(TableMetadata).filter(
+        TableMetadata.name == "ORDERS", ColumnMetadata.name == "TYPE"
+    ).one().data_type == "VARCHAR2"
+
+    # 通过接口单独修改字段后，所属表的哈希失效，下次导入时恢复为文件中的内容
+    column = db_session.query(ColumnMetadata).join(TableMetadata).filter(
+        TableMetadata.name == "CUSTOMERS", ColumnMetadata.name == "TYPE"
+    ).one()
+    ColumnMetadataService.update(db_session, column.id, ColumnMetadataUpdate(data_type="CLOB"))
+    result = ColumnarImportService.import_table_structure(db_session, _parquet(_structure_rows("VARCHAR2")), "parquet")
+    assert result["result"]["columns"]["updated"] == 2 and result["result"]["columns"]["skipped"] == 2
+    db_session.refresh(column)
+    assert column.data_type == "VARCHAR2"
+
+
+def test_excel_table_structure_reimport_skips_unchanged_tables(db_session):
+    DataSourceService.create(db_session, DataSourceCreate(name="ods", type="oracle", connection_config={}))
+
+    def workbook(customer_type):
+        buffer = io.BytesIO()
+        with pd.ExcelWriter(buffer) as writer:
+            pd.DataFrame([
+                {"data_source_name": "ods", "name": "ORDERS", "description": "订单"},
+                {"data_source_name": "ods", "name": "CUSTOMERS", "description": "客户"},
+            ]).to_excel(writer, sheet_name="tables", index=False)
+            pd.DataFrame([
+                {"data_source_name": "ods", "table_name": "ORDERS", "name": "ID", "data_type": "NUMBER"},
+                {"data_source_name": "ods", "table_name": "CUSTOMERS", "name": "TYPE", "data_type": customer_type},
+            ]).to_excel(writer, sheet_name="columns", index=False)
+        return buffer.getvalue()
+
+    UploadImportService.import_table_structure_excel(db_session, workbook("VARCHAR2"))
+    result = UploadImportService.import_table_structure_excel(db_session, workbook("CHAR"))
+
+    assert result["result"]["tables"] == {"created": 0, "updated": 1, "skipped": 1}
+    assert result["result"]["columns"] == {"created": 0, "updated": 1, "skipped": 1}
+    assert db_session.query(ColumnMetadata).filter(ColumnMetadata.name == "TYPE").one().data_type == "CHAR"
+    assert db_session.query(TableMetadata).filter(TableMetadata.content_hash.is_(None)).count() == 0
+
+
+def test_migrate_schema_adds_content_hash_columns():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE table_metadata (id INTEGER PRIMARY KEY, name VARCHAR(200))")
+
+    migrate_schema(engine)
+    migrate_schema(engine)
+
+    assert "content_hash" in {c["name"] for c in inspect(engine).get_columns("table_metadata")}
+
+
+def test_excel_table_structure_failed_column_clears_table_hash(db_session):
+    """有字段写入失败的表不记录内容哈希，修正文件后重新导入时不会被当作未变化而跳过"""
+    DataSourceService.create(db_session, DataSourceCreate(name="ods", type="oracle", connection_config={}))
+
+    def workbook(amount_type):
+        buffer = io.BytesIO()
+        with pd.ExcelWriter(buffer) as writer:
+            pd.DataFrame([
+                {"data_source_name": "ods", "name": "ORDERS", "description": "订单"},
+                {"data_source_name": "ods", "name": "CUSTOMERS", "description": "客户"},
+            ]).to_excel(writer, sheet_name="tables", index=False)
+            pd.DataFrame([
+                {"data_source_name": "ods", "table_name": "ORDERS", "name": "ID", "data_type": "NUMBER"},
+                {"data_source_name": "ods", "table_name": "ORDERS", "name": "AMOUNT", "data_type": amount_type},
+                {"data_source_name": "ods", "table_name": "CUSTOMERS", "name": "ID", "data_type": "NUMBER"},
+            ]).to_excel(writer, sheet_name="columns", index=False)
+        return buffer.getvalue()
+
+    # 类型超过长度限制，该字段写入失败
+    result = UploadImportService.import_table_structure_excel(db_session, workbook("N" * 60))
+    assert result["status"] == "partial_success"
+    assert result["result"]["columns"]["created"] == 2
+    hashes = dict(db_session.query(TableMetadata.name, TableMetadata.content_hash))
+    assert hashes["ORDERS"] is None and hashes["CUSTOMERS"] is not None
+
+    result = UploadImportService.import_table_structure_excel(db_session, workbook("NUMBER"))
+    assert result["status"] == "success"
+    assert result["result"]["tables"] == {"created": 0, "updated": 1, "skipped": 1}
+    assert db_session.query(ColumnMetadata).filter(ColumnMetadata.name == "AMOUNT").count() == 1
+
+
+def test_excel_columns_import_clears_table_hash_once(db_session, monkeypatch):
+    """只导入字段时清除所属表的内容哈希，每张表只清除一次"""
+    DataSourceService.create(db_session, DataSourceCreate(name="ods", type="oracle", connection_config={}))
+    table = TableMetadataService.create(db_session, TableMetadataCreate(
+        data_source_id=DataSourceService.get_by_name(db_session, "ods").id, name="ORDERS"))
+    table.content_hash = "stale"
+    db_session.commit()
+
+    cleared = []
+    invalidate = TableMetadataService.invalidate_content_hash
+    monkeypatch.setattr(TableMetadataService, "invalidate_content_hash",
+                        staticmethod(lambda db, table_id: (cleared.append(table_id), invalidate(db, table_id))))
+
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer) as writer:
+        pd.DataFrame([
+            {"data_source_name": "ods", "table_name": "ORDERS", "name": name, "data_type": "NUMBER"}
+            for name in ["ID", "AMOUNT", "STATUS"]
+        ]).to_excel(writer, sheet_name="columns", index=False)
+    result = UploadImportService.import_excel(db_session, buffer.getvalue())
+
+    assert result["result"]["columns"]["created"] == 3
+    assert cleared == [table.id]
+    db_session.refresh(table)
+    assert table.content_hash is None
@@ -0,0 +1,37 @@
+from datetime import datetime
+
+import pytest
+
+from utils.cron_utils import CronSchedule
+
+# 测试用例：cron表达式解析和下一次触发时间
+
+
+def test_next_after_steps_ranges_and_aliases():
+    assert CronSchedule("*/15 * * * *").next_after(datetime(2024, 1, 1, 10, 7, 30)) == datetime(2024, 1, 1, 10, 15)
+    # 不含当前时刻
+    assert CronSchedule("0 2 * * *").next_after(datetime(2024, 1, 1, 2, 0)) == datetime(2024, 1, 2, 2, 0)
+    assert CronSchedule("30 8-18/5 * * *").next_after(datetime(2024, 1, 1, 13, 31)) == datetime(2024, 1, 1, 18, 30)
+    assert CronSchedule("@monthly").next_after(datetime(2024, 12, 15)) == datetime(2025, 1, 1)
+    # 2024-01-06是星期六，0和7都表示星期日
+    assert CronSchedule("0 0 * * 0").next_after(datetime(2024, 1, 6, 12)) == datetime(2024, 1, 7)
+    assert CronSchedule("0 0 * * 7").next_after(datetime(2024, 1, 6, 12)) == datetime(2024, 1, 7)
+
+
+def test_day_of_month_or_day_of_week():
+    """日和星期都有限制时满足其一即触发"""
+    schedule = CronSchedule("0 0 15 * 1")
+    # 2024-01-08是星期一，早于15日
+    assert schedule.next_after(datetime(2024, 1, 2)) == datetime(2024, 1, 8)
+    assert CronSchedule("0 0 29 2 *").next_after(datetime(2024, 3, 1)) == datetime(2028, 2, 29)
+
+
+@pytest.mark.parametrize("expression", ["* * * *", "60 * * * *", "a * * * *", "*/0 * * * *", "5-1 * * * *"])
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression)
+
+
+def test_never_firing_expression():
+    with pytest.raises(ValueError):
+        CronSchedule("0 0 30 2 *").next_after(datetime(2024, 1, 1))
@@ -0,0 +1,76 @@
+import sys
+
+from config.settings import settings
+from utils.es_mapping_utils import (
+    flatten_mapping_properties, index_selected, normalize_patterns, mapping_hash, collapse_time_series
+)
+
+# 测试用例：Elasticsearch映射展开、索引筛选和时间序列索引合并
+
+
+def test_flatten_mapping_properties_keeps_definition_order():
+    properties = {
+        "message": {"type": "text", "analyzer": "ik_max_word", "fields": {"keyword": {"type": "keyword"}}},
+        "user": {"properties": {
+            "name": {"type": "keyword"},
+            "address": {"type": "nested", "properties": {"city": {"type": "keyword"}}}
+        }},
+        "@timestamp": {"type": "date", "format": "strict_date_optional_time"}
+    }
+
+    fields = flatten_mapping_properties(properties)
+
+    assert [(f["name"], f["type"]) for f in fields] == [
+        ("message", "text"), ("message.keyword", "keyword"), ("user.name", "keyword"),
+        ("user.address.city", "keyword"), ("@timestamp", "date")
+    ]
+    assert fields[0]["analyzer"] == "ik_max_word" and "multi_field" not in fields[0]
+    assert fields[1]["multi_field"] is True
+    assert fields[4]["format"] == "strict_date_optional_time"
+
+
+def test_flatten_mapping_properties_beyond_recursion_limit():
+    depth = sys.getrecursionlimit() + 100
+    properties = leaf = {}
+    for level in range(depth):
+        leaf["f"] = {"properties": {}}
+        leaf = leaf["f"]["properties"]
+    leaf["value"] = {"type": "long"}
+
+    fields = flatten_mapping_properties(properties)
+
+    assert len(fields) == 1
+    assert fields[0]["name"] == ".".join(["f"] * depth + ["value"])
+
+
+def test_index_selected():
+    include, exclude = normalize_patterns("logs-*, metrics-*"), normalize_patterns(["logs-debug-*"])
+
+    assert index_selected("logs-2024.01.01", include, exclude)
+    assert not index_selected("logs-debug-2024.01.01", include, exclude)
+    assert not index_selected("orders", include, exclude)
+    # 未指定包含的通配符时跳过系统索引
+    assert index_selected("orders", [], [])
+    assert not index_selected(".kibana", [], [])
+
+
+def test_collapse_time_series_groups_by_prefix_and_mapping():
+    v1 = mapping_hash({"properties": {"msg": {"type": "text"}, "level": {"type": "keyword"}}})
+    # 键的顺序不影响哈希
+    assert v1 == mapping_hash({"properties": {"level": {"type": "keyword"}, "msg": {"type": "text"}}})
+    v2 = mapping_hash({"properties": {"msg": {"type": "text"}}})
+    index_hashes = {
+        "logs-2024.01.01": v1, "logs-2024.01.02": v1, "logs-2024.01.03": v2,
+        "metrics_202401": v1, "orders": v1,
+    }
+
+    groups = collapse_time_series(index_hashes, settings.es_time_series_suffix)
+
+    assert [(g["name"], g["indices"], g["collapsed"]) for g in groups] == [
+        # 最新的索引使用新映射，旧映射的一组名称后加哈希前缀
+        ("logs-*", ["logs-2024.01.03"], True),
+        (f"logs-*#{v1[:8]}", ["logs-2024.01.01", "logs-2024.01.02"], True),
+        ("metrics_*", ["metrics_202401"], True),
+        ("orders", ["orders"], False),
+    ]
+    assert [g["name"] for g in collapse_time_series(index_hashes, "")] == sorted(index_hashes)
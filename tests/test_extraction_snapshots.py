@@ -0,0 +1,91 @@
+import os
+from datetime import datetime
+
+import pytest
+
+from config.settings import settings
+from services.extraction_snapshot_service import ExtractionSnapshotService
+from utils import snapshot_utils
+from utils.snapshot_utils import iter_snapshot, resolve_codec, write_snapshot
+
+# 测试用例：提取快照的写入、重新读取和保留策略
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "extraction_snapshot_dir", str(tmp_path))
+    return tmp_path
+
+
+def _stream(failed):
+    """模拟流式提取：失败的集合在迭代过程中才被记录"""
+    metadata = {"incremental": False, "watermark": datetime(2024, 1, 1, 2, 0), "failed_tables": failed}
+
+    def tables():
+        for index in range(5):
+            if index == 4:
+                failed.append(("app", "broken"))
+            yield {"schema": "app", "name": f"t{index}", "columns": [{"name": "id", "type": "int"}]}
+
+    metadata["tables"] = tables()
+    return metadata
+
+
+def test_snapshot_round_trip_and_gzip_fallback(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot_utils, "_zstandard", lambda: None)
+    assert resolve_codec("zstd") == "gzip"
+
+    path = str(tmp_path / "s.ndjson.gz")
+    tables = [{"name": "a", "analyzed_at": datetime(2024, 5, 1, 8, 30)}, {"name": "b"}]
+    assert write_snapshot(path, {"id": "x"}, iter(tables), {"watermark": datetime(2024, 5, 2)}, "gzip") == 2
+
+    header, rows, trailer = iter_snapshot(path)
+    assert header["id"] == "x"
+    assert trailer == {}
+    assert list(rows) == tables
+    assert trailer == {"table_count": 2, "watermark": datetime(2024, 5, 2)}
+
+
+def test_record_completes_snapshot_when_import_stops_early(snapshot_dir):
+    """导入中途停止时仍取完提取结果，重新读取得到完整的表和尾信息"""
+    metadata = ExtractionSnapshotService.record(7, "MONGODB", _stream([]))
+    tables = metadata["tables"]
+    assert next(tables)["name"] == "t0"
+    tables.close()
+
+    snapshots = ExtractionSnapshotService.list_snapshots(7)
+    assert len(snapshots) == 1
+    assert not any(name.endswith(".tmp") for name in os.listdir(snapshot_dir / "7"))
+
+    replayed = ExtractionSnapshotService.load(7)
+    assert replayed["snapshot_id"] == snapshots[0]["id"]
+    assert replayed["watermark"] == datetime(2024, 1, 1, 2, 0)
+    assert [table["name"] for table in replayed["tables"]] == [f"t{index}" for index in range(5)]
+    assert replayed["failed_tables"] == [["app", "broken"]]
+
+    with pytest.raises(FileNotFoundError):
+        ExtractionSnapshotService.load(8, snapshots[0]["id"])
+    with pytest.raises(ValueError):
+        ExtractionSnapshotService.load(7, "../../etc/passwd")
+
+
+def test_failed_extraction_leaves_no_snapshot(snapshot_dir):
+    def failing():
+        yield {"name": "t0"}
+        raise RuntimeError("连接中断")
+
+    metadata = ExtractionSnapshotService.record(7, "ORACLE", {"tables": failing()})
+    with pytest.raises(RuntimeError):
+        list(metadata["tables"])
+    assert ExtractionSnapshotService.list_snapshots(7) == []
+    assert os.listdir(snapshot_dir / "7") == []
+
+
+def test_retention_keeps_latest_snapshots(snapshot_dir, monkeypatch):
+    monkeypatch.setattr(settings, "extraction_snapshot_retention", 2)
+    for _ in range(4):
+        list(ExtractionSnapshotService.record(7, "ORACLE", _stream([]))["tables"])
+
+    snapshots = ExtractionSnapshotService.list_snapshots(7)
+    assert len(snapshots) == 2
+    assert snapshots[0]["id"] > snapshots[1]["id"]
@@ -0,0 +1,37 @@
+import io
+
+import pandas as pd
+
+from config.settings import settings
+from utils import file_processing_utils
+from utils.file_processing_utils import read_excel_sheets
+
+# 测试用例：Excel多工作表解析
+
+
+def _workbook() -> bytes:
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer) as writer:
+        pd.DataFrame({"name": ["ods", "dw"], "source_type": ["oracle", "mongodb"]}).to_excel(
+            writer, sheet_name="data_sources", index=False)
+        pd.DataFrame({"data_source_name": ["ods"] * 50, "name": [f"T{i}" for i in range(50)]}).to_excel(
+            writer, sheet_name="tables", index=False)
+        pd.DataFrame({"other": [1]}).to_excel(writer, sheet_name="notes", index=False)
+    return buffer.getvalue()
+
+
+def test_parallel_parse_matches_serial(monkeypatch):
+    """进程池并行解析的结果与依次解析一致，并保持请求的工作表顺序"""
+    contents = _workbook()
+
+    monkeypatch.setattr(settings, "excel_parse_workers", 1)
+    serial = read_excel_sheets(contents, ["tables", "data_sources", "columns"])
+
+    monkeypatch.setattr(settings, "excel_parse_workers", 2)
+    monkeypatch.setattr(settings, "excel_parallel_min_bytes", 0)
+    parallel = read_excel_sheets(contents, ["tables", "data_sources", "columns"])
+
+    assert file_processing_utils._parse_executor is not None
+    assert list(parallel) == ["tables", "data_sources"]
+    for name, df in serial.items():
+        pd.testing.assert_frame_equal(parallel[name], df)
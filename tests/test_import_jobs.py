@@ -0,0 +1,157 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+import models
+from models import DataSource, ImportJob, ImportJobStatus
+from models.schemas import DataSourceCreate
+from services.data_source_service import DataSourceService
+from services.import_job_service import ImportJobService
+from services.import_unit_of_work import ImportUnitOfWork
+
+# 测试用例：后台导入任务
+
+
+@pytest.fixture
+def job_session(tmp_path, monkeypatch):
+    """工作线程需要独立的数据库连接，使用临时文件数据库"""
+    engine = models.create_metadata_engine(
+        f"sqlite:///{tmp_path / 'jobs.db'}",
+        connect_args={"check_same_thread": False}
+    )
+    models.Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(models, "session_local", factory)
+    session = factory()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def _import_sources(db, contents, progress=None):
+    names = contents.decode().split(",")
+    with ImportUnitOfWork(db, progress=progress) as uow:
+        uow.expect_rows(len(names))
+        for name in names:
+            with uow.row():
+                DataSourceService.create(db, DataSourceCreate(name=name, type="oracle", connection_config={}), commit=False)
+    return {"status": "success", "message": f"导入{len(names)}个数据源"}
+
+
+def test_job_runs_to_completion(job_session):
+    """提交的任务在后台执行完成，并记录处理行数"""
+    job = ImportJobService.submit(job_session, "test", "sources.txt", _import_sources, "源A,源B,源C".encode())
+    assert job["file_name"] == "sources.txt"
+
+    ImportJobService._live_jobs[job["id"]].future.result(timeout=10)
+
+    finished = ImportJobService.get_job(job_session, job["id"])
+    assert finished["status"] == "succeeded"
+    assert finished["processed_rows"] == 3
+    assert finished["progress"] == 100.0
+    assert finished["result"]["status"] == "success"
+    assert job_session.query(DataSource).count() == 3
+
+
+def test_cancel_running_job_rolls_back(job_session):
+    """运行中的任务被取消后停止处理并回滚未提交的写操作"""
+    started = threading.Event()
+    proceed = threading.Event()
+
+    def blocking_import(db, contents, progress=None):
+        started.set()
+        proceed.wait(timeout=10)
+        return _import_sources(db, contents, progress=progress)
+
+    job = ImportJobService.submit(job_session, "test", "sources.txt", blocking_import, "源A,源B".encode())
+    future = ImportJobService._live_jobs[job["id"]].future
+    assert started.wait(timeout=10)
+
+    cancelled = ImportJobService.cancel_job(job_session, job["id"])
+    assert cancelled["cancel_requested"] is True
+    proceed.set()
+    future.result(timeout=10)
+
+    finished = ImportJobService.get_job(job_session, job["id"])
+    assert finished["status"] == "cancelled"
+    assert job_session.query(DataSource).count() == 0
+
+
+def test_progress_is_committed_with_imported_rows(job_session):
+    """分块提交时进度随数据一起写入任务记录，服务重启后仍可查询"""
+    committed = threading.Event()
+    proceed = threading.Event()
+
+    def chunked_import(db, contents, progress=None):
+        names = contents.decode().split(",")
+        with ImportUnitOfWork(db, commit_every=2, progress=progress) as uow:
+            uow.expect_rows(len(names))
+            for index, name in enumerate(names):
+                with uow.row():
+                    DataSourceService.create(db, DataSourceCreate(name=name, type="oracle", connection_config={}),
+                                             commit=False)
+                if index == 1:
+                    committed.set()
+                    proceed.wait(timeout=10)
+        return {"status": "success"}
+
+    job = ImportJobService.submit(job_session, "test", "sources.txt", chunked_import, "源A,源B,源C".encode())
+    future = ImportJobService._live_jobs[job["id"]].future
+    assert committed.wait(timeout=10)
+
+    reader = models.session_local()
+    try:
+        row = reader.query(ImportJob).filter(ImportJob.id == job["id"]).one()
+        assert (row.status, row.total_rows, row.processed_rows) == (ImportJobStatus.RUNNING, 3, 2)
+    finally:
+        reader.close()
+    proceed.set()
+    future.result(timeout=10)
+    assert ImportJobService.get_job(job_session, job["id"])["processed_rows"] == 3
+
+
+def test_recover_interrupted_jobs(job_session):
+    """服务重启前未结束的任务在启动时标记为失败，已结束的任务不变"""
+    for job_id, status in [("pending", ImportJobStatus.PENDING), ("running", ImportJobStatus.RUNNING),
+                           ("done", ImportJobStatus.SUCCEEDED)]:
+        job_session.add(ImportJob(id=job_id, job_type="test", status=status, errors=[], cancel_requested=0))
+    job_session.commit()
+
+    assert ImportJobService.recover_interrupted() == 2
+    job_session.expire_all()
+    statuses = {job.id: job.status for job in job_session.query(ImportJob)}
+    assert statuses == {"pending": ImportJobStatus.FAILED, "running": ImportJobStatus.FAILED,
+                        "done": ImportJobStatus.SUCCEEDED}
+    assert ImportJobService.get_job(job_session, "running")["errors"] == ["服务重启时任务被中断"]
+
+
+def test_cleanup_runs_when_job_finishes_or_is_cancelled_before_start(job_session, monkeypatch):
+    """任务结束后调用清理函数，在队列中被取消、从未开始执行的任务同样清理"""
+    monkeypatch.setattr(ImportJobService, "_executor", ThreadPoolExecutor(max_workers=1))
+    started = threading.Event()
+    proceed = threading.Event()
+    cleaned = []
+
+    def blocking_import(db, contents, progress=None):
+        started.set()
+        proceed.wait(timeout=10)
+        return _import_sources(db, contents, progress=progress)
+
+    running = ImportJobService.submit(job_session, "test", "a.txt", blocking_import, "源A".encode(),
+                                      cleanup=lambda: cleaned.append("running"))
+    future = ImportJobService._live_jobs[running["id"]].future
+    assert started.wait(timeout=10)
+    # 唯一的工作线程被占用，第二个任务留在队列中
+    queued = ImportJobService.submit(job_session, "test", "b.txt", _import_sources, "源B".encode(),
+                                     cleanup=lambda: cleaned.append("queued"))
+
+    assert ImportJobService.cancel_job(job_session, queued["id"])["status"] == "cancelled"
+    assert cleaned == ["queued"]
+    proceed.set()
+    future.result(timeout=10)
+    assert cleaned == ["queued", "running"]
+    assert ImportJobService.get_job(job_session, running["id"])["status"] == "succeeded"
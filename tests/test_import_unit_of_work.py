@@ -0,0 +1,89 @@
+import pytest
+
+from models import DataSource, TableMetadata, ColumnMetadata
+from models.schemas import DataSourceCreate, TableMetadataCreate
+from services.data_source_service import DataSourceService
+from services.table_metadata_service import TableMetadataService
+from services.import_unit_of_work import ImportUnitOfWork
+
+# 测试用例：导入工作单元
+
+
+def _source(name: str) -> DataSourceCreate:
+    return DataSourceCreate(name=name, type="oracle", connection_config={})
+
+
+def test_failed_row_is_rolled_back_alone(db_session):
+    """单行失败只回滚该行，其余行在结束时统一提交"""
+    errors = []
+    with ImportUnitOfWork(db_session) as uow:
+        for name in ["源A", "坏数据", "源B"]:
+            try:
+                with uow.row():
+                    # 写入已flush到数据库后再失败，验证保存点能撤销该行的写操作
+                    DataSourceService.create(db_session, _source(name), commit=False)
+                    if name == "坏数据":
+                        raise ValueError("行数据校验失败")
+            except ValueError as e:
+                errors.append(str(e))
+
+    assert len(errors) == 1
+    assert uow.commits == 1
+    assert uow.rows_processed == 2
+    assert uow.rows_failed == 1
+    assert sorted(ds.name for ds in db_session.query(DataSource).all()) == ["源A", "源B"]
+
+
+def test_exception_rolls_back_whole_import(db_session):
+    """未隔离的行出错时整个导入回滚，不留下半完成的数据"""
+    with pytest.raises(ValueError):
+        with ImportUnitOfWork(db_session, isolate_rows=False) as uow:
+            source = DataSourceService.create(db_session, _source("源A"), commit=False)
+            for name in ["T1", "T1"]:
+                with uow.row():
+                    TableMetadataService.create(db_session, TableMetadataCreate(
+                        name=name,
+                        data_source_id=source.id,
+                        columns=[{"name": "ID", "data_type": "NUMBER", "is_primary_key": True}]
+                    ), commit=False)
+
+    assert db_session.query(DataSource).count() == 0
+    assert db_session.query(TableMetadata).count() == 0
+    assert db_session.query(ColumnMetadata).count() == 0
+
+
+def test_commit_every_splits_transaction(db_session):
+    """配置commit_every后按块提交"""
+    with ImportUnitOfWork(db_session, commit_every=2) as uow:
+        for i in range(5):
+            with uow.row():
+                DataSourceService.create(db_session, _source(f"源{i}"), commit=False)
+
+    # 每2行提交一次，结束时再提交剩余的1行
+    assert uow.commits == 3
+    assert db_session.query(DataSource).count() == 5
+
+
+def test_table_structure_json_keeps_rows_around_a_bad_row(db_session):
+    """表结构导入逐行使用保存点，一行出错只回滚该行并记入validation_errors"""
+    import json
+    from services.upload_import_service import UploadImportService
+
+    DataSourceService.create(db_session, _source("ods"))
+    contents = json.dumps({
+        "tables": [{"data_source_name": "ods", "name": "ORDERS"}],
+        "columns": [
+            {"data_source_name": "ods", "table_name": "ORDERS", "name": "ID", "data_type": "NUMBER"},
+            # 缺少data_type
+            {"data_source_name": "ods", "table_name": "ORDERS", "name": "AMOUNT"},
+            {"data_source_name": "ods", "table_name": "ORDERS", "name": "CREATED", "data_type": "DATE"}
+        ]
+    }).encode()
+
+    result = UploadImportService.import_table_structure_json(db_session, contents)
+
+    assert result["status"] == "partial_success"
+    assert result["result"]["columns"]["created"] == 2
+    assert len(result["result"]["validation_errors"]) == 1
+    assert "第 2 条字段数据" in result["result"]["validation_errors"][0]
+    assert sorted(name for (name,) in db_session.query(ColumnMetadata.name)) == ["CREATED", "ID"]
@@ -0,0 +1,68 @@
+import io
+import json
+
+import pytest
+
+from config.settings import settings
+from models import LineageRelation
+from models.schemas import DataSourceCreate, TableMetadataCreate
+from services.data_source_service import DataSourceService
+from services.table_metadata_service import TableMetadataService
+from services.upload_import_service import UploadImportService
+from utils.json_stream_utils import JsonStructureError, iter_bytes, iter_json_array, iter_ndjson
+
+# 测试用例：JSON/NDJSON流式解析
+
+
+def test_iter_json_array_across_chunk_boundaries():
+    """任意分块大小下的解析结果与json.loads一致，包括被截断的数字和多字节字符"""
+    items = [{"name": "订单", "n": 12345}, 1.5e-10, -7, "x\"]", None, [True, {"k": []}]]
+    contents = json.dumps({"meta": {"lineages": "not this one"}, "lineages": items, "tail": 1},
+                          ensure_ascii=False, indent=2).encode()
+
+    for block_size in (1, 2, 3, 7, 64):
+        assert list(iter_json_array(iter_bytes(contents, block_size), "lineages")) == items
+        ndjson = "\n".join(json.dumps(i, ensure_ascii=False) for i in items).encode()
+        assert list(iter_ndjson(iter_bytes(ndjson, block_size))) == items
+
+
+def test_iter_json_array_errors():
+    with pytest.raises(JsonStructureError, match="缺少必要的lineages字段"):
+        list(iter_json_array(iter_bytes(b'{"other": []}', 4), "lineages"))
+    with pytest.raises(JsonStructureError, match="必须是数组格式"):
+        list(iter_json_array(iter_bytes(b'{"lineages": {}}', 4), "lineages"))
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array(iter_bytes(b'{"lineages": [{"a": 1} {"a": 2}]}', 4), "lineages"))
+    with pytest.raises(json.JSONDecodeError, match="第2行"):
+        list(iter_ndjson(iter_bytes(b'{"a": 1}\n{"a": \n', 4)))
+
+
+def test_lineage_json_import_is_processed_in_chunks(db_session, monkeypatch):
+    """分批解析和处理：后面批次复用前面批次新建的血缘关系，文件对象按块读取"""
+    monkeypatch.setattr(settings, "json_stream_block_size", 16)
+    monkeypatch.setattr(settings, "json_stream_chunk_size", 2)
+    source = DataSourceService.create(db_session, DataSourceCreate(name="ods", type="oracle", connection_config={}))
+    for name in ["A", "B", "C"]:
+        TableMetadataService.create(db_session, TableMetadataCreate(name=name, data_source_id=source.id))
+
+    def lineage(source_table, target_table):
+        return {"source_db_name": "ods", "source_table_name": source_table,
+                "target_db_name": "ods", "target_table_name": target_table, "relation_type": "ETL"}
+
+    lineages = [lineage("A", "B"), lineage("B", "C"), lineage("MISSING", "C"), lineage("A", "B")]
+    result = UploadImportService.import_table_lineage_json(
+        db_session, io.BytesIO(json.dumps({"lineages": lineages}).encode())
+    )
+    assert result["status"] == "partial_success"
+    assert result["result"]["lineages"] == {"created": 2, "updated": 0, "skipped": 1}
+    assert result["result"]["validation_errors"] == ["第 3 条血缘关系数据: 源表不存在: MISSING 于数据库 ods"]
+
+    lineages[1]["description"] = "changed"
+    ndjson = "\n".join(json.dumps(l) for l in lineages[:2]).encode()
+    result = UploadImportService.import_table_lineage_ndjson(db_session, ndjson)
+    assert result["result"]["lineages"] == {"created": 0, "updated": 1, "skipped": 1}
+    assert db_session.query(LineageRelation).count() == 2
+
+    result = UploadImportService.import_table_lineage_json(db_session, b'{"items": []}')
+    assert result["status"] == "error"
+    assert result["result"]["validation_errors"] == ["JSON文件缺少必要的lineages字段"]
@@ -0,0 +1,79 @@
+import json
+
+from models import LineageRelation, ColumnLineageRelation
+from models.schemas import DataSourceCreate, TableMetadataCreate, LineageRelationCreate
+from services.data_source_service import DataSourceService
+from services.table_metadata_service import TableMetadataService
+from services.lineage_service import LineageService
+from services.lineage_resolution_index import LineageResolutionIndex
+from services.upload_import_service import UploadImportService
+
+# 测试用例：血缘导入名称解析索引
+
+
+def _setup_catalog(db):
+    source = DataSourceService.create(db, DataSourceCreate(name="ods", type="oracle", connection_config={}))
+    tables = {}
+    for name in ["ORDERS", "ORDERS_DW", "CUSTOMERS"]:
+        tables[name] = TableMetadataService.create(db, TableMetadataCreate(
+            name=name,
+            schema_name="SALES",
+            data_source_id=source.id,
+            columns=[
+                {"name": "ID", "data_type": "NUMBER", "is_primary_key": True},
+                {"name": "AMOUNT", "data_type": "NUMBER"}
+            ]
+        ))
+    return source, tables
+
+
+def _row(source_table, target_table, **extra):
+    row = {
+        "source_db_name": "ods", "source_table_name": source_table,
+        "target_db_name": "ods", "target_table_name": target_table
+    }
+    row.update(extra)
+    return row
+
+
+def test_index_resolves_names_case_insensitively(db_session):
+    """表名和字段名大小写不敏感，已有的多源血缘关系可按单个源表匹配"""
+    source, tables = _setup_catalog(db_session)
+    lineage = LineageService.create_table_lineage(db_session, LineageRelationCreate(
+        source_table_ids=[tables["ORDERS"].id, tables["CUSTOMERS"].id],
+        target_table_id=tables["ORDERS_DW"].id,
+        relation_type="ETL"
+    ))
+
+    index = LineageResolutionIndex.build(
+        db_session,
+        [_row("orders", "orders_dw", source_column_name="amount", target_column_name="Amount")],
+        include_columns=True
+    )
+
+    assert index.data_source_id("ods") == source.id
+    assert index.data_source_id("missing") is None
+    assert index.table_id(source.id, "orders") == tables["ORDERS"].id
+    assert index.table_id(source.id, "ORDERS", schema_name="sales") == tables["ORDERS"].id
+    assert index.table_id(source.id, float("nan")) is None
+    assert index.column_id(tables["ORDERS_DW"].id, "AMOUNT") is not None
+    assert index.table_lineage_id([tables["CUSTOMERS"].id, tables["ORDERS"].id], tables["ORDERS_DW"].id) == lineage.id
+    assert index.table_lineage_id([tables["ORDERS"].id], tables["ORDERS_DW"].id) == lineage.id
+    assert index.table_lineage_id([tables["ORDERS_DW"].id], tables["ORDERS"].id) is None
+
+
+def test_column_lineage_import_reuses_created_table_lineage(db_session):
+    """同一导入中先建立的表级血缘关系被后续行复用，不会重复创建"""
+    _setup_catalog(db_session)
+    contents = json.dumps({"column_lineages": [
+        _row("ORDERS", "ORDERS_DW", source_column_name="ID", target_column_name="ID"),
+        _row("ORDERS", "ORDERS_DW", source_column_name="AMOUNT", target_column_name="AMOUNT"),
+        _row("ORDERS", "ORDERS_DW", source_column_name="MISSING", target_column_name="AMOUNT")
+    ]}).encode()
+
+    response = UploadImportService.import_column_lineage_json(db_session, contents)
+
+    assert response["result"]["column_lineages"]["created"] == 2
+    assert len(response["result"]["validation_errors"]) == 1
+    assert db_session.query(LineageRelation).count() == 1
+    assert db_session.query(ColumnLineageRelation).count() == 2
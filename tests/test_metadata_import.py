@@ -0,0 +1,60 @@
+from datetime import datetime
+
+from models import DataSource, DataSourceType, TableMetadata
+from services.metadata_import_service import MetadataImportService
+
+# 测试用例：从数据源提取结果导入元数据
+
+
+def _table(name, columns):
+    return {"schema": "ODS", "name": name, "primary_keys": [], "columns": columns}
+
+
+def _add_source(db, watermark=None):
+    source = DataSource(name="ora", type=DataSourceType.ORACLE, connection_config={}, extract_watermark=watermark)
+    db.add(source)
+    db.flush()
+    source_id = source.id
+    db.commit()
+    return source_id
+
+
+def _watermark(db, source_id):
+    db.expire_all()
+    return db.query(DataSource.extract_watermark).filter(DataSource.id == source_id).scalar()
+
+
+def test_watermark_advances_after_clean_import(db_session):
+    source_id = _add_source(db_session, datetime(2024, 1, 1))
+    stats = MetadataImportService._import_metadata_to_db(db_session, source_id, {
+        "incremental": True, "watermark": datetime(2024, 2, 1),
+        "tables": iter([_table("ORDERS", [{"name": "ID", "type": "NUMBER"}])]),
+        "table_names": [("ODS", "ORDERS")]
+    })
+    assert stats["tables_imported"] == 1
+    assert _watermark(db_session, source_id) == datetime(2024, 2, 1)
+
+
+def test_watermark_kept_when_table_import_fails(db_session):
+    """导入失败的表DDL时间早于新水位线，水位线不变才能在下次增量提取时重新扫描"""
+    source_id = _add_source(db_session, datetime(2024, 1, 1))
+    stats = MetadataImportService._import_metadata_to_db(db_session, source_id, {
+        "incremental": True, "watermark": datetime(2024, 2, 1),
+        # 缺少列类型，写入该表时出错
+        "tables": iter([_table("ORDERS", [{"name": "ID", "type": "NUMBER"}]), _table("BROKEN", [{"name": "ID"}])]),
+        "table_names": [("ODS", "ORDERS"), ("ODS", "BROKEN")]
+    })
+    assert (stats["tables_imported"], stats["tables_skipped"]) == (1, 1)
+    assert db_session.query(TableMetadata.name).filter(TableMetadata.data_source_id == source_id).all() == [("ORDERS",)]
+    assert _watermark(db_session, source_id) == datetime(2024, 1, 1)
+
+
+def test_watermark_kept_when_extraction_reports_failed_tables(db_session):
+    source_id = _add_source(db_session)
+    stats = MetadataImportService._import_metadata_to_db(db_session, source_id, {
+        "incremental": False, "watermark": datetime(2024, 2, 1),
+        "tables": iter([_table("ORDERS", [{"name": "ID", "type": "NUMBER"}])]),
+        "failed_tables": [("ODS", "EVENTS")]
+    })
+    assert stats["tables_skipped"] == 1
+    assert _watermark(db_session, source_id) is None
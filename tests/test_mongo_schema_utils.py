@@ -0,0 +1,38 @@
+from utils.mongo_schema_utils import build_schema_pipeline, columns_from_type_counts
+
+# 测试用例：MongoDB结构推断的聚合管道和结果转换
+
+
+def test_build_schema_pipeline_samples_and_expands_levels():
+    pipeline = build_schema_pipeline(500, 3)
+
+    assert pipeline[0] == {"$sample": {"size": 500}}
+    # 顶层展开之后每增加一层嵌套追加一组展开阶段
+    assert len(pipeline) - len(build_schema_pipeline(500, 1)) == 2 * 3
+    assert [stage for stage in pipeline if "$group" in stage][-1]["$group"]["_id"] == "$_id.p"
+    assert pipeline[-1] == {"$sort": {"_id": 1}}
+
+
+def test_columns_from_type_counts():
+    rows = [
+        {"_id": "_id", "n": 200, "types": [{"t": "objectId", "n": 200}]},
+        {"_id": "amount", "n": 200, "types": [{"t": "int", "n": 120}, {"t": "double", "n": 70}, {"t": "null", "n": 10}]},
+        {"_id": "code", "n": 50, "types": [{"t": "string", "n": 30}, {"t": "int", "n": 20}]},
+        {"_id": "items", "n": 100, "types": [{"t": "array", "n": 100}], "lmin": 1, "lmax": 4, "lsum": 150},
+        {"_id": "items[*].sku", "n": 100, "types": [{"t": "string", "n": 100}]},
+        {"_id": "deleted_at", "n": 20, "types": [{"t": "null", "n": 20}]},
+    ]
+
+    columns = {column["name"]: column for column in columns_from_type_counts(rows)}
+
+    assert columns["amount"]["type"] == "number"
+    assert list(columns["amount"]["type_counts"]) == ["int", "double", "null"]
+    assert columns["amount"]["description"] == "字段类型: int(120), double(70), null(10)"
+    assert columns["code"]["type"] == "mixed"
+    assert columns["code"]["frequency"] == 0.25
+    assert columns["items[*].sku"]["type"] == "string"
+    assert (columns["items"]["array_min_length"], columns["items"]["array_avg_length"]) == (1, 1.5)
+    assert columns["amount"]["null_ratio"] == 0.05
+    assert columns["deleted_at"]["type"] == "null"
+    assert columns["_id"]["type"] == "objectId"
+    assert columns_from_type_counts([]) == []
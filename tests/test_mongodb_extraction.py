@@ -0,0 +1,108 @@
+import threading
+
+from pymongo import _csot
+from pymongo.errors import ExecutionTimeout
+
+from core.metadata_extractor import MetadataExtractor
+
+# 测试用例：MongoDB元数据并行提取（按集合超时、失败的集合单独记录）
+
+
+class FakeCollection:
+    def __init__(self, client, db_name, name):
+        self.client = client
+        self.database = type("FakeDatabase", (), {"name": db_name})()
+        self.name = name
+
+    def _record(self):
+        # 记录每个操作生效的超时时间和剩余时间
+        with self.client.lock:
+            self.client.timeouts.append((self.database.name, self.name, _csot.get_timeout(), _csot.remaining()))
+
+    def estimated_document_count(self):
+        self._record()
+        return 100
+
+    def count_documents(self, filter):
+        self._record()
+        return 42
+
+    def aggregate(self, pipeline, allowDiskUse=False):
+        self._record()
+        if (self.database.name, self.name) in self.client.slow:
+            # 模拟超过时间限制的操作：等到截止时间后由驱动抛出超时
+            threading.Event().wait(max(_csot.remaining(), 0))
+            raise ExecutionTimeout("operation exceeded time limit")
+        return iter([{"_id": "_id", "n": 10, "types": [{"t": "objectId", "n": 10}]}])
+
+
+class FakeDatabase:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+    def list_collection_names(self):
+        return list(self.client.databases[self.name])
+
+    def __getitem__(self, name):
+        return FakeCollection(self.client, self.name, name)
+
+
+class FakeMongoClient:
+    def __init__(self, databases, slow=()):
+        self.databases = databases
+        self.slow = set(slow)
+        self.timeouts = []
+        self.lock = threading.Lock()
+
+    def list_database_names(self):
+        return list(self.databases)
+
+    def __getitem__(self, name):
+        return FakeDatabase(self, name)
+
+
+def _client(slow=()):
+    return FakeMongoClient({
+        "shop": ["orders", "customers", "system.views"],
+        "admin": ["system.users"],
+        "logs": ["events"],
+    }, slow=slow)
+
+
+def test_slow_collection_times_out_without_affecting_others():
+    """超时的集合记录在failed_tables和errors中，其他集合按(数据库, 集合)的顺序生成"""
+    client = _client(slow=[("shop", "customers")])
+    metadata = MetadataExtractor._extract_mongodb_metadata(
+        client, {"collection_timeout_ms": 200, "extract_workers": 2}
+    )
+    tables = list(metadata["tables"])
+
+    assert [(t["schema"], t["name"]) for t in tables] == [("logs", "events"), ("shop", "orders")]
+    assert tables[0]["row_count"] == 100 and tables[0]["primary_keys"] == ["_id"]
+    assert metadata["failed_tables"] == [("shop", "customers")]
+    assert metadata["errors"][0]["name"] == "customers"
+    assert "time limit" in metadata["errors"][0]["error"]
+    # 每个集合的操作都在各自的时间限制内执行，慢集合不占用其他集合的时间
+    assert {timeout for _, _, timeout, _ in client.timeouts} == {0.2}
+    assert all(remaining > 0 for db_name, name, _, remaining in client.timeouts if name != "customers")
+
+
+def test_failed_tables_are_complete_after_iteration_and_exact_count():
+    client = _client(slow=[("logs", "events"), ("shop", "orders")])
+    metadata = MetadataExtractor._extract_mongodb_metadata(
+        client, {"collection_timeout_ms": 50, "extract_workers": 4, "exact_count": True}
+    )
+    # failed_tables在迭代过程中填充
+    assert metadata["failed_tables"] == []
+    tables = list(metadata["tables"])
+
+    assert [(t["name"], t["row_count"]) for t in tables] == [("customers", 42)]
+    assert metadata["failed_tables"] == [("logs", "events"), ("shop", "orders")]
+    # 超时只在各集合的提取期间生效
+    assert _csot.get_timeout() is None
+
+
+def test_no_collections_yields_nothing():
+    metadata = MetadataExtractor._extract_mongodb_metadata(FakeMongoClient({"admin": ["system.users"]}), {})
+    assert list(metadata["tables"]) == [] and metadata["failed_tables"] == []
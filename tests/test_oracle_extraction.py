@@ -0,0 +1,359 @@
+import threading
+from datetime import datetime
+
+import pytest
+
+from core.connection_factory import ConnectionFactory
+from core.metadata_extractor import MetadataExtractor, _TableRowGroups, _ordered_results, _ordered_streams
+from models import DataSource, DataSourceType, TableMetadata, ColumnMetadata
+from services.metadata_import_service import MetadataImportService
+
+# 测试用例：Oracle元数据提取（按表归并、会话池并行提取、增量提取）
+
+NOW = datetime(2024, 3, 1, 12, 0)
+
+
+def _binary_key(owner, table_name):
+    # NLSSORT(..., 'NLS_SORT=BINARY')按数据库字符集（AL32UTF8）的字节排序
+    return owner.encode("utf-8"), table_name.encode("utf-8")
+
+
+class FakeOracle:
+    """
+    按表结构模拟Oracle数据字典，只识别提取器发出的几类查询
+
+    tables: (owner, table_name)到{"columns": [(列名, 类型)], "pks": [...], "ddl": 时间, "listed": 是否出现在all_tables中}
+    """
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.queries = []
+        self.fetch_sizes = []
+        self.lock = threading.Lock()
+
+    def rows(self, sql, binds):
+        owners = [value for name, value in binds.items() if name.startswith("owner_")]
+        since = binds.get("since")
+
+        def selected(key, table, require_listed=True):
+            if owners and key[0] not in owners:
+                return False
+            if not owners and key[0] == "SYS":
+                return False
+            if since is not None and table["ddl"] < since:
+                return False
+            return table.get("listed", True) or not require_listed
+
+        ordered = sorted(self.tables.items(), key=lambda item: _binary_key(*item[0]))
+        if "SYSDATE" in sql:
+            return [(NOW,)]
+        if "DISTINCT t.owner" in sql:
+            # 不保证顺序
+            return [(owner,) for owner in sorted({key[0] for key in self.tables if key[0] != "SYS"}, reverse=True)]
+        if "all_tab_columns" in sql:
+            return [
+                (key[0], key[1], column, column_type, 22, None, None, "N" if column in table.get("pks", []) else "Y",
+                 position, None)
+                for key, table in ordered if selected(key, table, require_listed=False)
+                for position, (column, column_type) in enumerate(table["columns"], start=1)
+            ]
+        if "all_constraints" in sql:
+            return [(key[0], key[1], column) for key, table in ordered if selected(key, table, require_listed=False)
+                    for column in table.get("pks", [])]
+        if "tablespace_name" in sql:
+            return [(key[0], key[1], "USERS", 10, None) for key, table in ordered if selected(key, table)]
+        # 只列出表名，不要求顺序
+        return [key for key, table in reversed(ordered) if selected(key, table)]
+
+
+class FakeCursor:
+    def __init__(self, database):
+        self.database = database
+        self.arraysize = 100
+        self.prefetchrows = 2
+        self._rows = []
+
+    def execute(self, sql, binds=None):
+        with self.database.lock:
+            self.database.queries.append((sql, dict(binds or {}), self.arraysize, self.prefetchrows))
+        self._rows = list(self.database.rows(sql, binds or {}))
+
+    def fetchmany(self, size):
+        with self.database.lock:
+            self.database.fetch_sizes.append(size)
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def close(self):
+        pass
+
+
+class FakePool:
+    def __init__(self, database):
+        self.database = database
+        self.acquired = 0
+        self.released = 0
+
+    def acquire(self):
+        self.acquired += 1
+        connection = type("FakeConnection", (), {})()
+        connection.cursor = lambda: FakeCursor(self.database)
+        return connection
+
+    def release(self, connection):
+        self.released += 1
+
+
+def _table(columns, pks=(), ddl=datetime(2024, 1, 1), listed=True):
+    return {"columns": columns, "pks": list(pks), "ddl": ddl, "listed": listed}
+
+
+@pytest.fixture
+def database():
+    return FakeOracle({
+        # 二进制排序下大写字母、下划线、小写字母依次排列，与语言排序不同
+        ("HR", "EMP_2"): _table([("ID", "NUMBER")]),
+        ("HR", "EMPLOYEES"): _table([("ID", "NUMBER"), ("NAME", "VARCHAR2"), ("DEPT_ID", "NUMBER"),
+                                     ("HIRED", "DATE"), ("SALARY", "NUMBER")], pks=["ID"]),
+        ("HR", "audit_log"): _table([("EVENT", "VARCHAR2")]),
+        ("APP", "ORDERS"): _table([("ORDER_ID", "NUMBER"), ("LINE_NO", "NUMBER"), ("AMOUNT", "NUMBER")],
+                                  pks=["ORDER_ID", "LINE_NO"]),
+        # 没有字段和主键的表
+        ("APP", "EMPTY"): _table([]),
+        # 查询字段时已存在、查询表时尚未出现的表
+        ("APP", "NEW_TABLE"): _table([("ID", "NUMBER")], pks=["ID"], listed=False),
+        ("SYS", "OBJ$"): _table([("OBJ#", "NUMBER")]),
+    })
+
+
+def _summary(tables):
+    return [(t["schema"], t["name"], [c["name"] for c in t["columns"]], t["primary_keys"]) for t in tables]
+
+
+EXPECTED = [
+    ("APP", "EMPTY", [], []),
+    ("APP", "ORDERS", ["ORDER_ID", "LINE_NO", "AMOUNT"], ["ORDER_ID", "LINE_NO"]),
+    ("HR", "EMPLOYEES", ["ID", "NAME", "DEPT_ID", "HIRED", "SALARY"], ["ID"]),
+    ("HR", "EMP_2", ["ID"], []),
+    ("HR", "audit_log", ["EVENT"], []),
+]
+
+
+def test_table_row_groups_skips_unknown_tables():
+    rows = [("A", "T1", 1), ("A", "T1", 2), ("A", "T2", 3), ("B", "T1", 4)]
+    groups = _TableRowGroups(iter(rows))
+    assert groups.take(("A", "T0")) == []
+    assert [row[2] for row in groups.take(("A", "T1"))] == [1, 2]
+    # A.T2没有在表清单中出现，被跳过
+    assert [row[2] for row in groups.take(("B", "T1"))] == [4]
+    assert groups.take(("C", "T1")) == []
+
+
+def test_merge_with_interleaved_owners_and_chunk_boundaries(database):
+    """三条查询按二进制顺序归并：表的字段跨越fetchmany批次、没有字段或主键的表、只出现在字段查询中的表"""
+    pool = FakePool(database)
+    metadata = MetadataExtractor._extract_oracle_metadata(
+        pool, {"arraysize": 2, "prefetchrows": 3, "extract_workers": 1}
+    )
+    tables = list(metadata["tables"])
+
+    assert _summary(tables) == EXPECTED
+    assert metadata["incremental"] is False and metadata["watermark"] == NOW
+    employees = tables[2]
+    assert [column["position"] for column in employees["columns"]] == [1, 2, 3, 4, 5]
+    assert employees["columns"][0]["nullable"] is False and employees["columns"][1]["nullable"] is True
+    # 在execute之前设置了arraysize和prefetchrows，按arraysize逐批取回
+    extraction_queries = [query for query in database.queries if "ORDER BY" in query[0]]
+    assert len(extraction_queries) == 3
+    assert all((arraysize, prefetchrows) == (2, 3) for _, _, arraysize, prefetchrows in extraction_queries)
+    assert set(database.fetch_sizes) == {2}
+    assert pool.acquired == pool.released
+
+
+def test_parallel_extraction_by_owner_keeps_order(database):
+    """按所有者在会话池中并行提取，结果顺序与单条查询一致，每个模式只查询自己的表"""
+    pool = FakePool(database)
+    metadata = MetadataExtractor._extract_oracle_metadata(pool, {"arraysize": 2, "extract_workers": 4})
+    assert _summary(metadata["tables"]) == EXPECTED
+
+    owner_binds = {tuple(sorted(binds.values())) for sql, binds, _, _ in database.queries if "ORDER BY" in sql}
+    assert owner_binds == {("APP",), ("HR",)}
+    assert pool.acquired == pool.released
+
+
+def test_serial_extraction_releases_connection_when_stopped_early(database):
+    pool = FakePool(database)
+    tables = MetadataExtractor._extract_oracle_metadata(pool, {"extract_workers": 1})["tables"]
+    next(tables)
+    tables.close()
+    assert pool.acquired == pool.released
+
+
+def test_pool_is_shared_across_extraction_options(monkeypatch):
+    """提取选项不同的数据源复用同一会话池，并发获取时只创建一个；连接目标或会话池大小不同时才创建新的会话池"""
+    created = []
+
+    def create_pool(params):
+        threading.Event().wait(0.05)
+        created.append(params)
+        return object()
+
+    monkeypatch.setattr(ConnectionFactory, "_pools", {})
+    monkeypatch.setattr(ConnectionFactory, "_create_oracle_pool", staticmethod(create_pool))
+    monkeypatch.setattr(ConnectionFactory, "_oracle_dsn",
+                        staticmethod(lambda params: f"{params.get('host')}/{params.get('service_name')}"))
+    params = {"host": "db1", "service_name": "ORCL", "user": "meta", "password": "secret"}
+
+    pools = []
+    threads = [threading.Thread(target=lambda: pools.append(ConnectionFactory.get_oracle_pool(params)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1 and all(pool is pools[0] for pool in pools)
+
+    for options in ({"owners": ["HR"]}, {"arraysize": 500, "prefetchrows": 501, "extract_workers": 8}):
+        assert ConnectionFactory.get_oracle_pool({**params, **options}) is pools[0]
+    assert len(created) == 1
+
+    ConnectionFactory.get_oracle_pool({**params, "pool_max": 16})
+    ConnectionFactory.get_oracle_pool({**params, "host": "db2"})
+    assert len(created) == 3
+
+
+def test_close_connection_closes_shared_pool(monkeypatch):
+    closed = []
+
+    class ClosablePool:
+        def close(self, force=False):
+            closed.append(force)
+
+    monkeypatch.setattr(ConnectionFactory, "_pools", {})
+    monkeypatch.setattr(ConnectionFactory, "_create_oracle_pool", staticmethod(lambda params: ClosablePool()))
+    monkeypatch.setattr(ConnectionFactory, "_oracle_dsn",
+                        staticmethod(lambda params: f"{params.get('host')}/{params.get('service_name')}"))
+    params = {"host": "db1", "service_name": "ORCL", "user": "u", "password": "p"}
+    ConnectionFactory.get_oracle_pool(params)
+
+    # 提取选项不同的连接参数对应同一个会话池
+    ConnectionFactory.close_connection("oracle", {**params, "owners": ["HR"]})
+    assert closed == [True] and ConnectionFactory._pools == {}
+
+
+def test_ordered_results_preserves_submission_order():
+    finished = []
+
+    def work(item):
+        if item == 0:
+            # 第一个任务最后完成
+            while len(finished) < 3:
+                threading.Event().wait(0.01)
+        finished.append(item)
+        return item * 10
+
+    results = [(item, future.result()) for item, future in _ordered_results(work, range(4), 4, "test")]
+    assert results == [(0, 0), (1, 10), (2, 20), (3, 30)]
+    assert finished[-1] == 0
+
+
+def test_ordered_streams_bounds_buffered_results_and_stops_early():
+    """每个元素最多缓冲buffer_size个结果，调用方提前停止时关闭各元素的迭代器，未开始的元素不再执行"""
+    produced = {}
+    closed = []
+
+    def work(item):
+        try:
+            for value in range(100):
+                produced[item] = value + 1
+                yield item, value
+        finally:
+            closed.append(item)
+
+    results = _ordered_streams(work, range(4), 2, 3, "test")
+    assert next(results) == (0, 0)
+    # 等待两个线程都因队列已满而暂停
+    for _ in range(100):
+        if produced.get(0, 0) >= 4 and produced.get(1, 0) >= 4:
+            break
+        threading.Event().wait(0.01)
+    threading.Event().wait(0.3)
+    # 队列中的3个结果、阻塞在放入队列时的1个，以及元素0已被取走的1个
+    assert produced[0] <= 5 and produced[1] <= 4
+    results.close()
+    assert sorted(closed) == [0, 1]
+    assert set(produced) == {0, 1}
+
+
+def test_ordered_streams_yields_in_item_order_and_raises_errors():
+    def work(item):
+        if item == 0:
+            # 第一个元素最后开始产生结果
+            threading.Event().wait(0.1)
+        yield item * 10
+        if item == 2:
+            raise ValueError("模式2提取失败")
+        yield item * 10 + 1
+
+    results = _ordered_streams(work, range(4), 4, 1, "test")
+    assert [next(results) for _ in range(5)] == [0, 1, 10, 11, 20]
+    with pytest.raises(ValueError, match="模式2提取失败"):
+        next(results)
+
+
+def test_parallel_extraction_releases_connections_when_stopped_early(database):
+    pool = FakePool(database)
+    tables = MetadataExtractor._extract_oracle_metadata(pool, {"extract_workers": 4, "extract_buffer": 1})["tables"]
+    assert next(tables)["schema"] == "APP"
+    tables.close()
+    assert pool.acquired == pool.released
+
+
+def test_incremental_extraction_filters_by_ddl_time(database):
+    """增量提取只取last_ddl_time不早于水位线的表，并列出所有表名"""
+    database.tables[("HR", "EMP_2")]["ddl"] = datetime(2024, 2, 15)
+    pool = FakePool(database)
+    metadata = MetadataExtractor._extract_oracle_metadata(pool, {"extract_workers": 1}, since=datetime(2024, 2, 1))
+
+    assert metadata["incremental"] is True
+    assert _summary(metadata["tables"]) == [("HR", "EMP_2", ["ID"], [])]
+    assert sorted(metadata["table_names"]) == sorted(
+        [("APP", "EMPTY"), ("APP", "ORDERS"), ("HR", "EMPLOYEES"), ("HR", "EMP_2"), ("HR", "audit_log")]
+    )
+    assert all(binds.get("since") == datetime(2024, 2, 1) for sql, binds, _, _ in database.queries
+               if "ORDER BY" in sql)
+
+
+def test_incremental_import_updates_changed_and_deletes_dropped_tables(db_session, database):
+    """增量导入：修改过的表被更新，未变化的表保持不变，数据源中已删除的表被删除"""
+    source = DataSource(name="ora", type=DataSourceType.ORACLE, connection_config={})
+    db_session.add(source)
+    db_session.flush()
+    source_id = source.id
+    db_session.commit()
+    pool = FakePool(database)
+
+    full = MetadataExtractor._extract_oracle_metadata(pool, {"extract_workers": 1})
+    assert MetadataImportService._import_metadata_to_db(db_session, source_id, full)["tables_imported"] == 5
+
+    del database.tables[("HR", "audit_log")]
+    database.tables[("APP", "ORDERS")] = _table([("ORDER_ID", "NUMBER"), ("AMOUNT", "NUMBER")], pks=["ORDER_ID"],
+                                                ddl=datetime(2024, 2, 15))
+    incremental = MetadataExtractor._extract_oracle_metadata(pool, {"extract_workers": 1}, since=datetime(2024, 2, 1))
+    stats = MetadataImportService._import_metadata_to_db(db_session, source_id, incremental)
+
+    assert (stats["tables_updated"], stats["tables_unchanged"], stats["tables_deleted"]) == (1, 3, 1)
+    assert stats["columns_deleted"] == 1
+    names = {name for (name,) in db_session.query(TableMetadata.name).filter(TableMetadata.data_source_id == source_id)}
+    assert names == {"EMPTY", "ORDERS", "EMPLOYEES", "EMP_2"}
+    orders_columns = db_session.query(ColumnMetadata.name).join(
+        TableMetadata, ColumnMetadata.table_id == TableMetadata.id
+    ).filter(TableMetadata.name == "ORDERS").all()
+    assert sorted(name for (name,) in orders_columns) == ["AMOUNT", "ORDER_ID"]
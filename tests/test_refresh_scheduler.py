@@ -0,0 +1,113 @@
+import threading
+from datetime import datetime
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+import models
+from config.settings import settings
+from models import DataSource, DataSourceType, RefreshRun
+from services.refresh_scheduler_service import RefreshSchedulerService
+
+# 测试用例：数据源元数据定时刷新
+
+
+@pytest.fixture
+def refresh_session(tmp_path, monkeypatch):
+    """刷新在工作线程中执行，使用临时文件数据库；不启动调度线程，由测试直接调用tick"""
+    engine = models.create_metadata_engine(
+        f"sqlite:///{tmp_path / 'refresh.db'}",
+        connect_args={"check_same_thread": False}
+    )
+    models.Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(models, "session_local", factory)
+    monkeypatch.setattr(settings, "refresh_max_workers", 3)
+    monkeypatch.setattr(settings, "refresh_type_limits", {"oracle": 1})
+    monkeypatch.setattr(settings, "refresh_poll_seconds", 600)
+    # 调度线程在测试中不参与调度
+    monkeypatch.setattr(RefreshSchedulerService, "_loop", classmethod(lambda cls: None))
+    RefreshSchedulerService.start()
+    session = factory()
+    try:
+        yield session
+    finally:
+        session.close()
+        RefreshSchedulerService.stop()
+        engine.dispose()
+
+
+def _add_source(db, name, source_type, policy):
+    source = DataSource(name=name, type=source_type, connection_config={}, refresh_policy=policy)
+    db.add(source)
+    db.flush()
+    source_id = source.id
+    db.commit()
+    return source_id
+
+
+def test_parse_policy():
+    assert RefreshSchedulerService.parse_policy(None) is None
+    assert RefreshSchedulerService.parse_policy({"cron": "@daily", "jitter_seconds": 0}) == {
+        "cron": "@daily", "jitter_seconds": 0, "full_resync": False, "enabled": True
+    }
+    with pytest.raises(ValueError):
+        RefreshSchedulerService.parse_policy({"cron": "0 25 * * *"})
+    with pytest.raises(ValueError):
+        RefreshSchedulerService.parse_policy({"cron": "@daily", "interval": 60})
+    # 语法正确但不会触发
+    with pytest.raises(ValueError):
+        RefreshSchedulerService.parse_policy({"cron": "0 0 30 2 *"})
+
+
+def test_invalid_policy_does_not_block_other_sources(refresh_session):
+    """已保存的无效策略只跳过该数据源，其他数据源照常调度"""
+    broken = _add_source(refresh_session, "broken", DataSourceType.MONGODB, {"cron": "0 0 30 2 *"})
+    healthy = _add_source(refresh_session, "healthy", DataSourceType.MONGODB, {"cron": "@hourly", "jitter_seconds": 0})
+
+    assert RefreshSchedulerService.tick(datetime(2024, 1, 1, 0, 30)) == 600
+    assert set(RefreshSchedulerService._schedules) == {healthy}
+    assert broken in RefreshSchedulerService._invalid_policies
+    assert RefreshSchedulerService.next_run(healthy) == "2024-01-01T01:00:00"
+
+
+def test_type_limits_skip_and_history(refresh_session, monkeypatch):
+    """同类型刷新受并发上限限制，上一次刷新未结束时跳过触发，并记录运行结果"""
+    release = threading.Event()
+    started = []
+
+    def fake_import(db, data_source_id, full_resync):
+        started.append(data_source_id)
+        release.wait(timeout=10)
+        return {"tables_scanned": 5, "tables_imported": 1, "tables_updated": 2, "tables_deleted": 0}
+
+    monkeypatch.setattr(RefreshSchedulerService, "_import_metadata", staticmethod(fake_import))
+    policy = {"cron": "*/5 * * * *", "jitter_seconds": 0}
+    oracle_a = _add_source(refresh_session, "ora_a", DataSourceType.ORACLE, policy)
+    oracle_b = _add_source(refresh_session, "ora_b", DataSourceType.ORACLE, policy)
+    mongo = _add_source(refresh_session, "mongo", DataSourceType.MONGODB, policy)
+    _add_source(refresh_session, "manual", DataSourceType.MONGODB, None)
+
+    # 首轮只计算触发时间
+    assert RefreshSchedulerService.tick(datetime(2024, 1, 1, 0, 1)) == 240
+    RefreshSchedulerService.tick(datetime(2024, 1, 1, 0, 5))
+    assert set(RefreshSchedulerService._running) == {oracle_a, mongo}
+    assert [item[0] for item in RefreshSchedulerService._queue] == [oracle_b]
+
+    # 下一次触发时全部仍在执行或排队
+    RefreshSchedulerService.tick(datetime(2024, 1, 1, 0, 10))
+    assert sorted(RefreshSchedulerService._skipped) == sorted([oracle_a, oracle_b, mongo])
+
+    release.set()
+    for _ in range(3):
+        while RefreshSchedulerService._running:
+            RefreshSchedulerService._wakeup.wait(0.05)
+        RefreshSchedulerService.tick(datetime(2024, 1, 1, 0, 11))
+    assert sorted(started) == sorted([oracle_a, oracle_b, mongo])
+    skipped = refresh_session.query(RefreshRun).filter(RefreshRun.status == "skipped").count()
+    assert skipped == 3
+
+    runs = RefreshSchedulerService.list_runs(refresh_session, oracle_b, status="succeeded")
+    assert len(runs) == 1
+    assert runs[0]["scheduled_at"] == "2024-01-01T00:05:00"
+    assert (runs[0]["tables_scanned"], runs[0]["tables_changed"]) == (5, 3)
@@ -0,0 +1,169 @@
+from datetime import datetime
+
+from config.settings import settings
+from models import (
+    DataSource, DataSourceType, TableMetadata, ColumnMetadata, LineageRelation, ColumnLineageRelation
+)
+from core.metadata_extractor import MetadataExtractor
+from services.extraction_snapshot_service import ExtractionSnapshotService
+from services.metadata_import_service import MetadataImportService
+from services.schema_diff_service import SchemaDiffService
+from utils.schema_diff_utils import SchemaIndex, apply_extraction, diff_schema_indexes
+
+# 测试用例：提取结果之间的表结构变化检测
+
+
+def _table(name, columns, schema="ODS", primary_keys=()):
+    return {
+        "schema": schema, "name": name, "primary_keys": list(primary_keys),
+        "columns": [{"name": column, "type": column_type, "nullable": True, "description": "说明"}
+                    for column, column_type in columns]
+    }
+
+
+def _index(tables):
+    return apply_extraction(None, {"tables": tables})
+
+
+def test_diff_reports_added_removed_and_retyped_columns():
+    old = _index([
+        _table("ORDERS", [("ID", "NUMBER"), ("AMOUNT", "NUMBER"), ("NOTE", "VARCHAR2")], primary_keys=["ID"]),
+        _table("LEGACY", [("ID", "NUMBER")]),
+        _table("USERS", [("ID", "NUMBER")]),
+    ])
+    new = _index([
+        # 列顺序和描述的变化不算结构变化
+        _table("USERS", [("ID", "NUMBER")]),
+        _table("ORDERS", [("AMOUNT", "VARCHAR2"), ("ID", "NUMBER"), ("CREATED_AT", "DATE")], primary_keys=["ID"]),
+        _table("EVENTS", [("ID", "NUMBER"), ("PAYLOAD", "CLOB")]),
+    ])
+
+    result = diff_schema_indexes(old, new)
+
+    assert result["summary"] == {
+        "tables_added": 1, "tables_removed": 1, "tables_changed": 1,
+        "columns_added": 1, "columns_removed": 1, "columns_changed": 1
+    }
+    assert result["tables_added"] == [{"schema": "ODS", "name": "EVENTS", "columns": 2}]
+    assert result["tables_removed"] == [{"schema": "ODS", "name": "LEGACY"}]
+    orders = result["tables_changed"][0]
+    assert [column["name"] for column in orders["columns_added"]] == ["CREATED_AT"]
+    assert [column["name"] for column in orders["columns_removed"]] == ["NOTE"]
+    assert orders["columns_changed"] == [{
+        "name": "AMOUNT",
+        "before": {"type": "NUMBER", "nullable": True},
+        "after": {"type": "VARCHAR2", "nullable": True}
+    }]
+
+
+def test_incremental_and_failed_tables_keep_previous_structure():
+    base = _index([_table("A", [("ID", "NUMBER")]), _table("B", [("ID", "NUMBER")]), _table("C", [("ID", "NUMBER")])])
+    incremental = apply_extraction(base, {
+        "incremental": True,
+        "tables": [_table("A", [("ID", "VARCHAR2")])],
+        "table_names": [("ODS", "A"), ("ODS", "B")],
+    })
+    assert set(incremental.tables) == {("ODS", "A"), ("ODS", "B")}
+    assert incremental.tables[("ODS", "B")] == base.tables[("ODS", "B")]
+
+    failed = apply_extraction(base, {"tables": [], "failed_tables": [("ODS", "C")]})
+    assert set(failed.tables) == {("ODS", "C")}
+    assert isinstance(failed, SchemaIndex)
+
+
+def test_diff_against_catalog_annotates_downstream_impact(db_session, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "extraction_snapshot_dir", str(tmp_path))
+    source = DataSource(name="ora", type=DataSourceType.ORACLE, connection_config={})
+    db_session.add(source)
+    db_session.flush()
+
+    def add_table(name, columns, data_source_id=source.id):
+        table = TableMetadata(name=name, schema_name="ODS", data_source_id=data_source_id)
+        db_session.add(table)
+        db_session.flush()
+        created = []
+        for column_name, column_type in columns:
+            column = ColumnMetadata(name=column_name, table_id=table.id, data_type=column_type,
+                                    properties={"nullable": True})
+            db_session.add(column)
+            created.append(column)
+        db_session.flush()
+        return table, created
+
+    orders, (order_id, amount) = add_table("ORDERS", [("ID", "NUMBER"), ("AMOUNT", "NUMBER")])
+    _, (legacy_id,) = add_table("LEGACY", [("ID", "NUMBER")])
+    dw, (dw_amount, dw_total) = add_table("DW_ORDERS", [("AMOUNT", "NUMBER"), ("TOTAL", "NUMBER")])
+    mart, (mart_total,) = add_table("MART_SALES", [("TOTAL", "NUMBER")])
+    relation = LineageRelation(source_table_ids=[orders.id], target_table_id=dw.id)
+    db_session.add(relation)
+    db_session.flush()
+    # ORDERS.AMOUNT -> DW_ORDERS.AMOUNT -> DW_ORDERS.TOTAL -> MART_SALES.TOTAL，LEGACY.ID -> DW_ORDERS.TOTAL
+    for source_column, target_column in [(amount, dw_amount), (dw_amount, dw_total), (dw_total, mart_total),
+                                         (legacy_id, dw_total)]:
+        db_session.add(ColumnLineageRelation(lineage_relation_id=relation.id, source_column_id=source_column.id,
+                                             target_column_id=target_column.id))
+    db_session.commit()
+
+    tables = [
+        _table("ORDERS", [("ID", "NUMBER"), ("AMOUNT", "VARCHAR2")]),
+        _table("DW_ORDERS", [("AMOUNT", "NUMBER"), ("TOTAL", "NUMBER")]),
+        _table("MART_SALES", [("TOTAL", "NUMBER")]),
+    ]
+    metadata = {"incremental": False, "watermark": datetime(2024, 1, 1), "tables": iter(tables)}
+    list(ExtractionSnapshotService.record(source.id, "ORACLE", metadata)["tables"])
+
+    result = SchemaDiffService.diff(db_session, source.id, against="catalog")
+
+    assert result["summary"]["tables_changed"] == 1
+    changed = result["tables_changed"][0]["columns_changed"][0]
+    assert changed["name"] == "AMOUNT"
+    assert (changed["downstream_columns"], changed["downstream_tables"]) == (3, 2)
+    removed = result["tables_removed"][0]
+    assert removed["name"] == "LEGACY"
+    assert (removed["downstream_columns"], removed["downstream_tables"]) == (2, 2)
+
+
+def test_diff_previous_keeps_impact_of_tables_removed_by_import(db_session, tmp_path, monkeypatch):
+    """导入时删除的表已不在元数据目录中，仍按删除前的列级血缘报告下游影响"""
+    monkeypatch.setattr(settings, "extraction_snapshot_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "extraction_snapshot_enabled", True)
+    source = DataSource(name="ora", type=DataSourceType.ORACLE, connection_config={})
+    db_session.add(source)
+    db_session.flush()
+    source_id = source.id
+    db_session.commit()
+
+    extractions = [
+        [_table("LEGACY", [("ID", "NUMBER")]), _table("DW_ORDERS", [("TOTAL", "NUMBER")]),
+         _table("MART_SALES", [("TOTAL", "NUMBER")])],
+        [_table("DW_ORDERS", [("TOTAL", "NUMBER")]), _table("MART_SALES", [("TOTAL", "NUMBER")])],
+    ]
+
+    def fake_stream_metadata(source_type, connection_config, since=None):
+        return {"incremental": False, "watermark": datetime(2024, 1, 1), "tables": iter(extractions.pop(0))}
+
+    monkeypatch.setattr(MetadataExtractor, "stream_metadata", staticmethod(fake_stream_metadata))
+    MetadataImportService.import_metadata_from_source(db_session, source_id)
+
+    # LEGACY.ID -> DW_ORDERS.TOTAL -> MART_SALES.TOTAL
+    columns = {
+        table_name: column_id for column_id, table_name in db_session.query(ColumnMetadata.id, TableMetadata.name)
+        .join(TableMetadata, ColumnMetadata.table_id == TableMetadata.id)
+    }
+    relation = LineageRelation(source_table_ids=[], target_table_id=db_session.query(TableMetadata.id).filter(
+        TableMetadata.name == "DW_ORDERS").scalar())
+    db_session.add(relation)
+    db_session.flush()
+    for source_table, target_table in [("LEGACY", "DW_ORDERS"), ("DW_ORDERS", "MART_SALES")]:
+        db_session.add(ColumnLineageRelation(lineage_relation_id=relation.id, source_column_id=columns[source_table],
+                                             target_column_id=columns[target_table]))
+    db_session.commit()
+
+    result = MetadataImportService.import_metadata_from_source(db_session, source_id)
+    assert result["tables_deleted"] == 1
+    assert db_session.query(TableMetadata).filter(TableMetadata.name == "LEGACY").count() == 0
+
+    diff = SchemaDiffService.diff(db_session, source_id, against="previous")
+    assert diff["tables_removed"] == [
+        {"schema": "ODS", "name": "LEGACY", "downstream_columns": 2, "downstream_tables": 2}
+    ]
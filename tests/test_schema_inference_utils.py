@@ -0,0 +1,76 @@
+import sys
+from datetime import datetime
+
+from utils.schema_inference_utils import SchemaInferrer, infer_columns, merge_column_statistics
+
+# 测试用例：抽样文档的流式结构推断
+
+
+def test_inferrer_merges_documents_into_type_histograms():
+    documents = [
+        {"_id": 1, "amount": 10, "tags": ["a", "b", "c"], "items": [{"sku": "x", "qty": 1}, {"sku": "y"}],
+         "user": {"name": "u1", "created": datetime(2024, 1, 1)}},
+        {"_id": 2, "amount": 10.5, "tags": [], "items": [{"sku": 3}], "user": {"name": None}},
+        {"_id": 3, "amount": None, "tags": ["d"], "code": "A1"},
+        {"_id": 4, "amount": "n/a"},
+    ]
+
+    columns, dropped = infer_columns(documents)
+    columns = {column["name"]: column for column in columns}
+
+    assert dropped == 0
+    assert columns["amount"]["type_counts"] == {"double": 1, "int": 1, "null": 1, "string": 1}
+    assert columns["amount"]["type"] == "mixed"
+    assert columns["amount"]["null_ratio"] == 0.25
+    assert columns["tags"]["type"] == "array"
+    assert (columns["tags"]["array_min_length"], columns["tags"]["array_max_length"]) == (0, 3)
+    assert columns["tags"]["array_avg_length"] == 1.33
+    assert columns["tags[*]"]["type_counts"] == {"string": 4}
+    assert columns["tags[*]"]["frequency"] == 0.5
+    # 数组的所有元素都参与推断，不只是第一个
+    assert columns["items[*].sku"]["type"] == "mixed"
+    assert columns["items[*].qty"]["frequency"] == 0.25
+    assert columns["user.created"]["type"] == "date"
+    assert columns["user.name"]["null_ratio"] == 0.5
+    assert columns["code"]["frequency"] == 0.25
+    assert "user" in columns and columns["user"]["type"] == "object"
+
+
+def test_inferrer_caps_paths_and_handles_deep_documents():
+    inferrer = SchemaInferrer(max_paths=3)
+    inferrer.add({"a": 1, "b": 2, "c": 3, "d": 4})
+    inferrer.add({"a": 1, "e": 5})
+
+    assert [column["name"] for column in inferrer.columns()] == ["a", "b", "c"]
+    assert inferrer.dropped_paths == 2
+
+    depth = sys.getrecursionlimit() + 100
+    document = leaf = {}
+    for _ in range(depth):
+        leaf["f"] = {}
+        leaf = leaf["f"]
+    leaf["value"] = 1
+    columns, _ = infer_columns([document], max_paths=depth + 10)
+    assert columns[-1]["name"] == ".".join(["f"] * depth + ["value"])
+
+
+def test_transparent_arrays_merge_into_mapping_columns():
+    inferrer = SchemaInferrer(array_marker="")
+    inferrer.add({"tags": ["a", "b"], "user": [{"name": "u1"}, {"name": "u2"}]})
+    inferrer.add({"tags": "c"})
+    mapping_columns = [
+        {"name": "tags", "type": "keyword"},
+        {"name": "tags.raw", "type": "keyword", "multi_field": True},
+        {"name": "user.name", "type": "keyword"},
+        {"name": "missing", "type": "long"},
+    ]
+
+    columns = {column["name"]: column for column in merge_column_statistics(mapping_columns, inferrer.columns())}
+
+    assert columns["tags"]["type"] == "keyword"
+    assert columns["tags"]["type_counts"] == {"string": 3}
+    assert columns["tags"]["array_max_length"] == 2
+    assert columns["tags"]["frequency"] == 1.0
+    assert columns["tags.raw"] == mapping_columns[1]
+    assert columns["user.name"]["frequency"] == 0.5
+    assert columns["missing"]["frequency"] == 0
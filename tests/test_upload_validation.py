@@ -0,0 +1,94 @@
+import io
+import json
+
+import pandas as pd
+
+from models import DataSource
+from models.schemas import DataSourceCreate, TableMetadataCreate
+from services.data_source_service import DataSourceService
+from services.table_metadata_service import TableMetadataService
+from services.upload_validation_service import UploadValidationService
+
+# 测试用例：上传文件dry_run校验
+
+
+def _setup_catalog(db):
+    source = DataSourceService.create(db, DataSourceCreate(name="ods", type="oracle", connection_config={}))
+    for name in ["ORDERS", "ORDERS_DW"]:
+        TableMetadataService.create(db, TableMetadataCreate(
+            name=name,
+            data_source_id=source.id,
+            columns=[{"name": "ID", "data_type": "NUMBER"}, {"name": "AMOUNT", "data_type": "NUMBER"}]
+        ))
+
+
+def _issues(report, code):
+    return [(i["row"], i["field"]) for i in report["result"]["issues"] if i["code"] == code]
+
+
+def test_column_lineage_json_reports_every_problem(db_session):
+    """一次返回所有行的问题，且不写入任何数据"""
+    _setup_catalog(db_session)
+
+    def row(source_table="ORDERS", source_column="ID", target_column="ID", **extra):
+        data = {
+            "source_db_name": "ods", "source_table_name": source_table, "source_column_name": source_column,
+            "target_db_name": "ods", "target_table_name": "orders_dw", "target_column_name": target_column
+        }
+        data.update(extra)
+        return data
+
+    contents = json.dumps({"column_lineages": [
+        row(),
+        row(source_table="MISSING"),
+        row(source_column="NOPE"),
+        row(target_db_name="unknown"),
+        row(source_column=""),
+        row(),
+        "not-an-object"
+    ]}).encode()
+
+    report = UploadValidationService.validate(db_session, "column_lineage_json", contents)
+
+    assert report["status"] == "invalid"
+    assert _issues(report, "unknown_table") == [(2, "source_table_name")]
+    assert _issues(report, "unknown_column") == [(3, "source_column_name")]
+    assert _issues(report, "unknown_data_source") == [(4, "target_db_name")]
+    assert (5, "source_column_name") in _issues(report, "missing_field")
+    assert _issues(report, "duplicate_in_file") == [(6, None)]
+    assert _issues(report, "invalid_entry") == [(7, None)]
+    assert db_session.query(DataSource).count() == 1
+
+
+def test_excel_resolves_references_defined_in_the_same_file(db_session):
+    """Excel中的表和列可以引用同一文件中新定义的数据源和表，已存在的对象报告为警告"""
+    _setup_catalog(db_session)
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer) as writer:
+        pd.DataFrame([
+            {"name": "dw", "source_type": "ORACLE"},
+            {"name": "ods", "source_type": "oracle"},
+            {"name": "bad", "source_type": "mysql"}
+        ]).to_excel(writer, sheet_name="data_sources", index=False)
+        pd.DataFrame([
+            {"data_source_name": "dw", "name": "FACT"},
+            {"data_source_name": "ods", "name": "orders"},
+            {"data_source_name": "nowhere", "name": "X"}
+        ]).to_excel(writer, sheet_name="tables", index=False)
+        pd.DataFrame([
+            {"data_source_name": "dw", "table_name": "fact", "name": "ID", "data_type": "NUMBER"},
+            {"data_source_name": "dw", "table_name": "FACT", "name": "id", "data_type": "NUMBER"}
+        ]).to_excel(writer, sheet_name="columns", index=False)
+
+    report = UploadValidationService.validate(db_session, "excel", buffer.getvalue())
+    issues = {(i["sheet"], i["row"], i["code"]) for i in report["result"]["issues"]}
+
+    assert issues == {
+        ("data_sources", 3, "exists_in_catalog"),
+        ("data_sources", 4, "invalid_value"),
+        ("tables", 3, "exists_in_catalog"),
+        ("tables", 4, "unknown_data_source"),
+        ("columns", 3, "duplicate_in_file")
+    }
+    assert report["result"]["error_count"] == 3
+    assert report["result"]["warning_count"] == 2